@@ -0,0 +1,127 @@
+"""
+Synthetic workflow corpora & the repositories to serve them from `tests.fake_github`.
+
+Corpora are reproducible for a given seed. Action popularity is skewed, as it is in practice, and
+each action is pinned a few different ways (current major, stale minor, commit SHA) so a mix of
+up to date & outdated dependencies is reported.
+"""
+
+import random
+import typing as t
+from dataclasses import dataclass
+
+from tests.fake_github import FakeRepo
+
+# Steps that never need a release lookup
+NON_ACTION_USES = ("docker://alpine:3.20", "./.github/actions/local")
+
+
+def build_workflow(rng: random.Random, n_jobs: int, n_steps: int, actions: t.Sequence[str]) -> str:
+    """
+    Generate a workflow with `n_jobs` jobs of `n_steps` steps, mixing in typical boilerplate.
+
+    Steps that use an action draw their `uses` specification from `actions`.
+    """
+    lines = [
+        "name: synthetic",
+        "",
+        "on:",
+        "  push:",
+        "    branches: [main]",
+        "  pull_request:",
+        "",
+        "env:",
+        "  PYTHONUNBUFFERED: 1",
+        "",
+        "jobs:",
+    ]
+    for job_idx in range(n_jobs):
+        lines.extend(
+            (
+                f"  job-{job_idx}:",
+                "    runs-on: ${{ matrix.os }}",
+                "    strategy:",
+                "      matrix:",
+                '        python-version: ["3.11", "3.12", "3.13"]',
+                "        os: [ubuntu-latest, macos-latest, windows-latest]",
+                "    steps:",
+            )
+        )
+        for step_idx in range(n_steps):
+            if rng.random() < 0.3:
+                lines.extend(
+                    (
+                        f"    - name: Run step {step_idx}",
+                        "      run: |",
+                        "        python -m pip install --upgrade pip",
+                        "        pytest --cov --cov-report=xml",
+                    )
+                )
+            else:
+                lines.extend(
+                    (
+                        f"    - name: Use step {step_idx}",
+                        f"      uses: {rng.choice(actions)}",
+                        "      with:",
+                        "        python-version: ${{ matrix.python-version }}",
+                        "        cache: true",
+                    )
+                )
+
+    return "\n".join(lines)
+
+
+def build_corpus(n_workflows: int, actions: t.Sequence[str], seed: int = 42) -> list[str]:
+    """Generate a reproducible corpus of `n_workflows` workflows of varying size."""
+    rng = random.Random(seed)
+    return [
+        build_workflow(rng, n_jobs=rng.randint(1, 6), n_steps=rng.randint(2, 12), actions=actions)
+        for _ in range(n_workflows)
+    ]
+
+
+@dataclass(slots=True, frozen=True)
+class SyntheticOrg:
+    """A synthetic workflow corpus, along with the action repositories its dependencies refer to."""
+
+    workflows: dict[str, str]
+    action_repos: list[FakeRepo]
+
+    def workflow_repo(self, owner: str, name: str, root: str = ".github/workflows") -> FakeRepo:
+        """Build a repository serving the corpus' workflows from `root`."""
+        files = {f"{root}/{filename}": text for filename, text in self.workflows.items()}
+        return FakeRepo(owner=owner, name=name, files=files)
+
+
+def build_org(n_workflows: int, n_actions: int, seed: int = 42) -> SyntheticOrg:
+    """
+    Generate `n_workflows` workflows depending on a pool of `n_actions` synthetic actions.
+
+    Each action's repository has a handful of releases, each tagged with a random commit SHA.
+    """
+    rng = random.Random(seed)
+
+    action_repos = []
+    uses: list[str] = []
+    for idx in range(n_actions):
+        repo = FakeRepo(owner=f"owner-{idx % 50}", name=f"action-{idx}")
+        major = rng.randint(2, 6)
+        for minor in range(3):
+            repo.releases.append((f"v{major}.{minor}.0", f"{rng.getrandbits(160):040x}"))
+
+        action = f"{repo.owner}/{repo.name}"
+        uses.extend(
+            (
+                f"{action}@v{major}",
+                f"{action}@v{major - 1}.2",
+                f"{action}@{repo.releases[-1][1]}",
+            )
+        )
+        action_repos.append(repo)
+
+    weights = [1 / (rank + 1) for rank in range(len(uses))]
+    actions = [*rng.choices(uses, weights=weights, k=4 * len(uses)), *NON_ACTION_USES]
+
+    corpus = build_corpus(n_workflows, actions=actions, seed=seed)
+    workflows = {f"workflow-{idx:05}.yml": text for idx, text in enumerate(corpus)}
+    return SyntheticOrg(workflows=workflows, action_repos=action_repos)
@@ -0,0 +1,88 @@
+"""
+Benchmark workflow dependency extraction over a synthetic workflow corpus.
+
+Each engine extracts the job steps from the same corpus of generated workflows:
+    * `safe_load` - A full load using PyYAML's pure-Python loader (the original implementation)
+    * `load` - A full load, using libyaml if available
+    * `scan` - A scan of the YAML event stream, building only each step's `name` & `uses`
+"""
+
+import argparse
+import statistics
+import time
+import typing as t
+
+import yaml
+
+from benchmarks.corpus import build_corpus
+from check_workflow.extract import LOADER, load_steps, scan_steps
+
+ACTIONS = (
+    "actions/checkout@v4",
+    "actions/setup-python@v6",
+    "actions/cache@v4",
+    "astral-sh/setup-uv@v6",
+    "docker://alpine:3.20",
+    "./.github/actions/local",
+    "pypa/gh-action-pypi-publish@76f52bc884231f62b9a1b7c6c1b4b1f0b6f0bd9e",
+)
+
+
+def _safe_load_steps(raw_workflow: str) -> list:
+    loaded = yaml.safe_load(raw_workflow)
+
+    steps = []
+    for job, job_params in loaded["jobs"].items():
+        for step in job_params["steps"]:
+            uses = step.get("uses", None)
+            if uses is not None:
+                steps.append((job, step.get("name", None), uses))
+
+    return steps
+
+
+ENGINES: dict[str, t.Callable[[str], list]] = {
+    "safe_load": _safe_load_steps,
+    "load": load_steps,
+    "scan": scan_steps,
+}
+
+
+def _time_engine(engine: t.Callable[[str], list], corpus: list[str]) -> float:
+    start = time.perf_counter()
+    for raw_workflow in corpus:
+        engine(raw_workflow)
+
+    return time.perf_counter() - start
+
+
+def main() -> None:  # noqa: D103
+    parser = argparse.ArgumentParser("extract")
+    parser.add_argument(
+        "-w", "--n-workflows", type=int, default=1_000, help="Number of workflows in the corpus"
+    )
+    parser.add_argument("-n", "--n-trials", type=int, default=3, help="Number of trials per engine")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.n_workflows, actions=ACTIONS)
+    n_bytes = sum(len(raw_workflow) for raw_workflow in corpus)
+    print(f"Corpus: {len(corpus)} workflows, {n_bytes / 1e6:.1f} MB, loader: {LOADER.__name__}")
+
+    baseline = None
+    for name, engine in ENGINES.items():
+        timings = [_time_engine(engine, corpus) for _ in range(args.n_trials)]
+        median = statistics.median(timings)
+        if baseline is None:
+            baseline = median
+
+        print(
+            f"{name:<10} "
+            f"median: {median:.3f}s, "
+            f"min: {min(timings):.3f}s, "
+            f"max: {max(timings):.3f}s, "
+            f"speedup: {baseline / median:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Benchmark the per-dependency cost of parsing action specifications & checking them for updates.
+
+A large corpus of dependency occurrences is drawn from a much smaller pool of unique `uses`
+specifications, mirroring an organization-wide scan where the same few hundred actions are used
+over & over. Each dependency is parsed and compared against its action's latest release, both
+without memoization (the original implementation) and with it.
+"""
+
+import argparse
+import datetime as dt
+import random
+import statistics
+import string
+import time
+
+from packaging.specifiers import SpecifierSet
+from packaging.version import Version
+
+from check_workflow.gh_api import Release
+from check_workflow.workflow import (
+    JobDependency,
+    UsesSpec,
+    _spec_contains,
+    compatible_release,
+    is_outdated,
+)
+
+
+def _original_from_raw(raw_spec: str) -> UsesSpec:
+    action, raw_ver = raw_spec.split("@")
+    *_, raw_ver = raw_ver.split("/")
+    owner, repo = action.split("/")
+
+    if len(raw_ver) == 40 and all(c in string.hexdigits for c in raw_ver):
+        spec = None
+        sha = raw_ver
+    else:
+        sha = None
+        raw_ver = raw_ver.removeprefix("v")
+
+        if len(raw_ver.split(".")) == 1:
+            spec = SpecifierSet(f"~={raw_ver}.0")
+        else:
+            spec = SpecifierSet(f"~={raw_ver}")
+
+    return UsesSpec(owner=owner, repo=repo, spec=spec, sha=sha)
+
+
+def _original_is_outdated(dep: JobDependency, latest: Release) -> bool:
+    if dep.uses.sha is None:
+        return latest.ver not in dep.uses.spec  # type: ignore[operator]
+    else:
+        return latest.tag_hash != dep.uses.sha
+
+
+def build_corpus(
+    n_deps: int, n_actions: int, seed: int = 42
+) -> tuple[list[str], dict[tuple[str, str], Release]]:
+    """
+    Generate `n_deps` dependency occurrences drawn from `n_actions` unique actions.
+
+    Action popularity is heavily skewed, as it is in practice. The return is the list of raw `uses`
+    specifications along with the latest release of each action.
+    """
+    rng = random.Random(seed)
+
+    latest = {}
+    specs: list[str] = []
+    for idx in range(n_actions):
+        key = (f"owner-{idx % 50}", f"action-{idx}")
+        major = rng.randint(1, 6)
+        latest[key] = Release(
+            ver=Version(f"{major}.{rng.randint(0, 9)}.{rng.randint(0, 9)}"),
+            published=dt.datetime.now(),
+            url="",
+            tag_hash=f"{rng.getrandbits(160):040x}",
+        )
+
+        # Each action is pinned a few different ways across the corpus
+        specs.extend(
+            (
+                f"{key[0]}/{key[1]}@v{major}",
+                f"{key[0]}/{key[1]}@v{max(1, major - 1)}.2",
+                f"{key[0]}/{key[1]}@{latest[key].tag_hash}",
+            )
+        )
+
+    weights = [1 / (rank + 1) for rank in range(len(specs))]
+    return rng.choices(specs, weights=weights, k=n_deps), latest
+
+
+def _check_original(corpus: list[str], latest: dict[tuple[str, str], Release]) -> int:
+    n_outdated = 0
+    for raw_spec in corpus:
+        uses = _original_from_raw(raw_spec)
+        dep = JobDependency(job="job", step_name=None, uses=uses)
+        n_outdated += _original_is_outdated(dep, latest[(uses.owner, uses.repo)])
+
+    return n_outdated
+
+
+def _check_memoized(corpus: list[str], latest: dict[tuple[str, str], Release]) -> int:
+    n_outdated = 0
+    for raw_spec in corpus:
+        uses = UsesSpec.from_raw(raw_spec)
+        dep = JobDependency(job="job", step_name=None, uses=uses)
+        n_outdated += is_outdated(dep, latest[(uses.owner, uses.repo)])
+
+    return n_outdated
+
+
+def _clear_caches() -> None:
+    UsesSpec.from_raw.cache_clear()
+    compatible_release.cache_clear()
+    _spec_contains.cache_clear()
+
+
+def main() -> None:  # noqa: D103
+    parser = argparse.ArgumentParser("specs")
+    parser.add_argument(
+        "-d", "--n-deps", type=int, default=200_000, help="Number of dependency occurrences"
+    )
+    parser.add_argument("-a", "--n-actions", type=int, default=300, help="Number of unique actions")
+    parser.add_argument("-n", "--n-trials", type=int, default=3, help="Number of trials per mode")
+    args = parser.parse_args()
+
+    corpus, latest = build_corpus(args.n_deps, args.n_actions)
+    print(f"Corpus: {len(corpus)} dependencies, {len(set(corpus))} unique specifications")
+
+    baseline = None
+    for label, check in (("Original", _check_original), ("Memoized", _check_memoized)):
+        timings = []
+        for _ in range(args.n_trials):
+            _clear_caches()  # Include the cold start in every trial
+
+            start = time.perf_counter()
+            check(corpus, latest)
+            timings.append(time.perf_counter() - start)
+
+        per_dep = statistics.median(timings) / len(corpus) * 1e6
+        if baseline is None:
+            baseline = per_dep
+
+        print(
+            f"{label:<10} "
+            f"median: {statistics.median(timings):.3f}s, "
+            f"per dependency: {per_dep:.2f}us, "
+            f"speedup: {baseline / per_dep:.1f}x"
+        )
+
+    print(f"from_raw cache: {UsesSpec.from_raw.cache_info()}")
+    print(f"Containment cache: {_spec_contains.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Benchmark the time from client construction to the first completed query.
+
+Each trial builds a fresh client, connects, and issues a single release query, both with and
+without fetching GH's GraphQL schema for client-side validation.
+
+NOTE: This benchmark queries the live API, so a `PUBLIC_PAT` token must be available.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from check_workflow.gh_api import build_client, fetch_releases
+
+
+async def _time_first_query(validate_schema: bool) -> float:
+    start = time.perf_counter()
+    async with build_client(validate_schema=validate_schema) as session:
+        await fetch_releases(session=session, owner="actions", repo_name="checkout", n_latest=1)
+
+    return time.perf_counter() - start
+
+
+async def _run(n_trials: int) -> None:
+    for validate_schema in (True, False):
+        timings = [await _time_first_query(validate_schema) for _ in range(n_trials)]
+
+        label = "With schema fetch" if validate_schema else "Without schema fetch"
+        print(
+            f"{label:<22} "
+            f"median: {statistics.median(timings):.3f}s, "
+            f"min: {min(timings):.3f}s, "
+            f"max: {max(timings):.3f}s"
+        )
+
+
+def main() -> None:  # noqa: D103
+    parser = argparse.ArgumentParser("startup")
+    parser.add_argument("-n", "--n-trials", type=int, default=5, help="Number of trials per mode")
+    args = parser.parse_args()
+
+    asyncio.run(_run(n_trials=args.n_trials))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+Benchmark end-to-end runs & their individual phases against a local fake GraphQL API.
+
+A synthetic corpus of workflows is generated, along with repositories for each action it depends
+on, and served by the fake API from `tests.fake_github` with the configured latency & rate limit.
+The following phases are timed:
+    * `extract` - `extract_workflow_dependencies` over every workflow in the corpus
+    * `report_outdated` - `report_outdated` over the corpus, with a fresh client for each trial
+    * `format_outdated` - `format_outdated` of the resulting report, in terminal form
+    * `format_outdated_markdown` - As above, in markdown form
+    * `encode_json` - Streaming the resulting report as JSON, see `check_workflow.formats`
+    * `encode_sarif` - As above, as a SARIF log
+    * `local` - `CheckWorkflow local`, with the corpus written to a temporary workflow directory
+    * `remote` - `CheckWorkflow remote`, with the corpus served from a fake repository
+
+Results are written as JSON, along with the environment & parameters used, so runs can be compared
+across releases.
+
+NOTE: The fake API's rate limit budget is shared by every trial of every phase; if it's exhausted
+then queries wait until it's reset, per `--reset-seconds`.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import datetime as dt
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import typing as t
+from pathlib import Path
+
+from benchmarks.corpus import SyntheticOrg, build_org
+from check_workflow import __version__
+from check_workflow.cli import main as cli_main
+from check_workflow.extract import LOADER
+from check_workflow.formats import build_encoder
+from check_workflow.gh_api import GRAPHQL_URL_ENV, build_client
+from check_workflow.scheduler import RateLimitScheduler
+from check_workflow.workflow import (
+    OutdatedDep,
+    UsesSpec,
+    _spec_contains,
+    compatible_release,
+    extract_workflow_dependencies,
+    format_outdated,
+    report_outdated,
+)
+from tests.fake_github import FakeGitHub
+
+PHASES = (
+    "extract",
+    "report_outdated",
+    "format_outdated",
+    "format_outdated_markdown",
+    "encode_json",
+    "encode_sarif",
+    "local",
+    "remote",
+)
+
+WORKFLOW_OWNER = "bench"
+WORKFLOW_REPO = "workflows"
+
+
+def _clear_caches() -> None:
+    # Include the cold start in every trial
+    UsesSpec.from_raw.cache_clear()
+    compatible_release.cache_clear()
+    _spec_contains.cache_clear()
+
+
+def _extract(org: SyntheticOrg) -> None:
+    for raw_workflow in org.workflows.values():
+        extract_workflow_dependencies(raw_workflow)
+
+
+async def _report(org: SyntheticOrg, url: str) -> dict[str, list[OutdatedDep]]:
+    async with build_client(scheduler=RateLimitScheduler(), url=url) as session:
+        return await report_outdated(session, org.workflows)
+
+
+def _encode(outdated: dict[str, list[OutdatedDep]], fmt: str) -> None:
+    encoder = build_encoder(fmt, io.StringIO())
+    encoder.begin()
+    encoder.write_report(outdated)
+    encoder.end()
+
+
+def _run_cli(argv: list[str]) -> None:
+    # Rendering the report is part of the run, but printing it to the terminal shouldn't be
+    with contextlib.redirect_stdout(io.StringIO()):
+        cli_main(argv)
+
+
+class _Suite:
+    def __init__(self, org: SyntheticOrg, fake: FakeGitHub, workflow_dir: Path) -> None:
+        self.org = org
+        self.fake = fake
+        self.workflow_dir = workflow_dir
+        self._outdated: dict[str, list[OutdatedDep]] | None = None
+
+    @property
+    def outdated(self) -> dict[str, list[OutdatedDep]]:
+        """Report for the corpus, generated on first use for the formatting phases."""
+        if self._outdated is None:
+            self._outdated = asyncio.run(_report(self.org, self.fake.url))
+
+        return self._outdated
+
+    def phase(self, name: str) -> t.Callable[[], object]:
+        """Return a callable running a single trial of the named phase."""
+        match name:
+            case "extract":
+                return lambda: _extract(self.org)
+            case "report_outdated":
+                return lambda: asyncio.run(_report(self.org, self.fake.url))
+            case "format_outdated":
+                outdated = self.outdated
+                return lambda: format_outdated(outdated)
+            case "format_outdated_markdown":
+                outdated = self.outdated
+                return lambda: format_outdated(outdated, markdown=True)
+            case "encode_json":
+                outdated = self.outdated
+                return lambda: _encode(outdated, "json")
+            case "encode_sarif":
+                outdated = self.outdated
+                return lambda: _encode(outdated, "sarif")
+            case "local":
+                argv = ["local", "--root", str(self.workflow_dir), "--no-cache", "--no-daemon"]
+                return lambda: _run_cli(argv)
+            case "remote":
+                argv = ["remote", WORKFLOW_OWNER, WORKFLOW_REPO, "--no-cache", "--no-daemon"]
+                return lambda: _run_cli(argv)
+            case _:
+                raise ValueError(f"Unknown phase: {name}")
+
+    def time_phase(self, name: str, n_trials: int) -> dict[str, t.Any]:
+        """Time `n_trials` trials of the named phase, returning summary statistics in seconds."""
+        trial = self.phase(name)
+
+        timings = []
+        n_requests = []
+        for _ in range(n_trials):
+            _clear_caches()
+            start_requests = self.fake.n_requests
+
+            start = time.perf_counter()
+            trial()
+            timings.append(time.perf_counter() - start)
+            n_requests.append(self.fake.n_requests - start_requests)
+
+        return {
+            "median": statistics.median(timings),
+            "min": min(timings),
+            "max": max(timings),
+            "timings": timings,
+            "n_requests": statistics.median(n_requests),
+        }
+
+
+def _environment() -> dict[str, str]:
+    return {
+        "check_workflow": __version__,
+        "python": f"{platform.python_implementation()} {platform.python_version()}",
+        "platform": platform.platform(),
+        "yaml_loader": LOADER.__name__,
+    }
+
+
+def run_suite(
+    phases: t.Sequence[str],
+    n_workflows: int,
+    n_actions: int,
+    n_trials: int,
+    latency: float,
+    limit: int,
+    cost: int,
+    reset_seconds: float,
+    seed: int = 42,
+) -> dict[str, t.Any]:
+    """Run the selected benchmark phases, returning the results along with their parameters."""
+    org = build_org(n_workflows=n_workflows, n_actions=n_actions, seed=seed)
+    n_deps = sum(len(extract_workflow_dependencies(text)) for text in org.workflows.values())
+    repos = [*org.action_repos, org.workflow_repo(WORKFLOW_OWNER, WORKFLOW_REPO)]
+
+    results = {}
+    with (
+        tempfile.TemporaryDirectory() as tmp_dir,
+        FakeGitHub(
+            repos, limit=limit, cost=cost, reset_seconds=reset_seconds, latency=latency
+        ) as fake,
+    ):
+        workflow_dir = Path(tmp_dir) / ".github" / "workflows"
+        workflow_dir.mkdir(parents=True)
+        for filename, text in org.workflows.items():
+            (workflow_dir / filename).write_text(text)
+
+        # The CLI builds its own client, so point it at the fake API
+        os.environ.setdefault("PUBLIC_PAT", "benchmark")
+        os.environ[GRAPHQL_URL_ENV] = fake.url
+
+        suite = _Suite(org, fake, workflow_dir)
+        for name in phases:
+            results[name] = suite.time_phase(name, n_trials)
+            print(
+                f"{name:<26} "
+                f"median: {results[name]["median"]:.3f}s, "
+                f"min: {results[name]["min"]:.3f}s, "
+                f"max: {results[name]["max"]:.3f}s",
+                file=sys.stderr,
+            )
+
+        n_requests = fake.n_requests
+
+    return {
+        "timestamp": dt.datetime.now(dt.UTC).isoformat(),
+        "environment": _environment(),
+        "parameters": {
+            "n_workflows": n_workflows,
+            "n_actions": n_actions,
+            "n_trials": n_trials,
+            "latency": latency,
+            "limit": limit,
+            "cost": cost,
+            "reset_seconds": reset_seconds,
+            "seed": seed,
+        },
+        "corpus": {
+            "n_workflows": len(org.workflows),
+            "n_bytes": sum(len(text) for text in org.workflows.values()),
+            "n_dependencies": n_deps,
+        },
+        "server": {"n_requests": n_requests},
+        "phases": results,
+    }
+
+
+def main() -> None:  # noqa: D103
+    parser = argparse.ArgumentParser("suite")
+    parser.add_argument(
+        "-w", "--n-workflows", type=int, default=200, help="Number of workflows in the corpus"
+    )
+    parser.add_argument(
+        "-a", "--n-actions", type=int, default=100, help="Number of unique actions in the corpus"
+    )
+    parser.add_argument("-n", "--n-trials", type=int, default=3, help="Number of trials per phase")
+    parser.add_argument(
+        "-p",
+        "--phase",
+        choices=PHASES,
+        action="append",
+        default=argparse.SUPPRESS,
+        help="Phase to run, may be specified multiple times (default: all)",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="Fake API response latency, in seconds"
+    )
+    parser.add_argument(
+        "--limit", type=int, default=50_000, help="Fake API rate limit budget, in points"
+    )
+    parser.add_argument("--cost", type=int, default=1, help="Fake API cost per query, in points")
+    parser.add_argument(
+        "--reset-seconds", type=float, default=60, help="Fake API rate limit budget reset interval"
+    )
+    parser.add_argument("--seed", type=int, default=42, help="Corpus random seed")
+    parser.add_argument(
+        "-o", "--output", type=Path, help="Write results to this file rather than stdout"
+    )
+    args = parser.parse_args()
+
+    results = run_suite(
+        phases=getattr(args, "phase", PHASES),
+        n_workflows=args.n_workflows,
+        n_actions=args.n_actions,
+        n_trials=args.n_trials,
+        latency=args.latency,
+        limit=args.limit,
+        cost=args.cost,
+        reset_seconds=args.reset_seconds,
+        seed=args.seed,
+    )
+
+    if args.output is None:
+        print(json.dumps(results, indent=2))
+    else:
+        args.output.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
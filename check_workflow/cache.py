@@ -0,0 +1,264 @@
+import datetime as dt
+import json
+import os
+import sqlite3
+import time
+import typing as t
+from contextlib import contextmanager
+from pathlib import Path
+
+from packaging.version import Version
+
+from check_workflow.gh_api import Release, TAG_INDEX_T
+
+DEFAULT_CACHE_TTL = 6 * 60 * 60  # seconds
+DEFAULT_MAX_ENTRIES = 5_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS releases (
+    owner TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    ver TEXT NOT NULL,
+    published TEXT NOT NULL,
+    url TEXT NOT NULL,
+    tag_hash TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (owner, repo)
+);
+CREATE INDEX IF NOT EXISTS releases_fetched_at ON releases (fetched_at);
+CREATE TABLE IF NOT EXISTS no_releases (
+    owner TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (owner, repo)
+);
+CREATE INDEX IF NOT EXISTS no_releases_fetched_at ON no_releases (fetched_at);
+CREATE TABLE IF NOT EXISTS tag_indexes (
+    owner TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    tags TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (owner, repo)
+);
+CREATE INDEX IF NOT EXISTS tag_indexes_fetched_at ON tag_indexes (fetched_at);
+"""
+
+
+def default_cache_dir() -> Path:
+    """Return the cache directory, following the XDG base directory specification."""
+    xdg_cache = os.environ.get("XDG_CACHE_HOME", "")
+    base_dir = Path(xdg_cache) if xdg_cache else Path.home() / ".cache"
+
+    return base_dir / "check-workflow"
+
+
+class ReleaseStore(t.Protocol):
+    """Store of the latest release & tag index for `(owner, repo)` keys, see `ReleaseResolver`."""
+
+    def get_many(self, keys: t.Iterable[tuple[str, str]]) -> dict[tuple[str, str], Release | None]:
+        """
+        Return the fresh stored releases for the provided keys; misses are omitted.
+
+        Keys stored as having no releases are returned as `None`.
+        """
+        ...
+
+    def put_many(self, releases: t.Mapping[tuple[str, str], Release | None]) -> None:
+        """Store the provided releases; `None` records that the repository has no releases."""
+        ...
+
+    def get_tag_indexes(
+        self, keys: t.Iterable[tuple[str, str]]
+    ) -> dict[tuple[str, str], TAG_INDEX_T]:
+        """Return the fresh stored tag indexes for the provided keys; misses are omitted."""
+        ...
+
+    def put_tag_indexes(self, tag_indexes: t.Mapping[tuple[str, str], TAG_INDEX_T]) -> None:
+        """Store the provided tag indexes."""
+        ...
+
+
+class SQLiteStore:
+    """
+    Base for the persistent, SQLite-backed stores, creating the provided `schema` on connection.
+
+    The database is opened in WAL mode with a busy timeout so multiple processes (e.g. parallel CI
+    jobs) can safely share the same file.
+    """
+
+    def __init__(self, path: Path, schema: str) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(schema)
+
+    def __enter__(self) -> t.Self:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def close(self) -> None:  # noqa: D102
+        self._conn.close()
+
+    @contextmanager
+    def _transaction(self) -> t.Iterator[None]:
+        # Take the write lock up front so concurrent writers wait on the busy timeout rather than
+        # failing when upgrading from a read lock
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        else:
+            self._conn.execute("COMMIT")
+
+
+class ReleaseCache(SQLiteStore):
+    """
+    Persistent, SQLite-backed cache of the latest release & tag index for `(owner, repo)` keys.
+
+    Tag indexes, mapping tagged commit SHAs to their version, are stored as a single JSON document
+    per repository so each lookup is a single row read.
+
+    Repositories without any releases are cached as well, so they aren't re-queried on every run.
+
+    Cached entries are considered fresh for `ttl` seconds after they were fetched; stale entries
+    are ignored on lookup. Once the cache grows past `max_entries`, the least recently fetched
+    entries are evicted.
+
+    NOTE: Entries are never evicted by age, since processes sharing the cache file may use
+    different TTLs; an entry stale for one process may still be fresh for another.
+
+    The cache file may be safely shared between processes, see `SQLiteStore`.
+    """
+
+    def __init__(
+        self,
+        path: Path | None = None,
+        ttl: float = DEFAULT_CACHE_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        if path is None:
+            path = default_cache_dir() / "releases.sqlite3"
+
+        super().__init__(path, SCHEMA)
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    def get_many(self, keys: t.Iterable[tuple[str, str]]) -> dict[tuple[str, str], Release | None]:
+        """
+        Return the fresh cached releases for the provided keys; cache misses are omitted.
+
+        Keys cached as having no releases are returned as `None`.
+        """
+        oldest_fresh = time.time() - self.ttl
+
+        cached: dict[tuple[str, str], Release | None] = {}
+        for owner, repo in keys:
+            row = self._conn.execute(
+                (
+                    "SELECT ver, published, url, tag_hash FROM releases "
+                    "WHERE owner = ? AND repo = ? AND fetched_at >= ?"
+                ),
+                (owner, repo, oldest_fresh),
+            ).fetchone()
+
+            if row is not None:
+                ver, published, url, tag_hash = row
+                cached[(owner, repo)] = Release(
+                    ver=Version(ver),
+                    published=dt.datetime.fromisoformat(published),
+                    url=url,
+                    tag_hash=tag_hash,
+                )
+                continue
+
+            row = self._conn.execute(
+                "SELECT 1 FROM no_releases WHERE owner = ? AND repo = ? AND fetched_at >= ?",
+                (owner, repo, oldest_fresh),
+            ).fetchone()
+            if row is not None:
+                cached[(owner, repo)] = None
+
+        return cached
+
+    def put_many(self, releases: t.Mapping[tuple[str, str], Release | None]) -> None:
+        """
+        Store the provided releases, evicting entries if the cache has grown too large.
+
+        `None` records that the repository has no releases.
+        """
+        fetched_at = time.time()
+        rows = [
+            (owner, repo, str(r.ver), r.published.isoformat(), r.url, r.tag_hash, fetched_at)
+            for (owner, repo), r in releases.items()
+            if r is not None
+        ]
+        negative_rows = [
+            (owner, repo, fetched_at) for (owner, repo), r in releases.items() if r is None
+        ]
+
+        with self._transaction():
+            # A repository's latest state replaces whichever kind of entry was previously cached
+            self._conn.executemany(
+                "DELETE FROM no_releases WHERE owner = ? AND repo = ?",
+                [row[:2] for row in rows],
+            )
+            self._conn.executemany(
+                "DELETE FROM releases WHERE owner = ? AND repo = ?",
+                [row[:2] for row in negative_rows],
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO releases VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO no_releases VALUES (?, ?, ?)", negative_rows
+            )
+            self._evict()
+
+    def get_tag_indexes(
+        self, keys: t.Iterable[tuple[str, str]]
+    ) -> dict[tuple[str, str], TAG_INDEX_T]:
+        """Return the fresh cached tag indexes for the provided keys; cache misses are omitted."""
+        oldest_fresh = time.time() - self.ttl
+
+        cached = {}
+        for owner, repo in keys:
+            row = self._conn.execute(
+                "SELECT tags FROM tag_indexes WHERE owner = ? AND repo = ? AND fetched_at >= ?",
+                (owner, repo, oldest_fresh),
+            ).fetchone()
+
+            if row is not None:
+                cached[(owner, repo)] = {
+                    sha: Version(ver) for sha, ver in json.loads(row[0]).items()
+                }
+
+        return cached
+
+    def put_tag_indexes(self, tag_indexes: t.Mapping[tuple[str, str], TAG_INDEX_T]) -> None:
+        """Store the provided tag indexes, evicting entries if the cache has grown too large."""
+        fetched_at = time.time()
+        rows = [
+            (owner, repo, json.dumps({sha: str(ver) for sha, ver in tags.items()}), fetched_at)
+            for (owner, repo), tags in tag_indexes.items()
+        ]
+
+        with self._transaction():
+            self._conn.executemany("INSERT OR REPLACE INTO tag_indexes VALUES (?, ?, ?, ?)", rows)
+            self._evict()
+
+    def _evict(self) -> None:
+        for table in ("releases", "no_releases", "tag_indexes"):
+            self._conn.execute(
+                (
+                    f"DELETE FROM {table} WHERE rowid NOT IN "
+                    f"(SELECT rowid FROM {table} ORDER BY fetched_at DESC LIMIT ?)"
+                ),
+                (self.max_entries,),
+            )
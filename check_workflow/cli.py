@@ -1,46 +1,1012 @@
 import argparse
 import asyncio
+import contextlib
+import functools
+import os
+import posixpath
+import sys
+import typing as t
+from dataclasses import dataclass
 from pathlib import Path
 
-from check_workflow.gh_api import CLIENT, fetch_workflows
-from check_workflow.workflow import fetch_local, format_outdated, report_outdated
+from check_workflow import trace
+from check_workflow.cache import DEFAULT_CACHE_TTL, ReleaseCache
+from check_workflow.daemon import DAEMON_TOKEN_ENV, DEFAULT_REFRESH_INTERVAL, DEFAULT_REFRESH_TOP
+from check_workflow.fix import fix_local_outdated
+from check_workflow.formats import FORMATS, ReportEncoder, Source, TableEncoder, build_encoder
+from check_workflow.gh_api import (
+    Release,
+    TAG_INDEX_T,
+    WorkflowTarget,
+    build_client,
+    fetch_workflows_batch,
+)
+from check_workflow.graph import DependencyGraph, RepositoryRef
+from check_workflow.incremental import DependencyCache, report_incremental
+from check_workflow.local import (
+    LocalWorkflow,
+    discover_workflows,
+    iter_local_reports,
+    read_manifest,
+    report_local_outdated,
+)
+from check_workflow.org import iter_org_outdated
+from check_workflow.pool import (
+    DEFAULT_KEEPALIVE_EXPIRY,
+    DEFAULT_MAX_CONNECTIONS,
+    DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+    PoolLimits,
+    SessionManager,
+)
+from check_workflow.resolve import DEFAULT_BATCH_SIZE, DEFAULT_MAX_CONCURRENCY, ReleaseResolver
+from check_workflow.scheduler import RateLimitScheduler
+from check_workflow.shard import (
+    ResultStore,
+    ShardSpec,
+    ShardTask,
+    release_cache_path,
+    run_shards,
+    scan_key,
+    scan_shard,
+)
+from check_workflow.snapshot import (
+    OfflineResolver,
+    ReleaseSnapshot,
+    collect_local_actions,
+    collect_org_actions,
+    export_snapshot,
+)
+from check_workflow.workflow import OutdatedDep, iter_workflow_reports, report_outdated
+
+if t.TYPE_CHECKING:
+    from gql.client import AsyncClientSession
+
+    from check_workflow.daemon_client import DaemonClient
+
+# Options that only apply to a full run, so are never forwarded to a running daemon
+NOT_FORWARDED = (
+    "incremental",
+    "refresh",
+    "record",
+    "replay",
+    "profile",
+    "trace",
+    "stats",
+    "recursive",
+    "offline_index",
+    "fix",
+    "jobs",
+    "no_cache",
+)
+
+# The daemon uses its own query & caching settings, so runs changing these from their defaults
+# aren't forwarded either
+NOT_FORWARDED_DEFAULTS = {
+    "max_concurrency": DEFAULT_MAX_CONCURRENCY,
+    "batch_size": DEFAULT_BATCH_SIZE,
+    "cache_ttl": DEFAULT_CACHE_TTL,
+}
+
+
+@dataclass(slots=True, frozen=True)
+class _QueryOptions:
+    """Query, release lookup & caching options shared by the report subcommands."""
+
+    max_concurrency: int
+    batch_size: int
+    cache: ReleaseCache | None
+    refresh: bool
+    scheduler: RateLimitScheduler
+    sessions: SessionManager
+    recursive: bool = False
+    snapshot: ReleaseSnapshot | None = None
+
+    def build_resolver(self, session: "AsyncClientSession") -> ReleaseResolver:
+        return ReleaseResolver(
+            session=session,
+            max_concurrency=self.max_concurrency,
+            batch_size=self.batch_size,
+            cache=self.cache,
+            refresh=self.refresh,
+        )
+
+    def build_graph(self, session: "AsyncClientSession") -> DependencyGraph | None:
+        """Build the dependency graph used to check transitive dependencies, if enabled."""
+        if not self.recursive:
+            return None
+
+        return DependencyGraph(session=session, batch_size=self.batch_size)
+
+
+def _print_report(
+    encoder: ReportEncoder,
+    outdated: dict[str, list[OutdatedDep]],
+    header: str | None = None,
+    locate: t.Callable[[str], Source] = Source,
+) -> None:
+    with trace.span("format_outdated", "render", n_workflows=len(outdated)):
+        encoder.write_report(outdated, header=header, locate=locate)
+
+
+def _local_locate(root: Path) -> t.Callable[[str], Source]:
+    def locate(wf_name: str) -> Source:
+        return Source(path=(root / wf_name).as_posix())
+
+    return locate
+
+
+def _remote_locate(owner: str, repo: str, ref: str, root: str) -> t.Callable[[str], Source]:
+    def locate(wf_name: str) -> Source:
+        return Source(path=posixpath.join(root, wf_name), repository=f"{owner}/{repo}", ref=ref)
+
+    return locate
 
 
 async def _remote_report_pipeline(
-    org: str, repo: str, root: str, branch: str, markdown: bool
+    org: str,
+    repo: str,
+    root: str,
+    branches: list[str],
+    encoder: ReportEncoder,
+    stream: bool,
+    opts: _QueryOptions,
 ) -> None:
-    async with CLIENT as session:
-        workflows = await fetch_workflows(
+    # Only label the reports if we're comparing multiple branches
+    label_branches = len(branches) > 1
+
+    targets = [WorkflowTarget(owner=org, repo=repo, ref=branch, root=root) for branch in branches]
+    async with opts.sessions as session:
+        resolver = opts.build_resolver(session)
+        graph = opts.build_graph(session)
+
+        reports = {}
+        async for target, workflows in fetch_workflows_batch(session=session, targets=targets):
+            if not workflows:
+                print(f"No workflows found at the provided root: {target.ref}:{root}")
+                continue
+
+            expand = None
+            if graph is not None:
+                repository = RepositoryRef(owner=org, repo=repo, ref=target.ref)
+                expand = functools.partial(graph.expand_remote, repository, root)
+
+            if stream:
+                locate = _remote_locate(org, repo, target.ref, root)
+                async for wf_name, wf_outdated in iter_workflow_reports(
+                    session, workflows, resolver=resolver, expand=expand
+                ):
+                    label = f"{target.ref}:{wf_name}" if label_branches else wf_name
+                    _print_report(
+                        encoder, {label: wf_outdated}, locate={label: locate(wf_name)}.__getitem__
+                    )
+            else:
+                reports[target.ref] = asyncio.create_task(
+                    report_outdated(session, workflows, resolver=resolver, expand=expand)
+                )
+
+        for branch, report in reports.items():
+            outdated = await report
+            if outdated:
+                _print_report(
+                    encoder,
+                    outdated,
+                    header=(branch if label_branches else None),
+                    locate=_remote_locate(org, repo, branch, root),
+                )
+
+
+async def _resolve_releases(
+    keys: list[tuple[str, str]], opts: _QueryOptions
+) -> dict[tuple[str, str], Release | None]:
+    if opts.snapshot is not None:
+        return await OfflineResolver(opts.snapshot).resolve(keys)
+
+    async with opts.sessions as session:
+        return await opts.build_resolver(session).resolve(keys)
+
+
+async def _resolve_tag_indexes(
+    keys: list[tuple[str, str]], opts: _QueryOptions
+) -> dict[tuple[str, str], TAG_INDEX_T]:
+    if opts.snapshot is not None:
+        return await OfflineResolver(opts.snapshot).resolve_tag_indexes(keys)
+
+    async with opts.sessions as session:
+        return await opts.build_resolver(session).resolve_tag_indexes(keys)
+
+
+async def _local_report_pipeline(
+    roots: list[Path],
+    encoder: ReportEncoder,
+    stream: bool,
+    max_workers: int | None,
+    opts: _QueryOptions,
+    dep_cache: DependencyCache | None = None,
+) -> None:
+    workflows: list[LocalWorkflow] = []
+    for root in roots:
+        root_workflows = discover_workflows(root)
+        if not root_workflows:
+            print(f"No workflows found at the provided root: {root}")
+
+        workflows.extend(root_workflows)
+
+    if not workflows:
+        return
+
+    # Only label the reports if we're checking multiple roots
+    label_roots = len(roots) > 1
+
+    if dep_cache is not None:
+        # Reports come from cached data, so there's nothing to gain from streaming them
+        outdated = await report_incremental(
+            workflows,
+            dep_cache=dep_cache,
+            resolve=functools.partial(_resolve_releases, opts=opts),
+            release_cache=opts.cache,
+            refresh=opts.refresh,
+            max_workers=max_workers,
+            resolve_tags=functools.partial(_resolve_tag_indexes, opts=opts),
+        )
+        for root, root_outdated in outdated.items():
+            _print_report(
+                encoder,
+                root_outdated,
+                header=(root.as_posix() if label_roots else None),
+                locate=_local_locate(root),
+            )
+
+        return
+
+    if opts.snapshot is not None:
+        # Everything is resolved from the snapshot, so there's no need to connect
+        await _check_local(
+            workflows,
+            OfflineResolver(opts.snapshot),
+            None,
+            encoder,
+            stream,
+            max_workers,
+            label_roots,
+        )
+        return
+
+    async with opts.sessions as session:
+        await _check_local(
+            workflows,
+            opts.build_resolver(session),
+            opts.build_graph(session),
+            encoder,
+            stream,
+            max_workers,
+            label_roots,
+        )
+
+
+async def _check_local(
+    workflows: list[LocalWorkflow],
+    resolver: ReleaseResolver,
+    graph: DependencyGraph | None,
+    encoder: ReportEncoder,
+    stream: bool,
+    max_workers: int | None,
+    label_roots: bool,
+) -> None:
+    if stream:
+        async for workflow, wf_outdated in iter_local_reports(
+            workflows, resolver=resolver, max_workers=max_workers, graph=graph
+        ):
+            label = workflow.path.as_posix() if label_roots else workflow.name
+            source = Source(path=workflow.path.as_posix())
+            _print_report(encoder, {label: wf_outdated}, locate={label: source}.__getitem__)
+
+        return
+
+    outdated = await report_local_outdated(
+        workflows, resolver=resolver, max_workers=max_workers, graph=graph
+    )
+    for root, root_outdated in outdated.items():
+        _print_report(
+            encoder,
+            root_outdated,
+            header=(root.as_posix() if label_roots else None),
+            locate=_local_locate(root),
+        )
+
+
+async def _fix_pipeline(
+    roots: list[Path], dry_run: bool, max_workers: int | None, opts: _QueryOptions
+) -> None:
+    workflows: list[LocalWorkflow] = []
+    for root in roots:
+        root_workflows = discover_workflows(root)
+        if not root_workflows:
+            print(f"No workflows found at the provided root: {root}")
+
+        workflows.extend(root_workflows)
+
+    if not workflows:
+        return
+
+    if opts.snapshot is not None:
+        resolver = OfflineResolver(opts.snapshot)
+        fixes = await fix_local_outdated(
+            workflows, resolver=resolver, max_workers=max_workers, dry_run=dry_run
+        )
+    else:
+        async with opts.sessions as session:
+            fixes = await fix_local_outdated(
+                workflows,
+                resolver=opts.build_resolver(session),
+                max_workers=max_workers,
+                dry_run=dry_run,
+            )
+
+    for fix in fixes:
+        if dry_run:
+            print(fix.diff, end="")
+        else:
+            for edit in fix.edits:
+                print(f"{fix.path}: {edit.old} -> {edit.new}")
+
+    n_edits = sum(len(fix.edits) for fix in fixes)
+    action = "Would fix" if dry_run else "Fixed"
+    print(f"{action} {n_edits} outdated dependencies in {len(fixes)} workflow files")
+
+
+async def _org_report_pipeline(
+    org: str,
+    root: str,
+    ref: str,
+    include_archived: bool,
+    page_size: int,
+    encoder: ReportEncoder,
+    stream: bool,
+    opts: _QueryOptions,
+) -> None:
+    async with opts.sessions as session:
+        org_scan = iter_org_outdated(
             session=session,
-            owner=org,
-            repo_name=repo,
+            org=org,
+            resolver=opts.build_resolver(session),
             workflow_root=root,
-            branch=branch,
+            ref=ref,
+            include_archived=include_archived,
+            page_size=page_size,
+            graph=opts.build_graph(session),
         )
-        if not workflows:
-            print(f"No workflows found at the provided root: {root}")
+
+        if stream:
+            async for repo_name, repo_outdated in org_scan:
+                _print_report(
+                    encoder,
+                    repo_outdated,
+                    header=f"{org}/{repo_name}",
+                    locate=_remote_locate(org, repo_name, ref, root),
+                )
+
             return
 
-        outdated = await report_outdated(session, workflows)
+        # Match the ordering of the collected report
+        outdated = dict(sorted([result async for result in org_scan]))
 
-    if outdated:
-        print(format_outdated(outdated, markdown=markdown))
+    for repo_name, repo_outdated in outdated.items():
+        _print_report(
+            encoder,
+            repo_outdated,
+            header=f"{org}/{repo_name}",
+            locate=_remote_locate(org, repo_name, ref, root),
+        )
 
 
-async def _local_report_pipeline(root: Path, markdown: bool) -> None:
-    workflows = fetch_local(root)
-    if not workflows:
-        print(f"No workflows found at the provided root: {root}")
+async def _export_pipeline(
+    output: Path,
+    actions: list[str],
+    roots: list[Path],
+    orgs: list[str],
+    include_archived: bool,
+    opts: _QueryOptions,
+) -> None:
+    keys = []
+    for action in actions:
+        owner, repo, *_ = action.split("@")[0].split("/")
+        keys.append((owner, repo))
+
+    workflows: list[LocalWorkflow] = []
+    for root in roots:
+        root_workflows = discover_workflows(root)
+        if not root_workflows:
+            print(f"No workflows found at the provided root: {root}")
+
+        workflows.extend(root_workflows)
+
+    async with opts.sessions as session:
+        graph = opts.build_graph(session)
+        keys.extend(await collect_local_actions(workflows, graph=graph))
+        for org in orgs:
+            keys.extend(
+                await collect_org_actions(
+                    session, org, include_archived=include_archived, graph=graph
+                )
+            )
+
+        n_exported = await export_snapshot(output, keys, resolver=opts.build_resolver(session))
+
+    print(f"Exported releases of {n_exported} actions to {output}")
+
+
+async def _scan_shards_pipeline(
+    org: str,
+    root: str,
+    ref: str,
+    include_archived: bool,
+    page_size: int,
+    shards: list[ShardSpec],
+    store: ResultStore,
+    scan: str,
+    opts: _QueryOptions,
+) -> None:
+    async with opts.sessions as session:
+        # Shards share a resolver, so each release is only looked up once across them
+        resolver = opts.build_resolver(session)
+        graph = opts.build_graph(session)
+        for shard in shards:
+            n_checked = await scan_shard(
+                session=session,
+                org=org,
+                shard=shard,
+                store=store,
+                scan=scan,
+                resolver=resolver,
+                workflow_root=root,
+                ref=ref,
+                include_archived=include_archived,
+                page_size=page_size,
+                graph=graph,
+            )
+            print(f"Shard {shard}: Checked {n_checked} repositories")
+
+
+def _run_sharded_org(args: argparse.Namespace, encoder: ReportEncoder, opts: _QueryOptions) -> None:
+    """Run, resume, and/or merge the sharded `org` scan specified by the parsed CLI arguments."""
+    scan = scan_key(args.org, args.root, args.branch, args.include_archived, args.recursive)
+    shards: list[ShardSpec] = []
+    with ResultStore(args.results) as store:
+        if args.restart:
+            store.clear(scan)
+
+        if args.merge:
+            generation = store.latest_scan(scan)
+        else:
+            # Begins a new generation if the previous scan was merged, otherwise it's resumed
+            generation = store.begin_scan(scan, args.shards)
+            finished = store.finished_shards(generation, args.shards)
+            shards = [
+                ShardSpec(index=idx, count=args.shards)
+                for idx in getattr(args, "shard", range(args.shards))
+                if idx not in finished
+            ]
+
+            if shards and args.processes == 1:
+                _run_pipeline(
+                    _scan_shards_pipeline(
+                        org=args.org,
+                        root=args.root,
+                        ref=args.branch,
+                        include_archived=args.include_archived,
+                        page_size=args.page_size,
+                        shards=shards,
+                        store=store,
+                        scan=generation,
+                        opts=opts,
+                    ),
+                    sessions=opts.sessions,
+                )
+
+    if shards and args.processes > 1:
+        # Each worker opens its own stores, so none are held open here while they're started
+        tasks = [
+            ShardTask(
+                org=args.org,
+                shard=shard,
+                results=args.results,
+                scan=generation,
+                workflow_root=args.root,
+                ref=args.branch,
+                include_archived=args.include_archived,
+                page_size=args.page_size,
+                recursive=args.recursive,
+                max_concurrency=args.max_concurrency,
+                batch_size=args.batch_size,
+                cache_ttl=(None if args.no_cache else args.cache_ttl),
+                refresh=args.refresh,
+                validate_schema=args.validate_schema,
+                pool=_pool_limits(args),
+            )
+            for shard in shards
+        ]
+        run_shards(tasks, max_workers=args.processes)
+
+    # Only some of the shards were run here, the rest are merged once they've finished
+    if not args.merge and hasattr(args, "shard"):
         return
 
-    async with CLIENT as session:
-        outdated = await report_outdated(session, workflows)
+    with ResultStore(args.results) as store:
+        finished = store.finished_shards(generation, args.shards)
+        unfinished = sorted(set(range(args.shards)) - finished)
+        if unfinished:
+            print(
+                f"Shards {", ".join(str(idx) for idx in unfinished)} of {args.shards} haven't "
+                "finished, the report is incomplete"
+            )
+
+        for repo_name, repo_outdated in store.reports(generation).items():
+            _print_report(
+                encoder,
+                repo_outdated,
+                header=f"{args.org}/{repo_name}",
+                locate=_remote_locate(args.org, repo_name, args.branch, args.root),
+            )
+
+        # Complete results may now be discarded by the next run of the scan
+        if not unfinished:
+            store.mark_merged(scan)
+
+
+def _daemon_client(args: argparse.Namespace) -> "DaemonClient | None":
+    """Return a client for the running daemon, if there is one & the run can be forwarded to it."""
+    if args.no_daemon or any(getattr(args, opt, False) for opt in NOT_FORWARDED):
+        return None
+    if any(getattr(args, opt, val) != val for opt, val in NOT_FORWARDED_DEFAULTS.items()):
+        return None
+
+    from check_workflow.daemon_client import DaemonClient
+
+    client = DaemonClient(socket_path=getattr(args, "daemon_socket", None))
+    return client if client.is_running() else None
+
+
+def _forward_local(client: "DaemonClient", roots: list[Path], encoder: ReportEncoder) -> None:
+    discovered = {}
+    for root in roots:
+        root_workflows = discover_workflows(root)
+        if not root_workflows:
+            print(f"No workflows found at the provided root: {root}")
+        else:
+            discovered[root] = root_workflows
+
+    # Only label the reports if we're checking multiple roots
+    label_roots = len(roots) > 1
+
+    for root, root_workflows in discovered.items():
+        by_name = {workflow.name: workflow for workflow in root_workflows}
+        raw_workflows = {}
+        for wf_name, workflow in by_name.items():
+            try:
+                raw_workflows[wf_name] = workflow.path.read_text()
+            except OSError as e:
+                print(f"{workflow.path}: Could not read workflow ({e!r}), skipping...")
+
+        result = client.check_workflows(raw_workflows)
+        for wf_name, error in result.errors.items():
+            print(f"{by_name[wf_name].path}: Could not parse workflow ({error}), skipping...")
+
+        if result.reports:
+            _print_report(
+                encoder,
+                result.reports,
+                header=(root.as_posix() if label_roots else None),
+                locate=_local_locate(root),
+            )
+
+
+def _forward_remote(
+    client: "DaemonClient",
+    org: str,
+    repo: str,
+    root: str,
+    branches: list[str],
+    encoder: ReportEncoder,
+) -> None:
+    reports = {}
+    for branch in branches:
+        result = client.check_target(WorkflowTarget(owner=org, repo=repo, ref=branch, root=root))
+        if not result.found:
+            print(f"No workflows found at the provided root: {branch}:{root}")
+        else:
+            reports[branch] = result.reports
+
+    # Only label the reports if we're comparing multiple branches
+    label_branches = len(branches) > 1
+
+    for branch, outdated in reports.items():
+        if outdated:
+            _print_report(
+                encoder,
+                outdated,
+                header=(branch if label_branches else None),
+                locate=_remote_locate(org, repo, branch, root),
+            )
+
+
+def _serve(args: argparse.Namespace) -> None:
+    from check_workflow.daemon import Daemon, ReleaseIndex, default_socket_path
+
+    socket_path = None
+    if args.port is None:
+        socket_path = getattr(args, "socket", None) or default_socket_path()
+
+    async def serve() -> None:
+        scheduler = RateLimitScheduler(max_concurrency=args.max_concurrency)
+        async with build_client(
+            validate_schema=args.validate_schema, scheduler=scheduler, pool=_pool_limits(args)
+        ) as session:
+            daemon = Daemon(
+                session=session,
+                index=ReleaseIndex(ttl=args.cache_ttl),
+                max_concurrency=args.max_concurrency,
+                batch_size=args.batch_size,
+                refresh_interval=args.refresh_interval,
+                refresh_top=args.refresh_top,
+                token=(os.environ.get(DAEMON_TOKEN_ENV) or None),
+            )
+            await daemon.serve_forever(socket_path=socket_path, host=args.host, port=args.port)
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
 
-    if outdated:
-        print(format_outdated(outdated, markdown=markdown))
+
+def _add_format_args(subparser: argparse.ArgumentParser) -> None:
+    """Add the report output format options shared by the report subcommands."""
+    output = subparser.add_mutually_exclusive_group()
+    output.add_argument("-m", "--markdown", action="store_true", help="Format report as markdown")
+    output.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="table",
+        help="Report format; machine readable formats are written as each row is ready",
+    )
+
+
+def _add_daemon_args(subparser: argparse.ArgumentParser) -> None:
+    """Add the options controlling forwarding to a running daemon, see the `serve` subcommand."""
+    subparser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="Never forward the check to a running daemon",
+    )
+    subparser.add_argument(
+        "--daemon-socket",
+        type=Path,
+        default=argparse.SUPPRESS,
+        help="Socket of the daemon to forward to (default: $XDG_RUNTIME_DIR/check-workflow.sock)",
+    )
+
+
+def _add_pool_args(subparser: argparse.ArgumentParser) -> None:
+    """Add the HTTP connection pool options, see `pool.PoolLimits`."""
+    subparser.add_argument(
+        "--http2", action="store_true", help="Multiplex requests over HTTP/2 (requires h2)"
+    )
+    subparser.add_argument(
+        "--max-connections",
+        type=int,
+        default=DEFAULT_MAX_CONNECTIONS,
+        help="Maximum number of pooled HTTP connections",
+    )
+    subparser.add_argument(
+        "--max-keepalive-connections",
+        type=int,
+        default=DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+        help="Maximum number of idle HTTP connections kept alive for reuse",
+    )
+    subparser.add_argument(
+        "--keepalive-expiry",
+        type=float,
+        default=DEFAULT_KEEPALIVE_EXPIRY,
+        help="Time idle HTTP connections are kept alive for, in seconds",
+    )
+
+
+def _add_query_args(subparser: argparse.ArgumentParser) -> None:
+    """Add the query, release lookup & caching options shared by the report subcommands."""
+    subparser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=DEFAULT_MAX_CONCURRENCY,
+        help="Maximum number of concurrent release queries",
+    )
+    subparser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help="Maximum number of repositories per release query",
+    )
+    subparser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=DEFAULT_CACHE_TTL,
+        help="Lifetime of cached release data, in seconds",
+    )
+    subparser.add_argument(
+        "--no-cache", action="store_true", help="Disable the persistent release cache"
+    )
+    subparser.add_argument(
+        "--refresh", action="store_true", help="Ignore cached release data and re-query"
+    )
+    subparser.add_argument(
+        "--validate-schema",
+        action="store_true",
+        help="Fetch GH's GraphQL schema and validate queries against it before sending",
+    )
+    subparser.add_argument(
+        "--recursive",
+        action="store_true",
+        help="Also check the dependencies of reusable workflows & composite actions, recursively",
+    )
+    subparser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Print rate limit budget consumption & connection reuse when finished",
+    )
+    _add_pool_args(subparser)
+
+    recording = subparser.add_mutually_exclusive_group()
+    recording.add_argument(
+        "--record", type=Path, help="Record GraphQL requests & responses to this archive"
+    )
+    recording.add_argument(
+        "--replay",
+        type=Path,
+        help="Serve GraphQL responses from this recorded archive, without network access",
+    )
+    subparser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print a summary of the time spent in each phase & request when finished",
+    )
+    subparser.add_argument(
+        "--trace", type=Path, help="Write a Chrome trace-event JSON file of each phase & request"
+    )
+    subparser.add_argument(
+        "--replay-latency",
+        type=float,
+        default=0,
+        help="Simulated latency of each replayed response, in seconds",
+    )
+
+
+def _run_pipeline(pipeline: t.Coroutine[t.Any, t.Any, None], sessions: SessionManager) -> None:
+    """Run the provided report pipeline, closing its shared session once it's finished."""
+
+    async def run() -> None:
+        try:
+            await pipeline
+        finally:
+            await sessions.close()
+
+    asyncio.run(run())
+
+
+def _pool_limits(args: argparse.Namespace) -> PoolLimits:
+    return PoolLimits(
+        max_connections=args.max_connections,
+        max_keepalive_connections=args.max_keepalive_connections,
+        keepalive_expiry=args.keepalive_expiry,
+        http2=args.http2,
+    )
+
+
+def _run_reports(args: argparse.Namespace, encoder: ReportEncoder) -> None:
+    """Run the report subcommand specified by the parsed CLI arguments."""
+    if args.subcommand in ("local", "remote"):
+        client = _daemon_client(args)
+        if client is not None:
+            if args.subcommand == "local":
+                roots = getattr(args, "root", [])
+                if args.manifest is not None:
+                    roots.extend(read_manifest(args.manifest))
+
+                _forward_local(client, roots or [Path("./.github/workflows/")], encoder)
+            else:
+                _forward_remote(
+                    client,
+                    org=args.org,
+                    repo=args.repo,
+                    root=args.root,
+                    branches=getattr(args, "branch", ["main"]),
+                    encoder=encoder,
+                )
+
+            return
+
+    dep_cache = None
+    try:
+        with _query_run(args) as opts:
+            if args.subcommand == "local":
+                roots = getattr(args, "root", [])
+                if args.manifest is not None:
+                    roots.extend(read_manifest(args.manifest))
+
+                if args.fix:
+                    _run_pipeline(
+                        _fix_pipeline(
+                            roots=(roots or [Path("./.github/workflows/")]),
+                            dry_run=args.dry_run,
+                            max_workers=getattr(args, "jobs", None),
+                            opts=opts,
+                        ),
+                        sessions=opts.sessions,
+                    )
+                    return
+
+                if args.incremental:
+                    dep_cache = DependencyCache(path=getattr(args, "state_file", None))
+
+                _run_pipeline(
+                    _local_report_pipeline(
+                        roots=(roots or [Path("./.github/workflows/")]),
+                        encoder=encoder,
+                        stream=args.stream,
+                        max_workers=getattr(args, "jobs", None),
+                        opts=opts,
+                        dep_cache=dep_cache,
+                    ),
+                    sessions=opts.sessions,
+                )
+            elif args.subcommand == "org" and args.results is not None:
+                _run_sharded_org(args, encoder, opts)
+            elif args.subcommand == "org":
+                _run_pipeline(
+                    _org_report_pipeline(
+                        org=args.org,
+                        root=args.root,
+                        ref=args.branch,
+                        include_archived=args.include_archived,
+                        page_size=args.page_size,
+                        encoder=encoder,
+                        stream=args.stream,
+                        opts=opts,
+                    ),
+                    sessions=opts.sessions,
+                )
+            else:
+                _run_pipeline(
+                    _remote_report_pipeline(
+                        org=args.org,
+                        repo=args.repo,
+                        root=args.root,
+                        branches=getattr(args, "branch", ["main"]),
+                        encoder=encoder,
+                        stream=args.stream,
+                        opts=opts,
+                    ),
+                    sessions=opts.sessions,
+                )
+    finally:
+        if dep_cache is not None:
+            dep_cache.close()
+
+
+def _export_index(args: argparse.Namespace) -> None:
+    """Run the `export-index` subcommand specified by the parsed CLI arguments."""
+    actions = getattr(args, "action", [])
+    roots = getattr(args, "root", [])
+    orgs = getattr(args, "org", [])
+    if not (actions or roots or orgs):
+        roots = [Path("./.github/workflows/")]
+
+    with _query_run(args) as opts:
+        _run_pipeline(
+            _export_pipeline(
+                output=args.output,
+                actions=actions,
+                roots=roots,
+                orgs=orgs,
+                include_archived=args.include_archived,
+                opts=opts,
+            ),
+            sessions=opts.sessions,
+        )
+
+
+@contextlib.contextmanager
+def _query_run(args: argparse.Namespace) -> t.Iterator[_QueryOptions]:
+    """
+    Build the query options from the parsed CLI arguments, see `_add_query_args`.
+
+    The run is traced, profiled & summarized as requested, and the release cache & offline index
+    are closed once it's finished.
+    """
+    snapshot = None
+    if getattr(args, "offline_index", None) is not None:
+        snapshot = ReleaseSnapshot(args.offline_index)
+
+    # Offline runs never query, so there's nothing to cache, and shards run in worker processes
+    # open their own cache
+    cache = None
+    if not (args.no_cache or snapshot is not None or getattr(args, "processes", 1) > 1):
+        # Sharded scans keep their release cache alongside their results, so shards share it
+        results = getattr(args, "results", None)
+        cache = ReleaseCache(
+            path=(None if results is None else release_cache_path(results)), ttl=args.cache_ttl
+        )
+    scheduler = RateLimitScheduler(max_concurrency=args.max_concurrency)
+    opts = _QueryOptions(
+        max_concurrency=args.max_concurrency,
+        batch_size=args.batch_size,
+        cache=cache,
+        refresh=args.refresh,
+        scheduler=scheduler,
+        sessions=SessionManager(
+            pool=_pool_limits(args),
+            validate_schema=args.validate_schema,
+            scheduler=scheduler,
+            record=args.record,
+            replay=args.replay,
+            replay_latency=args.replay_latency,
+        ),
+        recursive=args.recursive,
+        snapshot=snapshot,
+    )
+
+    tracer = None
+    previous_tracer = trace.get_tracer()
+    if args.profile or args.trace is not None:
+        tracer = trace.Tracer()
+        trace.set_tracer(tracer)
+
+    try:
+        with trace.span(args.subcommand, "cli"):
+            yield opts
+    finally:
+        if cache is not None:
+            cache.close()
+
+        if snapshot is not None:
+            snapshot.close()
+
+        if args.stats:
+            print(opts.scheduler.stats.summary(), file=sys.stderr)
+            print(opts.sessions.stats.summary(), file=sys.stderr)
+
+        if tracer is not None:
+            trace.set_tracer(previous_tracer)
+            if args.trace is not None:
+                tracer.write_chrome_trace(args.trace)
+            if args.profile:
+                print(tracer.summary(), file=sys.stderr)
+
+
+def _check_shard_args(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    sharded = (
+        args.shards != 1
+        or hasattr(args, "shard")
+        or args.processes != 1
+        or args.merge
+        or args.restart
+    )
+    if args.results is None:
+        if sharded:
+            parser.error("--shards, --shard, --processes, --merge, & --restart require --results")
+
+        return
+
+    if args.stream:
+        # Results are merged from the store once the scan has finished
+        parser.error("--stream can't be combined with --results")
+    if args.shards < 1 or args.processes < 1:
+        parser.error("--shards & --processes must be at least 1")
+    if any(not 0 <= idx < args.shards for idx in getattr(args, "shard", [])):
+        parser.error(f"--shard must be in [0, {args.shards})")
+    if args.processes > 1 and (args.record is not None or args.replay is not None):
+        # Every process would need its own archive
+        parser.error("--record & --replay can't be combined with --processes")
 
 
-def main() -> None:  # noqa: D103
+def main(argv: t.Sequence[str] | None = None) -> None:  # noqa: D103
     parser = argparse.ArgumentParser("CheckWorkflow")
     subparsers = parser.add_subparsers(dest="subcommand")
 
@@ -49,11 +1015,66 @@ def main() -> None:  # noqa: D103
         "local", help="Query local project", formatter_class=argparse.ArgumentDefaultsHelpFormatter
     )
     local_sub.add_argument(
-        "-r", "--root", type=Path, default="./.github/workflows/", help="Workflow root"
+        "-r",
+        "--root",
+        type=Path,
+        action="append",
+        default=argparse.SUPPRESS,  # Appending to a non-empty default list would keep the default
+        help=(
+            "Workflow root, searched recursively for .github/workflows directories; may be "
+            "specified multiple times (default: ./.github/workflows/)"
+        ),
     )
     local_sub.add_argument(
-        "-m", "--markdown", action="store_true", help="Format report as markdown"
+        "--manifest", type=Path, help="File listing additional workflow roots, one per line"
     )
+    local_sub.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=argparse.SUPPRESS,
+        help="Maximum number of workflow parsing processes (default: number of CPUs)",
+    )
+    local_sub.add_argument(
+        "--incremental",
+        action="store_true",
+        help=(
+            "Only re-parse workflows that changed since the last incremental run, and skip the "
+            "network entirely if every release is cached"
+        ),
+    )
+    local_sub.add_argument(
+        "--state-file",
+        type=Path,
+        default=argparse.SUPPRESS,
+        help=(
+            "Incremental state file "
+            "(default: $XDG_CACHE_HOME/check-workflow/dependencies.sqlite3)"
+        ),
+    )
+    local_sub.add_argument(
+        "--fix",
+        action="store_true",
+        help="Rewrite outdated dependencies in place, to their latest release",
+    )
+    local_sub.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="With --fix, print a diff of the rewrites rather than making them",
+    )
+    local_sub.add_argument(
+        "--offline-index",
+        type=Path,
+        help="Resolve releases from this exported index alone, without network access",
+    )
+    _add_format_args(local_sub)
+    local_sub.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print each report as soon as it's ready, rather than all at once",
+    )
+    _add_query_args(local_sub)
+    _add_daemon_args(local_sub)
 
     # Query remote repo
     remote_sub = subparsers.add_parser(
@@ -63,27 +1084,242 @@ def main() -> None:  # noqa: D103
     )
     remote_sub.add_argument("org", type=str, help="Query repository parent")
     remote_sub.add_argument("repo", type=str, help="Query repository")
-    remote_sub.add_argument("-b", "--branch", type=str, default="main", help="Query branch")
+    remote_sub.add_argument(
+        "-b",
+        "--branch",
+        type=str,
+        action="append",
+        default=argparse.SUPPRESS,  # Appending to a non-empty default list would keep the default
+        help="Query branch, may be specified multiple times (default: main)",
+    )
     remote_sub.add_argument(
         "-r", "--root", type=str, default=".github/workflows/", help="Workflow root"
     )
+    _add_format_args(remote_sub)
     remote_sub.add_argument(
-        "-m", "--markdown", action="store_true", help="Format report as markdown"
+        "--stream",
+        action="store_true",
+        help="Print each report as soon as it's ready, rather than all at once",
     )
+    _add_query_args(remote_sub)
+    _add_daemon_args(remote_sub)
 
-    args = parser.parse_args()
-    if args.subcommand == "local":
-        asyncio.run(_local_report_pipeline(root=args.root, markdown=args.markdown))
-    else:
-        asyncio.run(
-            _remote_report_pipeline(
-                org=args.org,
-                repo=args.repo,
-                root=args.root,
-                branch=args.branch,
-                markdown=args.markdown,
-            )
-        )
+    # Query all repos in an org
+    org_sub = subparsers.add_parser(
+        "org",
+        help="Query all repositories in an organization",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    org_sub.add_argument("org", type=str, help="Query organization")
+    org_sub.add_argument(
+        "-b",
+        "--branch",
+        type=str,
+        default="HEAD",
+        help="Query branch; HEAD resolves to each default branch",
+    )
+    org_sub.add_argument(
+        "-r", "--root", type=str, default=".github/workflows/", help="Workflow root"
+    )
+    org_sub.add_argument(
+        "--include-archived", action="store_true", help="Include archived repositories"
+    )
+    org_sub.add_argument(
+        "--page-size", type=int, default=25, help="Number of repositories fetched per query"
+    )
+    _add_format_args(org_sub)
+    org_sub.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print each report as soon as it's ready, rather than all at once",
+    )
+    org_sub.add_argument(
+        "--results",
+        type=Path,
+        help=(
+            "Shared result store of a sharded scan, resumed if interrupted; also holds the "
+            "release cache shared between shards"
+        ),
+    )
+    org_sub.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help="Number of shards the organization's repositories are partitioned into",
+    )
+    org_sub.add_argument(
+        "--shard",
+        type=int,
+        action="append",
+        default=argparse.SUPPRESS,
+        help=(
+            "Only scan this shard, without merging the report; may be specified multiple times "
+            "(default: every unfinished shard)"
+        ),
+    )
+    org_sub.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="Number of worker processes unfinished shards are scanned in",
+    )
+    org_sub.add_argument(
+        "--merge",
+        action="store_true",
+        help="Only merge & report the stored results, without scanning",
+    )
+    org_sub.add_argument(
+        "--restart",
+        action="store_true",
+        help="Discard the stored results of a previous scan and start over",
+    )
+    _add_query_args(org_sub)
+
+    # Offline release index
+    export_sub = subparsers.add_parser(
+        "export-index",
+        help="Export a snapshot of the latest releases of the actions used, see --offline-index",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    export_sub.add_argument("output", type=Path, help="Snapshot destination")
+    export_sub.add_argument(
+        "-a",
+        "--action",
+        type=str,
+        action="append",
+        default=argparse.SUPPRESS,
+        help="Action to export, as <owner>/<repo>; may be specified multiple times",
+    )
+    export_sub.add_argument(
+        "-r",
+        "--root",
+        type=Path,
+        action="append",
+        default=argparse.SUPPRESS,
+        help=(
+            "Export the actions used by workflows in this root, searched recursively for "
+            ".github/workflows directories; may be specified multiple times "
+            "(default: ./.github/workflows/ if no actions, roots, or organizations are provided)"
+        ),
+    )
+    export_sub.add_argument(
+        "--org",
+        type=str,
+        action="append",
+        default=argparse.SUPPRESS,
+        help="Export the actions used across this organization; may be specified multiple times",
+    )
+    export_sub.add_argument(
+        "--include-archived", action="store_true", help="Include archived repositories"
+    )
+    _add_query_args(export_sub)
+
+    # Long-running daemon
+    serve_sub = subparsers.add_parser(
+        "serve",
+        help="Run a daemon answering check requests, with a warm client & release index",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    address = serve_sub.add_mutually_exclusive_group()
+    address.add_argument(
+        "--socket",
+        type=Path,
+        default=argparse.SUPPRESS,
+        help="Unix socket to listen on (default: $XDG_RUNTIME_DIR/check-workflow.sock)",
+    )
+    address.add_argument(
+        "--port",
+        type=int,
+        help=(
+            "Listen on this TCP port rather than a Unix socket; requests must present the token "
+            "set in $CHECK_WORKFLOW_DAEMON_TOKEN"
+        ),
+    )
+    serve_sub.add_argument(
+        "--host", type=str, default="127.0.0.1", help="Interface to listen on, with --port"
+    )
+    serve_sub.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=DEFAULT_MAX_CONCURRENCY,
+        help="Maximum number of concurrent release queries",
+    )
+    serve_sub.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help="Maximum number of repositories per release query",
+    )
+    serve_sub.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=DEFAULT_CACHE_TTL,
+        help="Lifetime of indexed release data, in seconds",
+    )
+    serve_sub.add_argument(
+        "--refresh-interval",
+        type=float,
+        default=DEFAULT_REFRESH_INTERVAL,
+        help="Interval between background refreshes of popular releases, in seconds",
+    )
+    serve_sub.add_argument(
+        "--refresh-top",
+        type=int,
+        default=DEFAULT_REFRESH_TOP,
+        help="Maximum number of popular releases refreshed in the background at once",
+    )
+    serve_sub.add_argument(
+        "--validate-schema",
+        action="store_true",
+        help="Fetch GH's GraphQL schema and validate queries against it before sending",
+    )
+    _add_pool_args(serve_sub)
+
+    args = parser.parse_args(argv)
+    if args.subcommand == "serve":
+        if args.port is not None and not os.environ.get(DAEMON_TOKEN_ENV):
+            parser.error(f"--port requires a shared token, set using ${DAEMON_TOKEN_ENV}")
+
+        _serve(args)
+        return
+
+    if getattr(args, "incremental", False) and args.recursive:
+        # Transitive dependencies come from remote definitions, which the content hashes don't cover
+        parser.error("--recursive can't be combined with --incremental")
+    if getattr(args, "offline_index", None) is not None and args.recursive:
+        # Remote definitions can't be fetched offline
+        parser.error("--recursive can't be combined with --offline-index")
+
+    if args.subcommand == "org":
+        _check_shard_args(parser, args)
+
+    if getattr(args, "fix", False):
+        # Only the workflow files themselves can be rewritten, and fixes aren't reports
+        for opt in ("incremental", "recursive", "markdown"):
+            if getattr(args, opt):
+                parser.error(f"--{opt} can't be combined with --fix")
+        if args.format != "table":
+            parser.error("--format can't be combined with --fix")
+    elif getattr(args, "dry_run", False):
+        parser.error("--dry-run requires --fix")
+
+    if args.subcommand == "export-index":
+        _export_index(args)
+        return
+
+    encoder = build_encoder("markdown" if args.markdown else args.format, sys.stdout)
+
+    diagnostics: contextlib.AbstractContextManager = contextlib.nullcontext()
+    if not isinstance(encoder, TableEncoder):
+        # Keep machine readable reports parseable by moving progress & skip messages to stderr
+        diagnostics = contextlib.redirect_stdout(sys.stderr)
+
+    with diagnostics:
+        encoder.begin()
+        try:
+            _run_reports(args, encoder)
+        finally:
+            encoder.end()
 
 
 if __name__ == "__main__":
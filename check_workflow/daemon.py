@@ -0,0 +1,456 @@
+import asyncio
+import contextlib
+import hmac
+import json
+import os
+import sys
+import time
+import typing as t
+from collections import Counter
+from http import HTTPStatus
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from check_workflow import WORKFLOW_T, __version__, trace
+from check_workflow.cache import DEFAULT_CACHE_TTL, default_cache_dir
+from check_workflow.gh_api import Release, TAG_INDEX_T, WorkflowTarget, fetch_workflows_batch
+from check_workflow.resolve import DEFAULT_BATCH_SIZE, DEFAULT_MAX_CONCURRENCY, ReleaseResolver
+from check_workflow.workflow import (
+    JobDependency,
+    OutdatedDep,
+    extract_workflow_dependencies,
+    iter_dependency_reports,
+    outdated_to_dict,
+)
+
+if t.TYPE_CHECKING:
+    from gql.client import AsyncClientSession
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_REFRESH_INTERVAL = 5 * 60  # seconds
+DEFAULT_REFRESH_TOP = 200
+
+MAX_BODY_BYTES = 32 * 1024 * 1024
+
+# Shared secret required by the daemon when serving over TCP, see `Daemon`
+DAEMON_TOKEN_ENV = "CHECK_WORKFLOW_DAEMON_TOKEN"
+
+type RELEASE_KEY_T = tuple[str, str]
+
+
+def default_socket_path() -> Path:
+    """
+    Return the daemon's default Unix socket path.
+
+    The socket is placed in `$XDG_RUNTIME_DIR` if it's set, otherwise in the cache directory.
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR", "")
+    if runtime_dir:
+        return Path(runtime_dir) / "check-workflow.sock"
+
+    return default_cache_dir() / "daemon.sock"
+
+
+def _claim_socket(socket_path: Path) -> None:
+    from check_workflow.daemon_client import DaemonClient
+
+    if DaemonClient(socket_path).is_running():
+        raise RuntimeError(f"A daemon is already listening on {socket_path}")
+
+    # Left behind by a daemon that didn't shut down cleanly
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    socket_path.unlink(missing_ok=True)
+
+
+class ReleaseIndex:
+    """
+    In-memory index of the latest release for `(owner, repo)` keys, for a long-running daemon.
+
+    Indexed releases are considered fresh for `ttl` seconds after they were fetched. Lookups of each
+    key are counted, so the most popular keys can be refreshed before they expire, see
+    `due_for_refresh`. Tag indexes are kept alongside releases, but are simply left to expire.
+
+    The index may be used as the cache of a `ReleaseResolver`, see `ReleaseStore`.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_CACHE_TTL) -> None:
+        self.ttl = ttl
+        self.hits: Counter[RELEASE_KEY_T] = Counter()
+        self._entries: dict[RELEASE_KEY_T, tuple[Release | None, float]] = {}
+        self._tag_entries: dict[RELEASE_KEY_T, tuple[TAG_INDEX_T, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_many(self, keys: t.Iterable[RELEASE_KEY_T]) -> dict[RELEASE_KEY_T, Release | None]:
+        """
+        Return the fresh indexed releases for the provided keys; misses are omitted.
+
+        Keys indexed as having no releases are returned as `None`.
+        """
+        oldest_fresh = time.monotonic() - self.ttl
+
+        indexed: dict[RELEASE_KEY_T, Release | None] = {}
+        for key in keys:
+            self.hits[key] += 1
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] >= oldest_fresh:
+                indexed[key] = entry[0]
+
+        return indexed
+
+    def put_many(self, releases: t.Mapping[RELEASE_KEY_T, Release | None]) -> None:
+        """Index the provided releases; `None` records that the repository has no releases."""
+        fetched_at = time.monotonic()
+        for key, release in releases.items():
+            self._entries[key] = (release, fetched_at)
+
+    def get_tag_indexes(self, keys: t.Iterable[RELEASE_KEY_T]) -> dict[RELEASE_KEY_T, TAG_INDEX_T]:
+        """Return the fresh indexed tag indexes for the provided keys; misses are omitted."""
+        oldest_fresh = time.monotonic() - self.ttl
+
+        indexed = {}
+        for key in keys:
+            entry = self._tag_entries.get(key)
+            if entry is not None and entry[1] >= oldest_fresh:
+                indexed[key] = entry[0]
+
+        return indexed
+
+    def put_tag_indexes(self, tag_indexes: t.Mapping[RELEASE_KEY_T, TAG_INDEX_T]) -> None:
+        """Index the provided tag indexes."""
+        fetched_at = time.monotonic()
+        for key, tag_index in tag_indexes.items():
+            self._tag_entries[key] = (tag_index, fetched_at)
+
+    def due_for_refresh(self, horizon: float, limit: int) -> list[RELEASE_KEY_T]:
+        """
+        Return up to `limit` of the most popular indexed keys that expire within `horizon` seconds.
+
+        Popularity is the number of lookups since the key was last refreshed, see `mark_refreshed`;
+        keys that haven't been looked up since are left to expire.
+        """
+        expiring = time.monotonic() - self.ttl + horizon
+
+        due: list[RELEASE_KEY_T] = []
+        for key, _ in self.hits.most_common():
+            if len(due) == limit:
+                break
+
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] < expiring:
+                due.append(key)
+
+        return due
+
+    def mark_refreshed(self, keys: t.Iterable[RELEASE_KEY_T]) -> None:
+        """Reset the popularity of the provided keys, and drop expired entries nobody looked up."""
+        for key in keys:
+            self.hits.pop(key, None)
+
+        oldest_fresh = time.monotonic() - self.ttl
+        for key, (_, fetched_at) in list(self._entries.items()):
+            if fetched_at < oldest_fresh and key not in self.hits:
+                del self._entries[key]
+
+        for key, (_, fetched_at) in list(self._tag_entries.items()):
+            if fetched_at < oldest_fresh:
+                del self._tag_entries[key]
+
+
+class CheckResult(t.NamedTuple):  # noqa: D101
+    found: bool
+    reports: dict[str, list[OutdatedDep]]
+    errors: dict[str, str]
+
+
+class Daemon:
+    """
+    Answer workflow check requests using a warm GraphQL session & an in-memory release index.
+
+    Every check shares the provided `session` and `index`, so connection setup, schema fetches, and
+    the lookups of popular actions are amortized across requests rather than paid for on each run.
+    Releases are looked up using a `ReleaseResolver` per check, with up to `max_concurrency` queries
+    of up to `batch_size` repositories each in flight at once.
+
+    While serving, the `refresh_top` most popular releases due to expire before the next refresh
+    are refreshed in the background every `refresh_interval` seconds.
+
+    Checks are served over HTTP on a Unix socket or TCP port, see `start_server`:
+        * `GET /health` - Daemon version, uptime, & index statistics
+        * `POST /check` - Check the provided workflows, from either a JSON object of
+        `{"workflows": {<filename>: <file contents>}}`, or a repository tree as
+        `{"target": {"owner": ..., "repo": ..., "ref": ..., "root": ...}}` where the `ref` & `root`
+        are optional
+
+    Checks are made using the daemon owner's GH token, so if a `token` is provided, every request
+    must present it as a bearer token (`Authorization: Bearer <token>`) or is rejected as
+    unauthorized. A token is required to serve over TCP, since the port is reachable by other users
+    (or hosts), unlike the Unix socket.
+    """
+
+    def __init__(
+        self,
+        session: "AsyncClientSession",
+        index: ReleaseIndex | None = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+        refresh_top: int = DEFAULT_REFRESH_TOP,
+        token: str | None = None,
+    ) -> None:
+        if refresh_interval <= 0:
+            raise ValueError(f"Refresh interval must be positive, received: {refresh_interval}")
+
+        self.session = session
+        self.index = ReleaseIndex() if index is None else index
+        self.max_concurrency = max_concurrency
+        self.batch_size = batch_size
+        self.refresh_interval = refresh_interval
+        self.refresh_top = refresh_top
+        self.token = token
+
+        self.n_checks = 0
+        self._started_at = time.monotonic()
+
+    def _build_resolver(self, use_index: bool = True) -> ReleaseResolver:
+        return ReleaseResolver(
+            session=self.session,
+            max_concurrency=self.max_concurrency,
+            batch_size=self.batch_size,
+            cache=(self.index if use_index else None),
+        )
+
+    async def check_workflows(self, workflows: WORKFLOW_T) -> CheckResult:
+        """
+        Check the provided workflow files for outdated dependencies.
+
+        Reports are ordered to match the provided workflows; files without outdated dependencies
+        are omitted.
+
+        NOTE: Workflows that can't be parsed are skipped, and their errors included in the result.
+        """
+        self.n_checks += 1
+
+        parsed: list[tuple[str, list[JobDependency]]] = []
+        errors = {}
+        for wf_name, wf in workflows.items():
+            try:
+                parsed.append((wf_name, extract_workflow_dependencies(wf)))
+            except Exception as e:
+                # One malformed workflow shouldn't sink the rest of the check
+                errors[wf_name] = repr(e)
+
+        reports = {
+            wf_name: wf_outdated
+            async for wf_name, wf_outdated in iter_dependency_reports(
+                parsed, self._build_resolver()
+            )
+        }
+        ordered = {wf_name: reports[wf_name] for wf_name, _ in parsed if wf_name in reports}
+
+        return CheckResult(found=True, reports=ordered, errors=errors)
+
+    async def check_target(self, target: WorkflowTarget) -> CheckResult:
+        """
+        Fetch & check the workflow files of the provided repository tree for outdated dependencies.
+
+        If no workflows were found at the target, e.g. the repository or root doesn't exist, the
+        result is marked as not found.
+        """
+        fetched = [wfs async for _, wfs in fetch_workflows_batch(self.session, [target])]
+        if not fetched[0]:
+            return CheckResult(found=False, reports={}, errors={})
+
+        return await self.check_workflows(fetched[0])
+
+    async def refresh(self) -> int:
+        """
+        Refresh the most popular indexed releases that are due to expire before the next refresh.
+
+        The number of refreshed releases is returned.
+        """
+        due = self.index.due_for_refresh(
+            horizon=(2 * self.refresh_interval), limit=self.refresh_top
+        )
+        if due:
+            with trace.span("refresh_index", "daemon", n_keys=len(due)):
+                releases = await self._build_resolver(use_index=False).resolve(due)
+
+            # Unresolved keys may have failed transiently, so they're simply left to expire
+            self.index.put_many({key: r for key, r in releases.items() if r is not None})
+
+        self.index.mark_refreshed(due)
+        return len(due)
+
+    async def refresh_forever(self) -> None:
+        """Refresh popular indexed releases every `refresh_interval` seconds, see `refresh`."""
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                # Releases are still looked up on demand, so try again next time
+                print(f"Could not refresh release index ({e!r}), skipping...", file=sys.stderr)
+
+    def health(self) -> dict[str, t.Any]:  # noqa: D102
+        return {
+            "status": "ok",
+            "version": __version__,
+            "uptime": time.monotonic() - self._started_at,
+            "n_checks": self.n_checks,
+            "n_indexed": len(self.index),
+        }
+
+    async def handle(self, method: str, path: str, body: bytes) -> tuple[HTTPStatus, dict]:
+        """Handle an API request, returning the response's status & JSON body."""
+        if path == "/health":
+            if method != "GET":
+                return HTTPStatus.METHOD_NOT_ALLOWED, {"error": f"Unsupported method: {method}"}
+
+            return HTTPStatus.OK, self.health()
+
+        if path != "/check":
+            return HTTPStatus.NOT_FOUND, {"error": f"Unknown endpoint: {path}"}
+        if method != "POST":
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": f"Unsupported method: {method}"}
+
+        try:
+            request = json.loads(body)
+            if not isinstance(request, dict):
+                raise ValueError("Expected a JSON object")
+
+            if "workflows" in request:
+                workflows = request["workflows"]
+                if not isinstance(workflows, dict) or not all(
+                    isinstance(wf, str) for wf in workflows.values()
+                ):
+                    raise ValueError("Workflows must map filenames to file contents")
+
+                check = self.check_workflows(workflows)
+            elif "target" in request:
+                check = self.check_target(WorkflowTarget(**request["target"]))
+            else:
+                raise ValueError("Expected either 'workflows' or 'target' to check")
+        except (TypeError, ValueError) as e:
+            return HTTPStatus.BAD_REQUEST, {"error": str(e)}
+
+        try:
+            with trace.span("check", "daemon"):
+                result = await check
+        except Exception as e:
+            return HTTPStatus.BAD_GATEWAY, {"error": repr(e)}
+
+        return HTTPStatus.OK, {
+            "found": result.found,
+            "reports": {
+                wf_name: [outdated_to_dict(dep) for dep in wf_outdated]
+                for wf_name, wf_outdated in result.reports.items()
+            },
+            "errors": result.errors,
+        }
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> tuple[HTTPStatus, dict]:
+        try:
+            method, target, _ = (await reader.readline()).decode("latin-1").split()
+        except ValueError:
+            return HTTPStatus.BAD_REQUEST, {"error": "Malformed request line"}
+
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if not self._is_authorized(headers.get("authorization", "")):
+            return HTTPStatus.UNAUTHORIZED, {"error": "Missing or invalid token"}
+
+        try:
+            content_length = int(headers.get("content-length", 0))
+        except ValueError:
+            return HTTPStatus.BAD_REQUEST, {"error": "Malformed Content-Length"}
+
+        if content_length > MAX_BODY_BYTES:
+            return HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Request body too large"}
+
+        body = await reader.readexactly(content_length)
+        return await self.handle(method, urlsplit(target).path, body)
+
+    def _is_authorized(self, authorization: str) -> bool:
+        if self.token is None:
+            return True
+
+        scheme, _, presented = authorization.partition(" ")
+        if scheme.lower() != "bearer":
+            return False
+
+        return hmac.compare_digest(presented.strip().encode(), self.token.encode())
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        # Just enough HTTP/1.1 for the API, one request per connection
+        try:
+            status, payload = await self._read_request(reader)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+
+        body = json.dumps(payload).encode()
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n"
+        )
+
+        with contextlib.suppress(ConnectionError):
+            writer.write(head.encode("latin-1") + body)
+            await writer.drain()
+            writer.close()
+            await writer.wait_closed()
+
+    async def start_server(
+        self, socket_path: Path | None = None, host: str = DEFAULT_HOST, port: int | None = None
+    ) -> asyncio.Server:
+        """
+        Start serving the API on the provided Unix socket path, or TCP `host` & `port`.
+
+        The socket is only accessible by the current user, as checks are made using their token. A
+        stale socket left behind by a previous daemon is replaced, but a `RuntimeError` is raised if
+        another daemon is still listening on it.
+
+        NOTE: Serving over TCP requires the daemon to have a `token`, otherwise a `ValueError` is
+        raised.
+        """
+        if port is not None:
+            if not self.token:
+                raise ValueError("A token is required to serve over TCP")
+
+            return await asyncio.start_server(self._handle_connection, host=host, port=port)
+
+        if socket_path is None:
+            raise ValueError("Either a socket path or port must be provided")
+
+        _claim_socket(socket_path)
+        server = await asyncio.start_unix_server(self._handle_connection, path=socket_path)
+        os.chmod(socket_path, 0o600)
+
+        return server
+
+    async def serve_forever(
+        self, socket_path: Path | None = None, host: str = DEFAULT_HOST, port: int | None = None
+    ) -> None:
+        """Serve the API & refresh the release index until cancelled, see `start_server`."""
+        server = await self.start_server(socket_path=socket_path, host=host, port=port)
+        address = socket_path if port is None else f"http://{host}:{port}"
+        print(f"Serving check requests on {address}", file=sys.stderr)
+
+        refresher = asyncio.create_task(self.refresh_forever())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            refresher.cancel()
+            if port is None and socket_path is not None:
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(socket_path)
@@ -0,0 +1,107 @@
+import http.client
+import json
+import os
+import socket
+from http import HTTPStatus
+from pathlib import Path
+
+from check_workflow import WORKFLOW_T
+from check_workflow.daemon import CheckResult, default_socket_path
+from check_workflow.gh_api import WorkflowTarget
+from check_workflow.workflow import outdated_from_dict
+
+DEFAULT_CLIENT_TIMEOUT = 5 * 60  # seconds
+PROBE_TIMEOUT = 1  # seconds
+
+
+class DaemonError(Exception):
+    """Raised when the daemon responds to a request with an error."""
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    sock: socket.socket
+
+    def __init__(self, socket_path: Path, timeout: float) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(os.fspath(self.socket_path))
+
+
+class DaemonClient:
+    """
+    Thin client forwarding check requests to a daemon listening on the provided Unix socket.
+
+    Requests are made using the standard library's `http.client` rather than a GraphQL client, so
+    forwarded checks skip the import, connection, & release lookup costs of a full run.
+    """
+
+    def __init__(
+        self, socket_path: Path | None = None, timeout: float = DEFAULT_CLIENT_TIMEOUT
+    ) -> None:
+        self.socket_path = default_socket_path() if socket_path is None else socket_path
+        self.timeout = timeout
+
+    def is_running(self) -> bool:
+        """Check whether a daemon is listening on the client's socket."""
+        if not hasattr(socket, "AF_UNIX") or not self.socket_path.exists():
+            return False
+
+        try:
+            self.request("GET", "/health", timeout=PROBE_TIMEOUT)
+        except (DaemonError, OSError, ValueError):
+            return False
+
+        return True
+
+    def request(
+        self, method: str, path: str, payload: object = None, timeout: float | None = None
+    ) -> dict:
+        """
+        Send a request to the daemon and return its decoded JSON response.
+
+        A `DaemonError` is raised if the daemon responds with an error.
+        """
+        conn = _UnixHTTPConnection(self.socket_path, self.timeout if timeout is None else timeout)
+        try:
+            if payload is None:
+                conn.request(method, path)
+            else:
+                conn.request(
+                    method,
+                    path,
+                    body=json.dumps(payload).encode(),
+                    headers={"Content-Type": "application/json"},
+                )
+
+            response = conn.getresponse()
+            decoded: dict = json.loads(response.read())
+        finally:
+            conn.close()
+
+        if response.status != HTTPStatus.OK:
+            raise DaemonError(f"Daemon responded with {response.status}: {decoded.get("error")}")
+
+        return decoded
+
+    def _check(self, payload: dict) -> CheckResult:
+        decoded = self.request("POST", "/check", payload)
+        return CheckResult(
+            found=decoded["found"],
+            reports={
+                wf_name: [outdated_from_dict(dep) for dep in wf_outdated]
+                for wf_name, wf_outdated in decoded["reports"].items()
+            },
+            errors=decoded["errors"],
+        )
+
+    def check_workflows(self, workflows: WORKFLOW_T) -> CheckResult:
+        """Check the provided workflow files using the daemon, see `Daemon.check_workflows`."""
+        return self._check({"workflows": workflows})
+
+    def check_target(self, target: WorkflowTarget) -> CheckResult:
+        """Check the provided repository tree using the daemon, see `Daemon.check_target`."""
+        return self._check({"target": target._asdict()})
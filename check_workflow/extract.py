@@ -0,0 +1,380 @@
+import typing as t
+
+import yaml
+from yaml.events import (
+    AliasEvent,
+    DocumentEndEvent,
+    DocumentStartEvent,
+    Event,
+    MappingEndEvent,
+    MappingStartEvent,
+    ScalarEvent,
+    SequenceEndEvent,
+    SequenceStartEvent,
+    StreamEndEvent,
+    StreamStartEvent,
+)
+from yaml.nodes import ScalarNode
+from yaml.resolver import Resolver
+
+# NOTE: This module imports PyYAML at import time, so it should only be imported once a workflow
+# actually needs parsing
+
+# Prefer libyaml's bindings, if PyYAML was built with them
+LOADER: type[yaml.SafeLoader] = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+STR_TAG = "tag:yaml.org,2002:str"
+NULL_TAG = "tag:yaml.org,2002:null"
+
+# Implicitly resolved scalars that can fail to construct, or that alter the surrounding mapping
+UNSAFE_TAGS = frozenset(
+    (
+        "tag:yaml.org,2002:merge",
+        "tag:yaml.org,2002:timestamp",
+        "tag:yaml.org,2002:value",
+    )
+)
+UNSAFE_FIRST_CHARS = frozenset("0123456789<=")
+
+
+class RawStep(t.NamedTuple):  # noqa: D101
+    job: str
+    step_name: str | None
+    uses: str
+
+
+class UsesLocation(t.NamedTuple):
+    """Location of a step's `uses` value, as the character offsets of its scalar in the raw YAML."""
+
+    step: RawStep
+    start: int
+    end: int
+
+
+def load_steps(raw_workflow: str) -> list[RawStep]:
+    """
+    Extract the steps with a `uses` key from the provided raw workflow YAML.
+
+    The workflow is fully loaded, using libyaml if available.
+
+    NOTE: Jobs calling a reusable workflow have no steps of their own, so the job's `uses` is
+    extracted as a single step without a name.
+    """
+    loaded = yaml.load(raw_workflow, Loader=LOADER)
+
+    steps = []
+    for job, job_params in loaded["jobs"].items():
+        job_uses = job_params.get("uses", None)
+        if job_uses is not None:
+            steps.append(RawStep(job=job, step_name=None, uses=job_uses))
+            continue
+
+        for step in job_params["steps"]:
+            uses = step.get("uses", None)
+            if uses is None:
+                continue
+
+            steps.append(RawStep(job=job, step_name=step.get("name", None), uses=uses))
+
+    return steps
+
+
+def load_action_steps(raw_action: str) -> list[RawStep]:
+    """
+    Extract the steps with a `uses` key from the provided raw action metadata YAML (`action.yml`).
+
+    Only composite actions (`runs.using: composite`) have steps, other actions have none. As actions
+    have no jobs, steps are attributed to a `runs` job.
+    """
+    loaded = yaml.load(raw_action, Loader=LOADER)
+
+    runs = loaded.get("runs", None) if isinstance(loaded, dict) else None
+    if not isinstance(runs, dict) or runs.get("using", None) != "composite":
+        return []
+
+    steps = []
+    for step in runs.get("steps", None) or []:
+        uses = step.get("uses", None)
+        if uses is None:
+            continue
+
+        steps.append(RawStep(job="runs", step_name=step.get("name", None), uses=uses))
+
+    return steps
+
+
+def scan_steps(raw_workflow: str) -> list[RawStep]:
+    """
+    Extract the steps with a `uses` key from the provided raw workflow YAML.
+
+    Rather than loading the whole workflow, the YAML event stream is scanned and only the job names
+    and each step's `name` & `uses` are built.
+
+    NOTE: Workflows using YAML features that the scanner can't resolve exactly like a full load
+    (e.g. aliases within the job steps, merge keys, explicit tags), or that aren't a well-formed
+    workflow, are handed off to `load_steps` so the results (or raised errors) always match.
+    """
+    scanner = _EventScanner(raw_workflow)
+    try:
+        return scanner.scan()
+    except (_UnsupportedError, yaml.YAMLError):
+        return load_steps(raw_workflow)
+    finally:
+        scanner.dispose()
+
+
+def locate_steps(raw_workflow: str) -> list[UsesLocation]:
+    """
+    Extract the steps with a `uses` key from the provided raw workflow YAML, with their locations.
+
+    Steps are scanned from the YAML event stream in the same manner as `scan_steps`, and each step's
+    location spans its `uses` scalar, including any quotes, so the value can be rewritten in place.
+
+    NOTE: Workflows that `scan_steps` would hand off to a full load can't be located exactly, so a
+    `ValueError` is raised for these.
+    """
+    scanner = _EventScanner(raw_workflow, locate=True)
+    try:
+        scanner.scan()
+    except _UnsupportedError:
+        raise ValueError("Workflow uses YAML features that can't be located exactly") from None
+    finally:
+        scanner.dispose()
+
+    return scanner.locations
+
+
+class _UnsupportedError(Exception):
+    """The workflow can't be scanned exactly like a full load would handle it."""
+
+
+class _EventScanner:
+    def __init__(self, raw_workflow: str, locate: bool = False) -> None:
+        # Pull events straight from the parser, `yaml.parse` adds a surprising amount of overhead
+        self._loader = LOADER(raw_workflow)
+        self._events: t.Iterator[Event] = iter(self._loader.get_event, None)
+        # PyYAML's resolver is untyped, so pin down the signature that's relied upon
+        self._resolve_tag: t.Callable[[type[ScalarNode], str, tuple[bool, bool]], str] = (
+            Resolver().resolve
+        )
+        self._anchors: set[str] = set()
+
+        # Only record locations if asked, most scans have no use for them
+        self._locate = locate
+        self.locations: list[UsesLocation] = []
+
+    def dispose(self) -> None:
+        self._loader.dispose()
+
+    def scan(self) -> list[RawStep]:
+        self._expect(StreamStartEvent)
+        self._expect(DocumentStartEvent)
+        self._expect_start(MappingStartEvent)
+
+        steps = None
+        for key in self._iter_keys():
+            if key != "jobs":
+                self._skip(next(self._events))
+            elif steps is None:
+                steps = self._scan_jobs()
+            else:
+                raise _UnsupportedError  # Duplicate keys are resolved by the last occurrence
+
+        self._expect(DocumentEndEvent)
+        self._expect(StreamEndEvent)  # Loading would fail on multiple documents
+
+        if steps is None:
+            raise _UnsupportedError
+
+        return steps
+
+    def _scan_jobs(self) -> list[RawStep]:
+        self._expect_start(MappingStartEvent)
+
+        steps = []
+        seen_jobs = set()
+        for job in self._iter_keys():
+            if job is None or job in seen_jobs:
+                raise _UnsupportedError
+
+            seen_jobs.add(job)
+            steps.extend(self._scan_job(job))
+
+        return steps
+
+    def _scan_job(self, job: str) -> list[RawStep]:
+        self._expect_start(MappingStartEvent)
+
+        n_located = len(self.locations)
+
+        steps = None
+        fields: dict[str, str | None] = {}
+        uses_event = None
+        for key in self._iter_keys():
+            if key == "steps" and steps is None:
+                steps = self._scan_steps(job)
+            elif key == "uses" and key not in fields:
+                uses_event = next(self._events)
+                fields[key] = self._scalar_str(uses_event)
+            elif key in {"steps", "uses"}:
+                raise _UnsupportedError
+            else:
+                self._skip(next(self._events))
+
+        # Jobs calling a reusable workflow take precedence over their steps, see `load_steps`
+        uses = fields.get("uses")
+        if uses is not None:
+            step = RawStep(job=job, step_name=None, uses=uses)
+            if self._locate:
+                del self.locations[n_located:]
+                self._record(step, uses_event)
+
+            return [step]
+
+        if steps is None:
+            raise _UnsupportedError
+
+        return steps
+
+    def _scan_steps(self, job: str) -> list[RawStep]:
+        self._expect_start(SequenceStartEvent)
+
+        steps: list[RawStep] = []
+        while True:
+            event = next(self._events)
+            if isinstance(event, SequenceEndEvent):
+                return steps
+
+            self._check_start(event, MappingStartEvent)
+            step = self._scan_step(job)
+            if step is not None:
+                steps.append(step)
+
+    def _scan_step(self, job: str) -> RawStep | None:
+        fields: dict[str, str | None] = {}
+        uses_event = None
+        for key in self._iter_keys():
+            if key not in {"name", "uses"}:
+                self._skip(next(self._events))
+            elif key not in fields:
+                event = next(self._events)
+                fields[key] = self._scalar_str(event)
+                if key == "uses":
+                    uses_event = event
+            else:
+                raise _UnsupportedError
+
+        uses = fields.get("uses")
+        if uses is None:
+            return None
+
+        step = RawStep(job=job, step_name=fields.get("name"), uses=uses)
+        if self._locate:
+            self._record(step, uses_event)
+
+        return step
+
+    def _record(self, step: RawStep, uses_event: Event | None) -> None:
+        if uses_event is None:
+            return
+
+        # Events pulled from the parser always carry their marks
+        start, end = uses_event.start_mark, uses_event.end_mark
+        if start is None or end is None:
+            raise _UnsupportedError
+
+        self.locations.append(UsesLocation(step=step, start=start.index, end=end.index))
+
+    def _iter_keys(self) -> t.Iterator[str | None]:
+        """
+        Iterate over the keys of the current mapping, up to & including its end event.
+
+        String keys are yielded as their value, other keys are yielded as `None`. The caller is
+        expected to consume each key's value before advancing.
+        """
+        while True:
+            event = next(self._events)
+            if isinstance(event, MappingEndEvent):
+                return
+
+            # Loading would fail on unhashable keys; alias keys are rare enough to not bother with
+            if not isinstance(event, ScalarEvent):
+                raise _UnsupportedError
+
+            self._register_anchor(event)
+            tag = self._resolve(event)
+            yield event.value if tag == STR_TAG else None
+
+    def _scalar_str(self, event: Event) -> str | None:
+        if not isinstance(event, ScalarEvent):
+            raise _UnsupportedError
+
+        self._register_anchor(event)
+        tag = self._resolve(event)
+        if tag == STR_TAG:
+            value: str = event.value
+            return value
+        elif tag == NULL_TAG:
+            return None
+        else:
+            raise _UnsupportedError
+
+    def _skip(self, event: Event) -> None:
+        """Consume the node started by the provided event, checking that it would load cleanly."""
+        if isinstance(event, AliasEvent):
+            if event.anchor not in self._anchors:
+                raise _UnsupportedError
+
+            return
+
+        if isinstance(event, ScalarEvent):
+            self._register_anchor(event)
+
+            # Skipped values only need to be checked for unsafe tags, which is much cheaper to rule
+            # out by the value's first character than running the full resolver
+            if event.tag is not None:
+                raise _UnsupportedError
+            if event.implicit[0] and event.value[:1] in UNSAFE_FIRST_CHARS:
+                self._resolve(event)
+        elif isinstance(event, SequenceStartEvent):
+            self._check_start(event, SequenceStartEvent)
+            while not isinstance(event := next(self._events), SequenceEndEvent):
+                self._skip(event)
+        else:
+            self._check_start(event, MappingStartEvent)
+            for _ in self._iter_keys():
+                self._skip(next(self._events))
+
+    def _resolve(self, event: ScalarEvent) -> str:
+        if event.tag is not None:
+            raise _UnsupportedError
+
+        # Only plain scalars are implicitly resolved, anything quoted is a string, as is anything
+        # that no implicit resolver could match based on its first character
+        if not event.implicit[0] or event.value[:1] not in Resolver.yaml_implicit_resolvers:
+            return STR_TAG
+
+        tag = self._resolve_tag(ScalarNode, event.value, event.implicit)
+        if tag in UNSAFE_TAGS:
+            raise _UnsupportedError
+
+        return tag
+
+    def _register_anchor(self, event: ScalarEvent | MappingStartEvent | SequenceStartEvent) -> None:
+        if event.anchor is not None:
+            self._anchors.add(event.anchor)
+
+    def _check_start(
+        self, event: Event, kind: type[MappingStartEvent] | type[SequenceStartEvent]
+    ) -> None:
+        if not isinstance(event, kind) or event.tag is not None:
+            raise _UnsupportedError
+
+        self._register_anchor(event)
+
+    def _expect_start(self, kind: type[MappingStartEvent] | type[SequenceStartEvent]) -> None:
+        self._check_start(next(self._events), kind)
+
+    def _expect(self, kind: type[Event]) -> None:
+        if not isinstance(next(self._events), kind):
+            raise _UnsupportedError
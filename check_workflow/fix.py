@@ -0,0 +1,293 @@
+import asyncio
+import difflib
+import re
+import shutil
+import typing as t
+from concurrent.futures import Executor
+from pathlib import Path
+
+from packaging.version import Version
+
+from check_workflow import trace
+from check_workflow.gh_api import Release
+from check_workflow.local import LocalWorkflow, build_executor, try_parse
+from check_workflow.resolve import ReleaseResolver
+from check_workflow.workflow import UsesSpec, is_versioned
+
+if t.TYPE_CHECKING:
+    from check_workflow.extract import UsesLocation
+
+# Version comments trailing a SHA pin, e.g. `uses: actions/checkout@<sha>  # v4.2.2`
+VERSION_COMMENT_RE = re.compile(r"[ \t]#[ \t]*(?P<ver>v?\d+(?:\.\d+)*)(?=\s|$)")
+
+
+class UsesEdit(t.NamedTuple):
+    """
+    Rewrite of a `uses` value from `old` to `new`, within the scalar between `start` & `end`.
+
+    If `comment_ver` is provided, a version comment trailing the scalar on the same line is also
+    rewritten to it, keeping the comment's precision & `v` prefix.
+    """
+
+    start: int
+    end: int
+    old: str
+    new: str
+    comment_ver: Version | None = None
+
+
+class FileFix(t.NamedTuple):
+    """The edits made to a workflow file, along with their unified diff."""
+
+    path: Path
+    edits: list[UsesEdit]
+    diff: str
+
+
+def _read_raw(path: Path) -> str:
+    # Line endings are kept as-is, so locations match the file contents & rewrites preserve them
+    with path.open(encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def _locate_workflow_file(path: Path) -> list["UsesLocation"]:
+    # Runs in the worker processes, so keep this importable at module level
+    from check_workflow.extract import locate_steps
+
+    return locate_steps(_read_raw(path))
+
+
+def _is_behind(uses: UsesSpec, latest: Release, pinned: Version | None) -> bool:
+    """
+    Check whether the provided dependency is pinned behind the latest release.
+
+    Unlike when reporting outdated dependencies, pins ahead of the resolved latest release (e.g. a
+    major version that only has pre-releases so far) are left alone rather than downgraded. Version
+    pins are behind if the latest release is newer than every version they allow, and SHA pins are
+    behind if their tagged version is older than the latest release.
+
+    NOTE: SHA pins whose tagged version could not be resolved are never considered to be behind.
+    """
+    if uses.spec is not None:
+        # Compatible release clauses allow a contiguous range of versions, so the latest release is
+        # past all of them if it's outside of the range & above its lower bound
+        return latest.ver not in uses.spec and all(
+            latest.ver > Version(specifier.version) for specifier in uses.spec
+        )
+
+    return pinned is not None and pinned < latest.ver
+
+
+def bump_ref(raw_ref: str, latest: Version) -> str:
+    """
+    Bump the provided version reference to the latest release, keeping its precision & `v` prefix.
+
+    e.g. a latest release of `5.1.0` bumps `v4` to `v5`, `v4.2` to `v5.1`, and `4.2.2` to `5.1.0`.
+    """
+    prefix = "v" if raw_ref.startswith("v") else ""
+    n_parts = raw_ref.removeprefix("v").count(".") + 1
+    parts = (*latest.release, *(0,) * n_parts)[:n_parts]
+
+    return prefix + ".".join(str(part) for part in parts)
+
+
+def fixed_uses(raw_uses: str, uses: UsesSpec, latest: Version, tag_hash: str) -> str:
+    """
+    Build the provided dependency specification, pinned to the latest release.
+
+    SHA pins are pinned to the latest release's tag commit, otherwise the version is bumped using
+    `bump_ref`; any path or branch prefix is kept as-is.
+    """
+    action, ref = raw_uses.split("@", maxsplit=1)
+    if uses.sha is not None:
+        return f"{action}@{tag_hash}"
+
+    *branch, raw_ver = ref.split("/")
+    return f"{action}@{"/".join((*branch, bump_ref(raw_ver, latest)))}"
+
+
+def _bump_comment(line_tail: str, latest: Version) -> str:
+    match = VERSION_COMMENT_RE.search(line_tail)
+    if match is None:
+        return line_tail
+
+    bumped = bump_ref(match["ver"], latest)
+    return f"{line_tail[: match.start("ver")]}{bumped}{line_tail[match.end("ver") :]}"
+
+
+def apply_edits(raw_workflow: str, edits: t.Iterable[UsesEdit]) -> str:
+    """
+    Apply the provided edits to the raw workflow YAML, leaving everything else untouched.
+
+    A `ValueError` is raised if an edit's `old` value isn't found within its scalar, e.g. if the
+    workflow has changed since it was located.
+    """
+    # Edit from the end, so the offsets of earlier edits still hold
+    fixed = raw_workflow
+    for edit in sorted(edits, key=lambda edit: edit.start, reverse=True):
+        scalar = fixed[edit.start : edit.end]
+        if edit.old not in scalar:
+            raise ValueError(f"Expected '{edit.old}' at offset {edit.start}, found '{scalar}'")
+
+        # Version comments are only looked for on the rest of the scalar's line
+        tail_end = edit.end
+        tail = ""
+        if edit.comment_ver is not None:
+            tail_end = fixed.find("\n", edit.end)
+            tail_end = len(fixed) if tail_end == -1 else tail_end
+            tail = _bump_comment(fixed[edit.end : tail_end], edit.comment_ver)
+
+        fixed_scalar = scalar.replace(edit.old, edit.new, 1)
+        fixed = f"{fixed[: edit.start]}{fixed_scalar}{tail}{fixed[tail_end:]}"
+
+    return fixed
+
+
+def _rewrite_workflow_file(path: Path, edits: list[UsesEdit], dry_run: bool) -> str:
+    # Runs in the worker processes, see above
+    raw_workflow = _read_raw(path)
+    fixed = apply_edits(raw_workflow, edits)
+
+    if not dry_run:
+        # Write alongside the original & swap it in, so the file is never left partially written
+        tmp_path = path.with_name(f".{path.name}.fix.tmp")
+        try:
+            with tmp_path.open("w", encoding="utf-8", newline="") as f:
+                f.write(fixed)
+
+            shutil.copymode(path, tmp_path)
+            tmp_path.replace(path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    return "".join(
+        difflib.unified_diff(
+            raw_workflow.splitlines(keepends=True),
+            fixed.splitlines(keepends=True),
+            fromfile=f"a/{path.as_posix()}",
+            tofile=f"b/{path.as_posix()}",
+        )
+    )
+
+
+async def _try_rewrite(
+    path: Path, edits: list[UsesEdit], executor: Executor | None, dry_run: bool
+) -> FileFix | None:
+    try:
+        with trace.span("rewrite_workflow", "fix", path=path, n_edits=len(edits)):
+            if executor is None:
+                diff = _rewrite_workflow_file(path, edits, dry_run)
+            else:
+                loop = asyncio.get_running_loop()
+                diff = await loop.run_in_executor(
+                    executor, _rewrite_workflow_file, path, edits, dry_run
+                )
+    except Exception as e:
+        # One failed rewrite shouldn't sink the rest of the fixes
+        print(f"{path}: Could not rewrite workflow ({e!r}), skipping...")
+        return None
+
+    return FileFix(path=path, edits=edits, diff=diff)
+
+
+async def _plan_edits(
+    located: dict[Path, list["UsesLocation"]], resolver: ReleaseResolver
+) -> dict[Path, list[UsesEdit]]:
+    deps: dict[Path, list[tuple["UsesLocation", UsesSpec]]] = {}
+    for path, locations in located.items():
+        for location in locations:
+            if not is_versioned(location.step.uses):
+                continue
+
+            try:
+                deps.setdefault(path, []).append((location, UsesSpec.from_raw(location.step.uses)))
+            except Exception as e:
+                print(f"{path}: Could not parse '{location.step.uses}' ({e!r}), skipping...")
+
+    keys = [(uses.owner, uses.repo) for path_deps in deps.values() for _, uses in path_deps]
+    sha_keys = [
+        (uses.owner, uses.repo)
+        for path_deps in deps.values()
+        for _, uses in path_deps
+        if uses.sha is not None
+    ]
+    releases, tag_indexes = await asyncio.gather(
+        resolver.resolve(keys), resolver.resolve_tag_indexes(sha_keys)
+    )
+
+    planned: dict[Path, list[UsesEdit]] = {}
+    for path, path_deps in deps.items():
+        for location, uses in path_deps:
+            latest = releases[(uses.owner, uses.repo)]
+            if latest is None:
+                continue
+
+            pinned = None
+            if uses.sha is not None:
+                pinned = tag_indexes[(uses.owner, uses.repo)].get(uses.sha)
+
+            if not _is_behind(uses, latest, pinned):
+                continue
+
+            raw_uses = location.step.uses
+            planned.setdefault(path, []).append(
+                UsesEdit(
+                    start=location.start,
+                    end=location.end,
+                    old=raw_uses,
+                    new=fixed_uses(raw_uses, uses, latest.ver, latest.tag_hash),
+                    comment_ver=(latest.ver if uses.sha is not None else None),
+                )
+            )
+
+    return planned
+
+
+async def fix_local_outdated(
+    workflows: t.Iterable[LocalWorkflow],
+    resolver: ReleaseResolver,
+    max_workers: int | None = None,
+    dry_run: bool = False,
+) -> list[FileFix]:
+    """
+    Rewrite the outdated dependencies of the provided local workflows, in place.
+
+    Each outdated `uses` value is rewritten to the latest release, keeping the precision of version
+    pins (see `bump_ref`); SHA pins are rewritten to the latest release's tag commit, along with any
+    trailing version comment (e.g. `# v4.2.2`). Rewrites are minimal text edits at the locations
+    recorded while scanning the workflow (see `extract.locate_steps`), so formatting, comments, and
+    line endings are otherwise left untouched.
+
+    Workflows are located & rewritten in a pool of up to `max_workers` processes (defaulting to the
+    number of CPUs), and all release lookups are resolved together, so each action is only looked
+    up once. Each file is written to a temporary file that then replaces the original. If `dry_run`
+    is `True`, files are left untouched.
+
+    The return is the fixes for each rewritten file, in the order of the provided workflows.
+
+    NOTE: Workflows that can't be located exactly, or that change between being located & rewritten,
+    are skipped.
+    """
+    # Fixes are keyed by path, so only fix each file once if roots overlap
+    by_path = {workflow.path: workflow for workflow in workflows}
+
+    executor = build_executor(len(by_path), max_workers)
+    try:
+        parsed = await asyncio.gather(
+            *(try_parse(workflow, executor, _locate_workflow_file) for workflow in by_path.values())
+        )
+        located = {
+            path: locations
+            for path, locations in zip(by_path, parsed, strict=True)
+            if locations is not None
+        }
+
+        planned = await _plan_edits(located, resolver)
+        fixes = await asyncio.gather(
+            *(_try_rewrite(path, edits, executor, dry_run) for path, edits in planned.items())
+        )
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    return [fix for fix in fixes if fix is not None]
@@ -0,0 +1,223 @@
+import abc
+import json
+import typing as t
+
+from check_workflow import __url__, __version__
+from check_workflow.workflow import OutdatedDep, format_outdated, outdated_to_dict
+
+FORMATS = ("table", "markdown", "json", "ndjson", "sarif")
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+SARIF_RULE = {
+    "id": "outdated-action",
+    "name": "OutdatedAction",
+    "shortDescription": {"text": "Action dependency is outdated"},
+    "fullDescription": {
+        "text": "The specified version or SHA of an action does not match its latest release."
+    },
+    "helpUri": __url__,
+    "defaultConfiguration": {"level": "warning"},
+}
+
+
+class Source(t.NamedTuple):
+    """
+    Source of a reported workflow file.
+
+    The `path` is the workflow file's path, relative to its repository for remote workflows, whose
+    `repository` (`<owner>/<repo>`) & `ref` are also provided.
+    """
+
+    path: str
+    repository: str | None = None
+    ref: str | None = None
+
+
+def build_row(source: Source, dep: OutdatedDep) -> dict[str, t.Any]:
+    """
+    Build the JSON serializable row of the provided outdated dependency & its source workflow file.
+
+    Rows contain the workflow's `source` path (and `repository` & `ref`, for remote workflows),
+    followed by the fields of `outdated_to_dict`.
+    """
+    row: dict[str, t.Any] = {"source": source.path}
+    if source.repository is not None:
+        row["repository"] = source.repository
+    if source.ref is not None:
+        row["ref"] = source.ref
+
+    row.update(outdated_to_dict(dep))
+    return row
+
+
+class ReportEncoder(abc.ABC):
+    """
+    Base for encoders writing reports to the provided text stream as soon as they're ready.
+
+    Reports are written using `write_report`, between calls to `begin` & `end`, which write any
+    document framing. Subclasses write each outdated dependency directly to the stream using
+    `write_row`, so reports of any size are never held in memory as a whole.
+    """
+
+    def __init__(self, stream: t.TextIO) -> None:
+        self.stream = stream
+
+    def begin(self) -> None:  # noqa: D102
+        pass
+
+    def end(self) -> None:  # noqa: D102
+        pass
+
+    def write_report(
+        self,
+        outdated: dict[str, list[OutdatedDep]],
+        header: str | None = None,
+        locate: t.Callable[[str], Source] = Source,
+    ) -> None:
+        """
+        Write the provided per-file report of outdated dependencies.
+
+        Each file's `Source` is built by calling `locate` with its name in the report. The `header`
+        labels the report as a whole, e.g. its repository, for formats that group reports.
+        """
+        for wf_name, wf_outdated in outdated.items():
+            source = locate(wf_name)
+            for dep in wf_outdated:
+                self.write_row(source, dep)
+
+        # Flush so streamed reports show up as soon as they're ready, even when piped
+        self.stream.flush()
+
+    @abc.abstractmethod
+    def write_row(self, source: Source, dep: OutdatedDep) -> None:
+        """Write the provided outdated dependency of its `source` workflow file to the stream."""
+
+
+class TableEncoder(ReportEncoder):
+    """Encode reports as tables, in terminal friendly form or as markdown, see `format_outdated`."""
+
+    def __init__(self, stream: t.TextIO, markdown: bool = False) -> None:
+        super().__init__(stream)
+        self.markdown = markdown
+
+    def write_report(
+        self,
+        outdated: dict[str, list[OutdatedDep]],
+        header: str | None = None,
+        locate: t.Callable[[str], Source] = Source,
+    ) -> None:
+        """Write the provided report as a table per file, under the report's `header` if given."""
+        if header is not None:
+            if self.markdown:
+                print(f"## `{header}`\n", file=self.stream)
+            else:
+                print(f"{header}\n{"=" * len(header)}", file=self.stream)
+
+        print(format_outdated(outdated, markdown=self.markdown), file=self.stream, flush=True)
+
+    def write_row(self, source: Source, dep: OutdatedDep) -> None:  # noqa: D102
+        print(format_outdated({source.path: [dep]}, markdown=self.markdown), file=self.stream)
+
+
+class JSONEncoder(ReportEncoder):
+    """Encode reports as a single JSON array of rows, see `build_row`."""
+
+    _separator = "\n"
+
+    def begin(self) -> None:  # noqa: D102
+        self.stream.write("[")
+
+    def write_row(self, source: Source, dep: OutdatedDep) -> None:  # noqa: D102
+        self.stream.write(self._separator)
+        self.stream.write(json.dumps(build_row(source, dep)))
+        self._separator = ",\n"
+
+    def end(self) -> None:  # noqa: D102
+        self.stream.write("\n]\n")
+        self.stream.flush()
+
+
+class NDJSONEncoder(ReportEncoder):
+    """Encode reports as newline delimited JSON, one row per line, see `build_row`."""
+
+    def write_row(self, source: Source, dep: OutdatedDep) -> None:  # noqa: D102
+        self.stream.write(json.dumps(build_row(source, dep)))
+        self.stream.write("\n")
+
+
+class SARIFEncoder(ReportEncoder):
+    """
+    Encode reports as a SARIF 2.1.0 log, e.g. for upload to GitHub code scanning.
+
+    Each outdated dependency is a result of the `outdated-action` rule, located at its workflow
+    file, with the fields of its row (see `build_row`) attached as the result's properties.
+    """
+
+    _separator = "\n"
+
+    def begin(self) -> None:  # noqa: D102
+        run = {
+            "tool": {
+                "driver": {
+                    "name": "check-workflow",
+                    "version": __version__,
+                    "informationUri": __url__,
+                    "rules": [SARIF_RULE],
+                }
+            }
+        }
+        envelope = json.dumps({"$schema": SARIF_SCHEMA, "version": "2.1.0", "runs": [run]})
+
+        # Results are streamed into the run, so splice them in before the run's closing brackets
+        self.stream.write(f'{envelope.removesuffix("}]}")}, "results": [')
+
+    def write_row(self, source: Source, dep: OutdatedDep) -> None:  # noqa: D102
+        uses = dep.spec.uses
+        if uses.spec is not None:
+            specified, latest = str(uses.spec), str(dep.latest.ver)
+        else:
+            specified, latest = uses.sha[:7], dep.latest.tag_hash[:7]  # type: ignore[index]
+            if dep.pinned is not None:
+                specified, latest = f"{specified} ({dep.pinned})", f"{latest} ({dep.latest.ver})"
+
+        used_in = f"job '{dep.spec.job}'"
+        if dep.spec.via:
+            used_in = f"{used_in} (via {" > ".join(dep.spec.via)})"
+
+        result = {
+            "ruleId": SARIF_RULE["id"],
+            "level": "warning",
+            "message": {
+                "text": (
+                    f"{uses.owner}/{uses.repo} ({specified}) in {used_in} is outdated, "
+                    f"the latest release is {latest}"
+                )
+            },
+            "locations": [{"physicalLocation": {"artifactLocation": {"uri": source.path}}}],
+            "properties": build_row(source, dep),
+        }
+
+        self.stream.write(self._separator)
+        self.stream.write(json.dumps(result))
+        self._separator = ",\n"
+
+    def end(self) -> None:  # noqa: D102
+        self.stream.write("\n]}]}\n")
+        self.stream.flush()
+
+
+def build_encoder(fmt: str, stream: t.TextIO) -> ReportEncoder:
+    """Build the report encoder for the provided output format, writing to `stream`."""
+    match fmt:
+        case "table":
+            return TableEncoder(stream)
+        case "markdown":
+            return TableEncoder(stream, markdown=True)
+        case "json":
+            return JSONEncoder(stream)
+        case "ndjson":
+            return NDJSONEncoder(stream)
+        case "sarif":
+            return SARIFEncoder(stream)
+        case _:
+            raise ValueError(f"Unknown output format: '{fmt}'")
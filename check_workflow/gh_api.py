@@ -1,41 +1,175 @@
 import datetime as dt
+import functools
 import operator
 import os
 import platform
 import typing as t
 from dataclasses import dataclass
+from pathlib import Path
 
-import httpx
-from dotenv import load_dotenv
-from gql import Client
-from gql import __version__ as __gql_ver__
-from gql import gql
-from gql.client import AsyncClientSession
-from gql.transport.httpx import HTTPXAsyncTransport
-from httpx import Timeout
 from packaging.version import InvalidVersion, Version
 
-from check_workflow import WORKFLOW_T, __url__, __version__
-
-load_dotenv()
-TOK = os.environ.get("PUBLIC_PAT", "")
-
-TIMEOUT = Timeout(5, read=15)  # Extend the read timeout a bit, keep the rest at default
-USER_AGENT = (
-    f"check-workflow/{__version__} ({__url__}) "
-    f"gql/{__gql_ver__} "
-    f"httpx/{httpx.__version__} "
-    f"{platform.python_implementation()}/{platform.python_version()}"
-)
-TRANSPORT = HTTPXAsyncTransport(
-    url="https://api.github.com/graphql",
-    headers={"Authorization": f"bearer {TOK}", "User-Agent": USER_AGENT},
-    timeout=TIMEOUT,
-)
-CLIENT = Client(transport=TRANSPORT, fetch_schema_from_transport=True)
+from check_workflow import WORKFLOW_T, __url__, __version__, trace
+from check_workflow.scheduler import RATE_LIMIT_SELECTION, RateLimitScheduler, suggest_batch_size
+
+# Network dependencies are imported on first use so library users who only need the parsing helpers
+# (and `CheckWorkflow --help`) don't pay for them at import time
+if t.TYPE_CHECKING:
+    from gql import Client, GraphQLRequest
+    from gql.client import AsyncClientSession
+    from gql.transport import AsyncTransport
+
+    from check_workflow.pool import ConnectionStats, PoolLimits
+
+GRAPHQL_URL = "https://api.github.com/graphql"
+GRAPHQL_URL_ENV = "GITHUB_GRAPHQL_URL"
+
+TOK: str | None = None  # Resolved on first use, see `get_token`
+
+
+def get_token() -> str:
+    """
+    Return the GH API token, loading it from the environment or `.env` on first use.
+
+    The token is read from the `PUBLIC_PAT` environment variable; an empty string is returned if no
+    token is available.
+    """
+    global TOK
+    if TOK is None:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        TOK = os.environ.get("PUBLIC_PAT", "")
+
+    return TOK
+
+
+def _check_token(session: "AsyncClientSession") -> None:
+    # Replayed sessions never touch the network, so they don't need a token
+    if getattr(session.client.transport, "requires_token", True) and not get_token():
+        raise RuntimeError("No API token available")
+
+
+def _user_agent() -> str:
+    import httpx
+    from gql import __version__ as __gql_ver__
+
+    return (
+        f"check-workflow/{__version__} ({__url__}) "
+        f"gql/{__gql_ver__} "
+        f"httpx/{httpx.__version__} "
+        f"{platform.python_implementation()}/{platform.python_version()}"
+    )
+
+
+def build_client(
+    validate_schema: bool = False,
+    scheduler: RateLimitScheduler | None = None,
+    url: str | None = None,
+    record: Path | None = None,
+    replay: Path | None = None,
+    replay_latency: float = 0,
+    pool: "PoolLimits | None" = None,
+    connection_stats: "ConnectionStats | None" = None,
+) -> "Client":
+    """
+    Build a GQL client for GH's GraphQL API.
+
+    By default, queries are not validated client-side, which avoids downloading & building GH's
+    full GraphQL schema before any query is sent. If `validate_schema` is `True`, the schema is
+    fetched from the API when the client connects and queries are validated against it.
+
+    If a `scheduler` is provided, the client's requests are scheduled around GH's rate limits.
+
+    If no `url` is provided, the API endpoint is read from the `GITHUB_GRAPHQL_URL` environment
+    variable, e.g. for GitHub Enterprise Server, falling back to GH's public API.
+
+    If a `record` archive is provided, every request & response pair is written to it when the
+    client is closed. If a `replay` archive is provided, responses are instead served from it, each
+    delayed by `replay_latency` seconds, without any network requests; see `replay.ReplayTransport`
+    for details.
+
+    HTTP connections are pooled using the provided `pool` limits, falling back to the defaults of
+    `pool.PoolLimits`. If `connection_stats` are provided, connection reuse is tracked using them.
+    To share a single connected session, and its pool, across pipelines see `pool.SessionManager`.
+
+    If tracing is enabled, a span is recorded for each request; see `trace.set_tracer`.
+    """
+    from gql import Client
+
+    if record is not None and replay is not None:
+        raise ValueError("Cannot record and replay at the same time")
+
+    transport: AsyncTransport
+    if replay is not None:
+        from check_workflow.replay import ReplayTransport
+
+        transport = ReplayTransport(archive=replay, latency=replay_latency)
+    else:
+        transport = _build_http_transport(scheduler, url, pool, connection_stats)
+
+    if record is not None:
+        from check_workflow.replay import RecordingTransport
+
+        transport = RecordingTransport(transport=transport, archive=record)
+
+    tracer = trace.get_tracer()
+    if tracer is not None:
+        from check_workflow.transport import TracingTransport
+
+        transport = TracingTransport(transport=transport, tracer=tracer)
+
+    return Client(transport=transport, fetch_schema_from_transport=validate_schema)
+
+
+def _build_http_transport(
+    scheduler: RateLimitScheduler | None,
+    url: str | None,
+    pool: "PoolLimits | None" = None,
+    connection_stats: "ConnectionStats | None" = None,
+) -> "AsyncTransport":
+    from gql.transport.httpx import HTTPXAsyncTransport
+    from httpx import Timeout
+
+    from check_workflow.pool import PoolLimits
+
+    if url is None:
+        url = os.environ.get(GRAPHQL_URL_ENV) or GRAPHQL_URL
+
+    client_kwargs = (PoolLimits() if pool is None else pool).client_kwargs()
+    if connection_stats is not None:
+        client_kwargs["event_hooks"] = connection_stats.event_hooks()
+
+    client_kwargs["headers"] = {
+        "Authorization": f"bearer {get_token()}",
+        "User-Agent": _user_agent(),
+    }
+    client_kwargs["timeout"] = Timeout(5, read=15)  # Extend the read timeout a bit
+    if scheduler is None:
+        return HTTPXAsyncTransport(url=url, **client_kwargs)
+
+    from check_workflow.transport import RateLimitedTransport
+
+    return RateLimitedTransport(scheduler=scheduler, url=url, **client_kwargs)
+
+
+@functools.cache
+def get_client() -> "Client":
+    """Return the shared GQL client, building it on first use."""
+    return build_client()
+
+
+def __getattr__(name: str) -> "Client":
+    # Keep the module-level `CLIENT` available without building it at import time
+    if name == "CLIENT":
+        return get_client()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 WORKFLOW_QUERY = """
 query GetWorkflows($owner: String!, $repo: String!, $target: String!) {
+    rateLimit { cost remaining resetAt }
     repository(owner: $owner, name: $repo) {
         object(expression: $target) {
             ... on Tree {
@@ -54,8 +188,27 @@ query GetWorkflows($owner: String!, $repo: String!, $target: String!) {
 """
 
 
+def _parse_workflow_tree(tree: dict | None) -> WORKFLOW_T:
+    """
+    Build a dictionary of <filename>:<file contents> items from the provided tree object.
+
+    If the tree could not be resolved (e.g. the workflow root does not exist), an empty dictionary
+    is returned. Entries that aren't files, such as subdirectories, are skipped.
+    """
+    if tree is None:
+        return {}
+
+    raw_workflows = {}
+    for wf in tree.get("entries", []):
+        wf_text = (wf["object"] or {}).get("text")
+        if wf_text is not None:
+            raw_workflows[wf["name"]] = wf_text
+
+    return raw_workflows
+
+
 async def fetch_workflows(
-    session: AsyncClientSession,
+    session: "AsyncClientSession",
     owner: str,
     repo_name: str,
     workflow_root: str = ".github/workflows/",
@@ -66,8 +219,9 @@ async def fetch_workflows(
 
     The return is a dictionary of <filename>:<file contents> items.
     """
-    if not TOK:
-        raise RuntimeError("No API token available")
+    _check_token(session)
+
+    from gql import gql
 
     query = gql(WORKFLOW_QUERY)
     query.variable_values = {
@@ -75,17 +229,161 @@ async def fetch_workflows(
         "repo": repo_name,
         "target": f"{branch}:{workflow_root}",
     }
-    result = await session.execute(query)
+    with trace.span("fetch_workflows", "github", key=f"{owner}/{repo_name}", ref=branch):
+        result = await session.execute(query)
 
-    raw_workflows = {}
-    for wf in result["repository"]["object"]["entries"]:
-        raw_workflows[wf["name"]] = wf["object"]["text"]
+    return _parse_workflow_tree(result["repository"]["object"])
 
-    return raw_workflows
+
+ORG_REPOSITORIES_QUERY = """
+query GetOrgRepositories($org: String!, $target: String!, $page_size: Int!, $cursor: String) {
+    rateLimit { cost remaining resetAt }
+    organization(login: $org) {
+        repositories(first: $page_size, after: $cursor, orderBy: {field: NAME, direction: ASC}) {
+            pageInfo {
+                hasNextPage
+                endCursor
+            }
+            nodes {
+                name
+                isArchived
+                isEmpty
+                object(expression: $target) {
+                    ... on Tree {
+                        entries {
+                            name
+                            object {
+                                ... on Blob {
+                                text
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    }
+}
+"""
+
+
+class OrgRepository(t.NamedTuple):  # noqa: D101
+    owner: str
+    name: str
+    is_archived: bool
+    is_empty: bool
+    workflows: WORKFLOW_T
+
+
+async def iter_org_repositories(
+    session: "AsyncClientSession",
+    org: str,
+    workflow_root: str = ".github/workflows/",
+    ref: str = "HEAD",
+    page_size: int = 25,
+) -> t.AsyncIterator[OrgRepository]:
+    """
+    Iterate over all repositories in the query organization using GH's GraphQL API.
+
+    Repositories are fetched in pages of `page_size`, along with their workflow files in the same
+    manner as `fetch_workflows`. The default `ref` of `"HEAD"` resolves to each repository's default
+    branch. Repositories without workflows at the provided root are yielded with no workflows.
+    """
+    _check_token(session)
+
+    from gql import gql
+
+    cursor = None
+    while True:
+        query = gql(ORG_REPOSITORIES_QUERY)
+        query.variable_values = {
+            "org": org,
+            "target": f"{ref}:{workflow_root}",
+            "page_size": suggest_batch_size(session, page_size),
+            "cursor": cursor,
+        }
+        with trace.span("fetch_org_repositories", "github", org=org, cursor=cursor):
+            result = await session.execute(query)
+
+        repositories = result["organization"]["repositories"]
+        for node in repositories["nodes"]:
+            yield OrgRepository(
+                owner=org,
+                name=node["name"],
+                is_archived=node["isArchived"],
+                is_empty=node["isEmpty"],
+                workflows=_parse_workflow_tree(node["object"]),
+            )
+
+        if not repositories["pageInfo"]["hasNextPage"]:
+            break
+
+        cursor = repositories["pageInfo"]["endCursor"]
+
+
+ORG_REPOSITORY_NAMES_QUERY = """
+query GetOrgRepositoryNames($org: String!, $page_size: Int!, $cursor: String) {
+    rateLimit { cost remaining resetAt }
+    organization(login: $org) {
+        repositories(first: $page_size, after: $cursor, orderBy: {field: NAME, direction: ASC}) {
+            pageInfo {
+                hasNextPage
+                endCursor
+            }
+            nodes {
+                name
+                isArchived
+                isEmpty
+            }
+        }
+    }
+}
+"""
+
+
+async def iter_org_repository_names(
+    session: "AsyncClientSession", org: str, page_size: int = 100
+) -> t.AsyncIterator[OrgRepository]:
+    """
+    Iterate over all repositories in the query organization, without their workflows.
+
+    This is a lighter listing than `iter_org_repositories`, for when only a subset of repositories
+    are checked (e.g. see `shard.scan_shard`); repositories are always yielded with no workflows.
+    """
+    _check_token(session)
+
+    from gql import gql
+
+    cursor = None
+    while True:
+        query = gql(ORG_REPOSITORY_NAMES_QUERY)
+        query.variable_values = {
+            "org": org,
+            "page_size": suggest_batch_size(session, page_size),
+            "cursor": cursor,
+        }
+        with trace.span("fetch_org_repository_names", "github", org=org, cursor=cursor):
+            result = await session.execute(query)
+
+        repositories = result["organization"]["repositories"]
+        for node in repositories["nodes"]:
+            yield OrgRepository(
+                owner=org,
+                name=node["name"],
+                is_archived=node["isArchived"],
+                is_empty=node["isEmpty"],
+                workflows={},
+            )
+
+        if not repositories["pageInfo"]["hasNextPage"]:
+            break
+
+        cursor = repositories["pageInfo"]["endCursor"]
 
 
 RELEASE_QUERY = """
 query GetLatestReleases($owner: String!, $repo: String!, $n_latest: Int!) {
+    rateLimit { cost remaining resetAt }
     repository(owner: $owner, name: $repo) {
         releases(orderBy: {field: CREATED_AT, direction: DESC}, first: $n_latest) {
             nodes {
@@ -127,8 +425,27 @@ class Release:  # noqa: D101
         )
 
 
+def _parse_release_nodes(owner: str, repo_name: str, nodes: list[dict]) -> list[Release]:
+    """
+    Build a list of `Release` instances from the provided release nodes.
+
+    NOTE: Releases are sorted in version order, descending.
+
+    NOTE: If a release's tag cannot be parsed by `packaging.version` it is skipped.
+    """
+    releases = []
+    for r in nodes:
+        try:
+            releases.append(Release.from_node(r))
+        except InvalidVersion:
+            print(f"{owner}/{repo_name}: Could not parse version '{r["tagName"]}', skipping...")
+
+    releases.sort(key=operator.attrgetter("ver"), reverse=True)
+    return releases
+
+
 async def fetch_releases(
-    session: AsyncClientSession,
+    session: "AsyncClientSession",
     owner: str,
     repo_name: str,
     n_latest: int = 5,
@@ -140,19 +457,606 @@ async def fetch_releases(
 
     NOTE: If a release's tag cannot be parsed by `packaging.version` it is skipped.
     """
-    if not TOK:
-        raise RuntimeError("No API token available")
+    _check_token(session)
+
+    from gql import gql
 
     query = gql(RELEASE_QUERY)
     query.variable_values = {"owner": owner, "repo": repo_name, "n_latest": n_latest}
 
+    with trace.span("fetch_releases", "github", key=f"{owner}/{repo_name}"):
+        result = await session.execute(query)
+    return _parse_release_nodes(owner, repo_name, result["repository"]["releases"]["nodes"])
+
+
+RELEASE_BATCH_SELECTION = """
+    r{idx}: repository(owner: $owner_{idx}, name: $repo_{idx}) {{
+        releases(
+            orderBy: {{field: CREATED_AT, direction: DESC}}, first: $n_latest, after: $cursor_{idx}
+        ) {{
+            pageInfo {{
+                hasNextPage
+                endCursor
+            }}
+            nodes {{
+                tagName
+                isPrerelease
+                publishedAt
+                url
+                tagCommit {{ oid }}
+            }}
+        }}
+    }}
+"""
+
+LATEST_TAG_BATCH_SELECTION = """
+    l{idx}: repository(owner: $owner_{idx}, name: $repo_{idx}) {{
+        refs(
+            refPrefix: "refs/tags/",
+            first: $n_latest,
+            after: $cursor_{idx},
+            orderBy: {{field: TAG_COMMIT_DATE, direction: DESC}}
+        ) {{
+            pageInfo {{
+                hasNextPage
+                endCursor
+            }}
+            nodes {{
+                name
+                target {{
+                    ... on Commit {{ oid committedDate }}
+                    ... on Tag {{
+                        target {{
+                            ... on Commit {{ oid committedDate }}
+                        }}
+                    }}
+                }}
+            }}
+        }}
+    }}
+"""
+
+# Only the newest stable version is needed, so pages are kept small & only followed if a page has
+# no stable releases (or tags) at all. Pages are ordered by creation date, so they must still be
+# deep enough that a few backport releases cut after a new major don't push it off the first page
+DEFAULT_RELEASE_PAGE_SIZE = 5
+DEFAULT_MAX_RELEASE_PAGES = 5
+
+
+def _build_batch_query(
+    operation: str,
+    selection: str,
+    item_variables: str,
+    n_items: int,
+    shared_variables: t.Sequence[str] = (),
+) -> str:
+    """
+    Build a query document containing `n_items` aliased copies of the provided selection.
+
+    `selection` and `item_variables` are formatted with each item's `idx`, allowing each copy to be
+    aliased & parameterized by its own variables. `shared_variables` are declared once. The query's
+    rate limit status is also selected, see `RateLimitScheduler`.
+    """
+    if n_items < 1:
+        raise ValueError(f"Must query at least one item, received: {n_items}")
+
+    variables = list(shared_variables)
+    selections = []
+    for idx in range(n_items):
+        variables.append(item_variables.format(idx=idx))
+        selections.append(selection.format(idx=idx))
+
+    selections.append(RATE_LIMIT_SELECTION)
+
+    variable_defs = ", ".join(variables)
+    selection_set = "".join(selections)
+    return f"query {operation}({variable_defs}) {{{selection_set}}}"
+
+
+async def _execute_partial(session: "AsyncClientSession", query: "GraphQLRequest") -> dict:
+    """
+    Execute the provided query, salvaging partial data if the query returns errors.
+
+    Batched queries report unresolvable selections (e.g. a deleted or renamed repository) as errors
+    alongside the rest of the data, so we only raise if there's nothing to salvage.
+    """
+    from gql.transport.exceptions import TransportQueryError
+
+    try:
+        result: dict = await session.execute(query)
+    except TransportQueryError as e:
+        if e.data is None:
+            raise
+
+        for err in e.errors or []:
+            print(f"Partial query failure: {err.get("message", err)}")
+
+        partial: dict = e.data
+        return partial
+
+    return result
+
+
+def build_release_batch_query(n_repos: int) -> str:
+    """
+    Build a release query document for `n_repos` repositories.
+
+    Each repository is selected using an aliased `repository` field, `r<idx>`, parameterized by
+    its own `$owner_<idx>`, `$repo_<idx>`, and `$cursor_<idx>` variables, so each repository's
+    releases can be paged independently.
+    """
+    return _build_batch_query(
+        operation="GetLatestReleasesBatch",
+        selection=RELEASE_BATCH_SELECTION,
+        item_variables="$owner_{idx}: String!, $repo_{idx}: String!, $cursor_{idx}: String",
+        n_items=n_repos,
+        shared_variables=("$n_latest: Int!",),
+    )
+
+
+def build_latest_tag_batch_query(n_repos: int) -> str:
+    """
+    Build a tag query document for `n_repos` repositories, see `build_release_batch_query`.
+
+    Each repository is selected using an aliased `repository` field, `l<idx>`.
+    """
+    return _build_batch_query(
+        operation="GetLatestTagsBatch",
+        selection=LATEST_TAG_BATCH_SELECTION,
+        item_variables="$owner_{idx}: String!, $repo_{idx}: String!, $cursor_{idx}: String",
+        n_items=n_repos,
+        shared_variables=("$n_latest: Int!",),
+    )
+
+
+def _stable_release_nodes(owner: str, repo_name: str, nodes: list[dict]) -> list[Release]:
+    releases = _parse_release_nodes(
+        owner, repo_name, [node for node in nodes if not node.get("isPrerelease", False)]
+    )
+
+    # Tags may still carry a pre-release version, even if the release isn't marked as one
+    return [release for release in releases if not release.ver.is_prerelease]
+
+
+def _stable_tag_nodes(owner: str, repo_name: str, nodes: list[dict]) -> list[Release]:
+    """
+    Build a list of `Release` instances from the provided tag ref nodes, see `_index_tag_nodes`.
+
+    Tags have no release page or publish date, so releases link to the tag's tree & are dated by the
+    tagged commit.
+
+    NOTE: Releases are sorted in version order, descending.
+
+    NOTE: Tags that cannot be parsed by `packaging.version`, or that are pre-releases, are silently
+    skipped.
+    """
     releases = []
-    result = await session.execute(query)
-    for r in result["repository"]["releases"]["nodes"]:
+    for node in nodes:
+        target = node["target"] or {}
+        commit = target.get("target") or target
+        if commit.get("oid") is None or commit.get("committedDate") is None:
+            continue
+
         try:
-            releases.append(Release.from_node(r))
+            ver = Version(node["name"].removeprefix("v"))
         except InvalidVersion:
-            print(f"{owner}/{repo_name}: Could not parse version '{r["tagName"]}', skipping...")
+            continue
+
+        if ver.is_prerelease:
+            continue
+
+        releases.append(
+            Release(
+                ver=ver,
+                published=dt.datetime.fromisoformat(commit["committedDate"]),
+                url=f"https://github.com/{owner}/{repo_name}/tree/{node["name"]}",
+                tag_hash=commit["oid"],
+            )
+        )
 
     releases.sort(key=operator.attrgetter("ver"), reverse=True)
     return releases
+
+
+async def _page_latest(
+    session: "AsyncClientSession",
+    repos: t.Sequence[tuple[str, str]],
+    n_latest: int,
+    max_pages: int,
+    tags: bool,
+) -> dict[tuple[str, str], list[Release] | None]:
+    """
+    Page through the releases (or tags) of each `(owner, repo)` until a stable version is found.
+
+    Each query pages through every repository that hasn't found a stable version yet & still has
+    pages remaining, for up to `max_pages` pages. Repositories are resolved by the first page with
+    any stable versions, and map to that page's stable versions; repositories without any map to an
+    empty list, and unresolvable repositories map to `None`.
+    """
+    if tags:
+        build_query, prefix, parse_nodes = build_latest_tag_batch_query, "l", _stable_tag_nodes
+        connection, span_name = "refs", "fetch_latest_tags_batch"
+    else:
+        build_query, prefix, parse_nodes = build_release_batch_query, "r", _stable_release_nodes
+        connection, span_name = "releases", "fetch_releases_batch"
+
+    from gql import gql
+
+    latest: dict[tuple[str, str], list[Release] | None] = {key: [] for key in repos}
+    cursors: dict[tuple[str, str], str | None] = dict.fromkeys(latest)
+    for _ in range(max_pages):
+        batch = list(cursors.items())
+        query = gql(build_query(len(batch)))
+        query.variable_values = {"n_latest": n_latest}
+        for idx, ((owner, repo_name), cursor) in enumerate(batch):
+            query.variable_values[f"owner_{idx}"] = owner
+            query.variable_values[f"repo_{idx}"] = repo_name
+            query.variable_values[f"cursor_{idx}"] = cursor
+
+        with trace.span(span_name, "github", keys=[key for key, _ in batch]):
+            result = await _execute_partial(session, query)
+
+        cursors = {}
+        for idx, (key, _) in enumerate(batch):
+            repo_result = result.get(f"{prefix}{idx}")
+            if repo_result is None:
+                latest[key] = None
+                continue
+
+            nodes = repo_result[connection] or {}
+            latest[key] = parse_nodes(*key, nodes.get("nodes", []))
+
+            page_info = nodes.get("pageInfo") or {}
+            if not latest[key] and page_info.get("hasNextPage", False):
+                cursors[key] = page_info["endCursor"]
+
+        if not cursors:
+            break
+
+    return latest
+
+
+async def fetch_releases_batch(
+    session: "AsyncClientSession",
+    repos: t.Sequence[tuple[str, str]],
+    n_latest: int = DEFAULT_RELEASE_PAGE_SIZE,
+    max_pages: int = DEFAULT_MAX_RELEASE_PAGES,
+) -> dict[tuple[str, str], list[Release] | None]:
+    """
+    Fetch the latest stable releases for each `(owner, repo)` using batched GH queries.
+
+    Releases are fetched newest first, in pages of `n_latest`, and only the fields needed to build
+    a `Release` are requested. Further pages are only fetched for repositories whose page had no
+    stable release, for up to `max_pages` pages. Repositories without any stable releases (e.g.
+    actions that only publish tags) fall back to paging through their tags in the same manner.
+
+    The return is a dictionary keyed by `(owner, repo)`, in the order of the provided repos, of the
+    stable releases on the first page that had any. If a repository could not be resolved (e.g. it
+    has been deleted or renamed), its value is `None` rather than failing the whole batch; if
+    neither its releases nor its tags have a stable version, its value is empty.
+
+    NOTE: Releases are sorted in version order, descending.
+
+    NOTE: Pre-releases, and releases whose tag cannot be parsed by `packaging.version`, are skipped.
+    """
+    _check_token(session)
+    if max_pages < 1:
+        raise ValueError(f"Must fetch at least one page, received: {max_pages}")
+
+    releases = await _page_latest(session, repos, n_latest, max_pages, tags=False)
+
+    no_releases = [key for key, repo_releases in releases.items() if repo_releases == []]
+    if no_releases:
+        releases.update(await _page_latest(session, no_releases, n_latest, max_pages, tags=True))
+
+    return releases
+
+
+TAG_INDEX_BATCH_SELECTION = """
+    t{idx}: repository(owner: $owner_{idx}, name: $repo_{idx}) {{
+        refs(
+            refPrefix: "refs/tags/",
+            first: $page_size,
+            after: $cursor_{idx},
+            orderBy: {{field: TAG_COMMIT_DATE, direction: DESC}}
+        ) {{
+            pageInfo {{
+                hasNextPage
+                endCursor
+            }}
+            nodes {{
+                name
+                target {{
+                    ... on Commit {{ oid }}
+                    ... on Tag {{
+                        oid
+                        target {{
+                            ... on Commit {{ oid }}
+                        }}
+                    }}
+                }}
+            }}
+        }}
+    }}
+"""
+
+# Tags are paged newest first, so only SHAs pinned to one of the most recent tags are resolved
+DEFAULT_TAG_PAGE_SIZE = 100
+DEFAULT_MAX_TAG_PAGES = 5
+
+type TAG_INDEX_T = dict[str, Version]
+
+
+def build_tag_index_batch_query(n_repos: int) -> str:
+    """
+    Build a tag query document for `n_repos` repositories.
+
+    Each repository is selected using an aliased `repository` field, `t<idx>`, parameterized by
+    its own `$owner_<idx>`, `$repo_<idx>`, and `$cursor_<idx>` variables, so each repository's tags
+    can be paged independently.
+    """
+    return _build_batch_query(
+        operation="GetTagIndexesBatch",
+        selection=TAG_INDEX_BATCH_SELECTION,
+        item_variables="$owner_{idx}: String!, $repo_{idx}: String!, $cursor_{idx}: String",
+        n_items=n_repos,
+        shared_variables=("$page_size: Int!",),
+    )
+
+
+def _index_tag_nodes(tag_index: TAG_INDEX_T, nodes: list[dict]) -> None:
+    """
+    Add the commit SHA of each of the provided tag ref nodes to `tag_index`, mapped to its version.
+
+    Annotated tags are peeled to the commit they point to. If multiple tags point to the same commit
+    (e.g. `v5` and `v5.0.0`), the highest version is kept.
+
+    NOTE: Tags that cannot be parsed by `packaging.version` are silently skipped, repositories often
+    carry plenty of tags that aren't releases.
+    """
+    for node in nodes:
+        target = node["target"] or {}
+        sha = (target.get("target") or target).get("oid")
+        if sha is None:
+            continue
+
+        try:
+            ver = Version(node["name"].removeprefix("v"))
+        except InvalidVersion:
+            continue
+
+        if sha not in tag_index or tag_index[sha] < ver:
+            tag_index[sha] = ver
+
+
+async def fetch_tag_indexes_batch(
+    session: "AsyncClientSession",
+    repos: t.Sequence[tuple[str, str]],
+    page_size: int = DEFAULT_TAG_PAGE_SIZE,
+    max_pages: int = DEFAULT_MAX_TAG_PAGES,
+) -> dict[tuple[str, str], TAG_INDEX_T | None]:
+    """
+    Build an index of commit SHA to tagged version for each `(owner, repo)` using batched queries.
+
+    Tags are fetched newest first, in pages of `page_size`, for up to `max_pages` pages per
+    repository. Each query pages through every repository that still has tags remaining, so the
+    number of queries is bounded by the number of pages rather than the number of repositories.
+
+    The return is a dictionary keyed by `(owner, repo)`, in the order of the provided repos. If a
+    repository could not be resolved (e.g. it has been deleted or renamed), its value is `None`
+    rather than failing the whole batch.
+
+    See `_index_tag_nodes` for details on how tags are indexed.
+    """
+    _check_token(session)
+    if max_pages < 1:
+        raise ValueError(f"Must fetch at least one page, received: {max_pages}")
+
+    from gql import gql
+
+    indexes: dict[tuple[str, str], TAG_INDEX_T | None] = {key: {} for key in repos}
+    cursors: dict[tuple[str, str], str | None] = dict.fromkeys(indexes)
+    for _ in range(max_pages):
+        batch = list(cursors.items())
+        query = gql(build_tag_index_batch_query(len(batch)))
+        query.variable_values = {"page_size": page_size}
+        for idx, ((owner, repo_name), cursor) in enumerate(batch):
+            query.variable_values[f"owner_{idx}"] = owner
+            query.variable_values[f"repo_{idx}"] = repo_name
+            query.variable_values[f"cursor_{idx}"] = cursor
+
+        with trace.span("fetch_tag_indexes_batch", "github", keys=[key for key, _ in batch]):
+            result = await _execute_partial(session, query)
+
+        cursors = {}
+        for idx, (key, _) in enumerate(batch):
+            repo_result = result.get(f"t{idx}")
+            tag_index = indexes[key]
+            if repo_result is None or tag_index is None:
+                indexes[key] = None
+                continue
+
+            refs = repo_result["refs"]
+            if refs is None:
+                continue
+
+            _index_tag_nodes(tag_index, refs["nodes"])
+            if refs["pageInfo"]["hasNextPage"]:
+                cursors[key] = refs["pageInfo"]["endCursor"]
+
+        if not cursors:
+            break
+
+    return indexes
+
+
+WORKFLOW_BATCH_SELECTION = """
+    w{idx}: repository(owner: $owner_{idx}, name: $repo_{idx}) {{
+        object(expression: $target_{idx}) {{
+            ... on Tree {{
+                entries {{
+                    name
+                    object {{
+                        ... on Blob {{
+                        text
+                        }}
+                    }}
+                }}
+            }}
+        }}
+    }}
+"""
+
+# Each target may pull down every workflow file in its tree, so keep batches fairly small to stay
+# well clear of GH's node & query complexity limits
+DEFAULT_WORKFLOW_BATCH_SIZE = 10
+
+
+class WorkflowTarget(t.NamedTuple):  # noqa: D101
+    owner: str
+    repo: str
+    ref: str = "main"
+    root: str = ".github/workflows/"
+
+
+def build_workflow_batch_query(n_targets: int) -> str:
+    """
+    Build a workflow query document for `n_targets` repository trees.
+
+    Each target is selected using an aliased `repository` field, `w<idx>`, parameterized by its own
+    `$owner_<idx>`, `$repo_<idx>`, and `$target_<idx>` variables.
+    """
+    return _build_batch_query(
+        operation="GetWorkflowsBatch",
+        selection=WORKFLOW_BATCH_SELECTION,
+        item_variables="$owner_{idx}: String!, $repo_{idx}: String!, $target_{idx}: String!",
+        n_items=n_targets,
+    )
+
+
+async def fetch_workflows_batch(
+    session: "AsyncClientSession",
+    targets: t.Sequence[WorkflowTarget],
+    batch_size: int = DEFAULT_WORKFLOW_BATCH_SIZE,
+) -> t.AsyncIterator[tuple[WorkflowTarget, WORKFLOW_T | None]]:
+    """
+    Fetch all workflow files for each of the provided targets using GH's GraphQL API.
+
+    Targets are fetched using batched queries of up to `batch_size` targets each, and results are
+    yielded as `(target, workflows)` pairs, in the order of the provided targets, as each batch
+    completes. Workflows are a dictionary of <filename>:<file contents> items, as returned by
+    `fetch_workflows`.
+
+    If a target's repository could not be resolved (e.g. it has been deleted or renamed), its
+    workflows are `None` rather than failing the whole batch. If the repository was resolved but the
+    ref or workflow root does not exist, its workflows are empty.
+    """
+    _check_token(session)
+    if batch_size < 1:
+        raise ValueError(f"Batch size must be at least 1, received: {batch_size}")
+
+    from gql import gql
+
+    start = 0
+    while start < len(targets):
+        # Shrink batches if we're running low on rate limit budget
+        batch = targets[start : start + suggest_batch_size(session, batch_size)]
+        start += len(batch)
+
+        query = gql(build_workflow_batch_query(len(batch)))
+        query.variable_values = {}
+        for idx, target in enumerate(batch):
+            query.variable_values[f"owner_{idx}"] = target.owner
+            query.variable_values[f"repo_{idx}"] = target.repo
+            query.variable_values[f"target_{idx}"] = f"{target.ref}:{target.root}"
+
+        with trace.span("fetch_workflows_batch", "github", targets=batch):
+            result = await _execute_partial(session, query)
+        for idx, target in enumerate(batch):
+            repo_result = result.get(f"w{idx}")
+            if repo_result is None:
+                yield target, None
+            else:
+                yield target, _parse_workflow_tree(repo_result["object"])
+
+
+FILE_BATCH_SELECTION = """
+    f{idx}: repository(owner: $owner_{idx}, name: $repo_{idx}) {{
+        object(expression: $target_{idx}) {{
+            ... on Blob {{
+                text
+            }}
+        }}
+    }}
+"""
+
+
+# Each target is a single file, so batches can be larger than when fetching workflow trees
+DEFAULT_FILE_BATCH_SIZE = 50
+
+
+class FileTarget(t.NamedTuple):  # noqa: D101
+    owner: str
+    repo: str
+    ref: str
+    path: str
+
+
+def build_file_batch_query(n_targets: int) -> str:
+    """
+    Build a file query document for `n_targets` repository files.
+
+    Each target is selected using an aliased `repository` field, `f<idx>`, parameterized by its own
+    `$owner_<idx>`, `$repo_<idx>`, and `$target_<idx>` variables.
+    """
+    return _build_batch_query(
+        operation="GetFilesBatch",
+        selection=FILE_BATCH_SELECTION,
+        item_variables="$owner_{idx}: String!, $repo_{idx}: String!, $target_{idx}: String!",
+        n_items=n_targets,
+    )
+
+
+async def fetch_files_batch(
+    session: "AsyncClientSession",
+    targets: t.Sequence[FileTarget],
+    batch_size: int = DEFAULT_FILE_BATCH_SIZE,
+) -> dict[FileTarget, str | None]:
+    """
+    Fetch the contents of each of the provided repository files using batched GH queries.
+
+    Targets are fetched using batched queries of up to `batch_size` targets each. The return is a
+    dictionary keyed by target, in the order of the provided targets. If a target could not be
+    resolved (e.g. its repository, ref, or file does not exist, or it's not a file), its contents
+    are `None` rather than failing the whole batch.
+    """
+    _check_token(session)
+    if batch_size < 1:
+        raise ValueError(f"Batch size must be at least 1, received: {batch_size}")
+
+    from gql import gql
+
+    files: dict[FileTarget, str | None] = {}
+    start = 0
+    while start < len(targets):
+        # Shrink batches if we're running low on rate limit budget
+        batch = targets[start : start + suggest_batch_size(session, batch_size)]
+        start += len(batch)
+
+        query = gql(build_file_batch_query(len(batch)))
+        query.variable_values = {}
+        for idx, target in enumerate(batch):
+            query.variable_values[f"owner_{idx}"] = target.owner
+            query.variable_values[f"repo_{idx}"] = target.repo
+            query.variable_values[f"target_{idx}"] = f"{target.ref}:{target.path}"
+
+        with trace.span("fetch_files_batch", "github", targets=batch):
+            result = await _execute_partial(session, query)
+        for idx, target in enumerate(batch):
+            repo_result = result.get(f"f{idx}")
+            if repo_result is None or repo_result["object"] is None:
+                files[target] = None
+            else:
+                files[target] = repo_result["object"].get("text")
+
+    return files
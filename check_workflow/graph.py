@@ -0,0 +1,339 @@
+import asyncio
+import posixpath
+import typing as t
+from pathlib import Path
+
+from check_workflow import trace
+from check_workflow.gh_api import FileTarget, fetch_files_batch
+from check_workflow.scheduler import suggest_batch_size
+from check_workflow.workflow import (
+    JobDependency,
+    UsesSpec,
+    WORKFLOW_SUFFIXES,
+    is_versioned,
+)
+
+if t.TYPE_CHECKING:
+    from gql.client import AsyncClientSession
+
+    from check_workflow.extract import RawStep
+
+# GH allows reusable workflows & composite actions to be nested up to 10 levels deep
+DEFAULT_MAX_DEPTH = 10
+DEFAULT_DEFINITION_BATCH_SIZE = 25
+
+ACTION_FILENAMES = ("action.yml", "action.yaml")
+
+
+class RepositoryRef(t.NamedTuple):  # noqa: D101
+    owner: str
+    repo: str
+    ref: str
+
+
+class DefinitionRef(t.NamedTuple):
+    """
+    Location of a remote reusable workflow or action definition.
+
+    Definitions are reusable workflow files if `path` has a workflow suffix, otherwise `path` is the
+    directory containing an action's metadata file (`action.yml` or `action.yaml`); the repository
+    root is an empty `path`.
+    """
+
+    owner: str
+    repo: str
+    path: str
+    ref: str
+
+    @classmethod
+    def from_raw(cls, raw_uses: str) -> t.Self:
+        """Build a `DefinitionRef` from an `<owner>/<repo>[/<path>]@<ref>` specification."""
+        action, ref = raw_uses.split("@", maxsplit=1)
+        owner, repo, *path = action.split("/")
+        return cls(owner=owner, repo=repo, path="/".join(path), ref=ref)
+
+    def __str__(self) -> str:
+        action = "/".join(filter(None, (self.owner, self.repo, self.path)))
+        return f"{action}@{self.ref}"
+
+    @property
+    def repository(self) -> RepositoryRef:  # noqa: D102
+        return RepositoryRef(owner=self.owner, repo=self.repo, ref=self.ref)
+
+    @property
+    def is_workflow(self) -> bool:  # noqa: D102
+        return posixpath.splitext(self.path)[1].lower() in WORKFLOW_SUFFIXES
+
+    def candidates(self) -> list[FileTarget]:
+        """Build the targets of the files that may hold the definition, in order of preference."""
+        if self.is_workflow:
+            return [FileTarget(owner=self.owner, repo=self.repo, ref=self.ref, path=self.path)]
+
+        return [
+            FileTarget(
+                owner=self.owner, repo=self.repo, ref=self.ref, path=posixpath.join(self.path, name)
+            )
+            for name in ACTION_FILENAMES
+        ]
+
+
+# Local definitions are keyed by their resolved path on disk
+type DEFINITION_KEY_T = DefinitionRef | Path
+type BASE_T = RepositoryRef | Path
+
+
+def local_repository_root(workflow_path: Path) -> Path:
+    """
+    Return the repository root that local references in the provided workflow file resolve against.
+
+    Workflows within a `.github/workflows` directory resolve against the directory containing
+    `.github`, as GH does; other workflow files resolve against their own directory.
+    """
+    workflow_dir = workflow_path.resolve().parent
+    if workflow_dir.name == "workflows" and workflow_dir.parent.name == ".github":
+        return workflow_dir.parent.parent
+
+    return workflow_dir
+
+
+def _resolve_path(path: Path) -> Path:
+    return path.resolve()
+
+
+def _parse_definition(raw_definition: str, is_workflow: bool) -> list["RawStep"]:
+    from check_workflow.extract import load_action_steps, scan_steps
+
+    if is_workflow:
+        return scan_steps(raw_definition)
+    else:
+        return load_action_steps(raw_definition)
+
+
+def _read_local_definition(path: Path) -> tuple[str, bool] | None:
+    if path.suffix.lower() in WORKFLOW_SUFFIXES:
+        return (path.read_text(), True) if path.is_file() else None
+
+    for name in ACTION_FILENAMES:
+        if (path / name).is_file():
+            return (path / name).read_text(), False
+
+    return None
+
+
+class DependencyGraph:
+    """
+    Recursively expand dependencies with those of the reusable workflows & composite actions used.
+
+    Job-level reusable workflow calls (`jobs.<job>.uses`) and composite actions (`runs.steps` of an
+    `action.yml`) are both followed, whether they're local (`./path`) or remote. Local references
+    resolve against the repository of the definition they're made from, so local references within
+    a remote definition are fetched from the same repository & ref.
+
+    Remote definitions requested within the same event loop iteration are collected and fetched
+    using batched queries of up to `batch_size` definitions each, and every definition is fetched &
+    parsed at most once for the lifetime of the instance, regardless of how many workflows use it.
+
+    Transitive dependencies are attributed to the job of the workflow that (indirectly) uses them,
+    with the chain of definitions they were reached through as their `via`. Definitions are followed
+    up to `max_depth` levels deep; cycles are reported & not followed.
+
+    NOTE: Definitions that can't be found or parsed are treated as having no dependencies.
+    """
+
+    def __init__(
+        self,
+        session: "AsyncClientSession",
+        batch_size: int = DEFAULT_DEFINITION_BATCH_SIZE,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError(f"Batch size must be at least 1, received: {batch_size}")
+
+        self.session = session
+        self.batch_size = batch_size
+        self.max_depth = max_depth
+
+        self._definitions: dict[DEFINITION_KEY_T, asyncio.Future[list["RawStep"]]] = {}
+        self._pending: list[DefinitionRef] = []
+        self._flush_handle: asyncio.Handle | None = None
+        self._batch_tasks: set[asyncio.Task[None]] = set()
+
+    def definition(self, key: DEFINITION_KEY_T) -> asyncio.Future[list["RawStep"]]:
+        """
+        Return the lookup future for the steps of the provided definition.
+
+        If a lookup for the definition has already been started, its future is returned rather than
+        fetching it again.
+        """
+        if key not in self._definitions:
+            loop = asyncio.get_running_loop()
+            lookup = self._definitions[key] = loop.create_future()
+
+            if isinstance(key, Path):
+                lookup.set_result(self._load_local(key))
+            else:
+                self._pending.append(key)
+
+                # Defer dispatch so definitions requested in the same loop iteration share a batch
+                if self._flush_handle is None:
+                    self._flush_handle = loop.call_soon(self._flush)
+
+        return self._definitions[key]
+
+    async def expand(
+        self,
+        steps: t.Sequence["RawStep"],
+        base: BASE_T,
+        source: DEFINITION_KEY_T | None = None,
+    ) -> list[JobDependency]:
+        """
+        Build the direct & transitive dependencies of the provided workflow steps.
+
+        Local references are resolved against `base`, the repository the steps were defined in,
+        either on disk or remote. If the steps' own definition is provided as `source`, references
+        back to it are reported as cycles.
+
+        Direct dependencies match those of `extract_workflow_dependencies`, each followed by its own
+        transitive dependencies.
+        """
+        return await self._expand(steps, base, job=None, via=(), stack=(source,))
+
+    async def expand_local(
+        self, workflow_path: Path, steps: t.Sequence["RawStep"]
+    ) -> list[JobDependency]:
+        """Build the dependencies of the provided local workflow file's steps, see `expand`."""
+        source = _resolve_path(workflow_path)
+        return await self.expand(steps, base=local_repository_root(source), source=source)
+
+    async def expand_remote(
+        self, repository: RepositoryRef, root: str, wf_name: str, raw_workflow: str
+    ) -> list[JobDependency]:
+        """
+        Build the dependencies of the provided remote workflow file, see `expand`.
+
+        The workflow is `wf_name` within the `root` directory of the provided repository.
+        """
+        from check_workflow.extract import scan_steps
+
+        source = DefinitionRef(
+            owner=repository.owner,
+            repo=repository.repo,
+            path=posixpath.join(root, wf_name),
+            ref=repository.ref,
+        )
+        return await self.expand(scan_steps(raw_workflow), base=repository, source=source)
+
+    def _resolve_key(self, raw_uses: str, base: BASE_T) -> DEFINITION_KEY_T | None:
+        if raw_uses.startswith("./"):
+            if isinstance(base, Path):
+                return (base / raw_uses).resolve()
+
+            path = posixpath.normpath(raw_uses).strip("/")
+            return DefinitionRef(owner=base.owner, repo=base.repo, path=path, ref=base.ref)
+        elif is_versioned(raw_uses):
+            return DefinitionRef.from_raw(raw_uses)
+
+        return None
+
+    async def _expand(
+        self,
+        steps: t.Sequence["RawStep"],
+        base: BASE_T,
+        job: str | None,
+        via: tuple[str, ...],
+        stack: tuple[DEFINITION_KEY_T | None, ...],
+    ) -> list[JobDependency]:
+        # Expand every step concurrently so their definitions are fetched in shared batches
+        expanded = await asyncio.gather(
+            *(self._expand_step(step, base, job, via, stack) for step in steps)
+        )
+        return [dep for step_deps in expanded for dep in step_deps]
+
+    async def _expand_step(
+        self,
+        step: "RawStep",
+        base: BASE_T,
+        job: str | None,
+        via: tuple[str, ...],
+        stack: tuple[DEFINITION_KEY_T | None, ...],
+    ) -> list[JobDependency]:
+        # Transitive dependencies belong to the job of the workflow that uses them
+        job = step.job if job is None else job
+
+        deps = []
+        if is_versioned(step.uses):
+            deps.append(
+                JobDependency(
+                    job=job, step_name=step.step_name, uses=UsesSpec.from_raw(step.uses), via=via
+                )
+            )
+
+        key = self._resolve_key(step.uses, base)
+        if key is None:
+            return deps
+
+        chain = " > ".join((*via, step.uses))
+        if key in stack:
+            print(f"{chain}: Dependency cycle detected, skipping...")
+            return deps
+        if len(via) >= self.max_depth:
+            print(f"{chain}: Maximum nesting depth ({self.max_depth}) reached, skipping...")
+            return deps
+
+        child_steps = await self.definition(key)
+        if child_steps:
+            child_base = base if isinstance(key, Path) else key.repository
+            deps.extend(
+                await self._expand(child_steps, child_base, job, (*via, step.uses), (*stack, key))
+            )
+
+        return deps
+
+    def _load_local(self, path: Path) -> list["RawStep"]:
+        try:
+            definition = _read_local_definition(path)
+            if definition is None:
+                return []
+
+            return _parse_definition(*definition)
+        except Exception as e:
+            print(f"{path}: Could not parse definition ({e!r}), skipping...")
+            return []
+
+    def _flush(self) -> None:
+        pending, self._pending = self._pending, []
+        self._flush_handle = None
+
+        # Shrink batches if we're running low on rate limit budget
+        batch_size = suggest_batch_size(self.session, self.batch_size)
+        for start in range(0, len(pending), batch_size):
+            task = asyncio.create_task(self._fetch_batch(pending[start : start + batch_size]))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _fetch_batch(self, keys: list[DefinitionRef]) -> None:
+        # Dependencies are still checked without their definitions, so failures are reported rather
+        # than failing the dependent workflows
+        targets = [target for key in keys for target in key.candidates()]
+        try:
+            files = await fetch_files_batch(session=self.session, targets=targets)
+        except Exception as e:
+            print(f"Could not fetch definitions, transitive dependencies will be skipped: {e}")
+            files = {}
+
+        for key in keys:
+            steps = []
+            with trace.span("parse_definition", "parse", key=f"{key}"):
+                for target in key.candidates():
+                    raw_definition = files.get(target)
+                    if raw_definition is None:
+                        continue
+
+                    try:
+                        steps = _parse_definition(raw_definition, key.is_workflow)
+                    except Exception as e:
+                        print(f"{key}: Could not parse definition ({e!r}), skipping...")
+
+                    break
+
+            self._definitions[key].set_result(steps)
@@ -0,0 +1,264 @@
+import asyncio
+import hashlib
+import json
+import time
+import typing as t
+from pathlib import Path
+
+from check_workflow import trace
+from check_workflow.cache import ReleaseCache, SQLiteStore, default_cache_dir
+from check_workflow.gh_api import Release, TAG_INDEX_T
+from check_workflow.local import LocalWorkflow, build_executor, try_parse
+from check_workflow.workflow import (
+    JobDependency,
+    OutdatedDep,
+    UsesSpec,
+    compatible_release,
+    is_outdated,
+)
+
+DEFAULT_MAX_ENTRIES = 20_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dependencies (
+    path TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    deps TEXT NOT NULL,
+    checked_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dependencies_checked_at ON dependencies (checked_at);
+"""
+
+type RELEASE_KEY_T = tuple[str, str]
+
+
+def file_digest(contents: bytes) -> str:
+    """Return the content hash of the provided workflow file contents."""
+    return hashlib.blake2b(contents, digest_size=16).hexdigest()
+
+
+def _dump_deps(deps: t.Iterable[JobDependency]) -> str:
+    return json.dumps(
+        [
+            (
+                dep.job,
+                dep.step_name,
+                dep.uses.owner,
+                dep.uses.repo,
+                None if dep.uses.spec is None else str(dep.uses.spec),
+                dep.uses.sha,
+            )
+            for dep in deps
+        ],
+        separators=(",", ":"),
+    )
+
+
+def _load_deps(dumped: str) -> list[JobDependency]:
+    deps = []
+    for job, step_name, owner, repo, spec, sha in json.loads(dumped):
+        # Specifiers are stored in their `~=` form, see `UsesSpec.from_raw`
+        uses = UsesSpec(
+            owner=owner,
+            repo=repo,
+            spec=None if spec is None else compatible_release(spec.removeprefix("~=")),
+            sha=sha,
+        )
+        deps.append(JobDependency(job=job, step_name=step_name, uses=uses))
+
+    return deps
+
+
+class DependencyCache(SQLiteStore):
+    """
+    Persistent, SQLite-backed store of the parsed dependencies of local workflow files.
+
+    Each file's dependencies are stored along with the content hash of the file they were parsed
+    from, keyed by the file's absolute path. Once the store grows past `max_entries`, the least
+    recently checked entries are evicted.
+
+    The store file may be safely shared between processes, see `SQLiteStore`.
+    """
+
+    def __init__(self, path: Path | None = None, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        if path is None:
+            path = default_cache_dir() / "dependencies.sqlite3"
+
+        super().__init__(path, SCHEMA)
+        self.max_entries = max_entries
+
+    def get_many(self, paths: t.Iterable[str]) -> dict[str, tuple[str, list[JobDependency]]]:
+        """Return the `(digest, dependencies)` stored for the provided paths; misses are omitted."""
+        stored = {}
+        for path in paths:
+            row = self._conn.execute(
+                "SELECT digest, deps FROM dependencies WHERE path = ?", (path,)
+            ).fetchone()
+
+            if row is not None:
+                digest, deps = row
+                stored[path] = (digest, _load_deps(deps))
+
+        return stored
+
+    def put_many(self, entries: t.Mapping[str, tuple[str, list[JobDependency]]]) -> None:
+        """Store the provided `(digest, dependencies)` by path, evicting entries if needed."""
+        checked_at = time.time()
+        rows = [
+            (path, digest, _dump_deps(deps), checked_at) for path, (digest, deps) in entries.items()
+        ]
+
+        with self._transaction():
+            self._conn.executemany("INSERT OR REPLACE INTO dependencies VALUES (?, ?, ?, ?)", rows)
+            self._conn.execute(
+                (
+                    "DELETE FROM dependencies WHERE rowid NOT IN "
+                    "(SELECT rowid FROM dependencies ORDER BY checked_at DESC LIMIT ?)"
+                ),
+                (self.max_entries,),
+            )
+
+
+async def parse_incremental(
+    workflows: t.Sequence[LocalWorkflow],
+    dep_cache: DependencyCache,
+    max_workers: int | None = None,
+) -> dict[LocalWorkflow, list[JobDependency]]:
+    """
+    Parse the dependencies of the provided local workflows, reusing those stored in `dep_cache`.
+
+    Only workflows whose contents have changed since they were stored are re-parsed, in a pool of up
+    to `max_workers` processes if there are enough of them (see `iter_local_reports`); newly parsed
+    dependencies are written back to `dep_cache`.
+
+    NOTE: Workflows that can't be read or parsed are skipped, and are not stored.
+    """
+    # Only check each file once if roots overlap
+    by_path = {str(workflow.path.resolve()): workflow for workflow in workflows}
+
+    digests = {}
+    for path, workflow in by_path.items():
+        try:
+            digests[path] = file_digest(workflow.path.read_bytes())
+        except OSError as e:
+            print(f"{workflow.path}: Could not read workflow ({e!r}), skipping...")
+
+    with trace.span("dependency_cache_get", "cache") as span:
+        stored = dep_cache.get_many(digests)
+        changed = [path for path, digest in digests.items() if stored.get(path, ("",))[0] != digest]
+        span.set(cache_hits=len(digests) - len(changed), cache_misses=len(changed))
+
+    parsed = {path: stored[path][1] for path in digests.keys() - set(changed)}
+    if changed:
+        executor = build_executor(len(changed), max_workers)
+        try:
+            results = await asyncio.gather(
+                *(try_parse(by_path[path], executor) for path in changed)
+            )
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+        updated = {}
+        for path, deps in zip(changed, results, strict=True):
+            if deps is not None:
+                parsed[path] = deps
+                updated[path] = (digests[path], deps)
+
+        with trace.span("dependency_cache_put", "cache"):
+            dep_cache.put_many(updated)
+
+    return {by_path[path]: parsed[path] for path in by_path if path in parsed}
+
+
+def cached_releases(
+    keys: t.Iterable[RELEASE_KEY_T], release_cache: ReleaseCache | None
+) -> tuple[dict[RELEASE_KEY_T, Release | None], list[RELEASE_KEY_T]]:
+    """
+    Look up the latest releases for the provided keys in `release_cache`.
+
+    The return is a tuple of the fresh cached releases, along with the keys whose releases are
+    missing or have expired. If no cache is provided, all keys are missing.
+    """
+    unique_keys = list(dict.fromkeys(keys))
+    if release_cache is None:
+        return {}, unique_keys
+
+    with trace.span("release_cache_get", "cache") as span:
+        releases: dict[RELEASE_KEY_T, Release | None] = dict(release_cache.get_many(unique_keys))
+        span.set(cache_hits=len(releases), cache_misses=len(unique_keys) - len(releases))
+
+    return releases, [key for key in unique_keys if key not in releases]
+
+
+async def report_incremental(
+    workflows: t.Sequence[LocalWorkflow],
+    dep_cache: DependencyCache,
+    resolve: t.Callable[
+        [list[RELEASE_KEY_T]], t.Awaitable[t.Mapping[RELEASE_KEY_T, Release | None]]
+    ],
+    release_cache: ReleaseCache | None = None,
+    refresh: bool = False,
+    max_workers: int | None = None,
+    resolve_tags: (
+        t.Callable[[list[RELEASE_KEY_T]], t.Awaitable[t.Mapping[RELEASE_KEY_T, TAG_INDEX_T]]] | None
+    ) = None,
+) -> dict[Path, dict[str, list[OutdatedDep]]]:
+    """
+    Incrementally check the provided local workflows for outdated dependencies.
+
+    Only workflows that have changed since the last incremental check are re-parsed, see
+    `parse_incremental`. Fresh releases are taken from `release_cache`, unless `refresh` is `True`,
+    and only the missing or expired releases are passed to `resolve` to be looked up, e.g. using
+    `ReleaseResolver.resolve`; if every release is fresh, `resolve` is not called, so the check
+    requires no network access at all.
+
+    If `resolve_tags` is provided, tag indexes for SHA pinned dependencies are looked up in the same
+    manner, e.g. using `ReleaseResolver.resolve_tag_indexes`, so pinned SHAs can be resolved to
+    their tagged version.
+
+    The return matches `report_local_outdated`.
+    """
+    parsed = await parse_incremental(workflows, dep_cache, max_workers)
+
+    keys = ((dep.uses.owner, dep.uses.repo) for deps in parsed.values() for dep in deps)
+    releases, missing = cached_releases(keys, None if refresh else release_cache)
+    if missing:
+        releases.update(await resolve(missing))
+
+    tag_indexes: dict[RELEASE_KEY_T, TAG_INDEX_T] = {}
+    if resolve_tags is not None:
+        pinned_keys = list(
+            dict.fromkeys(
+                (dep.uses.owner, dep.uses.repo)
+                for deps in parsed.values()
+                for dep in deps
+                if dep.uses.sha is not None
+            )
+        )
+        if release_cache is not None and not refresh:
+            tag_indexes = release_cache.get_tag_indexes(pinned_keys)
+
+        missing = [key for key in pinned_keys if key not in tag_indexes]
+        if missing:
+            tag_indexes.update(await resolve_tags(missing))
+
+    collected: dict[Path, dict[str, list[OutdatedDep]]] = {}
+    for workflow, deps in parsed.items():
+        wf_outdated = []
+        for dep in deps:
+            key = (dep.uses.owner, dep.uses.repo)
+            latest = releases.get(key)
+            pinned = None if dep.uses.sha is None else tag_indexes.get(key, {}).get(dep.uses.sha)
+            if latest is not None and is_outdated(dep, latest, pinned):
+                wf_outdated.append(OutdatedDep(spec=dep, latest=latest, pinned=pinned))
+
+        if wf_outdated:
+            collected.setdefault(workflow.root, {})[workflow.name] = wf_outdated
+
+    outdated = {}
+    for root in dict.fromkeys(workflow.root for workflow in workflows):
+        if root in collected:
+            outdated[root] = dict(sorted(collected[root].items()))
+
+    return outdated
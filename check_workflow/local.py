@@ -0,0 +1,254 @@
+import asyncio
+import os
+import typing as t
+from concurrent.futures import Executor
+from pathlib import Path
+
+from check_workflow import trace
+from check_workflow.resolve import ReleaseResolver
+from check_workflow.workflow import (
+    JobDependency,
+    OutdatedDep,
+    WORKFLOW_SUFFIXES,
+    extract_workflow_dependencies,
+    iter_dependency_reports,
+)
+
+if t.TYPE_CHECKING:
+    from check_workflow.extract import RawStep
+    from check_workflow.graph import DependencyGraph
+
+# Directories that never contain workflows we care about, but can be expensive to walk
+SKIP_DIRS = frozenset((".git", ".hg", ".tox", ".venv", "__pycache__", "node_modules", "venv"))
+
+# Below this many workflow files, starting a process pool costs more than it saves
+MIN_POOL_FILES = 32
+
+
+class LocalWorkflow(t.NamedTuple):  # noqa: D101
+    root: Path
+    path: Path
+
+    @property
+    def name(self) -> str:
+        """Workflow path, relative to its root."""
+        return self.path.relative_to(self.root).as_posix()
+
+
+def _workflow_files(directory: Path) -> list[Path]:
+    return sorted(
+        path
+        for path in directory.iterdir()
+        if path.suffix.lower() in WORKFLOW_SUFFIXES and path.is_file()
+    )
+
+
+def discover_workflows(root: Path) -> list[LocalWorkflow]:
+    """
+    Recursively discover the workflow files (`*.yml` or `*.yaml`) beneath the provided root.
+
+    The contents of every `.github/workflows` directory nested anywhere beneath the root are
+    included, e.g. the workflows of each repository checked out into a shared directory.
+    Directories that can't contain workflows of interest, such as `.git` or `node_modules`, are not
+    searched.
+
+    Files directly within the root are only included if the root is itself a workflows directory:
+    either a `.github/workflows` directory, or a directory without any nested workflow directories.
+    Otherwise they're likely other configuration, e.g. a repository's `.pre-commit-config.yaml`.
+
+    If the root is not a directory, no workflows are discovered.
+    """
+    if not root.is_dir():
+        return []
+
+    nested = []
+    for dirpath, dirnames, _ in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+
+        parent = Path(dirpath)
+        if parent.name == ".github" and "workflows" in dirnames:
+            nested.extend(_workflow_files(parent / "workflows"))
+
+    resolved = root.resolve()
+    paths = nested
+    if not nested or (resolved.name == "workflows" and resolved.parent.name == ".github"):
+        paths = [*_workflow_files(root), *nested]
+
+    return [LocalWorkflow(root=root, path=path) for path in dict.fromkeys(paths)]
+
+
+def read_manifest(manifest: Path) -> list[Path]:
+    """
+    Read the workflow roots listed in the provided manifest file.
+
+    Roots are listed one per line; blank lines and lines starting with `#` are ignored. Relative
+    roots are resolved relative to the manifest's directory.
+    """
+    roots = []
+    for line in manifest.read_text().splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        roots.append(manifest.parent / line)
+
+    return roots
+
+
+def _parse_workflow_file(path: Path) -> list[JobDependency]:
+    # Runs in the worker processes, so keep this importable at module level
+    return extract_workflow_dependencies(path.read_text())
+
+
+def _scan_workflow_file(path: Path) -> list["RawStep"]:
+    # Runs in the worker processes, see above
+    from check_workflow.extract import scan_steps
+
+    return scan_steps(path.read_text())
+
+
+async def try_parse(
+    workflow: LocalWorkflow,
+    executor: Executor | None,
+    parse: t.Callable[[Path], list[t.Any]] | None = None,
+) -> list[t.Any] | None:
+    """
+    Parse the provided local workflow file using `parse`, in the `executor` if one is provided.
+
+    By default, the workflow's job dependencies are parsed. If the workflow can't be parsed, the
+    error is reported & `None` is returned, so one malformed workflow doesn't sink a whole scan.
+
+    NOTE: `parse` is pickled to be run in the executor's worker processes, so it must be defined
+    at the top level of a module.
+    """
+    if parse is None:
+        parse = _parse_workflow_file
+
+    try:
+        with trace.span("parse_workflow", "parse", path=workflow.path):
+            if executor is None:
+                return parse(workflow.path)
+            else:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(executor, parse, workflow.path)
+    except Exception as e:
+        # One malformed workflow shouldn't sink the rest of the scan
+        print(f"{workflow.path}: Could not parse workflow ({e!r}), skipping...")
+        return None
+
+
+async def parse_in_executor(
+    workflow: LocalWorkflow, executor: Executor | None, graph: "DependencyGraph | None" = None
+) -> list[JobDependency]:
+    """
+    Parse the job dependencies of the provided local workflow, in the `executor` if provided.
+
+    If a dependency `graph` is provided, reusable workflows & composite actions are expanded. If
+    the workflow can't be parsed, no dependencies are returned, see `try_parse`.
+    """
+    if graph is None:
+        parsed = await try_parse(workflow, executor)
+        return [] if parsed is None else parsed
+
+    # Only the raw steps are parsed in the pool, definitions are fetched & expanded in the loop
+    steps = await try_parse(workflow, executor, _scan_workflow_file)
+    if steps is None:
+        return []
+
+    return await graph.expand_local(workflow.path, steps)
+
+
+def build_executor(n_files: int, max_workers: int | None) -> Executor | None:
+    """
+    Build the process pool used to parse the provided number of workflow files, if worth using.
+
+    `None` is returned, so files are parsed in the event loop, if `max_workers` is `1` or there are
+    fewer than `MIN_POOL_FILES` files to parse. Otherwise, up to `max_workers` processes are used,
+    defaulting to the number of processors.
+    """
+    if max_workers is not None and max_workers < 1:
+        raise ValueError(f"Max workers must be at least 1, received: {max_workers}")
+
+    if max_workers == 1 or n_files < MIN_POOL_FILES:
+        return None
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    return ProcessPoolExecutor(max_workers=max_workers)
+
+
+async def iter_local_reports(
+    workflows: t.Iterable[LocalWorkflow],
+    resolver: ReleaseResolver,
+    max_workers: int | None = None,
+    graph: "DependencyGraph | None" = None,
+) -> t.AsyncIterator[tuple[LocalWorkflow, list[OutdatedDep]]]:
+    """
+    Check the provided local workflows for outdated dependencies, e.g. from `discover_workflows`.
+
+    Results are yielded as `(workflow, outdated dependencies)` pairs as soon as all of a workflow's
+    dependencies have been resolved; workflows without outdated dependencies are not yielded.
+
+    Workflows are parsed in a pool of up to `max_workers` processes (defaulting to the number of
+    CPUs), and each workflow's release lookups are requested as soon as it has been parsed so
+    parsing overlaps with the network requests; small scans are parsed in-process. All workflows
+    share the provided `resolver`, so each action's releases are only looked up once across every
+    workflow, regardless of its root.
+
+    If a `graph` is provided, the dependencies of any reusable workflows & composite actions used
+    are also checked, see `DependencyGraph`.
+
+    NOTE: Workflows that can't be parsed are skipped.
+    """
+    # Reports are keyed by path, so only check each file once if roots overlap
+    by_path = {str(workflow.path): workflow for workflow in workflows}
+
+    executor = build_executor(len(by_path), max_workers)
+
+    # Parsing is only started as workflows are taken into the resolving window, so a large scan
+    # doesn't hold every workflow's dependencies at once
+    parsing: list[asyncio.Task[list[JobDependency]]] = []
+
+    def _start_parsing() -> t.Iterator[tuple[str, asyncio.Task[list[JobDependency]]]]:
+        for key, workflow in by_path.items():
+            task = asyncio.create_task(parse_in_executor(workflow, executor, graph))
+            parsing.append(task)
+            yield key, task
+
+    try:
+        async for key, wf_outdated in iter_dependency_reports(_start_parsing(), resolver):
+            yield by_path[key], wf_outdated
+    finally:
+        # Don't leave any parsing behind if we're closed early
+        for task in parsing:
+            task.cancel()
+
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+async def report_local_outdated(
+    workflows: t.Sequence[LocalWorkflow],
+    resolver: ReleaseResolver,
+    max_workers: int | None = None,
+    graph: "DependencyGraph | None" = None,
+) -> dict[Path, dict[str, list[OutdatedDep]]]:
+    """
+    Check the provided local workflows for outdated dependencies.
+
+    The return is a dictionary of <root>:<per-file outdated dependencies> items, with roots in the
+    order they're first seen in the provided workflows and each root's files sorted by path; roots
+    without outdated dependencies are omitted.
+
+    This collects the results of `iter_local_reports`, see its documentation for details.
+    """
+    collected: dict[Path, dict[str, list[OutdatedDep]]] = {}
+    async for workflow, wf_outdated in iter_local_reports(workflows, resolver, max_workers, graph):
+        collected.setdefault(workflow.root, {})[workflow.name] = wf_outdated
+
+    outdated = {}
+    for root in dict.fromkeys(workflow.root for workflow in workflows):
+        if root in collected:
+            outdated[root] = dict(sorted(collected[root].items()))
+
+    return outdated
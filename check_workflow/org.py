@@ -0,0 +1,132 @@
+import asyncio
+import functools
+import typing as t
+
+from check_workflow.gh_api import OrgRepository, iter_org_repositories
+from check_workflow.graph import DependencyGraph, RepositoryRef
+from check_workflow.resolve import ReleaseResolver
+from check_workflow.workflow import OutdatedDep, report_outdated
+
+if t.TYPE_CHECKING:
+    from gql.client import AsyncClientSession
+
+
+async def report_repository(
+    session: "AsyncClientSession",
+    repo: OrgRepository,
+    resolver: ReleaseResolver,
+    graph: DependencyGraph | None = None,
+    workflow_root: str = ".github/workflows/",
+    ref: str = "HEAD",
+) -> dict[str, list[OutdatedDep]] | None:
+    """
+    Report the outdated dependencies of the provided repository's workflows.
+
+    If a dependency `graph` is provided, reusable workflows & composite actions are expanded from
+    the repository at `ref`. If the repository's workflows can't be checked, the error is reported
+    & `None` is returned, so one malformed repository doesn't sink a whole scan.
+    """
+    expand = None
+    if graph is not None:
+        repository = RepositoryRef(owner=repo.owner, repo=repo.name, ref=ref)
+        expand = functools.partial(graph.expand_remote, repository, workflow_root)
+
+    try:
+        return await report_outdated(session, repo.workflows, resolver=resolver, expand=expand)
+    except Exception as e:
+        # One malformed workflow shouldn't sink the rest of the scan
+        print(f"{repo.owner}/{repo.name}: Could not check workflows ({e!r}), skipping...")
+        return None
+
+
+async def iter_org_outdated(
+    session: "AsyncClientSession",
+    org: str,
+    resolver: ReleaseResolver,
+    workflow_root: str = ".github/workflows/",
+    ref: str = "HEAD",
+    include_archived: bool = False,
+    page_size: int = 25,
+    graph: DependencyGraph | None = None,
+) -> t.AsyncIterator[tuple[str, dict[str, list[OutdatedDep]]]]:
+    """
+    Check the workflows of every repository in the query organization for outdated dependencies.
+
+    Results are yielded as `(repo name, per-file outdated dependencies)` pairs as soon as each
+    repository's check completes; repositories without outdated dependencies are not yielded.
+
+    Each repository is checked as soon as its page of the repository listing arrives, so release
+    lookups overlap with paging. All checks share the provided `resolver`, so each action's releases
+    are only looked up once across the whole organization.
+
+    Empty repositories and repositories without workflows at the provided root are skipped, as are
+    archived repositories unless `include_archived` is `True`.
+
+    If a `graph` is provided, the dependencies of any reusable workflows & composite actions used
+    are also checked, see `DependencyGraph`. The graph's definitions are shared across the whole
+    organization, so each is only fetched once.
+    """
+    results: asyncio.Queue[tuple[str, dict[str, list[OutdatedDep]]] | None] = asyncio.Queue()
+
+    async def _check(repo: OrgRepository) -> None:
+        repo_outdated = await report_repository(session, repo, resolver, graph, workflow_root, ref)
+        await results.put((repo.name, repo_outdated or {}))
+
+    async def _page() -> None:
+        checks = []
+        try:
+            async for repo in iter_org_repositories(
+                session=session, org=org, workflow_root=workflow_root, ref=ref, page_size=page_size
+            ):
+                if repo.is_empty or not repo.workflows:
+                    continue
+                if repo.is_archived and not include_archived:
+                    continue
+
+                checks.append(asyncio.create_task(_check(repo)))
+
+            await asyncio.gather(*checks)
+        finally:
+            await results.put(None)
+
+    pager = asyncio.create_task(_page())
+    while (result := await results.get()) is not None:
+        if result[1]:
+            yield result
+
+    await pager  # Surface any paging errors
+
+
+async def report_org_outdated(
+    session: "AsyncClientSession",
+    org: str,
+    resolver: ReleaseResolver,
+    workflow_root: str = ".github/workflows/",
+    ref: str = "HEAD",
+    include_archived: bool = False,
+    page_size: int = 25,
+    graph: DependencyGraph | None = None,
+) -> dict[str, dict[str, list[OutdatedDep]]]:
+    """
+    Check the workflows of every repository in the query organization for outdated dependencies.
+
+    The return is a dictionary of <repo name>:<per-file outdated dependencies> items, sorted by
+    repository name; repositories without outdated dependencies are omitted.
+
+    This collects the results of `iter_org_outdated`, see its documentation for details.
+    """
+    outdated = {
+        repo_name: repo_outdated
+        async for repo_name, repo_outdated in iter_org_outdated(
+            session=session,
+            org=org,
+            resolver=resolver,
+            workflow_root=workflow_root,
+            ref=ref,
+            include_archived=include_archived,
+            page_size=page_size,
+            graph=graph,
+        )
+    }
+
+    return dict(sorted(outdated.items()))
@@ -0,0 +1,169 @@
+import asyncio
+import importlib.util
+import typing as t
+from collections import Counter
+from dataclasses import dataclass, field
+
+from check_workflow.gh_api import build_client
+
+if t.TYPE_CHECKING:
+    import httpx
+    from gql import Client
+    from gql.client import AsyncClientSession
+
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 10
+DEFAULT_KEEPALIVE_EXPIRY = 60.0  # seconds
+
+
+@dataclass(slots=True, frozen=True)
+class PoolLimits:
+    """
+    Connection pool options for the HTTP transport, see `httpx.Limits`.
+
+    Up to `max_connections` connections are opened at once, of which up to
+    `max_keepalive_connections` idle connections are kept alive for `keepalive_expiry` seconds to
+    be reused by later requests.
+
+    If `http2` is `True`, HTTP/2 is negotiated with the server so concurrent requests are
+    multiplexed over a single connection.
+
+    NOTE: HTTP/2 support requires the optional `h2` package, see the `http2` extra.
+    """
+
+    max_connections: int = DEFAULT_MAX_CONNECTIONS
+    max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS
+    keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY
+    http2: bool = False
+
+    def client_kwargs(self) -> dict[str, t.Any]:
+        """Build the `httpx.AsyncClient` keyword arguments for these options."""
+        from httpx import Limits
+
+        if self.http2 and importlib.util.find_spec("h2") is None:
+            raise RuntimeError("HTTP/2 requires the 'h2' package, see the 'http2' extra")
+
+        limits = Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+        return {"limits": limits, "http2": self.http2}
+
+
+@dataclass(slots=True)
+class ConnectionStats:
+    """
+    Connection reuse for the requests sent through an HTTP transport, see `event_hooks`.
+
+    Every request sent over an already open connection (including requests multiplexed over an
+    HTTP/2 connection) is counted as reused, so once the pool is warm the number of new
+    connections & TLS handshakes should stay flat as requests grow.
+
+    NOTE: Requests that fail before being sent are counted in `n_requests` only.
+    """
+
+    n_requests: int = 0
+    n_connections: int = 0
+    n_tls_handshakes: int = 0
+    n_reused: int = 0
+    http_versions: Counter[str] = field(default_factory=Counter)
+
+    def summary(self) -> str:
+        """Summarize connection reuse in a human-readable form."""
+        versions = ", ".join(f"{ver}: {n}" for ver, n in sorted(self.http_versions.items()))
+        return (
+            f"HTTP requests: {self.n_requests}, "
+            f"connections opened: {self.n_connections}, "
+            f"TLS handshakes: {self.n_tls_handshakes}, "
+            f"reused: {self.n_reused}, "
+            f"versions: {versions or "none"}"
+        )
+
+    def event_hooks(self) -> dict[str, list[t.Callable[..., t.Awaitable[None]]]]:
+        """Build the `httpx.AsyncClient` event hooks used to track connection reuse."""
+        return {"request": [self._on_request], "response": [self._on_response]}
+
+    async def _on_request(self, request: "httpx.Request") -> None:
+        self.n_requests += 1
+        request.extensions["trace"] = self._request_tracer()
+
+    async def _on_response(self, response: "httpx.Response") -> None:
+        self.http_versions[response.http_version] += 1
+
+    def _request_tracer(self) -> t.Callable[[str, dict[str, t.Any]], t.Awaitable[None]]:
+        # Connection events are traced by `httpcore` for each request, prefixed with the emitting
+        # module's name, so a request is sent over a reused connection if it didn't open one first
+        connected = False
+
+        async def on_trace(event: str, info: dict[str, t.Any]) -> None:
+            nonlocal connected
+            if event.endswith("connect_tcp.complete"):
+                connected = True
+                self.n_connections += 1
+            elif event.endswith("start_tls.complete"):
+                self.n_tls_handshakes += 1
+            elif event.endswith("send_request_headers.started") and not connected:
+                self.n_reused += 1
+
+        return on_trace
+
+
+class SessionManager:
+    """
+    Share a single connected GraphQL session, and its pool of HTTP connections, between pipelines.
+
+    Every `async with manager as session` block receives the same session, which is connected by
+    the first block to enter & is kept open once the block exits, so sequential & concurrent
+    pipelines all reuse the same pooled connections rather than each opening (& TLS handshaking)
+    their own. Call `close` once finished, before the event loop is shut down.
+
+    Clients are built using `build_client` with the provided `pool` limits & `client_kwargs`, and
+    their connection reuse is tracked by `stats`.
+
+    NOTE: Sessions are bound to the event loop they were connected in; if the manager is entered
+    from a new event loop, a new client is built & connected.
+    """
+
+    def __init__(
+        self,
+        pool: PoolLimits | None = None,
+        **client_kwargs: t.Any,  # noqa: ANN401
+    ) -> None:
+        self.pool = PoolLimits() if pool is None else pool
+        self.client_kwargs = client_kwargs
+        self.stats = ConnectionStats()
+
+        self._client: Client | None = None
+        self._session: AsyncClientSession | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock: asyncio.Lock | None = None
+
+    async def __aenter__(self) -> "AsyncClientSession":
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._lock is None:
+            # Anything connected in a previous event loop can't be used (or closed) from this one
+            self._loop, self._lock = loop, asyncio.Lock()
+            self._client = self._session = None
+
+        async with self._lock:
+            if self._session is None:
+                client = build_client(
+                    pool=self.pool, connection_stats=self.stats, **self.client_kwargs
+                )
+                self._session = await client.connect_async()  # type: ignore[no-untyped-call]
+                self._client = client
+
+        return self._session
+
+    async def __aexit__(self, *args: object) -> None:
+        # The session is kept open for the next pipeline, see `close`
+        pass
+
+    async def close(self) -> None:
+        """Close the shared session, if it was connected in the running event loop."""
+        if self._client is None or self._loop is not asyncio.get_running_loop():
+            return
+
+        client, self._client, self._session = self._client, None, None
+        await client.close_async()  # type: ignore[no-untyped-call]
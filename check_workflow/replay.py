@@ -0,0 +1,167 @@
+import asyncio
+import gzip
+import json
+import os
+import typing as t
+from pathlib import Path
+
+from gql import GraphQLRequest
+from gql.transport import AsyncTransport
+from gql.transport.exceptions import TransportError
+from graphql import ExecutionResult
+
+ARCHIVE_VERSION = 1
+
+
+class ReplayMissError(TransportError):
+    """Raised when a replayed request has no recorded response."""
+
+
+def _payload_key(payload: dict[str, t.Any]) -> str:
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"))
+
+
+def request_key(request: GraphQLRequest) -> str:
+    """
+    Build the archive key for the provided request.
+
+    Keys are built from the request's payload: its query, as printed from the parsed document so
+    formatting differences don't matter, along with its variables & operation name.
+    """
+    return _payload_key(request.payload)
+
+
+def read_archive(archive: Path) -> dict[str, dict[str, t.Any]]:
+    """Read the `<request key>:<response>` items from the provided archive."""
+    with gzip.open(archive, "rt", encoding="utf-8") as f:
+        contents = json.load(f)
+
+    if contents.get("version") != ARCHIVE_VERSION:
+        raise ValueError(f"Unsupported archive version: {contents.get("version")!r}")
+
+    return {_payload_key(entry["request"]): entry["response"] for entry in contents["entries"]}
+
+
+def write_archive(archive: Path, entries: t.Iterable[dict[str, t.Any]]) -> None:
+    """
+    Write the provided `{"request": <payload>, "response": <response>}` entries to the archive.
+
+    The archive is written to a temporary file first and then moved into place, so an existing
+    archive is never left partially written.
+    """
+    contents = {"version": ARCHIVE_VERSION, "entries": list(entries)}
+
+    archive.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = archive.with_name(f"{archive.name}.{os.getpid()}.tmp")
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(contents, f, separators=(",", ":"))
+
+    tmp_path.replace(archive)
+
+
+class WrappedTransport(t.Protocol):
+    """Typed view of the `AsyncTransport` methods that wrapping transports delegate to."""
+
+    async def connect(self) -> None: ...  # noqa: D102
+
+    async def close(self) -> None: ...  # noqa: D102
+
+    async def execute(self, request: GraphQLRequest) -> ExecutionResult: ...  # noqa: D102
+
+
+class RecordingTransport(AsyncTransport):
+    """
+    Transport recording each request & response pair made through the wrapped transport.
+
+    Recorded pairs are written to a gzipped JSON `archive` when the transport is closed, replacing
+    any existing archive; if the same request is made more than once, its latest response is kept.
+    Requests that fail at the transport level, e.g. an HTTP error, are not recorded.
+
+    NOTE: This module imports the full network stack, so it should only be imported once a client
+    is actually needed.
+    """
+
+    def __init__(self, transport: AsyncTransport, archive: Path) -> None:
+        self.transport: WrappedTransport = transport
+        self.archive = archive
+        self._entries: dict[str, dict[str, t.Any]] = {}
+
+    @property
+    def scheduler(self) -> object:
+        """Scheduler of the wrapped transport, if it has one."""
+        return getattr(self.transport, "scheduler", None)
+
+    async def connect(self) -> None:  # noqa: D102
+        await self.transport.connect()
+
+    async def close(self) -> None:  # noqa: D102
+        try:
+            await self.transport.close()
+        finally:
+            write_archive(self.archive, self._entries.values())
+
+    async def execute(  # noqa: D102
+        self, request: GraphQLRequest, **kwargs: t.Any  # noqa: ANN401
+    ) -> ExecutionResult:
+        result = await self.transport.execute(request, **kwargs)
+
+        payload = request.payload
+        self._entries[_payload_key(payload)] = {
+            "request": payload,
+            "response": {
+                "data": result.data,
+                "errors": result.errors,
+                "extensions": result.extensions,
+            },
+        }
+        return result
+
+    def subscribe(self, request: GraphQLRequest) -> t.NoReturn:  # noqa: D102
+        raise NotImplementedError("Subscriptions are not supported")
+
+
+class ReplayTransport(AsyncTransport):
+    """
+    Transport serving recorded responses from an `archive` written by `RecordingTransport`.
+
+    No network requests are made, and so no API token is required. Each response is delayed by
+    `latency` seconds to simulate a round trip. A `ReplayMissError` is raised for requests without a
+    recorded response.
+
+    NOTE: Requests must match their recording exactly, so a run with different options, e.g. a
+    different `--batch-size`, or with a release cache that has different contents, may not replay.
+    """
+
+    requires_token = False
+
+    def __init__(self, archive: Path, latency: float = 0) -> None:
+        self.archive = archive
+        self.latency = latency
+        self._responses: dict[str, dict[str, t.Any]] | None = None
+
+    async def connect(self) -> None:  # noqa: D102
+        if self._responses is None:
+            self._responses = read_archive(self.archive)
+
+    async def close(self) -> None:  # noqa: D102
+        pass
+
+    async def execute(  # noqa: D102
+        self, request: GraphQLRequest, **kwargs: t.Any  # noqa: ANN401
+    ) -> ExecutionResult:
+        if self._responses is None:
+            raise TransportError("Transport is not connected")
+
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+
+        response = self._responses.get(request_key(request))
+        if response is None:
+            raise ReplayMissError(f"No recorded response for request: {request.payload}")
+
+        return ExecutionResult(
+            data=response["data"], errors=response["errors"], extensions=response["extensions"]
+        )
+
+    def subscribe(self, request: GraphQLRequest) -> t.NoReturn:  # noqa: D102
+        raise NotImplementedError("Subscriptions are not supported")
@@ -0,0 +1,244 @@
+import asyncio
+import typing as t
+
+from check_workflow import trace
+from check_workflow.cache import ReleaseStore
+from check_workflow.gh_api import (
+    Release,
+    TAG_INDEX_T,
+    fetch_releases_batch,
+    fetch_tag_indexes_batch,
+)
+from check_workflow.scheduler import suggest_batch_size
+
+if t.TYPE_CHECKING:
+    from gql.client import AsyncClientSession
+
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_BATCH_SIZE = 25
+
+
+class ReleaseResolver:
+    """
+    Resolve the latest release for `(owner, repo)` keys, with batched, concurrent lookups.
+
+    Keys requested within the same event loop iteration are collected and resolved using batched
+    queries of up to `batch_size` repositories each, with up to `max_concurrency` queries in flight
+    at once. Resolved releases are cached for the lifetime of the instance, and concurrent requests
+    for the same key share a single in-flight lookup.
+
+    If a `cache` is provided (e.g. a `ReleaseCache`), fresh cached releases are used in place of a
+    query and newly fetched releases are written back to it; if `refresh` is `True` then cached
+    releases are ignored but the cache is still updated.
+
+    If a repository's releases could not be resolved, its latest release is `None`.
+
+    A `session` is only needed to query the keys missing from the cache; without one, their lookups
+    raise a `RuntimeError`, see `OfflineResolver` for resolving from a cache alone.
+
+    Tag indexes, used to resolve the version of SHA pinned dependencies, are looked up in the same
+    manner, see `tag_index`.
+    """
+
+    def __init__(
+        self,
+        session: "AsyncClientSession | None",
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        cache: ReleaseStore | None = None,
+        refresh: bool = False,
+    ) -> None:
+        if max_concurrency < 1:
+            raise ValueError(f"Max concurrency must be at least 1, received: {max_concurrency}")
+        if batch_size < 1:
+            raise ValueError(f"Batch size must be at least 1, received: {batch_size}")
+
+        self.session = session
+        self.batch_size = batch_size
+        self.cache = cache
+        self.refresh = refresh
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        self._lookups: dict[tuple[str, str], asyncio.Future[Release | None]] = {}
+        self._pending: list[tuple[str, str]] = []
+        self._tag_lookups: dict[tuple[str, str], asyncio.Future[TAG_INDEX_T]] = {}
+        self._tag_pending: list[tuple[str, str]] = []
+        self._flush_handle: asyncio.Handle | None = None
+        self._batch_tasks: set[asyncio.Task[None]] = set()
+
+    def latest(self, owner: str, repo: str) -> asyncio.Future[Release | None]:
+        """
+        Return the lookup future for the latest release of the query repo.
+
+        If a lookup for the query repo has already been started, its future is returned rather than
+        issuing a new request.
+        """
+        key = (owner, repo)
+        if key not in self._lookups:
+            loop = asyncio.get_running_loop()
+            self._lookups[key] = loop.create_future()
+            self._pending.append(key)
+
+            self._schedule_flush(loop)
+
+        return self._lookups[key]
+
+    def tag_index(self, owner: str, repo: str) -> asyncio.Future[TAG_INDEX_T]:
+        """
+        Return the lookup future for the tag index of the query repo, see `fetch_tag_indexes_batch`.
+
+        Tag indexes are only needed for SHA pinned dependencies, so they're looked up separately
+        from releases. If the query repo's tags could not be fetched, its tag index is empty.
+        """
+        key = (owner, repo)
+        if key not in self._tag_lookups:
+            loop = asyncio.get_running_loop()
+            self._tag_lookups[key] = loop.create_future()
+            self._tag_pending.append(key)
+            self._schedule_flush(loop)
+
+        return self._tag_lookups[key]
+
+    def _schedule_flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        # Defer dispatch so keys requested in the same loop iteration share a batch
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_soon(self._flush)
+
+    async def resolve(
+        self, keys: t.Iterable[tuple[str, str]]
+    ) -> dict[tuple[str, str], Release | None]:
+        """
+        Resolve the latest release for each of the provided `(owner, repo)` keys.
+
+        The return is ordered by the first occurrence of each key; duplicate keys are only looked up
+        once.
+        """
+        unique_keys = list(dict.fromkeys(keys))
+        lookups = [self.latest(owner, repo) for owner, repo in unique_keys]
+        releases = await asyncio.gather(*lookups)
+
+        return dict(zip(unique_keys, releases, strict=True))
+
+    async def resolve_tag_indexes(
+        self, keys: t.Iterable[tuple[str, str]]
+    ) -> dict[tuple[str, str], TAG_INDEX_T]:
+        """Resolve the tag index for each of the provided `(owner, repo)` keys, see `resolve`."""
+        unique_keys = list(dict.fromkeys(keys))
+        tag_indexes = await asyncio.gather(
+            *(self.tag_index(owner, repo) for owner, repo in unique_keys)
+        )
+
+        return dict(zip(unique_keys, tag_indexes, strict=True))
+
+    def _flush(self) -> None:
+        pending, self._pending = self._pending, []
+        tag_pending, self._tag_pending = self._tag_pending, []
+        self._flush_handle = None
+
+        if self.cache is not None and not self.refresh:
+            # This runs as an event loop callback, so lookup errors must be propagated to the
+            # pending lookups or their awaiters will never wake up
+            try:
+                with trace.span("release_cache_get", "cache") as span:
+                    cached = self.cache.get_many(pending)
+                    cached_tags = self.cache.get_tag_indexes(tag_pending)
+                    n_hits = len(cached) + len(cached_tags)
+                    span.set(
+                        cache_hits=n_hits, cache_misses=len(pending) + len(tag_pending) - n_hits
+                    )
+            except Exception as e:
+                for key in pending:
+                    self._lookups[key].set_exception(e)
+                for key in tag_pending:
+                    self._tag_lookups[key].set_exception(e)
+                return
+
+            for key, release in cached.items():
+                if release is None:
+                    print(f"{key[0]}/{key[1]}: Could not resolve latest release, skipping...")
+                self._lookups[key].set_result(release)
+            for key, tag_index in cached_tags.items():
+                self._tag_lookups[key].set_result(tag_index)
+
+            pending = [key for key in pending if key not in cached]
+            tag_pending = [key for key in tag_pending if key not in cached_tags]
+
+        self._fetch_missing(pending, tag_pending)
+
+    def _fetch_missing(
+        self, pending: list[tuple[str, str]], tag_pending: list[tuple[str, str]]
+    ) -> None:
+        """Dispatch batched queries for the pending keys that weren't found in the cache."""
+        session = self.session
+        if session is None:
+            error = RuntimeError(
+                "Releases missing from the cache can't be queried without a session"
+            )
+            for key in pending:
+                self._lookups[key].set_exception(error)
+            for key in tag_pending:
+                self._tag_lookups[key].set_exception(error)
+            return
+
+        # Shrink batches if we're running low on rate limit budget
+        batch_size = suggest_batch_size(session, self.batch_size)
+        for fetch, keys in ((self._fetch_batch, pending), (self._fetch_tag_batch, tag_pending)):
+            for start in range(0, len(keys), batch_size):
+                task = asyncio.create_task(fetch(session, keys[start : start + batch_size]))
+                self._batch_tasks.add(task)
+                task.add_done_callback(self._batch_tasks.discard)
+
+    async def _fetch_batch(
+        self, session: "AsyncClientSession", keys: list[tuple[str, str]]
+    ) -> None:
+        try:
+            async with self._semaphore:
+                releases = await fetch_releases_batch(session=session, repos=keys)
+        except Exception as e:
+            for key in keys:
+                self._lookups[key].set_exception(e)
+            return
+
+        for key in keys:
+            repo_releases = releases[key]
+            if not repo_releases:
+                print(f"{key[0]}/{key[1]}: Could not resolve latest release, skipping...")
+                self._lookups[key].set_result(None)
+            else:
+                self._lookups[key].set_result(repo_releases[0])
+
+        if self.cache is not None:
+            # Unresolvable repositories (`None`) may have failed transiently, so only repositories
+            # confirmed to have no releases (`[]`) are cached as such
+            try:
+                with trace.span("release_cache_put", "cache"):
+                    self.cache.put_many(
+                        {key: (r[0] if r else None) for key, r in releases.items() if r is not None}
+                    )
+            except Exception as e:
+                # Lookups are already resolved, so a failed write shouldn't fail the run
+                print(f"Could not write releases to the cache: {e!r}")
+
+    async def _fetch_tag_batch(
+        self, session: "AsyncClientSession", keys: list[tuple[str, str]]
+    ) -> None:
+        # Without a tag index, SHA pins are still compared against the latest release's tag, so
+        # failures are reported rather than failing the dependent lookups
+        try:
+            async with self._semaphore:
+                tag_indexes = await fetch_tag_indexes_batch(session=session, repos=keys)
+        except Exception as e:
+            print(f"Could not fetch tags, SHA pins will not be resolved to a version: {e}")
+            tag_indexes = {}
+
+        for key in keys:
+            self._tag_lookups[key].set_result(tag_indexes.get(key) or {})
+
+        if self.cache is not None:
+            try:
+                with trace.span("release_cache_put", "cache"):
+                    self.cache.put_tag_indexes(
+                        {key: tags for key, tags in tag_indexes.items() if tags is not None}
+                    )
+            except Exception as e:
+                print(f"Could not write tag indexes to the cache: {e!r}")
@@ -0,0 +1,244 @@
+import asyncio
+import datetime as dt
+import random
+import sys
+import typing as t
+from dataclasses import dataclass
+
+if t.TYPE_CHECKING:
+    from gql.client import AsyncClientSession
+    from gql.transport.exceptions import TransportServerError
+    from graphql import ExecutionResult
+
+DEFAULT_MAX_RETRIES = 5
+
+# Once the remaining point budget drops below this threshold, concurrency & batch sizes are scaled
+# down proportionally to what's left
+LOW_BUDGET_THRESHOLD = 500
+
+# Secondary rate limits are reported using one of these HTTP statuses rather than a GraphQL error.
+# 403s are also used for bad or under-scoped tokens, so they're only retried if they're identified
+# as a rate limit, see `_is_secondary_limit`
+SECONDARY_LIMIT_CODES = frozenset((403, 429))
+
+RATE_LIMIT_SELECTION = "rateLimit { cost remaining resetAt }"
+
+
+@dataclass(slots=True)
+class RateLimitStats:
+    """Point budget consumption for the requests sent through a `RateLimitScheduler`."""
+
+    n_requests: int = 0
+    total_cost: int = 0
+    remaining: int | None = None
+    reset_at: dt.datetime | None = None
+    n_retries: int = 0
+    n_budget_waits: int = 0
+    seconds_waited: float = 0.0
+
+    def summary(self) -> str:
+        """Summarize budget consumption in a human-readable form."""
+        remaining = "unknown" if self.remaining is None else f"{self.remaining}"
+        if self.reset_at is not None:
+            remaining = f"{remaining} (resets at {self.reset_at.isoformat()})"
+
+        return (
+            f"GraphQL requests: {self.n_requests}, "
+            f"cost: {self.total_cost} points, "
+            f"remaining: {remaining}, "
+            f"retries: {self.n_retries}, "
+            f"budget waits: {self.n_budget_waits}, "
+            f"time waited: {self.seconds_waited:.1f}s"
+        )
+
+
+class RateLimitScheduler:
+    """
+    Schedule GraphQL requests around GH's rate limits.
+
+    Each query is expected to select `rateLimit { cost remaining resetAt }`, which is used to track
+    the remaining point budget. Requests are scheduled as follows:
+        * Up to `max_concurrency` requests are allowed in flight at once; once the remaining budget
+        drops below `LOW_BUDGET_THRESHOLD`, this limit is scaled down proportionally
+        * If the remaining budget can't cover another request, requests are paused until the budget
+        is reset
+        * Requests that hit a secondary rate limit are retried up to `max_retries` times, waiting
+        for the duration of the response's `Retry-After` header if provided, otherwise backing off
+        exponentially with jitter; other errors, such as a 403 for a bad token, are raised at once
+
+    Budget consumption is tallied in `stats`.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+    ) -> None:
+        if max_concurrency < 1:
+            raise ValueError(f"Max concurrency must be at least 1, received: {max_concurrency}")
+
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.stats = RateLimitStats()
+        self._last_cost = 1
+        self._in_flight = 0
+        self._slot_released = asyncio.Condition()
+
+    @property
+    def _budget_fraction(self) -> float:
+        if self.stats.remaining is None or self.stats.remaining >= LOW_BUDGET_THRESHOLD:
+            return 1.0
+
+        return self.stats.remaining / LOW_BUDGET_THRESHOLD
+
+    @property
+    def concurrency_limit(self) -> int:
+        """Maximum number of requests allowed in flight, given the remaining budget."""
+        return max(1, int(self.max_concurrency * self._budget_fraction))
+
+    def suggest_batch_size(self, batch_size: int) -> int:
+        """Scale the provided batch size down if the remaining budget is running low."""
+        return max(1, int(batch_size * self._budget_fraction))
+
+    async def execute(
+        self,
+        send: t.Callable[[], t.Awaitable["ExecutionResult"]],
+        get_headers: t.Callable[[], t.Mapping[str, str] | None],
+    ) -> "ExecutionResult":
+        """
+        Send a request once the rate limits allow it, retrying if a rate limit is hit.
+
+        `send` is called to send the request & may be called multiple times if it needs to be
+        retried; `get_headers` is called to obtain the headers of the response that was just
+        received.
+        """
+        from gql.transport.exceptions import TransportServerError
+
+        n_retries = 0
+        while True:
+            await self._wait_for_budget()
+            await self._acquire_slot()
+            try:
+                result = await send()
+            except TransportServerError as e:
+                # Grab the headers before yielding, another request may overwrite them
+                headers = get_headers()
+                if not _is_secondary_limit(e, headers) or n_retries >= self.max_retries:
+                    raise
+
+                retry_after = _retry_after(headers)
+                n_retries += 1
+                await self._backoff(n_retries, retry_after)
+                continue
+            finally:
+                await self._release_slot()
+
+            self._record(result.data)
+            if _is_rate_limited(result) and n_retries < self.max_retries:
+                # Budget may have been spent elsewhere with the same token, so wait for the reset
+                n_retries += 1
+                self.stats.n_retries += 1
+                self.stats.remaining = 0
+                continue
+
+            return result
+
+    async def _acquire_slot(self) -> None:
+        async with self._slot_released:
+            await self._slot_released.wait_for(lambda: self._in_flight < self.concurrency_limit)
+            self._in_flight += 1
+
+    async def _release_slot(self) -> None:
+        async with self._slot_released:
+            self._in_flight -= 1
+            self._slot_released.notify_all()
+
+    async def _sleep(self, seconds: float) -> None:
+        self.stats.seconds_waited += seconds
+        await asyncio.sleep(seconds)
+
+    async def _wait_for_budget(self) -> None:
+        if self.stats.remaining is None or self.stats.remaining >= self._last_cost:
+            return
+
+        self.stats.n_budget_waits += 1
+        if self.stats.reset_at is None:
+            wait = self.backoff_max
+        else:
+            wait = max(0.0, (self.stats.reset_at - dt.datetime.now(dt.UTC)).total_seconds())
+
+        print(f"GraphQL rate limit exhausted, waiting {wait:.0f}s for reset...", file=sys.stderr)
+        await self._sleep(wait)
+
+        # Budget is unknown until the next response comes back
+        self.stats.remaining = None
+
+    async def _backoff(self, attempt: int, retry_after: float | None) -> None:
+        self.stats.n_retries += 1
+        if retry_after is None:
+            # Exponential backoff with "full jitter", which keeps retries from synchronizing
+            retry_after = random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+        await self._sleep(retry_after)
+
+    def _record(self, data: dict[str, t.Any] | None) -> None:
+        self.stats.n_requests += 1
+
+        rate_limit = (data or {}).get("rateLimit")
+        if rate_limit is None:
+            return
+
+        self._last_cost = max(1, rate_limit["cost"])
+        self.stats.total_cost += rate_limit["cost"]
+        self.stats.remaining = rate_limit["remaining"]
+        self.stats.reset_at = dt.datetime.fromisoformat(rate_limit["resetAt"])
+
+
+def _is_rate_limited(result: "ExecutionResult") -> bool:
+    # The transport passes along GH's errors as raw dictionaries rather than GraphQLError instances
+    errors: list[dict] = result.errors or []  # type: ignore[assignment]
+    return any(err.get("type") == "RATE_LIMITED" for err in errors)
+
+
+def _is_secondary_limit(error: "TransportServerError", headers: t.Mapping[str, str] | None) -> bool:
+    if error.code not in SECONDARY_LIMIT_CODES:
+        return False
+    if error.code != 403:
+        return True
+
+    # GH's secondary rate limit responses carry a retry hint or a rate limit message
+    headers = headers or {}
+    if "retry-after" in headers or headers.get("x-ratelimit-remaining") == "0":
+        return True
+
+    response = getattr(error.__cause__, "response", None)
+    return "rate limit" in getattr(response, "text", "").lower()
+
+
+def _retry_after(headers: t.Mapping[str, str] | None) -> float | None:
+    if headers is None:
+        return None
+
+    try:
+        return float(headers["retry-after"])
+    except (KeyError, ValueError):
+        return None
+
+
+def suggest_batch_size(session: "AsyncClientSession", batch_size: int) -> int:
+    """
+    Scale the provided batch size to the session's remaining budget.
+
+    If the session's transport isn't scheduled by a `RateLimitScheduler`, the batch size is returned
+    unchanged.
+    """
+    scheduler = getattr(session.client.transport, "scheduler", None)
+    if isinstance(scheduler, RateLimitScheduler):
+        return scheduler.suggest_batch_size(batch_size)
+
+    return batch_size
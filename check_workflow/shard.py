@@ -0,0 +1,419 @@
+import asyncio
+import hashlib
+import json
+import time
+import typing as t
+from dataclasses import dataclass
+from pathlib import Path
+
+from check_workflow.cache import ReleaseCache, SQLiteStore
+from check_workflow.gh_api import (
+    OrgRepository,
+    WorkflowTarget,
+    fetch_workflows_batch,
+    iter_org_repository_names,
+)
+from check_workflow.graph import DependencyGraph
+from check_workflow.org import report_repository
+from check_workflow.pool import PoolLimits
+from check_workflow.resolve import ReleaseResolver
+from check_workflow.workflow import OutdatedDep, outdated_from_dict, outdated_to_dict
+
+if t.TYPE_CHECKING:
+    from gql.client import AsyncClientSession
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS repo_results (
+    scan TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    report TEXT NOT NULL,
+    checked_at REAL NOT NULL,
+    PRIMARY KEY (scan, repo)
+);
+CREATE TABLE IF NOT EXISTS scans (
+    scan TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL,
+    started_at REAL NOT NULL,
+    merged_at REAL
+);
+CREATE TABLE IF NOT EXISTS finished_shards (
+    scan TEXT NOT NULL,
+    n_shards INTEGER NOT NULL,
+    shard INTEGER NOT NULL,
+    finished_at REAL NOT NULL,
+    PRIMARY KEY (scan, n_shards, shard)
+);
+"""
+
+
+@dataclass(slots=True, frozen=True)
+class ShardSpec:
+    """Shard `index` of `count` shards, see `shard_of`."""
+
+    index: int
+    count: int
+
+    @classmethod
+    def from_raw(cls, raw_shard: str) -> t.Self:
+        """Build a `ShardSpec` from an `<index>/<count>` specification, e.g. `"0/4"`."""
+        raw_index, _, raw_count = raw_shard.partition("/")
+        shard = cls(index=int(raw_index), count=int(raw_count))
+        if not 0 <= shard.index < shard.count:
+            raise ValueError(f"Shard index must be in [0, {shard.count}), received: {shard.index}")
+
+        return shard
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+
+def shard_of(repo_name: str, n_shards: int) -> int:
+    """
+    Return the index of the shard the provided repository belongs to, out of `n_shards`.
+
+    Repositories are partitioned by a hash of their (case-insensitive) name, so every process &
+    machine agrees on the partition without coordinating.
+    """
+    digest = hashlib.blake2b(repo_name.lower().encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % n_shards
+
+
+def scan_key(
+    org: str,
+    workflow_root: str = ".github/workflows/",
+    ref: str = "HEAD",
+    include_archived: bool = False,
+    recursive: bool = False,
+) -> str:
+    """Build the key identifying a scan with the provided options, see `ResultStore.begin_scan`."""
+    options = "".join(
+        flag
+        for flag, enabled in (("+archived", include_archived), ("+recursive", recursive))
+        if enabled
+    )
+    return f"{org}:{ref}:{workflow_root}{options}"
+
+
+class ResultStore(SQLiteStore):
+    """
+    Persistent, SQLite-backed store of the per-repository results of sharded organization scans.
+
+    Each checked repository's report is stored as soon as it's ready, keyed by the generation of
+    its scan (see `begin_scan`), along with which shards of the generation have finished, so an
+    interrupted scan resumes without re-checking anything that was already stored.
+
+    Scans are identified by their `scan_key`, which `begin_scan`, `latest_scan`, `mark_merged`, &
+    `clear` take; the remaining methods take the generation key returned by `begin_scan` or
+    `latest_scan`.
+
+    The store file may be safely shared between processes, see `SQLiteStore`. The release cache
+    shared by the scan's shards is kept in its own file alongside it, see `release_cache_path`.
+    """
+
+    def __init__(self, path: Path) -> None:
+        super().__init__(path, SCHEMA)
+
+    def begin_scan(self, scan: str, n_shards: int) -> str:
+        """
+        Return the key of the generation that the query scan's results are stored under.
+
+        An unfinished generation is resumed. Once all `n_shards` shards of a generation have
+        finished and its results have been merged (see `mark_merged`), the next run of the scan
+        (e.g. the next nightly scan) begins a new generation and the previous generation's results
+        are discarded, so finished results are never reused.
+
+        NOTE: Finished results are kept until they've been merged, so rerunning a shard before the
+        merge doesn't discard the results of the other shards.
+        """
+        with self._transaction():
+            row = self._conn.execute(
+                "SELECT generation, merged_at FROM scans WHERE scan = ?", (scan,)
+            ).fetchone()
+
+            generation = 0
+            if row is not None:
+                current = _generation_key(scan, row[0])
+                finished = self.finished_shards(current, n_shards)
+                if row[1] is None or len(finished) < n_shards:
+                    return current
+
+                self._delete(current)
+                generation = row[0] + 1
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO scans VALUES (?, ?, ?, NULL)",
+                (scan, generation, time.time()),
+            )
+
+        return _generation_key(scan, generation)
+
+    def mark_merged(self, scan: str) -> None:
+        """Mark the latest generation of the query scan as merged, see `begin_scan`."""
+        with self._transaction():
+            self._conn.execute("UPDATE scans SET merged_at = ? WHERE scan = ?", (time.time(), scan))
+
+    def latest_scan(self, scan: str) -> str:
+        """Return the key of the query scan's latest generation, without beginning a new one."""
+        row = self._conn.execute("SELECT generation FROM scans WHERE scan = ?", (scan,)).fetchone()
+        return _generation_key(scan, 0 if row is None else row[0])
+
+    def checked_repos(self, scan: str) -> set[str]:
+        """Return the names of the repositories whose results are stored for the query scan."""
+        rows = self._conn.execute("SELECT repo FROM repo_results WHERE scan = ?", (scan,))
+        return {repo for (repo,) in rows}
+
+    def put_result(self, scan: str, repo: str, outdated: dict[str, list[OutdatedDep]]) -> None:
+        """Store the per-file outdated dependencies of the provided repository."""
+        report = {
+            wf_name: [outdated_to_dict(dep) for dep in wf_outdated]
+            for wf_name, wf_outdated in outdated.items()
+        }
+        with self._transaction():
+            self._conn.execute(
+                "INSERT OR REPLACE INTO repo_results VALUES (?, ?, ?, ?)",
+                (scan, repo, json.dumps(report), time.time()),
+            )
+
+    def finished_shards(self, scan: str, n_shards: int) -> set[int]:
+        """Return the indices of the query scan's finished shards, out of `n_shards`."""
+        rows = self._conn.execute(
+            "SELECT shard FROM finished_shards WHERE scan = ? AND n_shards = ?", (scan, n_shards)
+        )
+        return {shard for (shard,) in rows}
+
+    def finish_shard(self, scan: str, shard: ShardSpec) -> None:
+        """Mark the provided shard of the query scan as finished."""
+        with self._transaction():
+            self._conn.execute(
+                "INSERT OR REPLACE INTO finished_shards VALUES (?, ?, ?, ?)",
+                (scan, shard.count, shard.index, time.time()),
+            )
+
+    def reports(self, scan: str) -> dict[str, dict[str, list[OutdatedDep]]]:
+        """
+        Merge the stored results of the query scan into a combined report.
+
+        The return matches `report_org_outdated`: a dictionary of <repo name>:<per-file outdated
+        dependencies> items, sorted by repository name, omitting repositories without outdated
+        dependencies.
+        """
+        rows = self._conn.execute(
+            "SELECT repo, report FROM repo_results WHERE scan = ? ORDER BY repo", (scan,)
+        )
+
+        merged = {}
+        for repo, report in rows:
+            outdated = {
+                wf_name: [outdated_from_dict(dep) for dep in wf_outdated]
+                for wf_name, wf_outdated in json.loads(report).items()
+            }
+            if outdated:
+                merged[repo] = outdated
+
+        return merged
+
+    def clear(self, scan: str) -> None:
+        """Discard the stored results & finished shards of the query scan, see `scan_key`."""
+        with self._transaction():
+            self._delete(self.latest_scan(scan))
+            self._conn.execute("DELETE FROM scans WHERE scan = ?", (scan,))
+
+    def _delete(self, generation_key: str) -> None:
+        self._conn.execute("DELETE FROM repo_results WHERE scan = ?", (generation_key,))
+        self._conn.execute("DELETE FROM finished_shards WHERE scan = ?", (generation_key,))
+
+
+def _generation_key(scan: str, generation: int) -> str:
+    return f"{scan}#{generation}"
+
+
+def release_cache_path(results: Path) -> Path:
+    """
+    Return the path of the release cache shared by the shards of scans stored in `results`.
+
+    The cache is kept alongside the result store, so shards with access to the store (e.g. on a
+    shared volume) share their release lookups, but in its own file.
+    """
+    return results.with_name(f"{results.stem}.releases.sqlite3")
+
+
+async def scan_shard(
+    session: "AsyncClientSession",
+    org: str,
+    shard: ShardSpec,
+    store: ResultStore,
+    scan: str,
+    resolver: ReleaseResolver,
+    workflow_root: str = ".github/workflows/",
+    ref: str = "HEAD",
+    include_archived: bool = False,
+    page_size: int = 100,
+    graph: DependencyGraph | None = None,
+) -> int:
+    """
+    Check the repositories of the provided shard of the query organization, storing their results.
+
+    Results are stored under the provided `scan` generation key, as returned by
+    `ResultStore.begin_scan` for the scan's `scan_key`.
+
+    The organization's repositories are listed by name, then the workflows of the shard's
+    repositories (see `shard_of`) are fetched in batches using `fetch_workflows_batch` and each
+    repository is checked with `report_outdated` as soon as its workflows arrive. Results are
+    written to the `store` as each repository's check completes, and repositories already stored for
+    the scan are skipped, so an interrupted shard resumes where it left off. Once every repository
+    has been stored, the shard is marked as finished.
+
+    Repositories are filtered in the same manner as `iter_org_outdated`. The return is the number
+    of repositories checked.
+
+    NOTE: Repositories whose check fails aren't stored, leaving the shard unfinished so they're
+    retried when the scan is resumed.
+    """
+    checked = store.checked_repos(scan)
+
+    targets = []
+    async for repo in iter_org_repository_names(session=session, org=org, page_size=page_size):
+        if repo.is_empty or (repo.is_archived and not include_archived):
+            continue
+        if shard_of(repo.name, shard.count) != shard.index or repo.name in checked:
+            continue
+
+        targets.append(WorkflowTarget(owner=org, repo=repo.name, ref=ref, root=workflow_root))
+
+    n_failed = 0
+
+    async def _check(repo: OrgRepository) -> None:
+        nonlocal n_failed
+
+        outdated = await report_repository(session, repo, resolver, graph, workflow_root, ref)
+        if outdated is None:
+            n_failed += 1
+        else:
+            store.put_result(scan, repo.name, outdated)
+
+    checks = []
+    async for target, workflows in fetch_workflows_batch(session=session, targets=targets):
+        if workflows is None:
+            # Deleted or renamed since it was listed, so there's nothing to retry
+            print(f"{org}/{target.repo}: Could not resolve repository, skipping...")
+            store.put_result(scan, target.repo, {})
+            continue
+
+        repo = OrgRepository(
+            owner=org, name=target.repo, is_archived=False, is_empty=False, workflows=workflows
+        )
+        checks.append(asyncio.create_task(_check(repo)))
+
+    await asyncio.gather(*checks)
+
+    if n_failed:
+        print(f"Shard {shard}: {n_failed} repositories could not be checked, rerun to retry them")
+    else:
+        store.finish_shard(scan, shard)
+
+    return len(targets)
+
+
+@dataclass(slots=True, frozen=True)
+class ShardTask:
+    """
+    Options of a shard scan run in its own process, see `run_shard`.
+
+    Results are stored in the `results` store under the `scan` generation key, see `scan_shard`.
+    The release cache is kept alongside the store, so releases are shared between shards, see
+    `release_cache_path`.
+    """
+
+    org: str
+    shard: ShardSpec
+    results: Path
+    scan: str
+    workflow_root: str = ".github/workflows/"
+    ref: str = "HEAD"
+    include_archived: bool = False
+    page_size: int = 100
+    recursive: bool = False
+    max_concurrency: int = 8
+    batch_size: int = 25
+    cache_ttl: float | None = None
+    refresh: bool = False
+    validate_schema: bool = False
+    pool: PoolLimits | None = None
+
+
+def run_shards(tasks: t.Sequence[ShardTask], max_workers: int | None = None) -> None:
+    """
+    Run the provided shard scans in a pool of up to `max_workers` processes, see `run_shard`.
+
+    Shards that fail are reported rather than failing the rest, and are resumed by the next run.
+
+    NOTE: Each shard opens its own result store & release cache, so the caller shouldn't hold any
+    open while the worker processes are started.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        running = {executor.submit(run_shard, task): task for task in tasks}
+        for future in as_completed(running):
+            shard = running[future].shard
+            try:
+                n_checked = future.result()
+            except Exception as e:
+                print(f"Shard {shard}: Could not finish scan ({e!r}), rerun to resume")
+            else:
+                print(f"Shard {shard}: Checked {n_checked} repositories")
+
+
+async def _run_shard(task: ShardTask, store: ResultStore, cache: ReleaseCache | None) -> int:
+    from check_workflow.gh_api import build_client
+    from check_workflow.scheduler import RateLimitScheduler
+
+    scheduler = RateLimitScheduler(max_concurrency=task.max_concurrency)
+    async with build_client(
+        validate_schema=task.validate_schema, scheduler=scheduler, pool=task.pool
+    ) as session:
+        resolver = ReleaseResolver(
+            session=session,
+            max_concurrency=task.max_concurrency,
+            batch_size=task.batch_size,
+            cache=cache,
+            refresh=task.refresh,
+        )
+        graph = None
+        if task.recursive:
+            graph = DependencyGraph(session=session, batch_size=task.batch_size)
+
+        return await scan_shard(
+            session=session,
+            org=task.org,
+            shard=task.shard,
+            store=store,
+            scan=task.scan,
+            resolver=resolver,
+            workflow_root=task.workflow_root,
+            ref=task.ref,
+            include_archived=task.include_archived,
+            page_size=task.page_size,
+            graph=graph,
+        )
+
+
+def run_shard(task: ShardTask) -> int:
+    """
+    Run the provided shard scan in a new event loop, see `scan_shard`.
+
+    The shard gets its own GraphQL session & rate limit scheduler, so shards may be run in separate
+    processes (e.g. using a `ProcessPoolExecutor`) or on separate machines. The result store &
+    release cache are opened by the shard itself. If `task.cache_ttl` is `None`, the release cache
+    isn't used.
+    """
+    cache = None
+    if task.cache_ttl is not None:
+        cache = ReleaseCache(path=release_cache_path(task.results), ttl=task.cache_ttl)
+
+    try:
+        with ResultStore(task.results) as store:
+            return asyncio.run(_run_shard(task, store, cache))
+    finally:
+        if cache is not None:
+            cache.close()
@@ -0,0 +1,359 @@
+import asyncio
+import datetime as dt
+import mmap
+import os
+import posixpath
+import struct
+import time
+import typing as t
+from pathlib import Path
+
+from packaging.version import Version
+
+from check_workflow.gh_api import Release, TAG_INDEX_T, iter_org_repositories
+from check_workflow.local import LocalWorkflow, parse_in_executor
+from check_workflow.resolve import ReleaseResolver
+from check_workflow.workflow import JobDependency, extract_workflow_dependencies
+
+if t.TYPE_CHECKING:
+    from gql.client import AsyncClientSession
+
+    from check_workflow.graph import DependencyGraph
+
+SNAPSHOT_MAGIC = b"CWRS"
+SNAPSHOT_VERSION = 1
+
+# All integers are little-endian. The header is followed by the key table, an array of fixed-size
+# entries sorted by key, and then the variable-length keys & records they point to
+HEADER = struct.Struct("<4sHHId")  # magic, format version, reserved, number of keys, created at
+KEY_ENTRY = struct.Struct("<IHHI")  # key offset, key length, reserved, record offset
+# flags, published (unix seconds), hash length, version length, url length, number of tags
+RECORD = struct.Struct("<BqBBHI")
+TAG_ENTRY = struct.Struct("<BB")  # SHA length, version length
+
+HAS_RELEASE = 0x01
+TEXT_HASH = 0x02  # Tag hash isn't hex, so it's stored as text rather than packed
+
+
+def _snapshot_key(owner: str, repo: str) -> bytes:
+    # GH's owner & repository names are case-insensitive
+    return f"{owner}/{repo}".lower().encode()
+
+
+def _pack_record(release: Release | None, tag_index: TAG_INDEX_T) -> bytes:
+    flags, published, tag_hash, ver, url = 0, 0, b"", b"", b""
+    if release is not None:
+        flags |= HAS_RELEASE
+        published = int(release.published.timestamp())
+        ver, url = str(release.ver).encode(), release.url.encode()
+        try:
+            tag_hash = bytes.fromhex(release.tag_hash)
+        except ValueError:
+            flags |= TEXT_HASH
+            tag_hash = release.tag_hash.encode()
+
+    parts = [RECORD.pack(flags, published, len(tag_hash), len(ver), len(url), len(tag_index))]
+    parts.extend((tag_hash, ver, url))
+    for sha, tag_ver in tag_index.items():
+        packed_sha, packed_ver = bytes.fromhex(sha), str(tag_ver).encode()
+        parts.extend((TAG_ENTRY.pack(len(packed_sha), len(packed_ver)), packed_sha, packed_ver))
+
+    return b"".join(parts)
+
+
+def write_snapshot(
+    path: Path,
+    releases: t.Mapping[tuple[str, str], Release | None],
+    tag_indexes: t.Mapping[tuple[str, str], TAG_INDEX_T] | None = None,
+) -> int:
+    """
+    Write a snapshot of the provided latest releases & tag indexes, see `ReleaseSnapshot`.
+
+    Keys without a release or tag index are omitted. The snapshot is written to a temporary file
+    that then replaces `path`, so readers never see a partially written snapshot.
+
+    The return is the number of keys written.
+    """
+    if tag_indexes is None:
+        tag_indexes = {}
+
+    entries: dict[bytes, tuple[Release | None, TAG_INDEX_T]] = {}
+    for key in dict.fromkeys((*releases, *tag_indexes)):
+        release, tag_index = releases.get(key), tag_indexes.get(key) or {}
+        if release is not None or tag_index:
+            entries[_snapshot_key(*key)] = (release, tag_index)
+
+    sorted_keys = sorted(entries)
+    key_offset = HEADER.size + KEY_ENTRY.size * len(sorted_keys)
+    record_offset = key_offset + sum(len(raw_key) for raw_key in sorted_keys)
+
+    table, records = [], []
+    for raw_key in sorted_keys:
+        record = _pack_record(*entries[raw_key])
+        table.append(KEY_ENTRY.pack(key_offset, len(raw_key), 0, record_offset))
+        records.append(record)
+
+        key_offset += len(raw_key)
+        record_offset += len(record)
+
+    header = HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0, len(sorted_keys), time.time())
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with tmp_path.open("wb") as f:
+            f.write(header)
+            f.writelines(table)
+            f.writelines(sorted_keys)
+            f.writelines(records)
+
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+    return len(sorted_keys)
+
+
+def _dependency_keys(deps: t.Iterable[JobDependency]) -> list[tuple[str, str]]:
+    return list(dict.fromkeys((dep.uses.owner, dep.uses.repo) for dep in deps))
+
+
+async def collect_local_actions(
+    workflows: t.Iterable[LocalWorkflow], graph: "DependencyGraph | None" = None
+) -> list[tuple[str, str]]:
+    """
+    Collect the `(owner, repo)` keys of the actions used by the provided local workflows.
+
+    If a `graph` is provided, the actions used by any reusable workflows & composite actions are
+    also collected, see `DependencyGraph`.
+
+    NOTE: Workflows that can't be parsed are skipped.
+    """
+    parsed = await asyncio.gather(
+        *(parse_in_executor(workflow, None, graph) for workflow in workflows)
+    )
+    return _dependency_keys(dep for deps in parsed for dep in deps)
+
+
+async def collect_org_actions(
+    session: "AsyncClientSession",
+    org: str,
+    workflow_root: str = ".github/workflows/",
+    ref: str = "HEAD",
+    include_archived: bool = False,
+    page_size: int = 25,
+    graph: "DependencyGraph | None" = None,
+) -> list[tuple[str, str]]:
+    """
+    Collect the `(owner, repo)` keys of the actions used across the query organization.
+
+    Repositories are filtered in the same manner as `iter_org_outdated`. If a `graph` is provided,
+    the actions used by any reusable workflows & composite actions are also collected.
+
+    NOTE: Workflows that can't be parsed are skipped.
+    """
+    from check_workflow.graph import RepositoryRef
+
+    deps: list[JobDependency] = []
+    async for repo in iter_org_repositories(
+        session=session, org=org, workflow_root=workflow_root, ref=ref, page_size=page_size
+    ):
+        if repo.is_empty or (repo.is_archived and not include_archived):
+            continue
+
+        repository = RepositoryRef(owner=repo.owner, repo=repo.name, ref=ref)
+        for wf_name, raw_workflow in repo.workflows.items():
+            try:
+                if graph is None:
+                    deps.extend(extract_workflow_dependencies(raw_workflow))
+                else:
+                    deps.extend(
+                        await graph.expand_remote(repository, workflow_root, wf_name, raw_workflow)
+                    )
+            except Exception as e:
+                # One malformed workflow shouldn't sink the rest of the scan
+                wf_path = f"{repo.owner}/{repo.name}:{posixpath.join(workflow_root, wf_name)}"
+                print(f"{wf_path}: Could not parse workflow ({e!r}), skipping...")
+
+    return _dependency_keys(deps)
+
+
+async def export_snapshot(
+    path: Path, keys: t.Iterable[tuple[str, str]], resolver: ReleaseResolver
+) -> int:
+    """
+    Resolve the latest release & tag index of the provided keys and write them to a snapshot.
+
+    Keys whose releases & tags could not be resolved are omitted, see `write_snapshot`. The return
+    is the number of keys written.
+    """
+    keys = list(dict.fromkeys(keys))
+    releases, tag_indexes = await asyncio.gather(
+        resolver.resolve(keys), resolver.resolve_tag_indexes(keys)
+    )
+    return write_snapshot(path, releases, tag_indexes)
+
+
+class ReleaseSnapshot:
+    """
+    Read-only snapshot of the latest release & tag index for `(owner, repo)` keys.
+
+    Snapshots are compact binary files, written using `write_snapshot` (see the `export-index` CLI
+    subcommand), that are memory-mapped rather than loaded. Keys are kept in a sorted table of
+    fixed-size entries, so each lookup is a binary search over the mapped file & only the matching
+    records are decoded; opening a snapshot costs the same regardless of its size.
+
+    Snapshots never expire. The snapshot may be used as the cache of a `ReleaseResolver`, see
+    `ReleaseStore` & `OfflineResolver`.
+
+    NOTE: Keys are case-insensitive, like GH's owner & repository names.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        with path.open("rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER.size:
+                raise ValueError(f"Not a release snapshot: {path}")
+
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, n_keys, created_at = HEADER.unpack_from(self._map)
+        self._n_keys: int = n_keys
+        if magic != SNAPSHOT_MAGIC:
+            self.close()
+            raise ValueError(f"Not a release snapshot: {path}")
+        if version != SNAPSHOT_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported release snapshot version ({version}): {path}")
+
+        self.created = dt.datetime.fromtimestamp(created_at, dt.UTC)
+
+    def __enter__(self) -> t.Self:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._n_keys
+
+    def close(self) -> None:  # noqa: D102
+        self._map.close()
+
+    def _key_at(self, idx: int) -> tuple[bytes, int]:
+        key_offset, key_len, _, record_offset = KEY_ENTRY.unpack_from(
+            self._map, HEADER.size + idx * KEY_ENTRY.size
+        )
+        return self._map[key_offset : key_offset + key_len], record_offset
+
+    def _find(self, owner: str, repo: str) -> int | None:
+        """Return the offset of the query repo's record, or `None` if it isn't in the snapshot."""
+        target = _snapshot_key(owner, repo)
+
+        lo, hi = 0, self._n_keys
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key, record_offset = self._key_at(mid)
+            if key == target:
+                return record_offset
+            elif key < target:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        return None
+
+    def _read_release(self, offset: int) -> Release | None:
+        flags, published, hash_len, ver_len, url_len, _ = RECORD.unpack_from(self._map, offset)
+        if not flags & HAS_RELEASE:
+            return None
+
+        offset += RECORD.size
+        tag_hash = self._map[offset : offset + hash_len]
+        offset += hash_len
+        ver = self._map[offset : offset + ver_len].decode()
+        offset += ver_len
+        url = self._map[offset : offset + url_len].decode()
+
+        return Release(
+            ver=Version(ver),
+            published=dt.datetime.fromtimestamp(published, dt.UTC),
+            url=url,
+            tag_hash=tag_hash.decode() if flags & TEXT_HASH else tag_hash.hex(),
+        )
+
+    def _read_tag_index(self, offset: int) -> TAG_INDEX_T:
+        _, _, hash_len, ver_len, url_len, n_tags = RECORD.unpack_from(self._map, offset)
+        offset += RECORD.size + hash_len + ver_len + url_len
+
+        tag_index = {}
+        for _ in range(n_tags):
+            sha_len, tag_ver_len = TAG_ENTRY.unpack_from(self._map, offset)
+            offset += TAG_ENTRY.size
+            sha = self._map[offset : offset + sha_len].hex()
+            offset += sha_len
+            tag_index[sha] = Version(self._map[offset : offset + tag_ver_len].decode())
+            offset += tag_ver_len
+
+        return tag_index
+
+    def get_many(self, keys: t.Iterable[tuple[str, str]]) -> dict[tuple[str, str], Release | None]:
+        """
+        Return the snapshotted releases for the provided keys; misses are omitted.
+
+        Keys snapshotted without a release (i.e. with only a tag index) are returned as `None`.
+        """
+        releases: dict[tuple[str, str], Release | None] = {}
+        for key in keys:
+            offset = self._find(*key)
+            if offset is not None:
+                releases[key] = self._read_release(offset)
+
+        return releases
+
+    def put_many(self, releases: t.Mapping[tuple[str, str], Release | None]) -> None:
+        """Discard the provided releases, snapshots are read-only."""
+        pass
+
+    def get_tag_indexes(
+        self, keys: t.Iterable[tuple[str, str]]
+    ) -> dict[tuple[str, str], TAG_INDEX_T]:
+        """Return the snapshotted tag indexes for the provided keys; misses are omitted."""
+        tag_indexes = {}
+        for key in keys:
+            offset = self._find(*key)
+            if offset is not None:
+                tag_indexes[key] = self._read_tag_index(offset)
+
+        return tag_indexes
+
+    def put_tag_indexes(self, tag_indexes: t.Mapping[tuple[str, str], TAG_INDEX_T]) -> None:
+        """Discard the provided tag indexes, snapshots are read-only."""
+        pass
+
+
+class OfflineResolver(ReleaseResolver):
+    """
+    Resolve latest releases & tag indexes from a `ReleaseSnapshot` alone, without network access.
+
+    Keys that aren't in the snapshot resolve to `None`, and an empty tag index, as if their
+    releases could not be resolved; they're reported separately from the keys snapshotted without a
+    release. See `ReleaseResolver` for the lookup interface.
+    """
+
+    def __init__(self, snapshot: ReleaseSnapshot) -> None:
+        # Nothing is ever queried, so there's no need for a session
+        super().__init__(session=None, cache=snapshot)
+        self.snapshot = snapshot
+
+    def _fetch_missing(
+        self, pending: list[tuple[str, str]], tag_pending: list[tuple[str, str]]
+    ) -> None:
+        # Keys missing from the snapshot can't be looked up any further
+        for key in pending:
+            print(f"{key[0]}/{key[1]}: Not in the offline release index, skipping...")
+            self._lookups[key].set_result(None)
+
+        for key in tag_pending:
+            self._tag_lookups[key].set_result({})
@@ -0,0 +1,217 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import typing as t
+import weakref
+from pathlib import Path
+
+# Span arguments summed into the columns of the summary table
+SUMMARY_ARGS = ("bytes", "cache_hits", "cache_misses")
+
+
+class Span:
+    """
+    A timed span of work, recorded by its `Tracer` once the span's context exits.
+
+    Arguments may be attached when the span is created or added while it's open using `set`.
+    """
+
+    __slots__ = ("tracer", "name", "category", "args", "start_ns", "end_ns", "tid")
+
+    def __init__(self, tracer: "Tracer", name: str, category: str, args: dict[str, object]) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start_ns = 0
+        self.end_ns = 0
+        self.tid = 0
+
+    def set(self, **args: object) -> None:
+        """Attach the provided arguments to the span."""
+        self.args.update(args)
+
+    @property
+    def duration_ns(self) -> int:  # noqa: D102
+        return self.end_ns - self.start_ns
+
+    def __enter__(self) -> t.Self:
+        self.tid = self.tracer._current_tid()
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None, exc: object, tb: object) -> None:
+        self.end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+
+        self.tracer.spans.append(self)
+
+
+class _NullSpan:
+    """Stand-in for `Span` while tracing is disabled, which records nothing."""
+
+    __slots__ = ()
+
+    def set(self, **args: object) -> None:  # noqa: D102
+        pass
+
+    def __enter__(self) -> t.Self:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """
+    Record spans of work for later summary or export as a Chrome trace.
+
+    Concurrent asyncio tasks are recorded on their own track of the trace, so overlapping requests
+    are displayed side by side rather than incorrectly nested.
+    """
+
+    def __init__(self) -> None:
+        self.spans: list[Span] = []
+        self.origin_ns = time.perf_counter_ns()
+
+        self._task_tids: weakref.WeakKeyDictionary[asyncio.Task, int] = weakref.WeakKeyDictionary()
+        self._thread_tids: dict[int, int] = {}
+
+    def _current_tid(self) -> int:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+
+        if task is None:
+            return self._thread_tids.setdefault(threading.get_ident(), len(self._thread_tids))
+
+        if task not in self._task_tids:
+            # Offset task tracks so they never collide with thread tracks
+            self._task_tids[task] = 1_000 + len(self._task_tids)
+
+        return self._task_tids[task]
+
+    def span(self, name: str, category: str = "phase", **args: object) -> Span:
+        """Create a span, which is timed & recorded while its context is open."""
+        return Span(self, name, category, args)
+
+    def to_chrome_trace(self) -> dict[str, t.Any]:
+        """
+        Build a Chrome trace-event document of the recorded spans.
+
+        The document may be loaded into `chrome://tracing` or https://ui.perfetto.dev.
+        """
+        pid = os.getpid()
+        events = []
+        for span in self.spans:
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": span.category,
+                    "ph": "X",
+                    "ts": (span.start_ns - self.origin_ns) / 1_000,
+                    "dur": span.duration_ns / 1_000,
+                    "pid": pid,
+                    "tid": span.tid,
+                    "args": span.args,
+                }
+            )
+
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: Path) -> None:
+        """Write the recorded spans to the provided path as a Chrome trace-event JSON file."""
+        with path.open("w", encoding="utf-8") as f:
+            # Span arguments may hold arbitrary objects, e.g. `(owner, repo)` keys
+            json.dump(self.to_chrome_trace(), f, default=str)
+
+    def summary(self) -> str:  # pragma: no cover
+        """
+        Summarize the recorded spans into a table, aggregated by span name.
+
+        Spans are listed in order of their total duration, descending, along with the sums of their
+        payload sizes & cache hits or misses, where recorded.
+        """
+        from prettytable import PrettyTable
+
+        aggregated: dict[tuple[str, str], list[Span]] = {}
+        for span in self.spans:
+            aggregated.setdefault((span.category, span.name), []).append(span)
+
+        table = PrettyTable(
+            field_names=[
+                "Category",
+                "Span",
+                "Count",
+                "Total (ms)",
+                "Mean (ms)",
+                "Max (ms)",
+                "Bytes",
+                "Cache Hits",
+                "Cache Misses",
+            ]
+        )
+        table.align = "r"
+        table.align["Category"] = table.align["Span"] = "l"
+
+        rows = []
+        for (category, name), spans in aggregated.items():
+            durations = [span.duration_ns / 1e6 for span in spans]
+            totals = [
+                sum(t.cast(int, span.args.get(arg, 0)) for span in spans) for arg in SUMMARY_ARGS
+            ]
+            rows.append(
+                [
+                    category,
+                    name,
+                    len(spans),
+                    round(sum(durations), 2),
+                    round(sum(durations) / len(spans), 2),
+                    round(max(durations), 2),
+                    *(total or "" for total in totals),
+                ]
+            )
+
+        table.add_rows(sorted(rows, key=lambda row: row[3], reverse=True))
+        return table.get_string()
+
+
+_TRACER: Tracer | None = None
+
+
+def get_tracer() -> Tracer | None:
+    """Return the active tracer, or `None` if tracing is disabled."""
+    return _TRACER
+
+
+def set_tracer(tracer: Tracer | None) -> Tracer | None:
+    """
+    Set the active tracer, returning the previous one; tracing is disabled if `tracer` is `None`.
+
+    NOTE: Spans are only recorded in the process the tracer is set in, so work done in a process
+    pool is only captured as a whole, from the parent process.
+    """
+    global _TRACER
+    previous, _TRACER = _TRACER, tracer
+    return previous
+
+
+def span(name: str, category: str = "phase", **args: object) -> Span | _NullSpan:
+    """
+    Create a span using the active tracer, to be timed & recorded while its context is open.
+
+    If tracing is disabled, a shared no-op span is returned, so instrumented code costs next to
+    nothing. Arguments should be cheap to build, as they're built regardless; more expensive
+    arguments can be attached using `Span.set`, guarded by a check of `get_tracer()`.
+    """
+    if _TRACER is None:
+        return NULL_SPAN
+
+    return _TRACER.span(name, category, **args)
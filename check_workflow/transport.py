@@ -0,0 +1,98 @@
+import functools
+import json
+import typing as t
+
+from gql import GraphQLRequest
+from gql.transport import AsyncTransport
+from gql.transport.httpx import HTTPXAsyncTransport
+from graphql import ExecutionResult, OperationDefinitionNode
+
+from check_workflow.replay import WrappedTransport
+from check_workflow.scheduler import RateLimitScheduler
+from check_workflow.trace import Tracer
+
+
+class RateLimitedTransport(HTTPXAsyncTransport):
+    """
+    HTTPX transport whose requests are scheduled around GH's rate limits.
+
+    NOTE: This module imports the full network stack, so it should only be imported once a client
+    is actually needed.
+    """
+
+    def __init__(self, scheduler: RateLimitScheduler, **kwargs: t.Any) -> None:  # noqa: ANN401
+        super().__init__(**kwargs)
+        self.scheduler = scheduler
+
+    async def execute(  # noqa: D102
+        self,
+        request: GraphQLRequest,
+        *,
+        extra_args: dict[str, t.Any] | None = None,
+        upload_files: bool = False,
+    ) -> ExecutionResult:
+        send = functools.partial(
+            super().execute, request, extra_args=extra_args, upload_files=upload_files
+        )
+        return await self.scheduler.execute(send, lambda: self.response_headers)
+
+
+def _operation_name(request: GraphQLRequest) -> str:
+    if request.operation_name is not None:
+        return request.operation_name
+
+    for definition in request.document.definitions:
+        if isinstance(definition, OperationDefinitionNode) and definition.name is not None:
+            return definition.name.value
+
+    return "anonymous"
+
+
+class TracingTransport(AsyncTransport):
+    """
+    Transport recording a span for each request made through the wrapped transport.
+
+    Each request's span is named for its GraphQL operation, and records the size of its payload
+    & response (`request_bytes` & `bytes`), along with its rate limit cost, if selected.
+    """
+
+    def __init__(self, transport: AsyncTransport, tracer: Tracer) -> None:
+        self.transport: WrappedTransport = transport
+        self.tracer = tracer
+
+    @property
+    def scheduler(self) -> object:
+        """Scheduler of the wrapped transport, if it has one."""
+        return getattr(self.transport, "scheduler", None)
+
+    @property
+    def requires_token(self) -> bool:
+        """Whether the wrapped transport needs an API token."""
+        return getattr(self.transport, "requires_token", True)
+
+    async def connect(self) -> None:  # noqa: D102
+        with self.tracer.span("connect", "graphql"):
+            await self.transport.connect()
+
+    async def close(self) -> None:  # noqa: D102
+        with self.tracer.span("close", "graphql"):
+            await self.transport.close()
+
+    async def execute(  # noqa: D102
+        self, request: GraphQLRequest, **kwargs: t.Any  # noqa: ANN401
+    ) -> ExecutionResult:
+        request_bytes = len(json.dumps(request.payload))
+        with self.tracer.span(
+            _operation_name(request), "graphql", request_bytes=request_bytes
+        ) as span:
+            result = await self.transport.execute(request, **kwargs)
+
+            span.set(bytes=len(json.dumps(result.data)), n_errors=len(result.errors or ()))
+            rate_limit = (result.data or {}).get("rateLimit")
+            if rate_limit is not None:
+                span.set(cost=rate_limit.get("cost"))
+
+        return result
+
+    def subscribe(self, request: GraphQLRequest) -> t.NoReturn:  # noqa: D102
+        raise NotImplementedError("Subscriptions are not supported")
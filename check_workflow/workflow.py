@@ -1,15 +1,29 @@
+import asyncio
+import datetime as dt
+import functools
+import operator
 import string
 import typing as t
 from collections import defaultdict
 from pathlib import Path
 
-import yaml
-from gql.client import AsyncClientSession
 from packaging.specifiers import SpecifierSet
-from prettytable import PrettyTable, TableStyle
+from packaging.version import Version
 
-from check_workflow import WORKFLOW_T
-from check_workflow.gh_api import Release, fetch_releases
+from check_workflow import WORKFLOW_T, trace
+from check_workflow.cache import ReleaseCache
+from check_workflow.gh_api import Release, TAG_INDEX_T
+from check_workflow.resolve import DEFAULT_BATCH_SIZE, DEFAULT_MAX_CONCURRENCY, ReleaseResolver
+
+if t.TYPE_CHECKING:
+    from gql.client import AsyncClientSession
+
+WORKFLOW_SUFFIXES = frozenset((".yml", ".yaml"))
+
+# Across an organization, the same few hundred action specifications are repeated many times over,
+# so parsed specifications & specifier evaluations are memoized
+USES_CACHE_SIZE = 4_096
+CONTAINMENT_CACHE_SIZE = 4_096
 
 
 class UsesSpec(t.NamedTuple):  # noqa: D101
@@ -19,23 +33,30 @@ class UsesSpec(t.NamedTuple):  # noqa: D101
     sha: str | None
 
     @classmethod
+    @functools.lru_cache(maxsize=USES_CACHE_SIZE)
     def from_raw(cls, raw_spec: str) -> t.Self:
         """
         Build a `UsesSpec` instance from the provided workflow dependency specification.
 
         Dependency specifications are assumed to be of the form `<user>/<repo>@<ver>` or a full SHA
-        hash, e.g. :
+        hash, optionally with a path within the repository (e.g. an action in a subdirectory or a
+        reusable workflow), e.g. :
             * `"actions/setup-python@v6"`
             * `"deadsnakes/action@v3.2.0"`
             * `"actions/checkout@8f4b7f84864484a7bf31766abe9204da3cbe65b3"`
+            * `"github/codeql-action/init@v3"`
+            * `"octo-org/ci/.github/workflows/build.yml@v1"`
 
         If a version specifier is used, the resulting instance's `spec` attribute is built using a
         compatible release clause (`~=`) and the `sha` attribute will be `None`. Otherwise, `spec`
         will be `None` and `sha` will be the pinned SHA.
+
+        NOTE: The most recently used specifications are memoized, so repeated specifications share
+        a single instance.
         """
         action, raw_ver = raw_spec.split("@")
         *_, raw_ver = raw_ver.split("/")  # May use a branch, which we don't care about
-        owner, repo = action.split("/")
+        owner, repo, *_ = action.split("/")  # Releases are per repository, regardless of path
 
         # Discriminate between version pin and SHA
         if len(raw_ver) == 40 and all(c in string.hexdigits for c in raw_ver):
@@ -43,52 +64,97 @@ class UsesSpec(t.NamedTuple):  # noqa: D101
             sha = raw_ver
         else:
             sha = None
-            raw_ver = raw_ver.removeprefix("v")  # Some repos may prefix their tags
-
-            if len(raw_ver.split(".")) == 1:
-                # Major-only version spec needs special handling, otherwise SpecifierSet will raise
-                spec = SpecifierSet(f"~={raw_ver}.0")
-            else:
-                spec = SpecifierSet(f"~={raw_ver}")
+            spec = compatible_release(raw_ver.removeprefix("v"))  # Some repos may prefix their tags
 
         return cls(owner=owner, repo=repo, spec=spec, sha=sha)
 
 
+class _HashedSpecifierSet(SpecifierSet):
+    """
+    Specifier set whose hash is only computed once.
+
+    `SpecifierSet` re-canonicalizes each of its specifiers every time it's hashed, which dominates
+    the cost of a containment cache lookup. Parsed specifiers are shared & never modified, so the
+    hash can be safely reused.
+    """
+
+    def __init__(self, specifiers: str) -> None:
+        super().__init__(specifiers)
+        self._hash = super().__hash__()
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __reduce__(self) -> tuple[type[t.Self], tuple[str]]:
+        # String hashes are salted per process, so rehash when unpickled (e.g. from a process pool)
+        return (type(self), (str(self),))
+
+
+@functools.lru_cache(maxsize=USES_CACHE_SIZE)
+def compatible_release(raw_ver: str) -> SpecifierSet:
+    """
+    Build the compatible release specifier (`~=`) of the provided version, e.g. `4` -> `~=4.0`.
+
+    NOTE: Many actions share the same few versions, so specifiers are cached & shared between
+    calls.
+    """
+    if len(raw_ver.split(".")) == 1:
+        # Major-only version spec needs special handling, otherwise SpecifierSet will raise
+        return _HashedSpecifierSet(f"~={raw_ver}.0")
+    else:
+        return _HashedSpecifierSet(f"~={raw_ver}")
+
+
+@functools.lru_cache(maxsize=CONTAINMENT_CACHE_SIZE)
+def _spec_contains(spec: SpecifierSet, ver: Version) -> bool:
+    return ver in spec
+
+
 class JobDependency(t.NamedTuple):  # noqa: D101
     job: str
     step_name: str | None
     uses: UsesSpec
+    # Reusable workflows & composite actions the dependency was reached through, see `graph`
+    via: tuple[str, ...] = ()
+
+
+def is_versioned(raw_uses: str) -> bool:
+    """
+    Check whether the provided raw `uses` spec refers to a versioned action or reusable workflow.
+
+    Docker & local actions have no releases to check against.
+    """
+    return not raw_uses.startswith(("docker", "./", "../"))
 
 
-def extract_workflow_dependencies(raw_workflow: str) -> list[JobDependency]:
+def extract_workflow_dependencies(raw_workflow: str, scan: bool = True) -> list[JobDependency]:
     """
     Extract job dependencies from the provided raw workflow YAML.
 
+    By default, the workflow's YAML event stream is scanned for each step's `name` & `uses` rather
+    than loading the full workflow, which is considerably faster for large numbers of workflows. If
+    `scan` is `False`, the full workflow is loaded instead; both approaches yield identical results.
+
     NOTE: Only versioned actions are considered. Other specifications, such as local or docker
     actions, are skipped.
     """
-    loaded = yaml.safe_load(raw_workflow)
+    from check_workflow.extract import load_steps, scan_steps
 
-    extracted_dependencies = []
-    for job, job_params in loaded["jobs"].items():
-        for step in job_params["steps"]:
-            uses = step.get("uses", None)
+    with trace.span("extract_workflow_dependencies", "parse", bytes=len(raw_workflow)):
+        raw_steps = scan_steps(raw_workflow) if scan else load_steps(raw_workflow)
 
-            if uses is None:
-                continue
-
-            if uses.startswith("docker"):
-                continue
-            elif uses.startswith("./") or uses.startswith("../"):
-                continue
-
-            extracted_dependencies.append(
-                JobDependency(
-                    job=job,
-                    step_name=step.get("name", None),
-                    uses=UsesSpec.from_raw(uses),
-                )
+    extracted_dependencies = []
+    for step in raw_steps:
+        if not is_versioned(step.uses):
+            continue
+
+        extracted_dependencies.append(
+            JobDependency(
+                job=step.job,
+                step_name=step.step_name,
+                uses=UsesSpec.from_raw(step.uses),
             )
+        )
 
     return extracted_dependencies
 
@@ -96,43 +162,359 @@ def extract_workflow_dependencies(raw_workflow: str) -> list[JobDependency]:
 class OutdatedDep(t.NamedTuple):  # noqa: D101
     spec: JobDependency
     latest: Release
+    pinned: Version | None = None  # Tagged version of a pinned SHA, if it could be resolved
+
+
+def outdated_to_dict(dep: OutdatedDep) -> dict[str, t.Any]:
+    """Convert the provided outdated dependency into a JSON serializable dictionary."""
+    uses = dep.spec.uses
+    return {
+        "job": dep.spec.job,
+        "step_name": dep.spec.step_name,
+        "uses": {
+            "owner": uses.owner,
+            "repo": uses.repo,
+            "spec": None if uses.spec is None else str(uses.spec),
+            "sha": uses.sha,
+        },
+        "latest": {
+            "ver": str(dep.latest.ver),
+            "published": dep.latest.published.isoformat(),
+            "url": dep.latest.url,
+            "tag_hash": dep.latest.tag_hash,
+        },
+        "pinned": None if dep.pinned is None else str(dep.pinned),
+        "via": list(dep.spec.via),
+    }
+
+
+def outdated_from_dict(dumped: dict[str, t.Any]) -> OutdatedDep:
+    """Build an outdated dependency from its dictionary form, as built by `outdated_to_dict`."""
+    uses, latest = dumped["uses"], dumped["latest"]
+
+    # Specifiers are dumped in their `~=` form, see `UsesSpec.from_raw`
+    spec, pinned = uses["spec"], dumped.get("pinned")
+    return OutdatedDep(
+        spec=JobDependency(
+            job=dumped["job"],
+            step_name=dumped["step_name"],
+            uses=UsesSpec(
+                owner=uses["owner"],
+                repo=uses["repo"],
+                spec=None if spec is None else compatible_release(spec.removeprefix("~=")),
+                sha=uses["sha"],
+            ),
+            via=tuple(dumped.get("via", ())),
+        ),
+        latest=Release(
+            ver=Version(latest["ver"]),
+            published=dt.datetime.fromisoformat(latest["published"]),
+            url=latest["url"],
+            tag_hash=latest["tag_hash"],
+        ),
+        pinned=None if pinned is None else Version(pinned),
+    )
+
+
+def is_outdated(dep: JobDependency, latest: Release, pinned: Version | None = None) -> bool:
+    """
+    Check whether the provided job dependency is behind its `latest` release.
+
+    Version specs are outdated if they don't contain the latest version. SHAs are outdated if the
+    version they're `pinned` to, if known, is older than the latest version, otherwise if they
+    differ from the latest release's tag hash.
+    """
+    # Switch behavior based on whether we've pinned a version vs. SHA
+    # If sha is None then spec is defined & vice-versa; since this is the only place this
+    # comparison happens we can go with this assumption vs. adding more narrowing logic
+    if dep.uses.sha is None:
+        return not _spec_contains(dep.uses.spec, latest.ver)
+    elif pinned is not None:
+        # SHAs may be pinned to a tag other than the release's, e.g. a major version tag
+        return pinned < latest.ver
+    else:
+        return latest.tag_hash != dep.uses.sha
+
+
+class _ResolvedDep(t.NamedTuple):
+    workflow: str
+    dep_idx: int
+    outdated: OutdatedDep | None
+    workflow_done: bool
+
+
+type PARSED_T = list[JobDependency] | asyncio.Future[list[JobDependency]]
+
+# Expands a `(filename, file contents)` workflow into its transitive dependencies, see `graph`
+type EXPAND_T = t.Callable[[str, str], t.Awaitable[list[JobDependency]]]
+
+
+def _parse_workflows(
+    raw_workflows: WORKFLOW_T | t.Iterable[tuple[str, str]], expand: EXPAND_T | None = None
+) -> t.Iterator[tuple[str, PARSED_T]]:
+    if isinstance(raw_workflows, t.Mapping):
+        raw_workflows = raw_workflows.items()
+
+    for wf_name, wf in raw_workflows:
+        if expand is None:
+            yield wf_name, extract_workflow_dependencies(wf)
+        else:
+            yield wf_name, asyncio.ensure_future(expand(wf_name, wf))
+
+
+# Maximum number of workflows being parsed or resolved at once, see `_iter_resolved`
+MAX_IN_FLIGHT_WORKFLOWS = 256
+
+# A dependency waiting on its lookup, as its workflow, its index within the workflow, & itself
+type _WAITING_T = tuple[str, int, JobDependency]
+type _PINNED_T = tuple[Release | None, TAG_INDEX_T]
+
+
+async def _iter_resolved(
+    parsed_workflows: t.Iterable[tuple[str, PARSED_T]],
+    resolver: ReleaseResolver,
+    max_in_flight: int = MAX_IN_FLIGHT_WORKFLOWS,
+) -> t.AsyncIterator[_ResolvedDep]:
+    """
+    Yield each workflow dependency as soon as its latest release has been resolved.
+
+    Each workflow's dependencies may be provided directly, or as a future that resolves to them once
+    they've been parsed elsewhere (e.g. in a process pool). Release lookups are requested as soon as
+    a workflow's dependencies are available, so lookups are batched across all workflows available
+    at the time. Raw workflow text is not retained once parsed.
+
+    Workflows are taken from the provided iterable as they're needed, with up to `max_in_flight`
+    workflows being parsed or resolved at once; further workflows are only taken once earlier ones
+    are done. Memory use & the time to the first result are bounded by this window rather than
+    growing with the number of workflows.
+
+    SHA pinned dependencies additionally wait on their repository's tag index, so the pinned SHA can
+    be resolved to its tagged version, see `ReleaseResolver.tag_index`.
+    """
+    waiting: dict[asyncio.Future[Release | None], list[_WAITING_T]] = {}
+    waiting_pinned: dict[asyncio.Future[_PINNED_T], list[_WAITING_T]] = {}
+    pinned_lookups: dict[tuple[str, str], asyncio.Future[_PINNED_T]] = {}
+    parsing: dict[asyncio.Future[list[JobDependency]], str] = {}
+    n_remaining: dict[str, int] = {}
+
+    if max_in_flight < 1:
+        raise ValueError(f"Max in flight must be at least 1, received: {max_in_flight}")
+
+    workflows = iter(parsed_workflows)
+    n_in_flight = 0
+    exhausted = False
+    ready: list[tuple[str, list[JobDependency]]] = []
+
+    def _resolved(
+        waiting_dep: _WAITING_T, latest: Release | None, pinned: Version | None = None
+    ) -> _ResolvedDep:
+        nonlocal n_in_flight
+        wf_name, dep_idx, dep = waiting_dep
+
+        outdated = None
+        if latest is not None and is_outdated(dep, latest, pinned):
+            outdated = OutdatedDep(spec=dep, latest=latest, pinned=pinned)
+
+        n_remaining[wf_name] -= 1
+        workflow_done = n_remaining[wf_name] == 0
+        if workflow_done:
+            del n_remaining[wf_name]
+            n_in_flight -= 1
+
+        return _ResolvedDep(
+            workflow=wf_name, dep_idx=dep_idx, outdated=outdated, workflow_done=workflow_done
+        )
+
+    while True:
+        # Top up the window of in flight workflows
+        while not exhausted and n_in_flight < max_in_flight:
+            try:
+                wf_name, wf_deps = next(workflows)
+            except StopIteration:
+                exhausted = True
+                break
+
+            n_in_flight += 1
+            if isinstance(wf_deps, asyncio.Future):
+                parsing[wf_deps] = wf_name
+            else:
+                ready.append((wf_name, wf_deps))
+
+        for wf_name, wf_deps in ready:
+            if not wf_deps:
+                n_in_flight -= 1
+                yield _ResolvedDep(workflow=wf_name, dep_idx=-1, outdated=None, workflow_done=True)
+                continue
+
+            n_remaining[wf_name] = len(wf_deps)
+            for dep_idx, dep in enumerate(wf_deps):
+                owner, repo = dep.uses.owner, dep.uses.repo
+                if dep.uses.sha is None:
+                    lookup = resolver.latest(owner, repo)
+                    waiting.setdefault(lookup, []).append((wf_name, dep_idx, dep))
+                    continue
+
+                if (owner, repo) not in pinned_lookups:
+                    pinned_lookups[(owner, repo)] = asyncio.gather(
+                        resolver.latest(owner, repo), resolver.tag_index(owner, repo)
+                    )
+
+                pinned_lookup = pinned_lookups[(owner, repo)]
+                waiting_pinned.setdefault(pinned_lookup, []).append((wf_name, dep_idx, dep))
+
+        ready = []
+        if not (waiting or waiting_pinned or parsing):
+            if exhausted:
+                break
+
+            # Every workflow in the window was empty, so there's nothing to wait on
+            continue
+
+        in_flight: list[asyncio.Future[t.Any]] = [*waiting, *waiting_pinned, *parsing]
+        done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+
+        # Request lookups for all newly parsed workflows together so they can share batches
+        ready = [(wf_name, fut.result()) for fut, wf_name in parsing.items() if fut in done]
+        for fut in parsing.keys() & done:
+            del parsing[fut]
+
+        for lookup in waiting.keys() & done:
+            latest = lookup.result()
+            for waiting_dep in waiting.pop(lookup):
+                yield _resolved(waiting_dep, latest)
+
+        # Lookups for SHA pinned dependencies also include the tag index, see above
+        for pinned_lookup in waiting_pinned.keys() & done:
+            latest, tag_index = pinned_lookup.result()
+            for waiting_dep in waiting_pinned.pop(pinned_lookup):
+                sha = waiting_dep[2].uses.sha
+                yield _resolved(waiting_dep, latest, None if sha is None else tag_index.get(sha))
+
+
+async def iter_outdated(
+    session: "AsyncClientSession",
+    raw_workflows: WORKFLOW_T | t.Iterable[tuple[str, str]],
+    resolver: ReleaseResolver | None = None,
+) -> t.AsyncIterator[tuple[str, OutdatedDep]]:
+    """
+    Parse the provided workflow files and yield outdated dependencies as soon as they're resolved.
+
+    Workflows may be provided as a dictionary of <filename>:<file contents> items, or any iterable
+    of `(filename, file contents)` pairs. Results are yielded as `(filename, outdated dependency)`
+    pairs in the order that their latest releases are resolved.
+
+    If a `resolver` is provided, it is used for release lookups, otherwise one is built using its
+    default parameters.
+
+    NOTE: Dependencies whose latest release cannot be resolved are skipped.
+    """
+    if resolver is None:
+        resolver = ReleaseResolver(session=session)
+
+    async for resolved in _iter_resolved(_parse_workflows(raw_workflows), resolver):
+        if resolved.outdated is not None:
+            yield resolved.workflow, resolved.outdated
+
+
+async def iter_dependency_reports(
+    parsed_workflows: t.Iterable[tuple[str, PARSED_T]], resolver: ReleaseResolver
+) -> t.AsyncIterator[tuple[str, list[OutdatedDep]]]:
+    """
+    Yield each workflow's outdated dependencies once resolved, from already parsed workflows.
+
+    Workflows are provided as `(filename, dependencies)` pairs, where the dependencies may also be a
+    future that resolves to them once they've been parsed elsewhere (e.g. in a process pool); each
+    workflow's release lookups are requested as soon as its dependencies are available. Workflows
+    are taken from `parsed_workflows` in a bounded window as earlier ones are done, so a lazy
+    iterable keeps memory use bounded, see `_iter_resolved`.
+
+    See `iter_workflow_reports` for a description of the results.
+    """
+    in_progress: dict[str, list[tuple[int, OutdatedDep]]] = defaultdict(list)
+    async for resolved in _iter_resolved(parsed_workflows, resolver):
+        if resolved.outdated is not None:
+            in_progress[resolved.workflow].append((resolved.dep_idx, resolved.outdated))
+
+        if resolved.workflow_done:
+            wf_outdated = in_progress.pop(resolved.workflow, [])
+            if wf_outdated:
+                wf_outdated.sort(key=operator.itemgetter(0))
+                yield resolved.workflow, [dep for _, dep in wf_outdated]
+
+
+async def iter_workflow_reports(
+    session: "AsyncClientSession",
+    raw_workflows: WORKFLOW_T | t.Iterable[tuple[str, str]],
+    resolver: ReleaseResolver | None = None,
+    expand: EXPAND_T | None = None,
+) -> t.AsyncIterator[tuple[str, list[OutdatedDep]]]:
+    """
+    Parse the provided workflow files and yield each file's outdated dependencies once resolved.
+
+    Results are yielded as `(filename, outdated dependencies)` pairs as soon as all of a file's
+    dependencies have been resolved; outdated dependencies are in the order they're specified in the
+    file. Files without outdated dependencies are not yielded.
+
+    If `expand` is provided, it is called with each workflow's filename & contents in place of
+    `extract_workflow_dependencies` to also include transitive dependencies, e.g. using
+    `DependencyGraph.expand_remote`.
+
+    See `iter_outdated` for a description of the remaining parameters.
+    """
+    if resolver is None:
+        resolver = ReleaseResolver(session=session)
+
+    async for report in iter_dependency_reports(_parse_workflows(raw_workflows, expand), resolver):
+        yield report
 
 
 async def report_outdated(
-    session: AsyncClientSession, raw_workflows: WORKFLOW_T
+    session: "AsyncClientSession",
+    raw_workflows: WORKFLOW_T,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    cache: ReleaseCache | None = None,
+    refresh: bool = False,
+    resolver: ReleaseResolver | None = None,
+    expand: EXPAND_T | None = None,
 ) -> dict[str, list[OutdatedDep]]:
-    """Parse the provided workflow files and return a per-file list of outdated dependencies."""
-    # Cache latest release info to cut down on API calls; keyed by (owner, repo) tuples
-    seen_releases: dict[tuple[str, str], Release] = {}
+    """
+    Parse the provided workflow files and return a per-file list of outdated dependencies.
 
-    outdated: dict[str, list[OutdatedDep]] = defaultdict(list)
-    for wf_name, wf in raw_workflows.items():
-        wf_deps = extract_workflow_dependencies(wf)
-        for dep in wf_deps:
-            cache_key = (dep.uses.owner, dep.uses.repo)
-            if cache_key not in seen_releases:
-                latest = (
-                    await fetch_releases(
-                        session=session, owner=dep.uses.owner, repo_name=dep.uses.repo
-                    )
-                )[0]
-                seen_releases[cache_key] = latest
-            else:
-                latest = seen_releases[cache_key]
-
-            # Switch behavior based on whether we've pinned a version vs. SHA
-            # If sha is None then spec is defined & vice-versa; since this is the only place this
-            # comparison happens we can go with this assumption vs. adding more narrowing logic
-            is_outdated = False
-            if dep.uses.sha is None:
-                if latest.ver not in dep.uses.spec:  # type: ignore[operator]
-                    is_outdated = True
-            else:
-                if latest.tag_hash != dep.uses.sha:
-                    is_outdated = True
+    Latest releases are looked up once per unique `(owner, repo)` across all workflows using
+    batched queries of up to `batch_size` repositories, with up to `max_concurrency` queries in
+    flight at once. If a `cache` is provided, fresh cached releases are used in place of a query
+    unless `refresh` is `True`.
+
+    If a `resolver` is provided, it is used for release lookups in place of building one from the
+    above parameters; this allows lookups to be shared across multiple reports.
 
-            if is_outdated:
-                outdated[wf_name].append(OutdatedDep(spec=dep, latest=latest))
+    If `expand` is provided, transitive dependencies are also checked, see `iter_workflow_reports`.
+
+    This collects the results of `iter_workflow_reports`, ordered to match the provided workflows.
+
+    NOTE: Dependencies whose latest release cannot be resolved are skipped.
+    """
+    if resolver is None:
+        resolver = ReleaseResolver(
+            session=session,
+            max_concurrency=max_concurrency,
+            batch_size=batch_size,
+            cache=cache,
+            refresh=refresh,
+        )
+
+    reports = {
+        wf_name: wf_outdated
+        async for wf_name, wf_outdated in iter_workflow_reports(
+            session, raw_workflows, resolver, expand
+        )
+    }
+
+    outdated: dict[str, list[OutdatedDep]] = defaultdict(list)
+    for wf_name in raw_workflows:
+        if wf_name in reports:
+            outdated[wf_name] = reports[wf_name]
 
     return outdated
 
@@ -146,6 +528,8 @@ def format_outdated(
     If `markdown` is `True`, outdated dependencies are summarized into a markdown-styled table,
     otherwise the table is output in a terminal friendly form.
     """
+    from prettytable import PrettyTable, TableStyle
+
     comps = []
     fields = ["Job", "Step Name", "Action", "Specified", "Latest"]
     for workflow, deps in outdated.items():
@@ -163,6 +547,8 @@ def format_outdated(
 
         for dep in deps:
             action_string = f"{dep.spec.uses.owner}/{dep.spec.uses.repo}"
+            if dep.spec.via:
+                action_string = f"{action_string}\n(via {" > ".join(dep.spec.via)})"
 
             # If spec is None then SHA is defined & vice-versa
             if dep.spec.uses.spec is not None:
@@ -171,6 +557,9 @@ def format_outdated(
             else:
                 uses_spec = dep.spec.uses.sha[:7]  # type: ignore[index,assignment]
                 latest_spec = dep.latest.tag_hash[:7]  # type: ignore[assignment]
+                if dep.pinned is not None:
+                    uses_spec = f"{uses_spec} ({dep.pinned})"  # type: ignore[assignment]
+                    latest_spec = f"{latest_spec} ({dep.latest.ver})"  # type: ignore[assignment]
 
             table.add_row(
                 [
@@ -189,9 +578,10 @@ def format_outdated(
 
 
 def fetch_local(base_dir: Path) -> WORKFLOW_T:
-    """Parse all `*.yml` files present in the specified base directory."""
+    """Parse all workflow files (`*.yml` or `*.yaml`) present in the specified base directory."""
     workflows = {}
-    for yml in base_dir.glob("*.yml", case_sensitive=False):
-        workflows[yml.name] = yml.read_text()
+    for wf in sorted(base_dir.iterdir()):
+        if wf.suffix.lower() in WORKFLOW_SUFFIXES and wf.is_file():
+            workflows[wf.name] = wf.read_text()
 
     return workflows
@@ -0,0 +1,357 @@
+import datetime as dt
+import hashlib
+import json
+import threading
+import time
+import typing as t
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from graphql import GraphQLError, build_schema, graphql_sync
+
+SCHEMA = build_schema("""
+enum OrderDirection { ASC DESC }
+enum ReleaseOrderField { CREATED_AT NAME }
+enum RepositoryOrderField { CREATED_AT NAME }
+enum RefOrderField { TAG_COMMIT_DATE ALPHABETICAL }
+
+input ReleaseOrder { field: ReleaseOrderField!, direction: OrderDirection! }
+input RepositoryOrder { field: RepositoryOrderField!, direction: OrderDirection! }
+input RefOrder { field: RefOrderField!, direction: OrderDirection! }
+
+type Query {
+    rateLimit: RateLimit
+    repository(owner: String!, name: String!): Repository
+    organization(login: String!): Organization
+}
+
+type RateLimit {
+    cost: Int!
+    remaining: Int!
+    resetAt: String!
+}
+
+type Organization {
+    repositories(
+        first: Int!, after: String, orderBy: RepositoryOrder
+    ): RepositoryConnection!
+}
+
+type RepositoryConnection {
+    pageInfo: PageInfo!
+    nodes: [Repository!]!
+}
+
+type PageInfo {
+    hasNextPage: Boolean!
+    endCursor: String
+}
+
+type Repository {
+    name: String!
+    isArchived: Boolean!
+    isEmpty: Boolean!
+    releases(first: Int!, after: String, orderBy: ReleaseOrder): ReleaseConnection!
+    object(expression: String!): GitObject
+    refs(refPrefix: String!, first: Int!, after: String, orderBy: RefOrder): RefConnection
+}
+
+type RefConnection {
+    pageInfo: PageInfo!
+    nodes: [Ref!]!
+}
+
+type Ref {
+    name: String!
+    target: GitObject
+}
+
+type ReleaseConnection {
+    pageInfo: PageInfo!
+    nodes: [Release!]!
+}
+
+type Release {
+    tagName: String!
+    isPrerelease: Boolean!
+    publishedAt: String!
+    url: String!
+    tagCommit: Commit
+}
+
+union GitObject = Commit | Tag | Tree | Blob
+
+type Commit { oid: String!, committedDate: String! }
+type Tag { oid: String!, target: GitObject }
+type Tree { entries: [TreeEntry!]! }
+type TreeEntry { name: String!, object: GitObject }
+type Blob { text: String }
+""")
+
+
+@dataclass
+class FakeRepo:
+    """
+    Repository contents; `releases` are `(tag, sha)` pairs & `files` are keyed by path.
+
+    Release tags are annotated, additional lightweight `tags` may also be provided as `(tag, sha)`
+    pairs. Releases & tags are both listed oldest first. Releases whose tag is listed in
+    `prereleases` are marked as pre-releases.
+    """
+
+    owner: str
+    name: str
+    releases: list[tuple[str, str]] = field(default_factory=list)
+    tags: list[tuple[str, str]] = field(default_factory=list)
+    files: dict[str, str] = field(default_factory=dict)
+    prereleases: set[str] = field(default_factory=set)
+    is_archived: bool = False
+
+    def release_nodes(self) -> list[dict]:
+        """Build nodes for every release, newest first."""
+        return [
+            {
+                "tagName": tag,
+                "isPrerelease": tag in self.prereleases,
+                "publishedAt": "2024-01-01T00:00:00Z",
+                "url": f"https://github.com/{self.owner}/{self.name}/releases/tag/{tag}",
+                "tagCommit": _commit_node(sha),
+            }
+            for tag, sha in reversed(self.releases)
+        ]
+
+    def tag_nodes(self) -> list[dict]:
+        """Build ref nodes for every tag, newest first."""
+        nodes = []
+        for tag, sha in self.releases:
+            tag_oid = hashlib.sha1(tag.encode()).hexdigest()
+            target = _commit_node(sha)
+            nodes.append(
+                {"name": tag, "target": {"__typename": "Tag", "oid": tag_oid, "target": target}}
+            )
+        for tag, sha in self.tags:
+            nodes.append({"name": tag, "target": _commit_node(sha)})
+
+        return nodes[::-1]
+
+    def tree(self, root: str) -> dict | None:
+        """Build a tree node for the files directly under `root`, or `None` if there are none."""
+        root = root.strip("/")
+        entries = []
+        for path, text in sorted(self.files.items()):
+            parent, _, name = path.rpartition("/")
+            if parent == root:
+                entries.append({"name": name, "object": {"__typename": "Blob", "text": text}})
+
+        if not entries:
+            return None
+
+        return {"__typename": "Tree", "entries": entries}
+
+
+def _commit_node(sha: str) -> dict:
+    return {"__typename": "Commit", "oid": sha, "committedDate": "2024-01-01T00:00:00Z"}
+
+
+def _page(nodes: list[dict], first: int, after: str | None) -> dict:
+    start = 0 if after is None else int(after)
+    page = nodes[start : start + first]
+    end = start + len(page)
+    return {"pageInfo": {"hasNextPage": end < len(nodes), "endCursor": f"{end}"}, "nodes": page}
+
+
+class FakeGitHub:
+    """
+    Fake GraphQL API server, serving the provided repositories at `url` while running.
+
+    Only the subset of GH's schema queried by `check_workflow` is implemented, for exercising the
+    client against a real HTTP server in tests & benchmarks.
+
+    Each request costs `cost` points out of a budget of `limit` points, which is replenished every
+    `reset_seconds`. Once the budget is exhausted, requests fail with a `RATE_LIMITED` error until
+    the budget is reset. Statuses appended to `secondary_limits` are returned for the next requests,
+    with a `Retry-After` header of `retry_after` seconds if it's not `None`.
+    """
+
+    def __init__(
+        self,
+        repos: t.Iterable[FakeRepo] = (),
+        limit: int = 5_000,
+        cost: int = 1,
+        reset_seconds: float = 3_600,
+        latency: float = 0,
+    ) -> None:
+        self.repos = {(repo.owner, repo.name): repo for repo in repos}
+        self.limit = limit
+        self.cost = cost
+        self.reset_seconds = reset_seconds
+        self.latency = latency
+
+        self.secondary_limits: list[int] = []
+        self.retry_after: float | None = None
+
+        self.n_requests = 0
+        self.max_in_flight = 0
+        self.queries: list[dict] = []
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._remaining = limit
+        self._reset_at = time.time() + reset_seconds
+        self._server: ThreadingHTTPServer | None = None
+
+    @property
+    def url(self) -> str:  # noqa: D102
+        if self._server is None:
+            raise RuntimeError("Server is not running")
+
+        host, port = self._server.server_address[:2]
+        return f"http://{host!s}:{port}/graphql"
+
+    def __enter__(self) -> t.Self:
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(self))
+        self._server.daemon_threads = True
+        threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+        ).start()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def handle(self, payload: dict) -> tuple[int, dict, dict[str, str]]:
+        """Execute the provided request payload, returning its status, body & extra headers."""
+        with self._lock:
+            self.n_requests += 1
+            self.queries.append(payload)
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+
+            if self.secondary_limits:
+                status = self.secondary_limits.pop(0)
+                headers = {}
+                if self.retry_after is not None:
+                    headers["Retry-After"] = f"{self.retry_after}"
+
+                self._in_flight -= 1
+                return status, {"message": "You have exceeded a secondary rate limit."}, headers
+
+            now = time.time()
+            if now >= self._reset_at:
+                self._remaining = self.limit
+                self._reset_at = now + self.reset_seconds
+
+            if self._remaining < self.cost:
+                self._in_flight -= 1
+                error = {"type": "RATE_LIMITED", "message": "API rate limit exceeded"}
+                return 200, {"data": None, "errors": [error]}, {}
+
+            self._remaining -= self.cost
+            rate_limit = {
+                "cost": self.cost,
+                "remaining": self._remaining,
+                "resetAt": dt.datetime.fromtimestamp(self._reset_at, dt.UTC).isoformat(),
+            }
+
+        try:
+            time.sleep(self.latency)
+            result = graphql_sync(
+                SCHEMA,
+                payload["query"],
+                root_value=_Root(self, rate_limit),
+                variable_values=payload.get("variables"),
+                operation_name=payload.get("operationName"),
+            )
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+        body: dict[str, t.Any] = {"data": result.data}
+        if result.errors:
+            body["errors"] = [err.formatted for err in result.errors]
+
+        return 200, body, {}
+
+
+class _Root:
+    def __init__(self, server: FakeGitHub, rate_limit: dict) -> None:
+        self.server = server
+        self.rateLimit = rate_limit
+
+    def repository(self, info: object, owner: str, name: str) -> dict:
+        repo = self.server.repos.get((owner, name))
+        if repo is None:
+            raise GraphQLError(f"Could not resolve to a Repository with the name '{owner}/{name}'.")
+
+        return _repo_node(repo)
+
+    def organization(self, info: object, login: str) -> dict:
+        repos = sorted(
+            (repo for (owner, _), repo in self.server.repos.items() if owner == login),
+            key=lambda repo: repo.name,
+        )
+
+        def repositories(info: object, first: int, after: str | None = None, **_: object) -> dict:
+            start = 0 if after is None else int(after)
+            page = repos[start : start + first]
+            end = start + len(page)
+            return {
+                "pageInfo": {"hasNextPage": end < len(repos), "endCursor": f"{end}"},
+                "nodes": [_repo_node(repo) for repo in page],
+            }
+
+        return {"repositories": repositories}
+
+
+def _repo_node(repo: FakeRepo) -> dict:
+    def releases(info: object, first: int, after: str | None = None, **_: object) -> dict:
+        return _page(repo.release_nodes(), first, after)
+
+    def git_object(info: object, expression: str) -> dict | None:
+        # Refs are ignored, every ref points at the same tree
+        _, _, path = expression.partition(":")
+        if path in repo.files:
+            return {"__typename": "Blob", "text": repo.files[path]}
+
+        return repo.tree(path)
+
+    def refs(info: object, first: int, after: str | None = None, **kwargs: object) -> dict:
+        nodes = repo.tag_nodes() if kwargs["refPrefix"] == "refs/tags/" else []
+        return _page(nodes, first, after)
+
+    return {
+        "name": repo.name,
+        "isArchived": repo.is_archived,
+        "isEmpty": not repo.files,
+        "releases": releases,
+        "object": git_object,
+        "refs": refs,
+    }
+
+
+def _make_handler(server: FakeGitHub) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        # Keep connections alive between requests, like GH's API
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self) -> None:
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            status, body, headers = server.handle(payload)
+
+            raw = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", f"{len(raw)}")
+            for name, value in headers.items():
+                self.send_header(name, value)
+
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    return Handler
@@ -0,0 +1,257 @@
+import asyncio
+import datetime as dt
+import sqlite3
+from pathlib import Path
+
+import pytest
+from packaging.version import Version
+from pytest_mock import MockerFixture
+
+from check_workflow.cache import ReleaseCache, default_cache_dir
+from check_workflow.gh_api import Release
+from check_workflow.resolve import ReleaseResolver
+
+SAMPLE_RELEASE = Release(
+    ver=Version("3.1.1"),
+    published=dt.datetime.fromisoformat("2024-05-17T14:07:20Z"),
+    url="https://github.com/sco1/flake8-annotations/releases/tag/v3.1.1",
+    tag_hash="d27be86996bb75bf0867eb24fe710cdb39ec5188",
+)
+
+
+def test_default_cache_dir_xdg(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert default_cache_dir() == tmp_path / "check-workflow"
+
+
+def test_default_cache_dir_fallback(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("XDG_CACHE_HOME", raising=False)
+    assert default_cache_dir() == Path.home() / ".cache" / "check-workflow"
+
+
+def test_cache_roundtrip(tmp_path: Path) -> None:
+    db_path = tmp_path / "releases.sqlite3"
+    with ReleaseCache(path=db_path) as cache:
+        cache.put_many({("sco1", "flake8-annotations"): SAMPLE_RELEASE})
+
+    # Reopen to make sure we're reading back from disk
+    with ReleaseCache(path=db_path) as cache:
+        cached = cache.get_many([("sco1", "flake8-annotations"), ("sco1", "missing")])
+
+    assert cached == {("sco1", "flake8-annotations"): SAMPLE_RELEASE}
+
+
+def test_cache_expired_ignored(tmp_path: Path, mocker: MockerFixture) -> None:
+    with ReleaseCache(path=tmp_path / "releases.sqlite3", ttl=60) as cache:
+        mocker.patch("check_workflow.cache.time.time", return_value=1_000)
+        cache.put_many({("sco1", "flake8-annotations"): SAMPLE_RELEASE})
+
+        mocker.patch("check_workflow.cache.time.time", return_value=1_061)
+        assert not cache.get_many([("sco1", "flake8-annotations")])
+
+
+def test_cache_evicts_oldest(tmp_path: Path, mocker: MockerFixture) -> None:
+    patched_time = mocker.patch("check_workflow.cache.time.time")
+    with ReleaseCache(path=tmp_path / "releases.sqlite3", max_entries=2) as cache:
+        for idx in range(3):
+            patched_time.return_value = 1_000 + idx
+            cache.put_many({("sco1", f"repo_{idx}"): SAMPLE_RELEASE})
+
+        cached = cache.get_many([("sco1", f"repo_{idx}") for idx in range(3)])
+
+    assert cached.keys() == {("sco1", "repo_1"), ("sco1", "repo_2")}
+
+
+def test_cache_evict_ignores_ttl(tmp_path: Path, mocker: MockerFixture) -> None:
+    db_path = tmp_path / "releases.sqlite3"
+    patched_time = mocker.patch("check_workflow.cache.time.time", return_value=1_000)
+    with ReleaseCache(path=db_path, ttl=600) as cache:
+        cache.put_many({("sco1", "flake8-annotations"): SAMPLE_RELEASE})
+
+    # A writer with a shorter TTL shouldn't evict entries that are still fresh for other readers
+    patched_time.return_value = 1_100
+    with ReleaseCache(path=db_path, ttl=60) as cache:
+        cache.put_many({("sco1", "check-workflow"): SAMPLE_RELEASE})
+
+    with ReleaseCache(path=db_path, ttl=600) as cache:
+        assert cache.get_many([("sco1", "flake8-annotations")])
+
+
+def test_cache_no_releases_roundtrip(tmp_path: Path, mocker: MockerFixture) -> None:
+    db_path = tmp_path / "releases.sqlite3"
+    patched_time = mocker.patch("check_workflow.cache.time.time", return_value=1_000)
+    with ReleaseCache(path=db_path, ttl=60) as cache:
+        cache.put_many({("sco1", "no-releases"): None})
+
+    with ReleaseCache(path=db_path, ttl=60) as cache:
+        assert cache.get_many([("sco1", "no-releases")]) == {("sco1", "no-releases"): None}
+
+        # A new release replaces the negative entry
+        cache.put_many({("sco1", "no-releases"): SAMPLE_RELEASE})
+        assert cache.get_many([("sco1", "no-releases")]) == {
+            ("sco1", "no-releases"): SAMPLE_RELEASE
+        }
+
+        cache.put_many({("sco1", "no-releases"): None})
+        assert cache.get_many([("sco1", "no-releases")]) == {("sco1", "no-releases"): None}
+
+        patched_time.return_value = 1_061
+        assert not cache.get_many([("sco1", "no-releases")])
+
+
+@pytest.mark.asyncio
+async def test_resolver_warm_cache_skips_query(tmp_path: Path, mocker: MockerFixture) -> None:
+    patched = mocker.patch(
+        "check_workflow.resolve.fetch_releases_batch", new_callable=mocker.AsyncMock
+    )
+
+    with ReleaseCache(path=tmp_path / "releases.sqlite3") as cache:
+        cache.put_many({("sco1", "flake8-annotations"): SAMPLE_RELEASE})
+
+        resolver = ReleaseResolver(session=mocker.AsyncMock(), cache=cache)
+        resolved = await resolver.resolve([("sco1", "flake8-annotations")])
+
+    assert resolved == {("sco1", "flake8-annotations"): SAMPLE_RELEASE}
+    patched.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_resolver_warm_cache_skips_no_releases_query(
+    tmp_path: Path, mocker: MockerFixture
+) -> None:
+    patched = mocker.patch(
+        "check_workflow.resolve.fetch_releases_batch",
+        new_callable=mocker.AsyncMock,
+        return_value={("sco1", "no-releases"): []},
+    )
+
+    with ReleaseCache(path=tmp_path / "releases.sqlite3") as cache:
+        for _ in range(2):
+            resolver = ReleaseResolver(session=mocker.AsyncMock(), cache=cache)
+            resolved = await resolver.resolve([("sco1", "no-releases")])
+            assert resolved == {("sco1", "no-releases"): None}
+
+    patched.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_resolver_no_session_raises(tmp_path: Path) -> None:
+    with ReleaseCache(path=tmp_path / "releases.sqlite3") as cache:
+        cache.put_many({("sco1", "flake8-annotations"): SAMPLE_RELEASE})
+
+        resolver = ReleaseResolver(session=None, cache=cache)
+        resolved = await resolver.resolve([("sco1", "flake8-annotations")])
+        assert resolved == {("sco1", "flake8-annotations"): SAMPLE_RELEASE}
+
+        with pytest.raises(RuntimeError, match="without a session"):
+            await resolver.resolve([("sco1", "missing")])
+
+
+@pytest.mark.asyncio
+async def test_resolver_unresolvable_not_cached(tmp_path: Path, mocker: MockerFixture) -> None:
+    patched = mocker.patch(
+        "check_workflow.resolve.fetch_releases_batch",
+        new_callable=mocker.AsyncMock,
+        return_value={("sco1", "unresolvable"): None},
+    )
+
+    with ReleaseCache(path=tmp_path / "releases.sqlite3") as cache:
+        for _ in range(2):
+            resolver = ReleaseResolver(session=mocker.AsyncMock(), cache=cache)
+            resolved = await resolver.resolve([("sco1", "unresolvable")])
+            assert resolved == {("sco1", "unresolvable"): None}
+
+        assert not cache.get_many([("sco1", "unresolvable")])
+
+    assert patched.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_resolver_cache_write_error_resolves(
+    tmp_path: Path, mocker: MockerFixture, capsys: pytest.CaptureFixture
+) -> None:
+    mocker.patch(
+        "check_workflow.resolve.fetch_releases_batch",
+        new_callable=mocker.AsyncMock,
+        return_value={("sco1", "flake8-annotations"): [SAMPLE_RELEASE]},
+    )
+
+    with ReleaseCache(path=tmp_path / "releases.sqlite3") as cache:
+        mocker.patch.object(cache, "put_many", side_effect=sqlite3.OperationalError("locked"))
+
+        resolver = ReleaseResolver(session=mocker.AsyncMock(), cache=cache)
+        resolved = await asyncio.wait_for(
+            resolver.resolve([("sco1", "flake8-annotations")]), timeout=5
+        )
+
+    assert resolved == {("sco1", "flake8-annotations"): SAMPLE_RELEASE}
+    assert "Could not write releases to the cache" in capsys.readouterr().out
+
+
+@pytest.mark.asyncio
+async def test_resolver_cache_error_raises(tmp_path: Path, mocker: MockerFixture) -> None:
+    with ReleaseCache(path=tmp_path / "releases.sqlite3") as cache:
+        mocker.patch.object(cache, "get_many", side_effect=sqlite3.OperationalError("locked"))
+
+        resolver = ReleaseResolver(session=mocker.AsyncMock(), cache=cache)
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            await asyncio.wait_for(resolver.resolve([("sco1", "flake8-annotations")]), timeout=5)
+
+
+@pytest.mark.asyncio
+async def test_resolver_refresh_updates_cache(tmp_path: Path, mocker: MockerFixture) -> None:
+    NEW_RELEASE = Release(
+        ver=Version("3.2.0"), published=dt.datetime.now(dt.UTC), url="", tag_hash=""
+    )
+    patched = mocker.patch(
+        "check_workflow.resolve.fetch_releases_batch",
+        new_callable=mocker.AsyncMock,
+        return_value={("sco1", "flake8-annotations"): [NEW_RELEASE]},
+    )
+
+    with ReleaseCache(path=tmp_path / "releases.sqlite3") as cache:
+        cache.put_many({("sco1", "flake8-annotations"): SAMPLE_RELEASE})
+
+        resolver = ReleaseResolver(session=mocker.AsyncMock(), cache=cache, refresh=True)
+        resolved = await resolver.resolve([("sco1", "flake8-annotations")])
+
+        assert resolved == {("sco1", "flake8-annotations"): NEW_RELEASE}
+        assert cache.get_many([("sco1", "flake8-annotations")]) == resolved
+
+    patched.assert_awaited_once()
+
+
+def test_cache_tag_index_roundtrip(tmp_path: Path) -> None:
+    TAG_INDEX = {SAMPLE_RELEASE.tag_hash: SAMPLE_RELEASE.ver, "a" * 40: Version("3.1.0")}
+
+    db_path = tmp_path / "releases.sqlite3"
+    with ReleaseCache(path=db_path) as cache:
+        cache.put_tag_indexes({("sco1", "flake8-annotations"): TAG_INDEX, ("sco1", "no-tags"): {}})
+
+    with ReleaseCache(path=db_path) as cache:
+        cached = cache.get_tag_indexes(
+            [("sco1", "flake8-annotations"), ("sco1", "no-tags"), ("sco1", "missing")]
+        )
+
+        # Tag indexes are cached separately from releases
+        assert not cache.get_many([("sco1", "flake8-annotations")])
+
+    assert cached == {("sco1", "flake8-annotations"): TAG_INDEX, ("sco1", "no-tags"): {}}
+
+
+@pytest.mark.asyncio
+async def test_resolver_warm_cache_skips_tag_query(tmp_path: Path, mocker: MockerFixture) -> None:
+    TAG_INDEX = {SAMPLE_RELEASE.tag_hash: SAMPLE_RELEASE.ver}
+    patched = mocker.patch(
+        "check_workflow.resolve.fetch_tag_indexes_batch",
+        new_callable=mocker.AsyncMock,
+        return_value={("sco1", "flake8-annotations"): TAG_INDEX},
+    )
+
+    with ReleaseCache(path=tmp_path / "releases.sqlite3") as cache:
+        for _ in range(2):
+            resolver = ReleaseResolver(session=mocker.AsyncMock(), cache=cache)
+            resolved = await resolver.resolve_tag_indexes([("sco1", "flake8-annotations")])
+            assert resolved == {("sco1", "flake8-annotations"): TAG_INDEX}
+
+    patched.assert_awaited_once()
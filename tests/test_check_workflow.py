@@ -1,4 +1,7 @@
+import asyncio
 import datetime as dt
+import pickle
+import typing as t
 from pathlib import Path
 
 import pytest
@@ -7,12 +10,16 @@ from packaging.version import Version
 from pytest_mock import MockerFixture
 
 from check_workflow.gh_api import Release
+from check_workflow.resolve import ReleaseResolver
 from check_workflow.workflow import (
     JobDependency,
     OutdatedDep,
     UsesSpec,
+    _iter_resolved,
     extract_workflow_dependencies,
     fetch_local,
+    iter_outdated,
+    iter_workflow_reports,
     report_outdated,
 )
 
@@ -43,6 +50,23 @@ def test_spec_from_raw(raw_spec: str, truth_out: UsesSpec) -> None:
     assert spec == truth_out
 
 
+def test_spec_from_raw_path() -> None:
+    # Actions & reusable workflows may live anywhere in their repository
+    for raw_spec in ("github/codeql-action/init@v3", "octo/ci/.github/workflows/build.yml@v3"):
+        spec = UsesSpec.from_raw(raw_spec)
+        assert (spec.owner, spec.repo) == tuple(raw_spec.split("/")[:2])
+        assert spec.spec == SpecifierSet("~=3.0")
+
+
+def test_spec_from_raw_shared() -> None:
+    assert UsesSpec.from_raw("actions/checkout@v4") is UsesSpec.from_raw("actions/checkout@v4")
+
+    # Specifiers are shared across actions too
+    checkout = UsesSpec.from_raw("actions/checkout@v4")
+    cache = UsesSpec.from_raw("actions/cache@v4")
+    assert checkout.spec is cache.spec
+
+
 SAMPLE_WORKFLOW = """\
 jobs:
   lint:
@@ -82,11 +106,33 @@ TRUTH_DEPENDENCIES = [
 ]
 
 
-def test_extract_dependencies() -> None:
-    extracted = extract_workflow_dependencies(SAMPLE_WORKFLOW)
+@pytest.mark.parametrize("scan", (True, False))
+def test_extract_dependencies(scan: bool) -> None:
+    extracted = extract_workflow_dependencies(SAMPLE_WORKFLOW, scan=scan)
     assert extracted == TRUTH_DEPENDENCIES
 
 
+SAMPLE_WORKFLOW_REUSABLE = """\
+jobs:
+  call:
+    uses: octo/ci/.github/workflows/build.yml@v1
+  call-local:
+    uses: ./.github/workflows/local.yml
+"""
+
+
+@pytest.mark.parametrize("scan", (True, False))
+def test_extract_dependencies_reusable(scan: bool) -> None:
+    extracted = extract_workflow_dependencies(SAMPLE_WORKFLOW_REUSABLE, scan=scan)
+    assert extracted == [
+        JobDependency(
+            job="call",
+            step_name=None,
+            uses=UsesSpec.from_raw("octo/ci/.github/workflows/build.yml@v1"),
+        )
+    ]
+
+
 SAMPLE_WORKFLOW_USES_RELATIVE = """\
 jobs:
   jobby_job:
@@ -117,6 +163,20 @@ def test_extract_dependencies_skip_docker() -> None:
     assert not extracted
 
 
+def _batch_in_order(
+    latest_releases: t.Sequence[list[Release]],
+) -> t.Callable[..., t.Awaitable[dict[tuple[str, str], list[Release]]]]:
+    """Build a batched release fetch stand-in that answers queried repos in dependency order."""
+    remaining = iter(latest_releases)
+
+    async def _fetch(
+        session: object, repos: t.Sequence[tuple[str, str]]
+    ) -> dict[tuple[str, str], list[Release]]:
+        return {repo: next(remaining) for repo in repos}
+
+    return _fetch
+
+
 @pytest.mark.asyncio
 async def test_report_outdated_by_version(mocker: MockerFixture) -> None:
     # Latest release for each dependency, in order.
@@ -141,10 +201,9 @@ async def test_report_outdated_by_version(mocker: MockerFixture) -> None:
 
     mock_session = mocker.AsyncMock()
     mocker.patch(
-        "check_workflow.workflow.fetch_releases",
-        new_callable=mocker.AsyncMock,
-        side_effect=LATEST_RELEASES,
+        "check_workflow.resolve.fetch_releases_batch", side_effect=_batch_in_order(LATEST_RELEASES)
     )
+    mocker.patch("check_workflow.resolve.fetch_tag_indexes_batch", return_value={})
 
     outdated = await report_outdated(session=mock_session, raw_workflows=WORKFLOWS)
     assert outdated == TRUTH_OUTDATED
@@ -167,15 +226,52 @@ async def test_report_outdated_by_sha(mocker: MockerFixture) -> None:
 
     mock_session = mocker.AsyncMock()
     mocker.patch(
-        "check_workflow.workflow.fetch_releases",
-        new_callable=mocker.AsyncMock,
-        side_effect=LATEST_RELEASES,
+        "check_workflow.resolve.fetch_releases_batch", side_effect=_batch_in_order(LATEST_RELEASES)
     )
+    mocker.patch("check_workflow.resolve.fetch_tag_indexes_batch", return_value={})
 
     outdated = await report_outdated(session=mock_session, raw_workflows=WORKFLOWS)
     assert outdated == TRUTH_OUTDATED
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("pinned", "is_outdated"),
+    (
+        (Version("0.9"), True),
+        (Version("1.0"), False),  # Pinned to another tag of the latest release
+    ),
+)
+async def test_report_outdated_by_sha_resolves_version(
+    mocker: MockerFixture, pinned: Version, is_outdated: bool
+) -> None:
+    LATEST_RELEASES = (
+        [Release(ver=Version("4.0"), published=dt.datetime.now(), url="", tag_hash="")],
+        [Release(ver=Version("6.1"), published=dt.datetime.now(), url="", tag_hash="")],
+        [Release(ver=Version("1.0"), published=dt.datetime.now(), url="", tag_hash="abc123")],
+        [Release(ver=Version("3.2.0"), published=dt.datetime.now(), url="", tag_hash="")],
+    )
+    WORKFLOWS = {"wf.yml": SAMPLE_WORKFLOW}
+
+    mocker.patch(
+        "check_workflow.resolve.fetch_releases_batch", side_effect=_batch_in_order(LATEST_RELEASES)
+    )
+    mock_fetch_tags = mocker.patch(
+        "check_workflow.resolve.fetch_tag_indexes_batch",
+        return_value={("ooga", "booga"): {"8f4b7f84864484a7bf31766abe9204da3cbe65b3": pinned}},
+    )
+
+    outdated = await report_outdated(session=mocker.AsyncMock(), raw_workflows=WORKFLOWS)
+
+    # Tags are only needed for SHA pinned dependencies
+    assert mock_fetch_tags.call_args.kwargs["repos"] == [("ooga", "booga")]
+    if is_outdated:
+        truth = OutdatedDep(spec=TRUTH_DEPENDENCIES[2], latest=LATEST_RELEASES[2][0], pinned=pinned)
+        assert outdated == {"wf.yml": [truth]}
+    else:
+        assert outdated == {}
+
+
 SAMPLE_WORKFLOW_REPEAT_DEP = """\
 jobs:
   lint:
@@ -195,17 +291,181 @@ async def test_report_outdated_caches(mocker: MockerFixture) -> None:
 
     mock_session = mocker.AsyncMock()
     patched = mocker.patch(
-        "check_workflow.workflow.fetch_releases", new_callable=mocker.AsyncMock, return_value=LATEST
+        "check_workflow.resolve.fetch_releases_batch",
+        new_callable=mocker.AsyncMock,
+        return_value={("actions", "checkout"): LATEST},
     )
 
     _ = await report_outdated(session=mock_session, raw_workflows=WORKFLOWS)
     patched.assert_awaited_once()
 
 
+SAMPLE_WORKFLOW_MISSING_REPO = """\
+jobs:
+  lint:
+    steps:
+    - uses: actions/checkout@v4
+    - uses: ooga/booga@v1
+"""
+
+
+@pytest.mark.asyncio
+async def test_report_outdated_skips_unresolved(mocker: MockerFixture) -> None:
+    WORKFLOWS = {"wf.yml": SAMPLE_WORKFLOW_MISSING_REPO}
+    LATEST = [Release(ver=Version("5.0"), published=dt.datetime.now(), url="", tag_hash="")]
+
+    mock_session = mocker.AsyncMock()
+    mocker.patch(
+        "check_workflow.resolve.fetch_releases_batch",
+        new_callable=mocker.AsyncMock,
+        return_value={("actions", "checkout"): LATEST, ("ooga", "booga"): None},
+    )
+
+    outdated = await report_outdated(session=mock_session, raw_workflows=WORKFLOWS)
+    assert [dep.spec.uses.repo for dep in outdated["wf.yml"]] == ["checkout"]
+
+
+SAMPLE_WORKFLOW_SLOW = """\
+jobs:
+  lint:
+    steps:
+    - uses: slow/action@v1
+    - uses: actions/checkout@v4
+"""
+
+SAMPLE_WORKFLOW_FAST = """\
+jobs:
+  lint:
+    steps:
+    - uses: actions/checkout@v4
+"""
+
+
+def _delayed_batches(
+    delays: dict[str, float],
+) -> t.Callable[..., t.Awaitable[dict[tuple[str, str], list[Release]]]]:
+    """Build a batched release fetch stand-in where each repo is outdated after a set delay."""
+
+    async def _fetch(
+        session: object, repos: t.Sequence[tuple[str, str]]
+    ) -> dict[tuple[str, str], list[Release]]:
+        await asyncio.sleep(sum(delays[repo] for _, repo in repos))
+        return {
+            repo: [Release(ver=Version("99.0"), published=dt.datetime.now(), url="", tag_hash="")]
+            for repo in repos
+        }
+
+    return _fetch
+
+
+@pytest.mark.asyncio
+async def test_iter_outdated_yields_as_resolved(mocker: MockerFixture) -> None:
+    mocker.patch(
+        "check_workflow.resolve.fetch_releases_batch",
+        side_effect=_delayed_batches({"action": 0.05, "checkout": 0}),
+    )
+
+    resolver = ReleaseResolver(session=mocker.AsyncMock(), batch_size=1)
+    results = [
+        (wf_name, dep.spec.uses.repo)
+        async for wf_name, dep in iter_outdated(
+            session=mocker.AsyncMock(),
+            raw_workflows={"slow.yml": SAMPLE_WORKFLOW_SLOW, "fast.yml": SAMPLE_WORKFLOW_FAST},
+            resolver=resolver,
+        )
+    ]
+
+    # The slow lookup shouldn't hold up the dependencies that have already been resolved
+    assert results[-1] == ("slow.yml", "action")
+    assert sorted(results) == [
+        ("fast.yml", "checkout"),
+        ("slow.yml", "action"),
+        ("slow.yml", "checkout"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_iter_workflow_reports_per_workflow(mocker: MockerFixture) -> None:
+    mocker.patch(
+        "check_workflow.resolve.fetch_releases_batch",
+        side_effect=_delayed_batches({"action": 0.05, "checkout": 0}),
+    )
+
+    resolver = ReleaseResolver(session=mocker.AsyncMock(), batch_size=1)
+    results = [
+        (wf_name, [dep.spec.uses.repo for dep in wf_outdated])
+        async for wf_name, wf_outdated in iter_workflow_reports(
+            session=mocker.AsyncMock(),
+            raw_workflows={"slow.yml": SAMPLE_WORKFLOW_SLOW, "fast.yml": SAMPLE_WORKFLOW_FAST},
+            resolver=resolver,
+        )
+    ]
+
+    # Workflows are yielded once complete, with their dependencies in file order
+    assert results == [("fast.yml", ["checkout"]), ("slow.yml", ["action", "checkout"])]
+
+
+@pytest.mark.asyncio
+async def test_iter_resolved_bounded_window(mocker: MockerFixture) -> None:
+    mocker.patch(
+        "check_workflow.resolve.fetch_releases_batch",
+        side_effect=_delayed_batches({"checkout": 0}),
+    )
+
+    n_taken = 0
+
+    def _parsed_workflows() -> t.Iterator[tuple[str, list[JobDependency]]]:
+        nonlocal n_taken
+        for idx in range(10):
+            n_taken += 1
+            raw_workflow = SAMPLE_WORKFLOW_FAST if idx % 2 else "jobs:\n  a:\n    steps: []\n"
+            yield f"wf_{idx}.yml", extract_workflow_dependencies(raw_workflow)
+
+    resolver = ReleaseResolver(session=mocker.AsyncMock())
+    n_taken_at = []
+    done = []
+    async for resolved in _iter_resolved(_parsed_workflows(), resolver, max_in_flight=2):
+        n_taken_at.append(n_taken)
+        if resolved.workflow_done:
+            done.append(resolved.workflow)
+
+    # Workflows are only taken once earlier ones are done, rather than all up front
+    assert n_taken_at[0] == 2
+    assert sorted(done) == [f"wf_{idx}.yml" for idx in range(10)]
+
+
+@pytest.mark.asyncio
+async def test_report_outdated_keeps_workflow_order(mocker: MockerFixture) -> None:
+    mocker.patch(
+        "check_workflow.resolve.fetch_releases_batch",
+        side_effect=_delayed_batches({"action": 0.05, "checkout": 0}),
+    )
+
+    resolver = ReleaseResolver(session=mocker.AsyncMock(), batch_size=1)
+    outdated = await report_outdated(
+        session=mocker.AsyncMock(),
+        raw_workflows={"slow.yml": SAMPLE_WORKFLOW_SLOW, "fast.yml": SAMPLE_WORKFLOW_FAST},
+        resolver=resolver,
+    )
+
+    assert list(outdated) == ["slow.yml", "fast.yml"]
+
+
 def test_fetch_local(tmp_path: Path) -> None:
-    YML_NAMES = {"abcd.yml", "another.yml"}
+    YML_NAMES = {"abcd.yml", "another.yml", "long.yaml", "UPPER.YML"}
     for fn in YML_NAMES:
         (tmp_path / fn).touch()
 
+    (tmp_path / "not_a_workflow.txt").touch()
+    (tmp_path / "subdir.yml").mkdir()
+
     workflows = fetch_local(tmp_path)
     assert workflows.keys() == YML_NAMES
+
+
+def test_spec_from_raw_pickle_roundtrip() -> None:
+    spec = UsesSpec.from_raw("actions/setup-python@v6")
+    unpickled = pickle.loads(pickle.dumps(spec))
+
+    assert unpickled == spec
+    assert hash(unpickled.spec) == hash(SpecifierSet("~=6.0"))
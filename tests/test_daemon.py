@@ -0,0 +1,201 @@
+import asyncio
+import datetime as dt
+import http.client
+import threading
+import time
+import typing as t
+from contextlib import contextmanager, suppress
+from pathlib import Path
+
+import pytest
+from packaging.version import Version
+
+from check_workflow.cli import main
+from check_workflow.daemon import Daemon, ReleaseIndex
+from check_workflow.daemon_client import DaemonClient, DaemonError
+from check_workflow.gh_api import Release, WorkflowTarget, build_client
+from tests.fake_github import FakeGitHub, FakeRepo
+
+CHECKOUT = FakeRepo(owner="actions", name="checkout", releases=[("v5.0.0", "b" * 40)])
+LINT_WORKFLOW = "jobs:\n  build:\n    steps:\n    - uses: actions/checkout@v4"
+WORKFLOWS = FakeRepo(
+    owner="sco1", name="workflows", files={".github/workflows/lint.yml": LINT_WORKFLOW}
+)
+
+SAMPLE_RELEASE = Release(ver=Version("5.0"), published=dt.datetime.now(), url="", tag_hash="")
+
+
+def test_release_index_expiry(monkeypatch: pytest.MonkeyPatch) -> None:
+    index = ReleaseIndex(ttl=60)
+    index.put_many({("actions", "checkout"): SAMPLE_RELEASE})
+    assert index.get_many([("actions", "checkout")]) == {("actions", "checkout"): SAMPLE_RELEASE}
+
+    expired = time.monotonic() + 61
+    monkeypatch.setattr("check_workflow.daemon.time.monotonic", lambda: expired)
+    assert index.get_many([("actions", "checkout")]) == {}
+
+
+def test_release_index_due_for_refresh() -> None:
+    index = ReleaseIndex(ttl=60)
+    index.put_many(
+        {
+            ("actions", "checkout"): SAMPLE_RELEASE,
+            ("actions", "setup-python"): SAMPLE_RELEASE,
+            ("actions", "unpopular"): SAMPLE_RELEASE,
+        }
+    )
+    index.get_many([("actions", "setup-python")])
+    index.get_many([("actions", "checkout"), ("actions", "setup-python")])
+
+    # Nothing expires soon enough
+    assert index.due_for_refresh(horizon=1, limit=10) == []
+
+    # Most popular first, unpopular keys are left to expire
+    assert index.due_for_refresh(horizon=60, limit=10) == [
+        ("actions", "setup-python"),
+        ("actions", "checkout"),
+    ]
+    assert index.due_for_refresh(horizon=60, limit=1) == [("actions", "setup-python")]
+
+    index.mark_refreshed([("actions", "setup-python")])
+    assert index.due_for_refresh(horizon=60, limit=10) == [("actions", "checkout")]
+
+
+@pytest.mark.asyncio
+async def test_daemon_check_workflows_uses_index() -> None:
+    workflows = {"lint.yml": LINT_WORKFLOW, "bad.yml": "not: a workflow"}
+    with FakeGitHub(repos=[CHECKOUT]) as fake:
+        async with build_client(url=fake.url) as session:
+            daemon = Daemon(session)
+
+            first = await daemon.check_workflows(workflows)
+            n_requests = fake.n_requests
+            second = await daemon.check_workflows(workflows)
+
+    # Warm lookups are answered from the index
+    assert fake.n_requests == n_requests
+    assert second == first
+
+    (outdated,) = first.reports["lint.yml"]
+    assert outdated.latest.ver == Version("5.0.0")
+    assert set(first.errors) == {"bad.yml"}
+
+
+@pytest.mark.asyncio
+async def test_daemon_refresh() -> None:
+    with FakeGitHub(repos=[CHECKOUT]) as fake:
+        async with build_client(url=fake.url) as session:
+            daemon = Daemon(session, index=ReleaseIndex(ttl=60), refresh_interval=60)
+            await daemon.check_workflows({"lint.yml": LINT_WORKFLOW})
+            await daemon.check_workflows({"lint.yml": LINT_WORKFLOW})
+
+            n_requests = fake.n_requests
+            assert await daemon.refresh() == 1
+            assert fake.n_requests == n_requests + 1
+
+            # Not looked up since, so left to expire
+            assert await daemon.refresh() == 0
+
+
+@pytest.mark.asyncio
+async def test_daemon_tcp_requires_token() -> None:
+    async with build_client(url="http://127.0.0.1:1/graphql") as session:
+        with pytest.raises(ValueError, match="token is required"):
+            await Daemon(session).start_server(port=0)
+
+        async with await Daemon(session, token="s3cret").start_server(port=0) as server:
+            port = server.sockets[0].getsockname()[1]
+
+            def health(headers: dict[str, str]) -> int:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+                try:
+                    conn.request("GET", "/health", headers=headers)
+                    return conn.getresponse().status
+                finally:
+                    conn.close()
+
+            assert await asyncio.to_thread(health, {}) == 401
+            assert await asyncio.to_thread(health, {"Authorization": "Bearer wrong"}) == 401
+            assert await asyncio.to_thread(health, {"Authorization": "Bearer s3cret"}) == 200
+
+
+def test_cli_serve_tcp_requires_token(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("CHECK_WORKFLOW_DAEMON_TOKEN", raising=False)
+    with pytest.raises(SystemExit):
+        main(["serve", "--port", "0"])
+
+
+@contextmanager
+def _running_daemon(url: str, socket_path: Path) -> t.Iterator[Daemon]:
+    started = threading.Event()
+    state: dict[str, t.Any] = {}
+
+    async def serve() -> None:
+        async with build_client(url=url) as session:
+            state["daemon"] = Daemon(session)
+            state["loop"], state["task"] = asyncio.get_running_loop(), asyncio.current_task()
+            async with await state["daemon"].start_server(socket_path=socket_path) as server:
+                started.set()
+                await server.serve_forever()
+
+    def run() -> None:
+        with suppress(asyncio.CancelledError):
+            asyncio.run(serve())
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    try:
+        assert started.wait(timeout=10)
+        yield state["daemon"]
+    finally:
+        state["loop"].call_soon_threadsafe(state["task"].cancel)
+        thread.join()
+
+
+def test_daemon_client(tmp_path: Path) -> None:
+    socket_path = tmp_path / "daemon.sock"
+    client = DaemonClient(socket_path)
+    assert not client.is_running()
+
+    with FakeGitHub(repos=[CHECKOUT, WORKFLOWS]) as fake, _running_daemon(fake.url, socket_path):
+        assert client.is_running()
+
+        result = client.check_target(WorkflowTarget(owner="sco1", repo="workflows"))
+        assert result.found
+        (outdated,) = result.reports["lint.yml"]
+        assert str(outdated.spec.uses.spec) == "~=4.0"
+
+        assert not client.check_target(WorkflowTarget(owner="sco1", repo="missing")).found
+
+        with pytest.raises(DaemonError, match="400"):
+            client.request("POST", "/check", {"unknown": 1})
+
+        with pytest.raises(DaemonError, match="404"):
+            client.request("GET", "/unknown")
+
+
+def test_cli_forwards_to_daemon(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture
+) -> None:
+    socket_path = tmp_path / "daemon.sock"
+    argv = ["remote", "sco1", "workflows", "--daemon-socket", str(socket_path)]
+    with FakeGitHub(repos=[CHECKOUT, WORKFLOWS]) as fake:
+        monkeypatch.setenv("GITHUB_GRAPHQL_URL", fake.url)
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+        main(argv)
+        direct = capsys.readouterr().out
+
+        with _running_daemon(fake.url, socket_path) as daemon:
+            main(argv)
+            assert daemon.n_checks == 1
+
+            # Options that only apply to a full run aren't forwarded
+            main([*argv, "--refresh"])
+            main([*argv, "--no-daemon"])
+            main([*argv, "--no-cache"])
+            main([*argv, "--batch-size", "5"])
+            main([*argv, "--max-concurrency", "2"])
+            assert daemon.n_checks == 1
+
+    assert "actions/checkout" in direct
+    assert capsys.readouterr().out == direct * 6
@@ -0,0 +1,217 @@
+import json
+
+import pytest
+import yaml
+from pytest_mock import MockerFixture
+
+from check_workflow.extract import (
+    LOADER,
+    RawStep,
+    load_action_steps,
+    load_steps,
+    locate_steps,
+    scan_steps,
+)
+from tests import SAMPLE_DATA_DIR
+
+
+def _reference_steps(raw_workflow: str) -> list[RawStep]:
+    # Mirrors the original pure-Python implementation, which the faster engines must match exactly
+    loaded = yaml.safe_load(raw_workflow)
+
+    steps = []
+    for job, job_params in loaded["jobs"].items():
+        # Jobs calling a reusable workflow have no steps
+        if job_params.get("uses", None) is not None:
+            steps.append(RawStep(job=job, step_name=None, uses=job_params["uses"]))
+            continue
+
+        for step in job_params["steps"]:
+            uses = step.get("uses", None)
+            if uses is not None:
+                steps.append(RawStep(job=job, step_name=step.get("name", None), uses=uses))
+
+    return steps
+
+
+def _sample_workflows() -> list[str]:
+    with (SAMPLE_DATA_DIR / "workflow_query.json").open("r") as f:
+        entries = json.load(f)["repository"]["object"]["entries"]
+
+    return [entry["object"]["text"] for entry in entries]
+
+
+PARITY_TEST_CASES = (
+    *_sample_workflows(),
+    # Irrelevant YAML features, which the scanner should skip over
+    """\
+on: [push]
+env:
+  ANCHORED: &anchored {a: 1, b: [1, 2.5, null, true]}
+  ALIASED: *anchored
+  WHEN: "2024-01-01"
+jobs:
+  "quoted-job":
+    runs-on: ubuntu-latest
+    steps:
+    - {name: 'Flow style', uses: "actions/checkout@v4"}
+    - name: |
+        Block scalar
+      uses: >-
+        actions/setup-python@v6
+    - run: echo "no uses"
+    - uses:
+    - name:
+      uses: actions/cache@v4  # Trailing comment
+""",
+    # Features the scanner hands off to a full load
+    """\
+defaults: &step
+  name: Anchored step
+  uses: actions/checkout@v4
+jobs:
+  build:
+    steps:
+    - *step
+    - <<: *step
+      name: Merged step
+""",
+    """\
+jobs:
+  build:
+    steps:
+    - name: 123
+      uses: actions/checkout@v4
+    - name: !!str tagged
+      uses: actions/checkout@v4
+  test:
+    steps:
+    - uses: actions/checkout@v4
+      uses: actions/checkout@v5
+""",
+    """\
+jobs:
+  build:
+    steps:
+    - uses: actions/checkout@v4
+jobs:
+  test:
+    steps:
+    - uses: actions/checkout@v5
+""",
+    "jobs:\n  build:\n    steps:\n    - uses: [actions/checkout@v4]\n",
+    "jobs:\n  build:\n    steps: []\n  test:\n    steps:\n    - name: Only a run\n      run: ls\n",
+    # Jobs calling reusable workflows
+    """\
+jobs:
+  build:
+    steps:
+    - uses: actions/checkout@v4
+  call:
+    name: Called
+    uses: octo/ci/.github/workflows/build.yml@v1
+    with:
+      uses: not-a-step
+  call-local:
+    uses: ./.github/workflows/local.yml
+    steps:
+    - uses: actions/checkout@v4
+  no-uses:
+    uses:
+    steps: []
+""",
+)
+
+
+@pytest.mark.parametrize("loader", (yaml.SafeLoader, LOADER))
+@pytest.mark.parametrize("raw_workflow", PARITY_TEST_CASES)
+def test_extract_parity(
+    raw_workflow: str, loader: type[yaml.SafeLoader], mocker: MockerFixture
+) -> None:
+    mocker.patch("check_workflow.extract.LOADER", loader)
+    truth_steps = _reference_steps(raw_workflow)
+
+    assert load_steps(raw_workflow) == truth_steps
+    assert scan_steps(raw_workflow) == truth_steps
+
+
+ERROR_PARITY_TEST_CASES = (
+    "",
+    "name: No jobs\n",
+    "jobs:\n  build:\n    runs-on: ubuntu-latest\n",
+    "jobs:\n  build:\n    steps:\n    - actions/checkout@v4\n",
+    "jobs: {}\n---\njobs: {}\n",
+    "jobs:\n  call:\n    uses:\n",
+    "jobs:\n  build:\n    steps:\n    - uses: *undefined\n",
+    "jobs:\n  build:\n    steps:\n    - uses: 'unterminated\n",
+)
+
+
+@pytest.mark.parametrize("raw_workflow", ERROR_PARITY_TEST_CASES)
+def test_extract_error_parity(raw_workflow: str) -> None:
+    with pytest.raises(Exception) as truth_exc:
+        _reference_steps(raw_workflow)
+
+    with pytest.raises(truth_exc.type):
+        load_steps(raw_workflow)
+
+    with pytest.raises(truth_exc.type):
+        scan_steps(raw_workflow)
+
+
+@pytest.mark.parametrize("raw_workflow", PARITY_TEST_CASES[:3])
+def test_scan_skips_full_load(raw_workflow: str, mocker: MockerFixture) -> None:
+    patched = mocker.patch("check_workflow.extract.load_steps")
+
+    scan_steps(raw_workflow)
+    patched.assert_not_called()
+
+
+@pytest.mark.parametrize("loader", (yaml.SafeLoader, LOADER))
+@pytest.mark.parametrize("raw_workflow", PARITY_TEST_CASES[:3])
+def test_locate_steps(
+    raw_workflow: str, loader: type[yaml.SafeLoader], mocker: MockerFixture
+) -> None:
+    mocker.patch("check_workflow.extract.LOADER", loader)
+    located = locate_steps(raw_workflow)
+
+    assert [location.step for location in located] == scan_steps(raw_workflow)
+    for location in located:
+        assert location.step.uses in raw_workflow[location.start : location.end]
+
+
+def test_locate_steps_job_uses() -> None:
+    raw_workflow = PARITY_TEST_CASES[-1]
+    located = locate_steps(raw_workflow)
+
+    # Steps of jobs calling a reusable workflow aren't located, matching `scan_steps`
+    assert [location.step for location in located] == scan_steps(raw_workflow)
+    assert [raw_workflow[location.start : location.end] for location in located] == [
+        "actions/checkout@v4",
+        "octo/ci/.github/workflows/build.yml@v1",
+        "./.github/workflows/local.yml",
+    ]
+
+
+def test_locate_steps_unsupported() -> None:
+    raw_workflow = "jobs:\n  a: &a\n    steps:\n    - uses: x/y@v1\n  b: *a\n"
+    with pytest.raises(ValueError, match="can't be located"):
+        locate_steps(raw_workflow)
+
+
+LOAD_ACTION_TEST_CASES: tuple[tuple[str, list[RawStep]], ...] = (
+    (
+        "runs:\n  using: composite\n  steps:\n  - name: Cache\n    uses: actions/cache@v4\n"
+        "  - run: ls\n    shell: bash\n",
+        [RawStep(job="runs", step_name="Cache", uses="actions/cache@v4")],
+    ),
+    ("runs:\n  using: node20\n  main: index.js\n", []),
+    ("runs:\n  using: composite\n", []),
+    ("name: No runs\n", []),
+    ("", []),
+)
+
+
+@pytest.mark.parametrize(("raw_action", "truth_steps"), LOAD_ACTION_TEST_CASES)
+def test_load_action_steps(raw_action: str, truth_steps: list[RawStep]) -> None:
+    assert load_action_steps(raw_action) == truth_steps
@@ -0,0 +1,168 @@
+from pathlib import Path
+
+import pytest
+from packaging.version import Version
+
+from check_workflow.cli import main
+from check_workflow.extract import locate_steps
+from check_workflow.fix import UsesEdit, apply_edits, bump_ref, fixed_uses
+from check_workflow.workflow import UsesSpec
+from tests.fake_github import FakeGitHub, FakeRepo
+
+BUMP_REF_TEST_CASES = (
+    ("v4", "v5"),
+    ("v4.2", "v5.1"),
+    ("4.2.2", "5.1.0"),
+    ("v4.2.2.1", "v5.1.0.0"),
+)
+
+
+@pytest.mark.parametrize(("raw_ref", "truth_ref"), BUMP_REF_TEST_CASES)
+def test_bump_ref(raw_ref: str, truth_ref: str) -> None:
+    assert bump_ref(raw_ref, Version("5.1.0")) == truth_ref
+
+
+FIXED_USES_TEST_CASES = (
+    ("actions/checkout@v4", "actions/checkout@v5"),
+    ("github/codeql-action/init@v3.1", "github/codeql-action/init@v5.1"),
+    (
+        "octo/ci/.github/workflows/build.yml@release/v1",
+        "octo/ci/.github/workflows/build.yml@release/v5",
+    ),
+    ("actions/checkout@" + "a" * 40, "actions/checkout@" + "b" * 40),
+)
+
+
+@pytest.mark.parametrize(("raw_uses", "truth_uses"), FIXED_USES_TEST_CASES)
+def test_fixed_uses(raw_uses: str, truth_uses: str) -> None:
+    uses = UsesSpec.from_raw(raw_uses)
+    assert fixed_uses(raw_uses, uses, Version("5.1.0"), "b" * 40) == truth_uses
+
+
+def test_apply_edits_minimal() -> None:
+    raw_workflow = (
+        "jobs:\r\n"
+        "  test:\r\n"
+        "    steps:\r\n"
+        "    - uses: 'actions/checkout@v4'  # Keep me\r\n"
+        "    - uses: actions/setup-python@" + "a" * 40 + "  # v5.0.0\r\n"
+    )
+    located = locate_steps(raw_workflow)
+    checkout, setup_python = located
+
+    fixed = apply_edits(
+        raw_workflow,
+        [
+            UsesEdit(checkout.start, checkout.end, checkout.step.uses, "actions/checkout@v5"),
+            UsesEdit(
+                setup_python.start,
+                setup_python.end,
+                setup_python.step.uses,
+                "actions/setup-python@" + "b" * 40,
+                comment_ver=Version("6.1.0"),
+            ),
+        ],
+    )
+
+    assert fixed == (
+        "jobs:\r\n"
+        "  test:\r\n"
+        "    steps:\r\n"
+        "    - uses: 'actions/checkout@v5'  # Keep me\r\n"
+        "    - uses: actions/setup-python@" + "b" * 40 + "  # v6.1.0\r\n"
+    )
+
+
+def test_apply_edits_stale() -> None:
+    with pytest.raises(ValueError, match="Expected 'actions/checkout@v4'"):
+        apply_edits(
+            "uses: x/y@v1\n", [UsesEdit(6, 12, "actions/checkout@v4", "actions/checkout@v5")]
+        )
+
+
+WORKFLOW = """\
+name: CI  # Formatting & comments are left alone
+
+jobs:
+  test:
+    steps:
+    - uses: actions/checkout@v4
+    - name: Set up Python
+      uses: "actions/setup-python@82c7e631bb3cdc910f68e0081d67478d79c6982d"  # v5.0.0
+    - uses: actions/cache@v4
+    - uses: actions/upload-artifact@v5
+    - uses: actions/upload-artifact@ffffffffffffffffffffffffffffffffffffffff
+    - uses: ./.github/actions/local
+"""
+TRUTH_FIXED = """\
+name: CI  # Formatting & comments are left alone
+
+jobs:
+  test:
+    steps:
+    - uses: actions/checkout@v5
+    - name: Set up Python
+      uses: "actions/setup-python@cccccccccccccccccccccccccccccccccccccccc"  # v6.0.0
+    - uses: actions/cache@v4
+    - uses: actions/upload-artifact@v5
+    - uses: actions/upload-artifact@ffffffffffffffffffffffffffffffffffffffff
+    - uses: ./.github/actions/local
+"""
+
+CHECKOUT = FakeRepo(owner="actions", name="checkout", releases=[("v5.0.0", "b" * 40)])
+SETUP_PYTHON = FakeRepo(
+    owner="actions",
+    name="setup-python",
+    releases=[("v5.0.0", "82c7e631bb3cdc910f68e0081d67478d79c6982d"), ("v6.0.0", "c" * 40)],
+)
+CACHE = FakeRepo(owner="actions", name="cache", releases=[("v4.2.0", "d" * 40)])
+# Pins ahead of the latest stable release shouldn't be downgraded
+UPLOAD_ARTIFACT = FakeRepo(
+    owner="actions",
+    name="upload-artifact",
+    releases=[("v4.6.0", "e" * 40), ("v5.0.0-beta.1", "f" * 40)],
+    prereleases={"v5.0.0-beta.1"},
+)
+
+
+def test_cli_fix(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture
+) -> None:
+    workflow_dir = tmp_path / ".github/workflows"
+    workflow_dir.mkdir(parents=True)
+    workflow_path = workflow_dir / "ci.yml"
+    workflow_path.write_text(WORKFLOW)
+
+    argv = ["local", "-r", str(workflow_dir), "--fix", "--no-cache", "--no-daemon"]
+    with FakeGitHub(repos=[CHECKOUT, SETUP_PYTHON, CACHE, UPLOAD_ARTIFACT]) as fake:
+        monkeypatch.setenv("GITHUB_GRAPHQL_URL", fake.url)
+
+        main([*argv, "--dry-run"])
+        dry_run = capsys.readouterr().out
+        assert workflow_path.read_text() == WORKFLOW
+        assert "-    - uses: actions/checkout@v4\n+    - uses: actions/checkout@v5\n" in dry_run
+        assert "Would fix 2 outdated dependencies in 1 workflow files" in dry_run
+
+        main(argv)
+        assert workflow_path.read_text() == TRUTH_FIXED
+        assert "Fixed 2 outdated dependencies in 1 workflow files" in capsys.readouterr().out
+
+        # Nothing left to fix
+        main(argv)
+        assert "Fixed 0 outdated dependencies in 0 workflow files" in capsys.readouterr().out
+
+    assert not list(workflow_dir.glob("*.tmp"))
+
+
+FIX_CONFLICT_TEST_CASES = (
+    ["local", "--fix", "--incremental"],
+    ["local", "--fix", "--recursive"],
+    ["local", "--fix", "--format", "json"],
+    ["local", "--dry-run"],
+)
+
+
+@pytest.mark.parametrize("argv", FIX_CONFLICT_TEST_CASES)
+def test_cli_fix_conflicts(argv: list[str]) -> None:
+    with pytest.raises(SystemExit):
+        main(argv)
@@ -0,0 +1,160 @@
+import datetime as dt
+import io
+import json
+from pathlib import Path
+
+import pytest
+from packaging.version import Version
+
+from check_workflow.cli import main
+from check_workflow.formats import (
+    JSONEncoder,
+    NDJSONEncoder,
+    ReportEncoder,
+    SARIFEncoder,
+    Source,
+    TableEncoder,
+    build_encoder,
+)
+from check_workflow.gh_api import Release
+from check_workflow.workflow import JobDependency, OutdatedDep, UsesSpec
+from tests.fake_github import FakeGitHub, FakeRepo
+
+CHECKOUT_LATEST = Release(
+    ver=Version("5.0.0"),
+    published=dt.datetime(2025, 8, 11, tzinfo=dt.timezone.utc),
+    url="https://github.com/actions/checkout/releases/tag/v5.0.0",
+    tag_hash="b" * 40,
+)
+OUTDATED = {
+    "lint.yml": [
+        OutdatedDep(
+            spec=JobDependency(
+                job="lint", step_name="Checkout", uses=UsesSpec.from_raw("actions/checkout@v4")
+            ),
+            latest=CHECKOUT_LATEST,
+        ),
+        OutdatedDep(
+            spec=JobDependency(
+                job="lint", step_name=None, uses=UsesSpec.from_raw(f"actions/checkout@{"a" * 40}")
+            ),
+            latest=CHECKOUT_LATEST,
+        ),
+    ]
+}
+
+
+def _encode(encoder_type: type[JSONEncoder | NDJSONEncoder | SARIFEncoder]) -> str:
+    stream = io.StringIO()
+    encoder = encoder_type(stream)
+    encoder.begin()
+    encoder.write_report(OUTDATED, locate=lambda wf_name: Source(f".github/workflows/{wf_name}"))
+    encoder.end()
+
+    return stream.getvalue()
+
+
+def test_json_encoder() -> None:
+    rows = json.loads(_encode(JSONEncoder))
+
+    assert len(rows) == 2
+    assert rows[0] == {
+        "source": ".github/workflows/lint.yml",
+        "job": "lint",
+        "step_name": "Checkout",
+        "uses": {"owner": "actions", "repo": "checkout", "spec": "~=4.0", "sha": None},
+        "latest": {
+            "ver": "5.0.0",
+            "published": "2025-08-11T00:00:00+00:00",
+            "url": "https://github.com/actions/checkout/releases/tag/v5.0.0",
+            "tag_hash": "b" * 40,
+        },
+        "pinned": None,
+        "via": [],
+    }
+    assert rows[1]["uses"]["sha"] == "a" * 40
+
+
+@pytest.mark.parametrize("encoder_type", (JSONEncoder, SARIFEncoder))
+def test_empty_report_is_valid(encoder_type: type[JSONEncoder | SARIFEncoder]) -> None:
+    stream = io.StringIO()
+    encoder = encoder_type(stream)
+    encoder.begin()
+    encoder.end()
+
+    json.loads(stream.getvalue())
+
+
+def test_ndjson_encoder() -> None:
+    lines = _encode(NDJSONEncoder).splitlines()
+
+    assert len(lines) == 2
+    assert json.loads(lines[0]) == json.loads(_encode(JSONEncoder))[0]
+
+
+def test_sarif_encoder() -> None:
+    log = json.loads(_encode(SARIFEncoder))
+    assert log["version"] == "2.1.0"
+
+    (run,) = log["runs"]
+    assert run["tool"]["driver"]["rules"][0]["id"] == "outdated-action"
+
+    version_result, sha_result = run["results"]
+    assert version_result["ruleId"] == "outdated-action"
+    assert "~=4.0" in version_result["message"]["text"]
+    assert "5.0.0" in version_result["message"]["text"]
+    assert "bbbbbbb" in sha_result["message"]["text"]
+
+    (location,) = version_result["locations"]
+    assert location["physicalLocation"]["artifactLocation"]["uri"] == ".github/workflows/lint.yml"
+
+
+def test_report_encoder_requires_write_row() -> None:
+    with pytest.raises(TypeError, match="write_row"):
+        ReportEncoder(io.StringIO())  # type: ignore[abstract]
+
+
+def test_table_encoder_write_row() -> None:
+    stream = io.StringIO()
+    TableEncoder(stream, markdown=True).write_row(Source("lint.yml"), OUTDATED["lint.yml"][0])
+
+    assert "### `lint.yml`" in stream.getvalue()
+    assert "actions/checkout" in stream.getvalue()
+
+
+def test_build_encoder_unknown_format() -> None:
+    with pytest.raises(ValueError, match="Unknown output format"):
+        build_encoder("xml", io.StringIO())
+
+
+def test_cli_machine_readable_output(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture
+) -> None:
+    root = tmp_path / "workflows"
+    root.mkdir()
+    (root / "lint.yml").write_text("jobs:\n  a:\n    steps:\n    - uses: actions/checkout@v4")
+
+    checkout = FakeRepo(owner="actions", name="checkout", releases=[("v5.0.0", "b" * 40)])
+    with FakeGitHub(repos=[checkout]) as fake:
+        monkeypatch.setenv("GITHUB_GRAPHQL_URL", fake.url)
+        main(
+            [
+                "local",
+                "-r",
+                str(root),
+                "-r",
+                str(tmp_path / "missing"),
+                "--no-cache",
+                "--no-daemon",
+                "--format",
+                "ndjson",
+            ]
+        )
+
+    captured = capsys.readouterr()
+
+    # Skipped roots are reported on stderr so stdout remains parseable
+    assert "No workflows found" in captured.err
+    (row,) = [json.loads(line) for line in captured.out.splitlines()]
+    assert row["source"] == (root / "lint.yml").as_posix()
+    assert row["latest"]["ver"] == "5.0.0"
@@ -2,11 +2,78 @@ import datetime as dt
 import json
 
 import pytest
+from gql.transport.exceptions import TransportQueryError
+from gql.transport.httpx import HTTPXAsyncTransport
 from packaging.version import Version
 from pytest_mock import MockerFixture
 
-from check_workflow.gh_api import Release, fetch_releases, fetch_workflows
+from check_workflow.gh_api import (
+    FileTarget,
+    Release,
+    WorkflowTarget,
+    build_client,
+    build_release_batch_query,
+    build_workflow_batch_query,
+    fetch_files_batch,
+    fetch_releases,
+    fetch_releases_batch,
+    fetch_tag_indexes_batch,
+    fetch_workflows,
+    fetch_workflows_batch,
+    get_client,
+    get_token,
+    iter_org_repositories,
+)
 from tests import SAMPLE_DATA_DIR
+from tests.fake_github import FakeGitHub, FakeRepo
+
+
+def test_get_token_deferred(mocker: MockerFixture, monkeypatch: pytest.MonkeyPatch) -> None:
+    mocker.patch("check_workflow.gh_api.TOK", None)
+    monkeypatch.setenv("PUBLIC_PAT", "def456")
+
+    assert get_token() == "def456"
+
+
+def test_module_client_is_shared() -> None:
+    import check_workflow.gh_api
+
+    assert check_workflow.gh_api.CLIENT is get_client()
+
+
+def test_build_client_skips_schema_fetch() -> None:
+    client = build_client()
+    assert not client.fetch_schema_from_transport
+
+
+def test_build_client_validate_schema() -> None:
+    client = build_client(validate_schema=True)
+    assert client.fetch_schema_from_transport
+
+
+URL_ENV_TEST_CASES = (
+    (None, None, "https://api.github.com/graphql"),
+    ("https://ghes.example.com/api/graphql", None, "https://ghes.example.com/api/graphql"),
+    (
+        "https://ghes.example.com/api/graphql",
+        "http://localhost/graphql",
+        "http://localhost/graphql",
+    ),
+)
+
+
+@pytest.mark.parametrize(("env_url", "url", "truth_url"), URL_ENV_TEST_CASES)
+def test_build_client_url(
+    env_url: str | None, url: str | None, truth_url: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    if env_url is None:
+        monkeypatch.delenv("GITHUB_GRAPHQL_URL", raising=False)
+    else:
+        monkeypatch.setenv("GITHUB_GRAPHQL_URL", env_url)
+
+    client = build_client(url=url)
+    assert isinstance(client.transport, HTTPXAsyncTransport)
+    assert str(client.transport.url) == truth_url
 
 
 @pytest.mark.asyncio
@@ -183,3 +250,283 @@ async def test_release_query_skip_bad_tag(mocker: MockerFixture) -> None:
         session=mock_session, owner="sco1", repo_name="flake8_annotations", n_latest=3
     )
     assert releases == TRUTH_OUT
+
+
+def test_build_release_batch_query() -> None:
+    query = build_release_batch_query(2)
+
+    assert "$owner_0: String!, $repo_0: String!" in query
+    assert "$owner_1: String!, $repo_1: String!" in query
+    assert "r0: repository(owner: $owner_0, name: $repo_0)" in query
+    assert "r1: repository(owner: $owner_1, name: $repo_1)" in query
+    assert "r2:" not in query
+
+
+def test_build_release_batch_query_empty_raises() -> None:
+    with pytest.raises(ValueError, match="at least one"):
+        build_release_batch_query(0)
+
+
+@pytest.mark.asyncio
+async def test_release_batch_query_partial_error(mocker: MockerFixture) -> None:
+    SAMPLE_RESPONSE = SAMPLE_DATA_DIR / "release_query_batch_partial.json"
+    with SAMPLE_RESPONSE.open("r") as f:
+        resp = json.load(f)
+
+    mock_session = mocker.AsyncMock()
+    mock_session.execute.side_effect = TransportQueryError(
+        "Could not resolve to a Repository",
+        errors=[{"message": "Could not resolve to a Repository", "path": ["r1"]}],
+        data=resp,
+    )
+
+    releases = await fetch_releases_batch(
+        session=mock_session, repos=[("sco1", "flake8-annotations"), ("sco1", "deleted")]
+    )
+
+    assert list(releases) == [("sco1", "flake8-annotations"), ("sco1", "deleted")]
+    resolved = releases[("sco1", "flake8-annotations")]
+    assert resolved is not None
+    assert [r.ver for r in resolved] == [Version("3.1.1"), Version("3.1.0")]
+    assert releases[("sco1", "deleted")] is None
+
+    query = mock_session.execute.call_args.args[0].payload
+    assert query["variables"]["owner_1"] == "sco1"
+    assert query["variables"]["repo_1"] == "deleted"
+
+
+@pytest.mark.asyncio
+async def test_release_batch_query_no_data_raises(mocker: MockerFixture) -> None:
+    mock_session = mocker.AsyncMock()
+    mock_session.execute.side_effect = TransportQueryError("Something broke", data=None)
+
+    with pytest.raises(TransportQueryError):
+        await fetch_releases_batch(session=mock_session, repos=[("sco1", "check-workflow")])
+
+
+@pytest.mark.asyncio
+async def test_release_batch_pages_to_stable_release() -> None:
+    checkout = FakeRepo(
+        owner="actions",
+        name="checkout",
+        releases=[
+            ("v4.0.0", "a" * 40),
+            ("v5.0.0", "b" * 40),
+            ("v6.0.0rc1", "c" * 40),
+            ("v6.0.0-beta.2", "d" * 40),
+        ],
+        prereleases={"v6.0.0-beta.2"},
+    )
+    python = FakeRepo(
+        owner="actions", name="setup-python", releases=[("v5.0.0", "e" * 40), ("v6.0.0", "f" * 40)]
+    )
+    with FakeGitHub(repos=[checkout, python]) as fake:
+        async with build_client(url=fake.url) as session:
+            releases = await fetch_releases_batch(
+                session=session,
+                repos=[("actions", "checkout"), ("actions", "setup-python")],
+                n_latest=1,
+            )
+
+            # Only the repository without a stable release on its first page is paged further
+            assert fake.n_requests == 3
+            assert len(fake.queries[-1]["variables"]) == 4
+
+    checkout_releases = releases[("actions", "checkout")]
+    setup_python_releases = releases[("actions", "setup-python")]
+    assert checkout_releases is not None
+    assert setup_python_releases is not None
+    assert [r.ver for r in checkout_releases] == [Version("5.0.0")]
+    assert [r.ver for r in setup_python_releases] == [Version("6.0.0")]
+
+
+@pytest.mark.asyncio
+async def test_release_batch_backports() -> None:
+    # Backport releases cut after a new major shouldn't push it off the first page
+    checkout = FakeRepo(
+        owner="actions",
+        name="checkout",
+        releases=[
+            ("v5.0.0", "a" * 40),
+            ("v4.3.1", "b" * 40),
+            ("v4.3.2", "c" * 40),
+            ("v3.6.1", "d" * 40),
+            ("v4.3.3", "e" * 40),
+        ],
+    )
+    with FakeGitHub(repos=[checkout]) as fake:
+        async with build_client(url=fake.url) as session:
+            releases = await fetch_releases_batch(session=session, repos=[("actions", "checkout")])
+
+    checkout_releases = releases[("actions", "checkout")]
+    assert checkout_releases is not None
+    assert checkout_releases[0].ver == Version("5.0.0")
+
+
+@pytest.mark.asyncio
+async def test_fetch_files_batch_chunks() -> None:
+    ci = FakeRepo(
+        owner="octo",
+        name="ci",
+        files={f"actions/a{idx}/action.yml": f"name: a{idx}" for idx in range(5)},
+    )
+    targets = [FileTarget("octo", "ci", "v1", f"actions/a{idx}/action.yml") for idx in range(5)]
+    targets.append(FileTarget("octo", "ci", "v1", "missing.yml"))
+    with FakeGitHub(repos=[ci]) as fake:
+        async with build_client(url=fake.url) as session:
+            files = await fetch_files_batch(session=session, targets=targets, batch_size=4)
+
+        assert fake.n_requests == 2
+
+    assert list(files) == targets
+    assert [files[target] for target in targets] == [
+        *(f"name: a{idx}" for idx in range(5)),
+        None,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_release_batch_tag_fallback() -> None:
+    tagged = FakeRepo(
+        owner="octo",
+        name="tagged",
+        tags=[("v1.0.0", "a" * 40), ("v1.1.0", "b" * 40), ("latest", "b" * 40)],
+    )
+    untagged = FakeRepo(owner="octo", name="untagged")
+    with FakeGitHub(repos=[tagged, untagged]) as fake:
+        async with build_client(url=fake.url) as session:
+            releases = await fetch_releases_batch(
+                session=session,
+                repos=[("octo", "tagged"), ("octo", "deleted"), ("octo", "untagged")],
+            )
+
+            # Releases & tags of every repository are each fetched in a single query
+            assert fake.n_requests == 2
+
+    tagged_releases = releases[("octo", "tagged")]
+    assert tagged_releases is not None
+    assert [r.ver for r in tagged_releases] == [Version("1.1.0"), Version("1.0.0")]
+    assert tagged_releases[0].tag_hash == "b" * 40
+    assert tagged_releases[0].url == "https://github.com/octo/tagged/tree/v1.1.0"
+
+    assert releases[("octo", "deleted")] is None
+    assert releases[("octo", "untagged")] == []
+
+
+@pytest.mark.asyncio
+async def test_fetch_tag_indexes_batch_pages() -> None:
+    checkout = FakeRepo(
+        owner="actions",
+        name="checkout",
+        releases=[("v4.0.0", "a" * 40), ("v5.0.0", "b" * 40)],
+        tags=[("v4", "a" * 40), ("v5", "b" * 40), ("nightly", "c" * 40), ("v5.0.1", "d" * 40)],
+    )
+    python = FakeRepo(owner="actions", name="setup-python", releases=[("v6.0.0", "e" * 40)])
+    with FakeGitHub(repos=[checkout, python]) as fake:
+        async with build_client(url=fake.url) as session:
+            tag_indexes = await fetch_tag_indexes_batch(
+                session=session,
+                repos=[
+                    ("actions", "checkout"),
+                    ("actions", "deleted"),
+                    ("actions", "setup-python"),
+                ],
+                page_size=2,
+            )
+
+            # Repositories are paged together, until every repository's tags are exhausted
+            assert fake.n_requests == 3
+
+    assert list(tag_indexes) == [
+        ("actions", "checkout"),
+        ("actions", "deleted"),
+        ("actions", "setup-python"),
+    ]
+    assert tag_indexes[("actions", "checkout")] == {
+        "a" * 40: Version("4.0.0"),
+        "b" * 40: Version("5.0.0"),
+        "d" * 40: Version("5.0.1"),
+    }
+    assert tag_indexes[("actions", "deleted")] is None
+    assert tag_indexes[("actions", "setup-python")] == {"e" * 40: Version("6.0.0")}
+
+
+@pytest.mark.asyncio
+async def test_fetch_tag_indexes_batch_max_pages() -> None:
+    checkout = FakeRepo(
+        owner="actions", name="checkout", tags=[("v4.0.0", "a" * 40), ("v5.0.0", "b" * 40)]
+    )
+    with FakeGitHub(repos=[checkout]) as fake:
+        async with build_client(url=fake.url) as session:
+            tag_indexes = await fetch_tag_indexes_batch(
+                session=session, repos=[("actions", "checkout")], page_size=1, max_pages=1
+            )
+
+    # Only the newest tags are indexed
+    assert tag_indexes == {("actions", "checkout"): {"b" * 40: Version("5.0.0")}}
+
+
+@pytest.mark.asyncio
+async def test_iter_org_repositories_pages(mocker: MockerFixture) -> None:
+    pages = []
+    for page in ("org_query_page_1.json", "org_query_page_2.json"):
+        with (SAMPLE_DATA_DIR / page).open("r") as f:
+            pages.append(json.load(f))
+
+    mock_session = mocker.AsyncMock()
+    mock_session.execute.side_effect = pages
+
+    repos = [repo async for repo in iter_org_repositories(session=mock_session, org="sco1")]
+
+    assert [repo.name for repo in repos] == ["check-workflow", "empty-repo", "old-repo"]
+    assert repos[0].workflows.keys() == {"lint_test.yml"}  # Subdirectory should be skipped
+    assert not repos[1].workflows
+    assert repos[1].is_empty
+    assert repos[2].is_archived
+
+    first_query, second_query = (
+        call.args[0].payload for call in mock_session.execute.call_args_list
+    )
+    assert first_query["variables"]["cursor"] is None
+    assert first_query["variables"]["target"] == "HEAD:.github/workflows/"
+    assert second_query["variables"]["cursor"] == "Y3Vyc29yOjI="
+
+
+def test_build_workflow_batch_query() -> None:
+    query = build_workflow_batch_query(2)
+
+    assert "$owner_1: String!, $repo_1: String!, $target_1: String!" in query
+    assert "w1: repository(owner: $owner_1, name: $repo_1)" in query
+    assert "object(expression: $target_1)" in query
+    assert "w2:" not in query
+
+
+@pytest.mark.asyncio
+async def test_fetch_workflows_batch(mocker: MockerFixture) -> None:
+    SAMPLE_RESPONSE = SAMPLE_DATA_DIR / "workflow_query.json"
+    with SAMPLE_RESPONSE.open("r") as f:
+        resp = json.load(f)
+
+    mock_session = mocker.AsyncMock()
+    mock_session.execute.side_effect = [
+        {"w0": resp["repository"], "w1": {"object": None}},
+        TransportQueryError("Could not resolve to a Repository", data={"w0": None}),
+    ]
+
+    TARGETS = [
+        WorkflowTarget(owner="sco1", repo="flake8-annotations"),
+        WorkflowTarget(owner="sco1", repo="flake8-annotations", ref="no-such-branch"),
+        WorkflowTarget(owner="sco1", repo="deleted"),
+    ]
+    results = [
+        r async for r in fetch_workflows_batch(session=mock_session, targets=TARGETS, batch_size=2)
+    ]
+
+    assert [target for target, _ in results] == TARGETS
+    assert results[0][1].keys() == {"lint_test.yml", "pypi_release.yml"}  # type: ignore[union-attr]
+    assert results[1][1] == {}
+    assert results[2][1] is None
+
+    first_query = mock_session.execute.call_args_list[0].args[0].payload
+    assert first_query["variables"]["target_0"] == "main:.github/workflows/"
+    assert first_query["variables"]["target_1"] == "no-such-branch:.github/workflows/"
@@ -0,0 +1,220 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from check_workflow.cli import main
+from check_workflow.extract import scan_steps
+from check_workflow.gh_api import FileTarget, build_client
+from check_workflow.graph import DefinitionRef, DependencyGraph, RepositoryRef
+from check_workflow.workflow import JobDependency, UsesSpec
+from tests.fake_github import FakeGitHub, FakeRepo
+
+DEFINITION_REF_TEST_CASES = (
+    ("actions/checkout@v4", DefinitionRef("actions", "checkout", "", "v4"), False),
+    ("github/codeql-action/init@v3", DefinitionRef("github", "codeql-action", "init", "v3"), False),
+    (
+        "octo/ci/.github/workflows/build.yml@release/v1",
+        DefinitionRef("octo", "ci", ".github/workflows/build.yml", "release/v1"),
+        True,
+    ),
+)
+
+
+@pytest.mark.parametrize(("raw_uses", "truth_ref", "is_workflow"), DEFINITION_REF_TEST_CASES)
+def test_definition_ref_from_raw(
+    raw_uses: str, truth_ref: DefinitionRef, is_workflow: bool
+) -> None:
+    ref = DefinitionRef.from_raw(raw_uses)
+    assert ref == truth_ref
+    assert ref.is_workflow is is_workflow
+    assert f"{ref}" == raw_uses
+
+
+def test_definition_ref_candidates() -> None:
+    action = DefinitionRef.from_raw("github/codeql-action/init@v3")
+    assert action.candidates() == [
+        FileTarget("github", "codeql-action", "v3", "init/action.yml"),
+        FileTarget("github", "codeql-action", "v3", "init/action.yaml"),
+    ]
+
+    workflow = DefinitionRef.from_raw("octo/ci/.github/workflows/build.yml@v1")
+    assert workflow.candidates() == [FileTarget("octo", "ci", "v1", ".github/workflows/build.yml")]
+
+
+CI = FakeRepo(
+    owner="octo",
+    name="ci",
+    files={
+        ".github/workflows/build.yml": """\
+on: workflow_call
+jobs:
+  build:
+    steps:
+    - uses: actions/checkout@v4
+    - name: Set up
+      uses: ./.github/actions/setup
+""",
+        ".github/actions/setup/action.yml": """\
+runs:
+  using: composite
+  steps:
+  - name: Set up Python
+    uses: actions/setup-python@v5
+  - run: echo "no uses"
+    shell: bash
+""",
+    },
+)
+COMPOSITE = FakeRepo(
+    owner="octo",
+    name="composite",
+    files={
+        "action.yaml": "runs:\n  using: composite\n  steps:\n  - uses: actions/cache@v3\n",
+    },
+)
+CHECKOUT = FakeRepo(
+    owner="actions",
+    name="checkout",
+    files={"action.yml": "runs:\n  using: node20\n  main: dist/index.js\n"},
+)
+SETUP_PYTHON = FakeRepo(owner="actions", name="setup-python")
+CACHE = FakeRepo(owner="actions", name="cache")
+
+CALLER_WORKFLOW = """\
+jobs:
+  call:
+    uses: octo/ci/.github/workflows/build.yml@v1
+  lint:
+    steps:
+    - uses: actions/checkout@v4
+    - name: Composite
+      uses: octo/composite@v2
+"""
+
+BUILD = "octo/ci/.github/workflows/build.yml@v1"
+TRUTH_EXPANDED = [
+    JobDependency(job="call", step_name=None, uses=UsesSpec.from_raw(BUILD)),
+    JobDependency(
+        job="call", step_name=None, uses=UsesSpec.from_raw("actions/checkout@v4"), via=(BUILD,)
+    ),
+    JobDependency(
+        job="call",
+        step_name="Set up Python",
+        uses=UsesSpec.from_raw("actions/setup-python@v5"),
+        via=(BUILD, "./.github/actions/setup"),
+    ),
+    JobDependency(job="lint", step_name=None, uses=UsesSpec.from_raw("actions/checkout@v4")),
+    JobDependency(job="lint", step_name="Composite", uses=UsesSpec.from_raw("octo/composite@v2")),
+    JobDependency(
+        job="lint",
+        step_name=None,
+        uses=UsesSpec.from_raw("actions/cache@v3"),
+        via=("octo/composite@v2",),
+    ),
+]
+
+
+@pytest.mark.asyncio
+async def test_expand_remote() -> None:
+    with FakeGitHub(repos=[CI, COMPOSITE, CHECKOUT, SETUP_PYTHON, CACHE]) as fake:
+        async with build_client(url=fake.url) as session:
+            graph = DependencyGraph(session=session)
+            expanded = await graph.expand_remote(
+                RepositoryRef("octo", "app", "main"), ".github/workflows", "ci.yml", CALLER_WORKFLOW
+            )
+
+    assert expanded == TRUTH_EXPANDED
+
+    # Definitions are fetched a nesting level at a time, each only once
+    assert fake.n_requests == 3
+
+
+LOOP = FakeRepo(
+    owner="octo",
+    name="loop",
+    files={
+        ".github/workflows/a.yml": "jobs:\n  a:\n    uses: octo/loop/.github/workflows/b.yml@v1\n",
+        ".github/workflows/b.yml": "jobs:\n  b:\n    uses: ./.github/workflows/a.yml\n",
+    },
+)
+
+
+@pytest.mark.asyncio
+async def test_expand_cycle(capsys: pytest.CaptureFixture) -> None:
+    with FakeGitHub(repos=[LOOP]) as fake:
+        async with build_client(url=fake.url) as session:
+            graph = DependencyGraph(session=session)
+            expanded = await graph.expand_remote(
+                RepositoryRef("octo", "loop", "v1"),
+                ".github/workflows",
+                "a.yml",
+                LOOP.files[".github/workflows/a.yml"],
+            )
+
+    assert expanded == [
+        JobDependency(
+            job="a", step_name=None, uses=UsesSpec.from_raw("octo/loop/.github/workflows/b.yml@v1")
+        )
+    ]
+    assert "Dependency cycle detected" in capsys.readouterr().out
+
+
+@pytest.mark.asyncio
+async def test_expand_max_depth(capsys: pytest.CaptureFixture) -> None:
+    with FakeGitHub(repos=[CI, CHECKOUT, SETUP_PYTHON]) as fake:
+        async with build_client(url=fake.url) as session:
+            graph = DependencyGraph(session=session, max_depth=1)
+            expanded = await graph.expand(scan_steps(CALLER_WORKFLOW)[:1], base=Path())
+
+    assert [dep.uses.repo for dep in expanded] == ["ci", "checkout"]
+    assert "Maximum nesting depth (1) reached" in capsys.readouterr().out
+
+
+def _make_repo(base: Path, files: dict[str, str]) -> None:
+    for rel_path, text in files.items():
+        path = base / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+
+def test_cli_recursive_local(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture
+) -> None:
+    _make_repo(
+        tmp_path,
+        {
+            ".github/workflows/ci.yml": (
+                "jobs:\n  test:\n    steps:\n    - uses: ./.github/actions/setup\n"
+            ),
+            ".github/actions/setup/action.yml": (
+                "runs:\n  using: composite\n  steps:\n  - uses: actions/checkout@v4\n"
+            ),
+        },
+    )
+
+    checkout = FakeRepo(owner="actions", name="checkout", releases=[("v5.0.0", "b" * 40)])
+    with FakeGitHub(repos=[checkout]) as fake:
+        monkeypatch.setenv("GITHUB_GRAPHQL_URL", fake.url)
+        main(
+            [
+                "local",
+                "-r",
+                str(tmp_path / ".github/workflows"),
+                "--no-cache",
+                "--no-daemon",
+                "--recursive",
+                "--format",
+                "ndjson",
+            ]
+        )
+
+    (row,) = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert row["job"] == "test"
+    assert row["uses"]["repo"] == "checkout"
+    assert row["via"] == ["./.github/actions/setup"]
+
+
+def test_cli_recursive_incremental() -> None:
+    with pytest.raises(SystemExit):
+        main(["local", "--incremental", "--recursive"])
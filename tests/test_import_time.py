@@ -0,0 +1,44 @@
+import subprocess
+import sys
+
+import pytest
+
+# Generous enough to avoid flaking on slow CI runners, while still catching a regression back to
+# importing the full network stack up front (~400ms+)
+IMPORT_BUDGET_US = 250_000
+
+HEAVY_MODULES = {"dotenv", "gql", "httpx", "prettytable", "yaml"}
+
+
+def _import_times(module: str) -> dict[str, int]:
+    """Import the query module in a fresh interpreter & return cumulative import time per module."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # Lines are of the form "import time: <self us> | <cumulative us> | <module name>"
+    timings = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        timings[name.strip()] = int(cumulative)
+
+    return timings
+
+
+@pytest.mark.parametrize("module", ("check_workflow.cli", "check_workflow.workflow"))
+def test_no_heavy_imports(module: str) -> None:
+    timings = _import_times(module)
+
+    imported_top_level = {name.split(".")[0] for name in timings}
+    assert not imported_top_level & HEAVY_MODULES
+
+
+def test_cli_import_budget() -> None:
+    timings = _import_times("check_workflow.cli")
+    assert timings["check_workflow.cli"] < IMPORT_BUDGET_US
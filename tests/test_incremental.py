@@ -0,0 +1,176 @@
+import dataclasses
+import datetime as dt
+from pathlib import Path
+
+import pytest
+from packaging.version import Version
+from pytest_mock import MockerFixture
+
+import check_workflow.local
+from check_workflow.cache import ReleaseCache
+from check_workflow.gh_api import Release
+from check_workflow.incremental import DependencyCache, parse_incremental, report_incremental
+from check_workflow.local import discover_workflows
+from check_workflow.workflow import extract_workflow_dependencies
+
+CHECKOUT_LATEST = Release(ver=Version("5.0"), published=dt.datetime.now(), url="", tag_hash="")
+PYTHON_LATEST = Release(ver=Version("6.1"), published=dt.datetime.now(), url="", tag_hash="")
+PUBLISH_LATEST = Release(
+    ver=Version("1.12.4"),
+    published=dt.datetime.now(),
+    url="",
+    tag_hash="76f52bc884231f62b9a1b7c6c1b4b1f0b6f0bd9e",
+)
+
+SAMPLE_WORKFLOW = """\
+jobs:
+  lint:
+    steps:
+    - name: Checkout
+      uses: actions/checkout@v4
+    - uses: actions/setup-python@v6
+    - uses: pypa/gh-action-pypi-publish@76f52bc884231f62b9a1b7c6c1b4b1f0b6f0bd9e
+"""
+
+
+def test_dependency_cache_roundtrip(tmp_path: Path) -> None:
+    deps = extract_workflow_dependencies(SAMPLE_WORKFLOW)
+
+    db_path = tmp_path / "dependencies.sqlite3"
+    with DependencyCache(path=db_path) as dep_cache:
+        dep_cache.put_many({"/repo/lint.yml": ("abc123", deps)})
+
+    with DependencyCache(path=db_path) as dep_cache:
+        stored = dep_cache.get_many(["/repo/lint.yml", "/repo/missing.yml"])
+
+    assert stored == {"/repo/lint.yml": ("abc123", deps)}
+
+
+@pytest.mark.asyncio
+async def test_parse_incremental_only_changed(tmp_path: Path, mocker: MockerFixture) -> None:
+    root = tmp_path / "workflows"
+    root.mkdir()
+    (root / "lint.yml").write_text(SAMPLE_WORKFLOW)
+    (root / "test.yml").write_text(SAMPLE_WORKFLOW)
+
+    spy = mocker.spy(check_workflow.local, "_parse_workflow_file")
+    with DependencyCache(path=tmp_path / "dependencies.sqlite3") as dep_cache:
+        first = await parse_incremental(discover_workflows(root), dep_cache)
+        assert spy.call_count == 2
+
+        (root / "test.yml").write_text(SAMPLE_WORKFLOW.replace("@v4", "@v5"))
+        second = await parse_incremental(discover_workflows(root), dep_cache)
+        assert spy.call_count == 3
+        spy.assert_called_with(root / "test.yml")
+
+    by_name = {workflow.name: deps for workflow, deps in second.items()}
+    assert by_name["lint.yml"] == list(first.values())[0]
+    assert str(by_name["test.yml"][0].uses.spec) == "~=5.0"
+
+
+@pytest.mark.asyncio
+async def test_parse_incremental_bad_workflow_not_stored(tmp_path: Path) -> None:
+    (tmp_path / "bad.yml").write_text("not: a workflow")
+
+    with DependencyCache(path=tmp_path / "dependencies.sqlite3") as dep_cache:
+        parsed = await parse_incremental(discover_workflows(tmp_path), dep_cache)
+        assert parsed == {}
+        assert dep_cache.get_many([str((tmp_path / "bad.yml").resolve())]) == {}
+
+
+@pytest.mark.asyncio
+async def test_report_incremental_skips_network_when_cached(
+    tmp_path: Path, mocker: MockerFixture
+) -> None:
+    root = tmp_path / "workflows"
+    root.mkdir()
+    (root / "lint.yml").write_text(SAMPLE_WORKFLOW)
+
+    resolve = mocker.AsyncMock(
+        return_value={("actions", "checkout"): CHECKOUT_LATEST, ("actions", "setup-python"): None}
+    )
+    with (
+        DependencyCache(path=tmp_path / "dependencies.sqlite3") as dep_cache,
+        ReleaseCache(path=tmp_path / "releases.sqlite3") as release_cache,
+    ):
+        release_cache.put_many({("actions", "setup-python"): PYTHON_LATEST})
+        workflows = discover_workflows(root)
+
+        outdated = await report_incremental(workflows, dep_cache, resolve, release_cache)
+        resolve.assert_awaited_once_with(
+            [("actions", "checkout"), ("pypa", "gh-action-pypi-publish")]
+        )
+
+        (outdated_dep,) = outdated[root]["lint.yml"]
+        assert outdated_dep.spec.uses.repo == "checkout"
+
+        # Once every release is cached, nothing should be looked up
+        release_cache.put_many(
+            {
+                ("actions", "checkout"): CHECKOUT_LATEST,
+                ("pypa", "gh-action-pypi-publish"): PUBLISH_LATEST,
+            }
+        )
+        resolve.reset_mock()
+        assert await report_incremental(workflows, dep_cache, resolve, release_cache) == outdated
+        resolve.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_report_incremental_refresh(tmp_path: Path, mocker: MockerFixture) -> None:
+    (tmp_path / "lint.yml").write_text(SAMPLE_WORKFLOW)
+
+    resolve = mocker.AsyncMock(return_value={})
+    with (
+        DependencyCache(path=tmp_path / "dependencies.sqlite3") as dep_cache,
+        ReleaseCache(path=tmp_path / "releases.sqlite3") as release_cache,
+    ):
+        release_cache.put_many({("actions", "setup-python"): PYTHON_LATEST})
+        await report_incremental(
+            discover_workflows(tmp_path), dep_cache, resolve, release_cache, refresh=True
+        )
+
+    (keys,) = resolve.await_args.args
+    assert ("actions", "setup-python") in keys
+
+
+@pytest.mark.asyncio
+async def test_report_incremental_resolves_pinned_version(
+    tmp_path: Path, mocker: MockerFixture
+) -> None:
+    (tmp_path / "lint.yml").write_text(SAMPLE_WORKFLOW)
+
+    resolve = mocker.AsyncMock(return_value={})
+    resolve_tags = mocker.AsyncMock(
+        return_value={
+            ("pypa", "gh-action-pypi-publish"): {PUBLISH_LATEST.tag_hash: Version("1.12.4")}
+        }
+    )
+    with (
+        DependencyCache(path=tmp_path / "dependencies.sqlite3") as dep_cache,
+        ReleaseCache(path=tmp_path / "releases.sqlite3") as release_cache,
+    ):
+        # The pinned SHA is tagged with the latest version, but isn't the release's tag commit
+        release_cache.put_many(
+            {
+                ("actions", "checkout"): CHECKOUT_LATEST,
+                ("actions", "setup-python"): PYTHON_LATEST,
+                ("pypa", "gh-action-pypi-publish"): dataclasses.replace(
+                    PUBLISH_LATEST, tag_hash=("f" * 40)
+                ),
+            }
+        )
+        outdated = await report_incremental(
+            discover_workflows(tmp_path),
+            dep_cache,
+            resolve,
+            release_cache,
+            resolve_tags=resolve_tags,
+        )
+
+    resolve_tags.assert_awaited_once_with([("pypa", "gh-action-pypi-publish")])
+    resolve.assert_not_awaited()
+
+    # Pinned to the latest release, so only actions/checkout is outdated
+    (outdated_dep,) = outdated[tmp_path]["lint.yml"]
+    assert outdated_dep.spec.uses.repo == "checkout"
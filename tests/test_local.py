@@ -0,0 +1,144 @@
+import datetime as dt
+from pathlib import Path
+
+import pytest
+from packaging.version import Version
+from pytest_mock import MockerFixture
+
+from check_workflow.gh_api import Release
+from check_workflow.local import (
+    discover_workflows,
+    iter_local_reports,
+    read_manifest,
+    report_local_outdated,
+)
+from check_workflow.resolve import ReleaseResolver
+
+LATEST = [Release(ver=Version("5.0"), published=dt.datetime.now(), url="", tag_hash="")]
+
+SAMPLE_WORKFLOW = """\
+jobs:
+  lint:
+    steps:
+    - uses: actions/checkout@v4
+"""
+
+
+def _make_repo(base: Path, files: dict[str, str]) -> Path:
+    for rel_path, text in files.items():
+        path = base / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+    return base
+
+
+def test_discover_workflows(tmp_path: Path) -> None:
+    _make_repo(
+        tmp_path,
+        {
+            "repo-a/.github/workflows/lint.yml": "",
+            "repo-a/.github/workflows/release.yaml": "",
+            "repo-a/.github/workflows/notes.md": "",
+            "repo-a/.github/dependabot.yml": "",
+            "repo-a/docker-compose.yml": "",
+            "group/repo-b/.github/workflows/test.yml": "",
+            "repo-c/node_modules/pkg/.github/workflows/vendored.yml": "",
+            ".pre-commit-config.yaml": "",
+        },
+    )
+
+    discovered = [workflow.path.relative_to(tmp_path) for workflow in discover_workflows(tmp_path)]
+    assert [path.as_posix() for path in discovered] == [
+        "group/repo-b/.github/workflows/test.yml",
+        "repo-a/.github/workflows/lint.yml",
+        "repo-a/.github/workflows/release.yaml",
+    ]
+
+
+def test_discover_workflows_direct(tmp_path: Path) -> None:
+    _make_repo(tmp_path, {"lint.yml": "", "README.md": ""})
+
+    assert [workflow.name for workflow in discover_workflows(tmp_path)] == ["lint.yml"]
+
+
+def test_discover_workflows_repo_root(tmp_path: Path) -> None:
+    _make_repo(
+        tmp_path,
+        {
+            ".github/workflows/lint.yml": "",
+            ".pre-commit-config.yaml": "",
+            "mkdocs.yml": "",
+        },
+    )
+
+    # Other configuration at a repository's root isn't mistaken for a workflow
+    discovered = [workflow.path.relative_to(tmp_path) for workflow in discover_workflows(tmp_path)]
+    assert [path.as_posix() for path in discovered] == [".github/workflows/lint.yml"]
+
+    workflow_dir = tmp_path / ".github/workflows"
+    assert [workflow.name for workflow in discover_workflows(workflow_dir)] == ["lint.yml"]
+
+
+def test_discover_workflows_missing_root(tmp_path: Path) -> None:
+    assert discover_workflows(tmp_path / "missing") == []
+
+
+def test_read_manifest(tmp_path: Path) -> None:
+    manifest = tmp_path / "roots.txt"
+    manifest.write_text("# Checked out repos\nrepo-a\n\n  /abs/repo-b  \n")
+
+    assert read_manifest(manifest) == [tmp_path / "repo-a", Path("/abs/repo-b")]
+
+
+@pytest.mark.asyncio
+async def test_local_bad_max_workers_raises(mocker: MockerFixture) -> None:
+    resolver = ReleaseResolver(session=mocker.AsyncMock())
+    with pytest.raises(ValueError, match="at least 1"):
+        async for _ in iter_local_reports([], resolver=resolver, max_workers=0):
+            pass
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("use_pool", (False, True))
+async def test_report_local_dedupes_across_roots(
+    tmp_path: Path, use_pool: bool, mocker: MockerFixture
+) -> None:
+    if use_pool:
+        mocker.patch("check_workflow.local.MIN_POOL_FILES", 1)
+
+    roots = [
+        _make_repo(tmp_path / "repo-a", {".github/workflows/lint.yml": SAMPLE_WORKFLOW}),
+        _make_repo(tmp_path / "repo-b", {".github/workflows/test.yaml": SAMPLE_WORKFLOW}),
+    ]
+    patched = mocker.patch(
+        "check_workflow.resolve.fetch_releases_batch",
+        new_callable=mocker.AsyncMock,
+        return_value={("actions", "checkout"): LATEST},
+    )
+
+    workflows = [workflow for root in roots for workflow in discover_workflows(root)]
+    resolver = ReleaseResolver(session=mocker.AsyncMock())
+    outdated = await report_local_outdated(workflows, resolver=resolver, max_workers=2)
+
+    assert list(outdated) == roots
+    assert list(outdated[roots[0]]) == [".github/workflows/lint.yml"]
+    assert list(outdated[roots[1]]) == [".github/workflows/test.yaml"]
+    patched.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_report_local_bad_workflow_skipped(tmp_path: Path, mocker: MockerFixture) -> None:
+    root = _make_repo(
+        tmp_path, {"good.yml": SAMPLE_WORKFLOW, "bad.yml": "not: a workflow", "empty.yml": ""}
+    )
+    mocker.patch(
+        "check_workflow.resolve.fetch_releases_batch",
+        new_callable=mocker.AsyncMock,
+        return_value={("actions", "checkout"): LATEST},
+    )
+
+    resolver = ReleaseResolver(session=mocker.AsyncMock())
+    outdated = await report_local_outdated(discover_workflows(root), resolver=resolver)
+
+    assert list(outdated[root]) == ["good.yml"]
@@ -0,0 +1,82 @@
+import datetime as dt
+import json
+
+import pytest
+from packaging.version import Version
+from pytest_mock import MockerFixture
+
+from check_workflow.gh_api import Release
+from check_workflow.org import report_org_outdated
+from check_workflow.resolve import ReleaseResolver
+from tests import SAMPLE_DATA_DIR
+
+LATEST = [Release(ver=Version("5.0"), published=dt.datetime.now(), url="", tag_hash="")]
+
+
+def _load_org_pages() -> list[dict]:
+    pages = []
+    for page in ("org_query_page_1.json", "org_query_page_2.json"):
+        with (SAMPLE_DATA_DIR / page).open("r") as f:
+            pages.append(json.load(f))
+
+    return pages
+
+
+@pytest.mark.asyncio
+async def test_report_org_skips_archived_and_empty(mocker: MockerFixture) -> None:
+    mock_session = mocker.AsyncMock()
+    mock_session.execute.side_effect = _load_org_pages()
+    patched = mocker.patch(
+        "check_workflow.resolve.fetch_releases_batch",
+        new_callable=mocker.AsyncMock,
+        return_value={("actions", "checkout"): LATEST},
+    )
+
+    resolver = ReleaseResolver(session=mock_session)
+    outdated = await report_org_outdated(session=mock_session, org="sco1", resolver=resolver)
+
+    assert list(outdated) == ["check-workflow"]
+    assert list(outdated["check-workflow"]) == ["lint_test.yml"]
+    patched.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_report_org_dedupes_releases(mocker: MockerFixture) -> None:
+    mock_session = mocker.AsyncMock()
+    mock_session.execute.side_effect = _load_org_pages()
+    patched = mocker.patch(
+        "check_workflow.resolve.fetch_releases_batch",
+        new_callable=mocker.AsyncMock,
+        return_value={("actions", "checkout"): LATEST},
+    )
+
+    resolver = ReleaseResolver(session=mock_session)
+    outdated = await report_org_outdated(
+        session=mock_session, org="sco1", resolver=resolver, include_archived=True
+    )
+
+    # Both repos depend on actions/checkout, but it should only be looked up once
+    assert list(outdated) == ["check-workflow", "old-repo"]
+    patched.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_report_org_bad_workflow_skipped(mocker: MockerFixture) -> None:
+    pages = _load_org_pages()
+    bad_entry = pages[0]["organization"]["repositories"]["nodes"][0]["object"]["entries"][0]
+    bad_entry["object"]["text"] = "not: a workflow"
+
+    mock_session = mocker.AsyncMock()
+    mock_session.execute.side_effect = pages
+    mocker.patch(
+        "check_workflow.resolve.fetch_releases_batch",
+        new_callable=mocker.AsyncMock,
+        return_value={("actions", "checkout"): LATEST},
+    )
+
+    resolver = ReleaseResolver(session=mock_session)
+    outdated = await report_org_outdated(
+        session=mock_session, org="sco1", resolver=resolver, include_archived=True
+    )
+
+    assert list(outdated) == ["old-repo"]
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from check_workflow.cli import main
+from check_workflow.gh_api import fetch_releases_batch
+from check_workflow.pool import ConnectionStats, PoolLimits, SessionManager
+from tests.fake_github import FakeGitHub, FakeRepo
+
+CHECKOUT = FakeRepo(owner="actions", name="checkout", releases=[("v5.0.0", "b" * 40)])
+WORKFLOWS = FakeRepo(
+    owner="sco1",
+    name="workflows",
+    files={
+        ".github/workflows/lint.yml": "jobs:\n  a:\n    steps:\n    - uses: actions/checkout@v4"
+    },
+)
+
+
+@pytest.mark.asyncio
+async def test_session_manager_shares_session() -> None:
+    with FakeGitHub(repos=[CHECKOUT]) as fake:
+        sessions = SessionManager(url=fake.url)
+
+        async def pipeline() -> None:
+            async with sessions as session:
+                await fetch_releases_batch(session, [("actions", "checkout")])
+
+        await pipeline()
+        await asyncio.gather(*(pipeline() for _ in range(5)))
+        async with sessions as first, sessions as second:
+            assert first is second
+
+        await sessions.close()
+
+    assert fake.n_requests == 6
+    assert sessions.stats.n_requests == 6
+    assert sessions.stats.http_versions == {"HTTP/1.1": 6}
+    assert sessions.stats.n_connections < sessions.stats.n_requests
+    assert sessions.stats.n_reused == 6 - sessions.stats.n_connections
+    assert sessions.stats.n_tls_handshakes == 0  # Plain HTTP
+
+
+def test_session_manager_new_event_loop() -> None:
+    with FakeGitHub(repos=[CHECKOUT]) as fake:
+        sessions = SessionManager(url=fake.url)
+
+        async def pipeline() -> object:
+            try:
+                async with sessions as session:
+                    await fetch_releases_batch(session, [("actions", "checkout")])
+                    return session
+            finally:
+                await sessions.close()
+
+        # Sessions can't outlive their event loop, so each run connects its own
+        assert asyncio.run(pipeline()) is not asyncio.run(pipeline())
+
+    assert sessions.stats.n_requests == 2
+
+
+def test_pool_limits_http2_requires_h2(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("check_workflow.pool.importlib.util.find_spec", lambda name: None)
+
+    assert PoolLimits().client_kwargs()["http2"] is False
+    with pytest.raises(RuntimeError, match="h2"):
+        PoolLimits(http2=True).client_kwargs()
+
+
+def test_connection_stats_summary() -> None:
+    stats = ConnectionStats(n_requests=10, n_connections=2, n_tls_handshakes=2, n_reused=8)
+    stats.http_versions["HTTP/2"] = 10
+
+    assert "reused: 8" in stats.summary()
+    assert "connections opened: 2" in stats.summary()
+    assert "HTTP/2: 10" in stats.summary()
+
+
+@pytest.mark.asyncio
+async def test_connection_stats_counts_reuse_from_trace() -> None:
+    stats = ConnectionStats()
+
+    # A new connection, a failed request & 2 requests multiplexed over the open connection
+    first, failed, *multiplexed = (stats._request_tracer() for _ in range(4))
+    await first("connection.connect_tcp.complete", {})
+    await first("http2.send_request_headers.started", {})
+    await failed("connection.connect_tcp.started", {})
+    for trace in multiplexed:
+        await trace("http2.send_request_headers.started", {})
+
+    assert stats.n_connections == 1
+    assert stats.n_reused == 2
+
+
+def test_cli_stats_reports_connections(
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture
+) -> None:
+    with FakeGitHub(repos=[CHECKOUT, WORKFLOWS]) as fake:
+        monkeypatch.setenv("GITHUB_GRAPHQL_URL", fake.url)
+        main(["remote", "sco1", "workflows", "--no-cache", "--no-daemon", "--stats"])
+
+    captured = capsys.readouterr()
+    assert "actions/checkout" in captured.out
+    assert "connections opened: 1" in captured.err
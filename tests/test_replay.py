@@ -0,0 +1,90 @@
+import gzip
+import json
+import time
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from check_workflow.cli import main
+from check_workflow.gh_api import build_client, fetch_releases_batch
+from check_workflow.replay import ReplayMissError
+from tests.fake_github import FakeGitHub, FakeRepo
+
+CHECKOUT = FakeRepo(
+    owner="actions",
+    name="checkout",
+    releases=[("v4.2.0", "a" * 40), ("v5.0.0", "b" * 40)],
+)
+WORKFLOWS = FakeRepo(
+    owner="sco1",
+    name="workflows",
+    files={
+        ".github/workflows/lint.yml": "jobs:\n  build:\n    steps:\n    - uses: actions/checkout@v4"
+    },
+)
+
+
+async def _record_checkout(archive: Path) -> dict:
+    with FakeGitHub(repos=[CHECKOUT]) as fake:
+        async with build_client(url=fake.url, record=archive) as session:
+            return await fetch_releases_batch(session, [("actions", "checkout")])
+
+
+def test_build_client_record_replay_exclusive(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="same time"):
+        build_client(record=tmp_path / "a.json.gz", replay=tmp_path / "a.json.gz")
+
+
+@pytest.mark.asyncio
+async def test_record_replay_round_trip(tmp_path: Path, mocker: MockerFixture) -> None:
+    archive = tmp_path / "recording.json.gz"
+    recorded = await _record_checkout(archive)
+
+    with gzip.open(archive, "rt") as f:
+        assert len(json.load(f)["entries"]) == 1
+
+    # The server is gone, and no token is needed to replay
+    mocker.patch("check_workflow.gh_api.TOK", "")
+    async with build_client(replay=archive) as session:
+        replayed = await fetch_releases_batch(session, [("actions", "checkout")])
+
+    assert replayed == recorded
+
+
+@pytest.mark.asyncio
+async def test_replay_latency(tmp_path: Path) -> None:
+    archive = tmp_path / "recording.json.gz"
+    await _record_checkout(archive)
+
+    async with build_client(replay=archive, replay_latency=0.1) as session:
+        start = time.perf_counter()
+        await fetch_releases_batch(session, [("actions", "checkout")])
+
+    assert time.perf_counter() - start >= 0.1
+
+
+@pytest.mark.asyncio
+async def test_replay_miss_raises(tmp_path: Path) -> None:
+    archive = tmp_path / "recording.json.gz"
+    await _record_checkout(archive)
+
+    async with build_client(replay=archive) as session:
+        with pytest.raises(ReplayMissError):
+            await fetch_releases_batch(session, [("actions", "setup-python")])
+
+
+def test_cli_remote_replay(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture
+) -> None:
+    archive = tmp_path / "recording.json.gz"
+    argv = ["remote", "sco1", "workflows", "--no-cache"]
+    with FakeGitHub(repos=[CHECKOUT, WORKFLOWS]) as fake:
+        monkeypatch.setenv("GITHUB_GRAPHQL_URL", fake.url)
+        main([*argv, "--record", str(archive)])
+
+    recorded = capsys.readouterr().out
+    assert "actions/checkout" in recorded
+
+    main([*argv, "--replay", str(archive)])
+    assert capsys.readouterr().out == recorded
@@ -0,0 +1,80 @@
+import asyncio
+import datetime as dt
+
+import pytest
+from packaging.version import Version
+from pytest_mock import MockerFixture
+
+from check_workflow.gh_api import Release
+from check_workflow.resolve import ReleaseResolver
+
+SAMPLE_RELEASE = Release(ver=Version("1.0"), published=dt.datetime.now(), url="", tag_hash="")
+
+
+def test_resolver_bad_concurrency_raises(mocker: MockerFixture) -> None:
+    with pytest.raises(ValueError, match="at least 1"):
+        ReleaseResolver(session=mocker.AsyncMock(), max_concurrency=0)
+
+
+def test_resolver_bad_batch_size_raises(mocker: MockerFixture) -> None:
+    with pytest.raises(ValueError, match="at least 1"):
+        ReleaseResolver(session=mocker.AsyncMock(), batch_size=0)
+
+
+@pytest.mark.asyncio
+async def test_resolver_shares_inflight(mocker: MockerFixture) -> None:
+    patched = mocker.patch(
+        "check_workflow.resolve.fetch_releases_batch",
+        new_callable=mocker.AsyncMock,
+        return_value={("actions", "checkout"): [SAMPLE_RELEASE]},
+    )
+
+    resolver = ReleaseResolver(session=mocker.AsyncMock())
+    first, second = await asyncio.gather(
+        resolver.latest("actions", "checkout"), resolver.latest("actions", "checkout")
+    )
+
+    assert first is second
+    patched.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_resolver_batches_and_bounds_concurrency(mocker: MockerFixture) -> None:
+    in_flight = 0
+    max_in_flight = 0
+    batch_sizes = []
+
+    async def _fake_fetch(
+        session: object, repos: list[tuple[str, str]]
+    ) -> dict[tuple[str, str], list[Release]]:
+        nonlocal in_flight, max_in_flight
+        batch_sizes.append(len(repos))
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+        return {repo: [SAMPLE_RELEASE] for repo in repos}
+
+    mocker.patch("check_workflow.resolve.fetch_releases_batch", side_effect=_fake_fetch)
+
+    resolver = ReleaseResolver(session=mocker.AsyncMock(), max_concurrency=2, batch_size=3)
+    keys = [("owner", f"repo_{i}") for i in range(10)]
+    resolved = await resolver.resolve(keys)
+
+    assert list(resolved) == keys
+    assert batch_sizes == [3, 3, 3, 1]
+    assert max_in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_resolver_unresolved_is_none(mocker: MockerFixture) -> None:
+    mocker.patch(
+        "check_workflow.resolve.fetch_releases_batch",
+        new_callable=mocker.AsyncMock,
+        return_value={("ooga", "booga"): None, ("ooga", "empty"): []},
+    )
+
+    resolver = ReleaseResolver(session=mocker.AsyncMock())
+    resolved = await resolver.resolve([("ooga", "booga"), ("ooga", "empty")])
+
+    assert resolved == {("ooga", "booga"): None, ("ooga", "empty"): None}
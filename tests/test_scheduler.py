@@ -0,0 +1,174 @@
+import asyncio
+import typing as t
+
+import pytest
+from gql.transport.exceptions import TransportServerError
+
+from check_workflow.gh_api import (
+    WorkflowTarget,
+    build_client,
+    fetch_releases_batch,
+    fetch_workflows_batch,
+)
+from check_workflow.scheduler import LOW_BUDGET_THRESHOLD, RateLimitScheduler
+from tests.fake_github import FakeGitHub, FakeRepo
+
+CHECKOUT = FakeRepo(
+    owner="actions",
+    name="checkout",
+    releases=[("v4.2.0", "a" * 40), ("v5.0.0", "b" * 40)],
+    files={".github/workflows/lint.yml": "jobs: {}"},
+)
+
+
+def test_scheduler_bad_concurrency_raises() -> None:
+    with pytest.raises(ValueError, match="at least 1"):
+        RateLimitScheduler(max_concurrency=0)
+
+
+def test_scheduler_scales_with_budget() -> None:
+    scheduler = RateLimitScheduler(max_concurrency=8)
+    assert scheduler.concurrency_limit == 8
+    assert scheduler.suggest_batch_size(25) == 25
+
+    scheduler.stats.remaining = LOW_BUDGET_THRESHOLD // 2
+    assert scheduler.concurrency_limit == 4
+    assert scheduler.suggest_batch_size(25) == 12
+
+    scheduler.stats.remaining = 0
+    assert scheduler.concurrency_limit == 1
+    assert scheduler.suggest_batch_size(25) == 1
+
+
+@pytest.mark.asyncio
+async def test_scheduler_tracks_budget() -> None:
+    scheduler = RateLimitScheduler()
+    with FakeGitHub(repos=[CHECKOUT], limit=1_000, cost=3) as fake:
+        async with build_client(scheduler=scheduler, url=fake.url) as session:
+            releases = await fetch_releases_batch(session, [("actions", "checkout")])
+            await fetch_releases_batch(session, [("actions", "checkout")])
+
+    assert str(releases[("actions", "checkout")][0].ver) == "5.0.0"  # type: ignore[index]
+    assert scheduler.stats.n_requests == 2
+    assert scheduler.stats.total_cost == 6
+    assert scheduler.stats.remaining == 994
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("retry_after", (0, None))
+async def test_scheduler_retries_secondary_limit(retry_after: float | None) -> None:
+    scheduler = RateLimitScheduler(backoff_base=0.01)
+    with FakeGitHub(repos=[CHECKOUT]) as fake:
+        fake.secondary_limits.extend((403, 429))
+        fake.retry_after = retry_after
+
+        async with build_client(scheduler=scheduler, url=fake.url) as session:
+            releases = await fetch_releases_batch(session, [("actions", "checkout")])
+
+    assert releases[("actions", "checkout")]
+    assert fake.n_requests == 3
+    assert scheduler.stats.n_retries == 2
+
+
+@pytest.mark.asyncio
+async def test_scheduler_secondary_limit_retries_exhausted() -> None:
+    scheduler = RateLimitScheduler(max_retries=1, backoff_base=0.01)
+    with FakeGitHub(repos=[CHECKOUT]) as fake:
+        fake.secondary_limits.extend((429, 429))
+        fake.retry_after = 0
+
+        async with build_client(scheduler=scheduler, url=fake.url) as session:
+            with pytest.raises(TransportServerError):
+                await fetch_releases_batch(session, [("actions", "checkout")])
+
+    assert fake.n_requests == 2
+
+
+AUTH_403_TEST_CASES: tuple[tuple[dict[str, str], bool], ...] = (
+    ({}, False),
+    ({"x-ratelimit-remaining": "0"}, True),
+    ({"retry-after": "0"}, True),
+)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(("headers", "is_retried"), AUTH_403_TEST_CASES)
+async def test_scheduler_403_only_retried_if_rate_limited(
+    headers: dict[str, str], is_retried: bool
+) -> None:
+    scheduler = RateLimitScheduler(max_retries=1, backoff_base=0.01)
+    n_sent = 0
+
+    async def send() -> t.NoReturn:
+        nonlocal n_sent
+        n_sent += 1
+        raise TransportServerError("403 Forbidden: Resource not accessible by token", 403)
+
+    with pytest.raises(TransportServerError):
+        await scheduler.execute(send, lambda: headers)
+
+    # Bad or under-scoped tokens should fail fast rather than backing off
+    assert n_sent == (2 if is_retried else 1)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_waits_for_reset() -> None:
+    scheduler = RateLimitScheduler()
+    with FakeGitHub(repos=[CHECKOUT], limit=2, reset_seconds=0.2) as fake:
+        async with build_client(scheduler=scheduler, url=fake.url) as session:
+            for _ in range(3):
+                await fetch_releases_batch(session, [("actions", "checkout")])
+
+    # Budget was spent after the second request, so the third should wait rather than failing
+    assert fake.n_requests == 3
+    assert scheduler.stats.n_budget_waits == 1
+    assert scheduler.stats.seconds_waited > 0
+
+
+@pytest.mark.asyncio
+async def test_scheduler_retries_rate_limited() -> None:
+    scheduler = RateLimitScheduler(backoff_max=0.3)
+    with FakeGitHub(repos=[CHECKOUT], limit=1, reset_seconds=0.2) as fake:
+        # Spend the budget from elsewhere, so the scheduler doesn't see it coming
+        async with build_client(url=fake.url) as session:
+            await fetch_releases_batch(session, [("actions", "checkout")])
+
+        async with build_client(scheduler=scheduler, url=fake.url) as session:
+            releases = await fetch_releases_batch(session, [("actions", "checkout")])
+
+    assert releases[("actions", "checkout")]
+    assert scheduler.stats.n_retries == 1
+    assert scheduler.stats.n_budget_waits == 1
+
+
+@pytest.mark.asyncio
+async def test_scheduler_limits_concurrency_on_low_budget() -> None:
+    scheduler = RateLimitScheduler(max_concurrency=8)
+    with FakeGitHub(repos=[CHECKOUT], limit=100, latency=0.02) as fake:
+        async with build_client(scheduler=scheduler, url=fake.url) as session:
+            # Budget is unknown until the first response comes back
+            await fetch_releases_batch(session, [("actions", "checkout")])
+            await asyncio.gather(
+                *(fetch_releases_batch(session, [("actions", "checkout")]) for _ in range(4))
+            )
+
+    assert scheduler.concurrency_limit == 1
+    assert fake.max_in_flight == 1
+
+
+@pytest.mark.asyncio
+async def test_scheduler_shrinks_workflow_batches() -> None:
+    repos = [FakeRepo(owner="sco1", name=f"repo-{idx}", files=CHECKOUT.files) for idx in range(4)]
+    targets = [WorkflowTarget(owner="sco1", repo=repo.name) for repo in repos]
+
+    scheduler = RateLimitScheduler()
+    with FakeGitHub(repos=repos, limit=LOW_BUDGET_THRESHOLD // 2) as fake:
+        async with build_client(scheduler=scheduler, url=fake.url) as session:
+            fetched = [
+                workflows
+                async for _, workflows in fetch_workflows_batch(session, targets, batch_size=2)
+            ]
+
+    # After the first batch, the remaining budget should halve the batch size
+    assert fetched == [{"lint.yml": "jobs: {}"}] * 4
+    assert fake.n_requests == 3
@@ -0,0 +1,199 @@
+import datetime as dt
+from pathlib import Path
+
+import pytest
+from packaging.version import Version
+
+from check_workflow.cli import main
+from check_workflow.gh_api import Release
+from check_workflow.shard import ResultStore, ShardSpec, scan_key, shard_of
+from check_workflow.workflow import JobDependency, OutdatedDep, UsesSpec
+from tests.fake_github import FakeGitHub, FakeRepo
+
+
+def test_shard_of_partition() -> None:
+    names = [f"repo-{idx}" for idx in range(100)]
+    shards = [shard_of(name, 4) for name in names]
+
+    assert set(shards) == {0, 1, 2, 3}
+    assert shards == [shard_of(name.upper(), 4) for name in names]
+
+
+def test_shard_spec_from_raw() -> None:
+    shard = ShardSpec.from_raw("1/4")
+    assert shard == ShardSpec(index=1, count=4)
+    assert str(shard) == "1/4"
+
+
+@pytest.mark.parametrize("raw_shard", ("4/4", "-1/4", "1", "a/b"))
+def test_shard_spec_from_raw_invalid(raw_shard: str) -> None:
+    with pytest.raises(ValueError):
+        ShardSpec.from_raw(raw_shard)
+
+
+OUTDATED = OutdatedDep(
+    spec=JobDependency(job="test", step_name=None, uses=UsesSpec.from_raw("actions/checkout@v4")),
+    latest=Release(
+        ver=Version("5.0.0"),
+        published=dt.datetime(2025, 8, 11, tzinfo=dt.timezone.utc),
+        url="https://github.com/actions/checkout/releases/tag/v5.0.0",
+        tag_hash="b" * 40,
+    ),
+)
+
+
+def test_result_store_roundtrip(tmp_path: Path) -> None:
+    assert scan_key("sco1") != scan_key("sco1", include_archived=True)
+
+    with ResultStore(tmp_path / "results.db") as store:
+        scan = store.begin_scan(scan_key("sco1"), 2)
+        other_scan = store.begin_scan(scan_key("sco1", include_archived=True), 2)
+        store.put_result(scan, "b-repo", {"ci.yml": [OUTDATED]})
+        store.put_result(scan, "a-repo", {})
+        store.finish_shard(scan, ShardSpec(index=1, count=2))
+
+    with ResultStore(tmp_path / "results.db") as store:
+        assert store.checked_repos(scan) == {"a-repo", "b-repo"}
+        assert store.checked_repos(other_scan) == set()
+        assert store.reports(scan) == {"b-repo": {"ci.yml": [OUTDATED]}}
+        assert store.finished_shards(scan, 2) == {1}
+        assert store.finished_shards(scan, 4) == set()
+
+        store.clear(scan_key("sco1"))
+        assert store.checked_repos(scan) == set()
+        assert store.finished_shards(scan, 2) == set()
+
+
+def test_result_store_generations(tmp_path: Path) -> None:
+    with ResultStore(tmp_path / "results.db") as store:
+        scan = store.begin_scan(scan_key("sco1"), 2)
+        store.put_result(scan, "a-repo", {"ci.yml": [OUTDATED]})
+        store.finish_shard(scan, ShardSpec(index=0, count=2))
+
+        # Unfinished scans are resumed
+        assert store.begin_scan(scan_key("sco1"), 2) == scan
+        assert store.latest_scan(scan_key("sco1")) == scan
+
+        # Finished scans are kept until they've been merged
+        store.finish_shard(scan, ShardSpec(index=1, count=2))
+        assert store.begin_scan(scan_key("sco1"), 2) == scan
+        assert store.checked_repos(scan) == {"a-repo"}
+
+        # Merged scans aren't reused by the next run, which starts over
+        store.mark_merged(scan_key("sco1"))
+        assert store.latest_scan(scan_key("sco1")) == scan
+        next_scan = store.begin_scan(scan_key("sco1"), 2)
+        assert next_scan != scan
+        assert store.checked_repos(next_scan) == set()
+        assert store.checked_repos(scan) == set()
+        assert store.latest_scan(scan_key("sco1")) == next_scan
+
+
+WORKFLOW = """\
+jobs:
+  test:
+    steps:
+    - uses: actions/checkout@v4
+"""
+ORG_REPOS = [
+    FakeRepo(owner="sco1", name=f"repo-{idx}", files={".github/workflows/ci.yml": WORKFLOW})
+    for idx in range(6)
+]
+CHECKOUT = FakeRepo(owner="actions", name="checkout", releases=[("v5.0.0", "b" * 40)])
+
+
+def test_cli_sharded_org(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture
+) -> None:
+    results = tmp_path / "results.db"
+    argv = ["org", "sco1", "--results", str(results), "--shards", "2"]
+    with FakeGitHub(repos=[*ORG_REPOS, CHECKOUT]) as fake:
+        monkeypatch.setenv("GITHUB_GRAPHQL_URL", fake.url)
+
+        # Run a single shard, leaving the report for later
+        main([*argv, "--shard", "0"])
+        out = capsys.readouterr().out
+        assert "Shard 0/2: Checked" in out
+        assert "sco1/repo-" not in out
+
+        # Resume the rest of the scan, the finished shard isn't scanned again & the release cached
+        # by the first shard is shared through the cache kept alongside the result store
+        assert (tmp_path / "results.releases.sqlite3").exists()
+        n_queries = len(fake.queries)
+        main(argv)
+        assert not any("releases" in query["query"] for query in fake.queries[n_queries:])
+        out = capsys.readouterr().out
+        assert "Shard 0/2" not in out
+        assert "Shard 1/2: Checked" in out
+        assert all(f"sco1/repo-{idx}" in out for idx in range(6))
+        assert "actions/checkout" in out
+
+        # Merging only reads the store
+        n_requests = fake.n_requests
+        main([*argv, "--merge"])
+        assert fake.n_requests == n_requests
+        assert capsys.readouterr().out == out.split("\n", maxsplit=1)[1]
+
+        # Once merged, the next run of the same scan checks everything again
+        main(argv)
+        out = capsys.readouterr().out
+        assert "Shard 0/2: Checked" in out
+        assert "Shard 1/2: Checked" in out
+
+
+def test_cli_sharded_org_rerun_before_merge(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture
+) -> None:
+    argv = ["org", "sco1", "--results", str(tmp_path / "results.db"), "--shards", "2"]
+    with FakeGitHub(repos=[*ORG_REPOS, CHECKOUT]) as fake:
+        monkeypatch.setenv("GITHUB_GRAPHQL_URL", fake.url)
+        main([*argv, "--shard", "0"])
+        main([*argv, "--shard", "1"])
+
+        # Rerunning a finished shard before the merge shouldn't discard the unmerged results
+        capsys.readouterr()
+        main([*argv, "--shard", "0"])
+        assert "Shard 0/2: Checked" not in capsys.readouterr().out
+
+    main([*argv, "--merge"])
+    out = capsys.readouterr().out
+    assert "haven't finished" not in out
+    assert all(f"sco1/repo-{idx}" in out for idx in range(6))
+
+
+def test_cli_sharded_org_incomplete(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture
+) -> None:
+    argv = ["org", "sco1", "--results", str(tmp_path / "results.db"), "--shards", "2"]
+    main([*argv, "--merge"])
+    assert "Shards 0, 1 of 2 haven't finished" in capsys.readouterr().out
+
+
+SHARD_CONFLICT_TEST_CASES = (
+    ["org", "sco1", "--shards", "2"],
+    ["org", "sco1", "--merge"],
+    ["org", "sco1", "--results", "results.db", "--stream"],
+    ["org", "sco1", "--results", "results.db", "--shards", "2", "--shard", "2"],
+    ["org", "sco1", "--results", "results.db", "--shards", "0"],
+    ["org", "sco1", "--results", "results.db", "--processes", "2", "--replay", "a.json"],
+)
+
+
+@pytest.mark.parametrize("argv", SHARD_CONFLICT_TEST_CASES)
+def test_cli_shard_conflicts(argv: list[str]) -> None:
+    with pytest.raises(SystemExit):
+        main(argv)
+
+
+def test_cli_sharded_org_processes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture
+) -> None:
+    argv = ["org", "sco1", "--results", str(tmp_path / "results.db"), "--shards", "3"]
+    with FakeGitHub(repos=[*ORG_REPOS, CHECKOUT]) as fake:
+        monkeypatch.setenv("GITHUB_GRAPHQL_URL", fake.url)
+        main([*argv, "--processes", "3"])
+
+    out = capsys.readouterr().out
+    assert all(f"Shard {idx}/3: Checked" in out for idx in range(3))
+    assert "haven't finished" not in out
+    assert all(f"sco1/repo-{idx}" in out for idx in range(6))
@@ -0,0 +1,177 @@
+import datetime as dt
+import json
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+from packaging.version import Version
+
+from check_workflow.cli import main
+from check_workflow.gh_api import Release
+from check_workflow.snapshot import (
+    HEADER,
+    OfflineResolver,
+    ReleaseSnapshot,
+    SNAPSHOT_MAGIC,
+    write_snapshot,
+)
+from tests.fake_github import FakeGitHub, FakeRepo
+
+SAMPLE_RELEASE = Release(
+    ver=Version("3.1.1"),
+    published=dt.datetime.fromisoformat("2024-05-17T14:07:20Z"),
+    url="https://github.com/sco1/flake8-annotations/releases/tag/v3.1.1",
+    tag_hash="d27be86996bb75bf0867eb24fe710cdb39ec5188",
+)
+SAMPLE_TAGS = {"d27be86996bb75bf0867eb24fe710cdb39ec5188": Version("3.1.1")}
+
+
+def _write_sample(path: Path) -> int:
+    releases: dict[tuple[str, str], Release | None] = {
+        ("sco1", "flake8-annotations"): SAMPLE_RELEASE,
+        ("actions", "checkout"): replace(SAMPLE_RELEASE, tag_hash="not-hex"),
+        ("octo", "untagged"): None,
+    }
+    # Enough keys that lookups have to search the key table
+    releases.update({("octo", f"repo-{idx}"): SAMPLE_RELEASE for idx in range(50)})
+    tag_indexes = {("sco1", "flake8-annotations"): SAMPLE_TAGS, ("octo", "tags-only"): SAMPLE_TAGS}
+
+    return write_snapshot(path, releases, tag_indexes)
+
+
+def test_snapshot_roundtrip(tmp_path: Path) -> None:
+    snapshot_path = tmp_path / "releases.idx"
+    assert _write_sample(snapshot_path) == 53
+
+    with ReleaseSnapshot(snapshot_path) as snapshot:
+        assert len(snapshot) == 53
+
+        releases = snapshot.get_many(
+            [
+                ("sco1", "flake8-annotations"),
+                ("Actions", "Checkout"),
+                ("octo", "repo-42"),
+                ("octo", "tags-only"),
+                ("octo", "untagged"),
+                ("sco1", "missing"),
+            ]
+        )
+        assert releases == {
+            ("sco1", "flake8-annotations"): SAMPLE_RELEASE,
+            ("Actions", "Checkout"): replace(SAMPLE_RELEASE, tag_hash="not-hex"),
+            ("octo", "repo-42"): SAMPLE_RELEASE,
+            ("octo", "tags-only"): None,
+        }
+
+        tag_indexes = snapshot.get_tag_indexes(
+            [("sco1", "flake8-annotations"), ("octo", "tags-only"), ("sco1", "missing")]
+        )
+        assert tag_indexes == {
+            ("sco1", "flake8-annotations"): SAMPLE_TAGS,
+            ("octo", "tags-only"): SAMPLE_TAGS,
+        }
+
+
+def test_snapshot_invalid(tmp_path: Path) -> None:
+    not_snapshot = tmp_path / "empty.idx"
+    not_snapshot.write_bytes(b"")
+    with pytest.raises(ValueError, match="Not a release snapshot"):
+        ReleaseSnapshot(not_snapshot)
+
+    future_snapshot = tmp_path / "future.idx"
+    future_snapshot.write_bytes(HEADER.pack(SNAPSHOT_MAGIC, 99, 0, 0, 0))
+    with pytest.raises(ValueError, match="Unsupported release snapshot version"):
+        ReleaseSnapshot(future_snapshot)
+
+
+@pytest.mark.asyncio
+async def test_offline_resolver(tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+    snapshot_path = tmp_path / "releases.idx"
+    _write_sample(snapshot_path)
+
+    with ReleaseSnapshot(snapshot_path) as snapshot:
+        resolver = OfflineResolver(snapshot)
+        releases = await resolver.resolve(
+            [("sco1", "flake8-annotations"), ("octo", "tags-only"), ("sco1", "missing")]
+        )
+        tag_indexes = await resolver.resolve_tag_indexes([("sco1", "missing")])
+
+    assert releases == {
+        ("sco1", "flake8-annotations"): SAMPLE_RELEASE,
+        ("octo", "tags-only"): None,
+        ("sco1", "missing"): None,
+    }
+    assert tag_indexes == {("sco1", "missing"): {}}
+
+    # Keys snapshotted without a release aren't reported as missing from the snapshot
+    out = capsys.readouterr().out
+    assert "sco1/missing: Not in the offline release index" in out
+    assert "octo/tags-only: Could not resolve latest release" in out
+    assert "octo/tags-only: Not in the offline release index" not in out
+
+
+WORKFLOW = """\
+jobs:
+  test:
+    steps:
+    - uses: actions/checkout@v4
+    - uses: actions/setup-python@82c7e631bb3cdc910f68e0081d67478d79c6982d
+"""
+
+
+def test_cli_export_offline_roundtrip(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture
+) -> None:
+    workflow_dir = tmp_path / ".github/workflows"
+    workflow_dir.mkdir(parents=True)
+    (workflow_dir / "ci.yml").write_text(WORKFLOW)
+    snapshot_path = tmp_path / "releases.idx"
+
+    checkout = FakeRepo(owner="actions", name="checkout", releases=[("v5.0.0", "b" * 40)])
+    setup_python = FakeRepo(
+        owner="actions",
+        name="setup-python",
+        releases=[("v5.0.0", "82c7e631bb3cdc910f68e0081d67478d79c6982d"), ("v6.0.0", "c" * 40)],
+    )
+    cache = FakeRepo(owner="actions", name="cache", releases=[("v4.2.0", "d" * 40)])
+    with FakeGitHub(repos=[checkout, setup_python, cache]) as fake:
+        monkeypatch.setenv("GITHUB_GRAPHQL_URL", fake.url)
+        main(
+            [
+                "export-index",
+                str(snapshot_path),
+                "-r",
+                str(workflow_dir),
+                "-a",
+                "actions/cache",
+                "--no-cache",
+            ]
+        )
+
+    assert "Exported releases of 3 actions" in capsys.readouterr().out
+
+    # Nothing is listening here, so any query would fail the check
+    monkeypatch.setenv("GITHUB_GRAPHQL_URL", "http://127.0.0.1:9/graphql")
+    main(
+        [
+            "local",
+            "-r",
+            str(workflow_dir),
+            "--offline-index",
+            str(snapshot_path),
+            "--no-daemon",
+            "--format",
+            "ndjson",
+        ]
+    )
+
+    rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(row["uses"]["repo"], row["latest"]["ver"]) for row in rows] == [
+        ("checkout", "5.0.0"),
+        ("setup-python", "6.0.0"),
+    ]
+
+
+def test_cli_offline_recursive() -> None:
+    with pytest.raises(SystemExit):
+        main(["local", "--offline-index", "releases.idx", "--recursive"])
@@ -0,0 +1,109 @@
+import asyncio
+import json
+import typing as t
+from pathlib import Path
+
+import pytest
+
+from check_workflow import trace
+from check_workflow.cli import main
+from tests.fake_github import FakeGitHub, FakeRepo
+
+
+@pytest.fixture
+def tracer() -> t.Iterator[trace.Tracer]:
+    tracer = trace.Tracer()
+    previous = trace.set_tracer(tracer)
+    yield tracer
+    trace.set_tracer(previous)
+
+
+def test_span_disabled_records_nothing() -> None:
+    assert trace.get_tracer() is None
+
+    with trace.span("noop", key="actions/checkout") as span:
+        span.set(bytes=123)
+
+    assert span is trace.NULL_SPAN
+
+
+def test_span_records_args(tracer: trace.Tracer) -> None:
+    with trace.span("outer", "cli"):
+        with trace.span("inner", key="actions/checkout") as span:
+            span.set(bytes=123)
+
+        with pytest.raises(ValueError):
+            with trace.span("failed"):
+                raise ValueError
+
+    inner, failed, outer = tracer.spans
+    assert (inner.name, inner.category, inner.args) == (
+        "inner",
+        "phase",
+        {"key": "actions/checkout", "bytes": 123},
+    )
+    assert failed.args == {"error": "ValueError"}
+    assert outer.start_ns <= inner.start_ns <= inner.end_ns <= outer.end_ns
+
+
+@pytest.mark.asyncio
+async def test_concurrent_tasks_tracked_separately(tracer: trace.Tracer) -> None:
+    async def work(name: str) -> None:
+        with trace.span(name):
+            await asyncio.sleep(0)
+
+    await asyncio.gather(work("a"), work("b"))
+
+    assert len({span.tid for span in tracer.spans}) == 2
+
+
+def test_chrome_trace(tracer: trace.Tracer, tmp_path: Path) -> None:
+    with trace.span("fetch", "github", keys=[("actions", "checkout")], path=tmp_path):
+        pass
+
+    trace_path = tmp_path / "trace.json"
+    tracer.write_chrome_trace(trace_path)
+
+    (event,) = json.loads(trace_path.read_text())["traceEvents"]
+    assert event["ph"] == "X"
+    assert (event["name"], event["cat"]) == ("fetch", "github")
+    assert event["args"] == {"keys": [["actions", "checkout"]], "path": str(tmp_path)}
+
+
+def test_cli_trace(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture
+) -> None:
+    checkout = FakeRepo(owner="actions", name="checkout", releases=[("v5.0.0", "b" * 40)])
+    workflows = FakeRepo(
+        owner="sco1",
+        name="workflows",
+        files={
+            ".github/workflows/lint.yml": "jobs:\n  a:\n    steps:\n    - uses: actions/checkout@v4"
+        },
+    )
+
+    trace_path = tmp_path / "trace.json"
+    with FakeGitHub(repos=[checkout, workflows]) as fake:
+        monkeypatch.setenv("GITHUB_GRAPHQL_URL", fake.url)
+        main(["remote", "sco1", "workflows", "--no-cache", "--profile", "--trace", str(trace_path)])
+
+    # Tracing shouldn't outlive the run
+    assert trace.get_tracer() is None
+
+    events = json.loads(trace_path.read_text())["traceEvents"]
+    spans = {(event["cat"], event["name"]) for event in events}
+    assert {
+        ("cli", "remote"),
+        ("github", "fetch_workflows_batch"),
+        ("graphql", "GetWorkflowsBatch"),
+        ("github", "fetch_releases_batch"),
+        ("graphql", "GetLatestReleasesBatch"),
+        ("parse", "extract_workflow_dependencies"),
+        ("render", "format_outdated"),
+    } <= spans
+
+    release_query = next(event for event in events if event["name"] == "GetLatestReleasesBatch")
+    assert release_query["args"]["bytes"] > 0
+    assert release_query["args"]["cost"] == 1
+
+    assert "GetLatestReleasesBatch" in capsys.readouterr().err